@@ -18,6 +18,7 @@ celery_app = Celery(
     include=[
         'app.tasks.quiz_generation_tasks',
         'app.tasks.document_processing_tasks', 
+        'app.tasks.question_paper_tasks',
         'app.tasks.youtube_tasks',
         'app.tasks.ai_tutor_tasks',
         'app.tasks.quiz_tasks'  # Your existing tasks
@@ -42,6 +43,7 @@ celery_app.conf.update(
     task_routes={
         'app.tasks.quiz_generation_tasks.*': {'queue': 'quiz_generation'},
         'app.tasks.document_processing_tasks.*': {'queue': 'document_processing'},
+        'app.tasks.question_paper_tasks.*': {'queue': 'document_processing'},
         'app.tasks.youtube_tasks.*': {'queue': 'youtube_processing'},
         'app.tasks.ai_tutor_tasks.*': {'queue': 'ai_tutor'},
         'app.tasks.quiz_tasks.*': {'queue': 'quiz_timers'}  # Your existing
@@ -66,6 +68,21 @@ celery_app.conf.update(
         'cache-warmup': {
             'task': 'app.tasks.cache_tasks.warmup_cache',
             'schedule': 3600.0,  # Every hour
+        },
+        'sweep-chunked-uploads': {
+            'task': 'sweep_chunked_uploads',
+            'schedule': 3600.0,  # Every hour
+            'options': {'queue': 'document_processing', 'expires': 3600},
+        },
+        'sweep-question-paper-files': {
+            'task': 'sweep_question_paper_files',
+            'schedule': 3600.0,  # Every hour
+            'options': {'queue': 'document_processing', 'expires': 3600},
+        },
+        'precompute-hot-video-bundles': {
+            'task': 'precompute_hot_video_bundles',
+            'schedule': float(os.getenv('YOUTUBE_BUNDLE_INTERVAL', 1800)),  # Every 30 minutes
+            'options': {'queue': 'youtube_processing', 'expires': 1800},
         }
     }
 )
@@ -2,6 +2,7 @@ import redis.asyncio as redis
 import json
 import logging
 import os
+import threading
 import time
 from typing import Optional, Dict, Any
 
@@ -24,7 +25,50 @@ class RedisService:
         self.db_session = int(os.getenv("REDIS_DB_SESSION", 0))
         self.db_cache = int(os.getenv("REDIS_DB_CACHE", 1))
         self.db_pubsub = int(os.getenv("REDIS_DB_PUBSUB", 2))
-    
+
+        # Lazily created sync clients (Celery workers, thread pools)
+        self._sync_clients = {}
+
+    def _connection_kwargs(self) -> Dict[str, Any]:
+        """Host, credentials and timeouts for clients built without REDIS_URL"""
+        connection_kwargs = {
+            "host": self.redis_host,
+            "port": self.redis_port,
+            "socket_connect_timeout": 5,
+            "socket_timeout": 5
+        }
+        if self.redis_password:
+            connection_kwargs["password"] = self.redis_password
+        if self.redis_username:
+            connection_kwargs["username"] = self.redis_username
+        return connection_kwargs
+
+    def get_sync_client(self, decode_responses: bool = False):
+        """
+        Get a shared synchronous Redis client for the cache database.
+        Works in Celery workers and threads where the async clients are not initialized;
+        connects exactly like cache_client (same database and credentials).
+        """
+        client = self._sync_clients.get(decode_responses)
+        if client is None:
+            import redis as sync_redis
+            if self.redis_url:
+                client = sync_redis.Redis.from_url(
+                    self.redis_url,
+                    db=self.db_cache,
+                    decode_responses=decode_responses,
+                    socket_connect_timeout=5,
+                    socket_timeout=5
+                )
+            else:
+                client = sync_redis.Redis(
+                    **self._connection_kwargs(),
+                    db=self.db_cache,
+                    decode_responses=decode_responses
+                )
+            self._sync_clients[decode_responses] = client
+        return client
+
     async def initialize(self):
         """Initialize Redis connections with proper pooling"""
         try:
@@ -58,19 +102,7 @@ class RedisService:
                 )
             else:
                 # Use individual parameters (fallback for local development)
-                connection_kwargs = {
-                    "host": self.redis_host,
-                    "port": self.redis_port,
-                    "decode_responses": True,
-                    "socket_connect_timeout": 5,
-                    "socket_timeout": 5
-                }
-                
-                if self.redis_password:
-                    connection_kwargs["password"] = self.redis_password
-                
-                if self.redis_username:
-                    connection_kwargs["username"] = self.redis_username
+                connection_kwargs = {**self._connection_kwargs(), "decode_responses": True}
                 
                 self.session_client = redis.Redis(
                     **connection_kwargs,
@@ -307,7 +339,34 @@ class RedisKeys:
     TASK_STATUS = "task:status:{task_id}"
     CACHE_DOCUMENT = "document:{doc_hash}"
     CACHE_TRANSCRIPT = "transcript:{video_id}"
+    GENERATION_RESULT = "gen:{kind}:{digest}"
+    LLM_GOVERNOR = "llm:governor:{key_hash}"
     RATE_LIMIT = "rate_limit:{user_id}:{action}"
 
+
+_circuit_breaker_lock = threading.Lock()
+
+
+class RedisCircuitBreaker:
+    """
+    Mixin for services with a Redis tier and an in-process fallback: after a
+    Redis error the tier is skipped for redis_retry_after seconds instead of
+    paying a connection timeout on every call. Subclasses name the tier in
+    redis_unavailable_message; failures are counted in redis_errors.
+    """
+    redis_retry_after = 30
+    redis_unavailable_message = "Redis tier unavailable"
+    redis_errors = 0
+    _redis_disabled_until = 0.0
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_disabled_until
+
+    def _redis_failed(self, error: Exception):
+        logger.warning(f"{self.redis_unavailable_message}: {error}")
+        with _circuit_breaker_lock:
+            self.redis_errors += 1
+        self._redis_disabled_until = time.monotonic() + self.redis_retry_after
+
 # Global instance
 redis_service = RedisService()
\ No newline at end of file
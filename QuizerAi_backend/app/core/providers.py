@@ -0,0 +1,106 @@
+# app/core/providers.py
+"""
+Lazy provider registry
+Expensive objects (LLM clients, chains, summarizers) are registered as factories
+and built on first use, so importing a module that defines them stays cheap.
+lazy_import() does the same for module attributes: routers reference heavy
+functions through it and the defining module is imported on the first call.
+"""
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderRegistry:
+    """Named factories, each called once (thread-safe) on first get()"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._init_ms: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register (or replace) a factory; a replaced provider is rebuilt on next use"""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name not in self._factories:
+                raise KeyError(f"No provider registered under '{name}'")
+
+            started = time.perf_counter()
+            instance = self._factories[name]()
+            self._init_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+            self._instances[name] = instance
+            logger.info(f"Provider '{name}' initialized in {self._init_ms[name]} ms")
+            return instance
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._instances
+
+    def reset(self, name: str = None):
+        """Drop built instances (all, or one) so they are rebuilt on next use"""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {"initialized": name in self._instances, "init_ms": self._init_ms.get(name)}
+                for name in self._factories
+            }
+
+
+class LazyAttribute:
+    """Stand-in for `from module import name`, resolved on first call or attribute access"""
+
+    __slots__ = ("_module", "_name", "_target")
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._name = name
+        self._target = None
+
+    def _resolve(self) -> Any:
+        if self._target is None:
+            self._target = getattr(importlib.import_module(self._module), self._name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, item: str):
+        return getattr(self._resolve(), item)
+
+    def __reduce__(self):
+        # Pickled by reference (e.g. for process pools): the target is imported on the other side
+        return (LazyAttribute, (self._module, self._name))
+
+    def __repr__(self) -> str:
+        state = "resolved" if self._target is not None else "unresolved"
+        return f"<lazy {self._module}.{self._name} ({state})>"
+
+
+def lazy_import(module: str, name: str) -> LazyAttribute:
+    """Defer importing `module` until `name` is first used"""
+    return LazyAttribute(module, name)
+
+
+# Global registry
+providers = ProviderRegistry()
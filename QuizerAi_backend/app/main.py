@@ -3,6 +3,7 @@ import logging
 import asyncio
 import time
 import os
+import sys
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
@@ -21,6 +22,8 @@ load_dotenv()
 
 # Import configurations and services
 from app.config.redis_config import redis_service
+from app.services.extraction_executor import extraction_executor
+from app.services.url_fetcher import url_fetcher
 from app.database.connection import engine, Base, get_db
 
 # Import routers
@@ -46,6 +49,7 @@ from app.routers.quiz_security_router import router as quiz_security_router
 
 # Import middleware and models
 from app.middleware.auth_middleware import require_admin, require_teacher, require_student
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
 from app.models.user_models import User
 from app.models.feedbackmodels import Feedback
 from app.database.quiz import (
@@ -115,6 +119,14 @@ async def lifespan(app: FastAPI):
         if redis_service.pubsub_client:
             await redis_service.pubsub_client.close()
         
+        # Stop extraction worker processes/threads, URL fetcher connections and browsers
+        extraction_executor.shutdown()
+        await url_fetcher.close()
+        # The YouTube service is imported lazily; close its pool/session only if it was used
+        youtube_module = sys.modules.get("app.services.enhanced_youtube_service")
+        if youtube_module is not None:
+            await youtube_module.youtube_service.close()
+        
         logger.info("Application shutdown completed")
         
     except Exception as e:
@@ -159,6 +171,9 @@ app.add_middleware(
     ]
 )
 
+# Cap multipart upload bodies before the form parser spools them (413)
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Combined middleware for request logging, timing, and Redis health
 @app.middleware("http")
 async def comprehensive_middleware(request: Request, call_next):
@@ -297,7 +312,9 @@ async def general_exception_handler(request: Request, exc: Exception):
     
     
 # Mount static files for uploaded content
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Only feedback screenshots are public: uploads/ is also the local object store
+# (documents, chunked upload parts and manifests)
+app.mount("/uploads/feedback", StaticFiles(directory="uploads/feedback"), name="uploads")
 
 
 # Include all routers with appropriate prefixes
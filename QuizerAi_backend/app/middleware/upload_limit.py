@@ -0,0 +1,66 @@
+# app/middleware/upload_limit.py
+"""
+Request size cap for multipart uploads
+FastAPI parses a form (spooling every file) before the endpoint or any
+dependency runs, so spool_upload's per-file limit only applies once the whole
+body has been received. This ASGI middleware caps the body itself: a declared
+Content-Length over the limit is rejected before anything is read, and bodies
+without one (chunked transfer) are cut off as soon as the bytes received pass
+it. Either way the client gets 413. Raw-body endpoints (chunked upload parts)
+are not multipart and keep their own per-part limits.
+"""
+import logging
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+from app.services.upload_ingestion import UPLOAD_REQUEST_MAX_BYTES, _format_limit
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSizeLimitMiddleware:
+    """Rejects multipart/form-data requests whose body exceeds max_bytes (413)"""
+
+    def __init__(self, app, max_bytes: int = None):
+        self.app = app
+        self.max_bytes = max_bytes or UPLOAD_REQUEST_MAX_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Upload exceeds {_format_limit(self.max_bytes)}"
+        declared = _header(scope, b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            logger.warning(f"Rejected upload to {scope.get('path')}: declared {declared} bytes")
+            response = JSONResponse(status_code=413, content={"detail": detail, "status_code": 413})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    logger.warning(f"Rejected upload to {scope.get('path')}: body passed {self.max_bytes} bytes")
+                    # Raised inside the form parser; FastAPI passes HTTPExceptions through to the handlers
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _header(scope, name: bytes):
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _is_multipart(scope) -> bool:
+    return (_header(scope, b"content-type") or "").lower().startswith("multipart/form-data")
@@ -1,33 +1,44 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
-from langchain.chains.summarize import load_summarize_chain
 from dotenv import load_dotenv
-import pytesseract
 from langchain.schema import Document
-from PIL import Image
-import requests
-from bs4 import BeautifulSoup
 from fastapi import UploadFile, HTTPException 
 import logging
 import os
 import json
-from langchain_community.document_loaders import SeleniumURLLoader
 import re
 from urllib.parse import urlparse, parse_qs    #this is for the cleaning the url of youtube 
-from langchain_yt_dlp.youtube_loader import YoutubeLoaderDL
 from typing import List
 
+# YouTube search/loading (langchain_community tools, yt_dlp, youtube_transcript_api)
+# and the summarize chain are imported where they are used; the LLM and chains
+# are built on first use through the provider registry (app.core.providers)
+import asyncio
+import math
+
+from app.core.providers import providers
+from app.models.llm_backends import backend_requires_api_key, create_llm
+from app.services.extraction_executor import extraction_executor
+from app.services.generation_cache import documents_to_text, generation_cache
+from app.services.llm_governor import llm_governor
+from app.services.single_flight import single_flight
+from app.utils.text_chunker import ChunkPacker, TextChunk, chunk_documents, chunk_text, count_tokens, truncate_to_tokens
+from app.utils.json_stream import IncrementalJSONArrayParser
+from app.utils.quiz_allocation import StreamingAllocator, allocate_questions, balance_questions, dedupe_questions
+
+# Built lazily by the provider registry; `from app.models.generate_quizes import llm`
+# still works and triggers initialization (PEP 562 module __getattr__)
+_LAZY_PROVIDERS = (
+    "llm", "intelligent_summarizer", "summary_chain",
+    "tutor_chain", "concept_chain", "problem_chain", "study_guide_chain"
+)
 
 
-# importing for the execution of youtube 
-from langchain_community.tools import YouTubeSearchTool
-
-#fetching the data from the youtubetranscript tool 
-from youtube_transcript_api import YouTubeTranscriptApi
-import asyncio
-import concurrent.futures
+def __getattr__(name):
+    if name in _LAZY_PROVIDERS:
+        return providers.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Load environment variables
 load_dotenv()
@@ -41,24 +52,53 @@ logger = logging.getLogger(__name__)
 langchain_api_key = os.getenv("LANGCHAIN_API_KEY")
 langchain_project = os.getenv("LANGCHAIN_PROJECT")
 
-# Set environment variables for LangSmith
-os.environ["LANGCHAIN_TRACING_V2"] = "true"  # Note: V2 and lowercase "true"
-os.environ["LANGCHAIN_API_KEY"] = langchain_api_key
-os.environ["LANGCHAIN_PROJECT"] = langchain_project
+# Set environment variables for LangSmith (skipped when not configured, e.g. offline benchmarks)
+if langchain_api_key:
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"  # Note: V2 and lowercase "true"
+    os.environ["LANGCHAIN_API_KEY"] = langchain_api_key
+if langchain_project:
+    os.environ["LANGCHAIN_PROJECT"] = langchain_project
 
 
 # Initialize LLM (your existing setup)
+# LLM_BACKEND: groq (default) | fake | record | replay, see app/models/llm_backends.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
 groq_api_key = os.getenv("GROQ_API_KEY")
-if not groq_api_key:
-    raise ValueError("GROQ_API_KEY not found in environment variables")
-
-llm = ChatGroq(
-    model="openai/gpt-oss-20b", 
-    api_key=groq_api_key,
-    max_tokens=3000,
-    temperature=0.3,
-    request_timeout=45
-)
+
+# Model name and prompt versions are part of the generation cache key.
+# Bump the prompt version whenever the corresponding prompt changes.
+LLM_MODEL_NAME = os.getenv("GROQ_LLM_MODEL", "openai/gpt-oss-20b")
+# Offline backends get their own cache namespace so they never serve real users
+LLM_CACHE_MODEL_ID = LLM_MODEL_NAME if LLM_BACKEND == "groq" else f"{LLM_BACKEND}/{LLM_MODEL_NAME}"
+QUIZ_PROMPT_VERSION = "quiz-v1"
+SUMMARY_PROMPT_VERSION = "summary-v2"
+
+# Map-reduce quiz mode: per-call chunk size and max LLM calls per quiz
+# (how many run at once is decided by llm_governor)
+QUIZ_MAP_CHUNK_TOKENS = int(os.getenv("QUIZ_MAP_CHUNK_TOKENS", "1500"))
+QUIZ_MAP_MAX_CHUNKS = int(os.getenv("QUIZ_MAP_MAX_CHUNKS", "10"))
+QUIZ_MODES = ("single", "map_reduce")
+
+def _create_llm():
+    # Checked on first use so imports (tests, non-AI workers) work without a key
+    if not groq_api_key and backend_requires_api_key(LLM_BACKEND):
+        raise ValueError("GROQ_API_KEY not found in environment variables")
+    return create_llm(
+        LLM_BACKEND,
+        model_name=LLM_MODEL_NAME, 
+        api_key=groq_api_key,
+        max_tokens=3000,
+        temperature=0.3,
+        request_timeout=45
+    )
+
+
+def get_llm():
+    """The shared chat model, created on first use"""
+    return providers.get("llm")
+
+
+providers.register("llm", _create_llm)
 
 # LangChain setup for map-reduce (your existing setup)
 text_splitter = RecursiveCharacterTextSplitter(
@@ -70,68 +110,21 @@ text_splitter = RecursiveCharacterTextSplitter(
 
 
 # This is to process the pdf in different chunks
-def count_tokens(text: str) -> int:
-    """Count tokens accurately using tiktoken"""
-    try:
-        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-        return len(encoding.encode(text))
-    except:
-        return len(text) // 4  # Fallback estimation
-
-def truncate_to_tokens(text: str, max_tokens: int = 700) -> str:
-    """Truncate text to specific token count"""
-    try:
-        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-        tokens = encoding.encode(text)
-        if len(tokens) <= max_tokens:
-            return text
-        return encoding.decode(tokens[:max_tokens])
-    except:
-        max_chars = max_tokens * 3
-        return text[:max_chars]
-
+# Token counting/chunking lives in app.utils.text_chunker (shared cached encoder)
 def split_text_safely(text: str, max_tokens: int = 700) -> List[str]:
     """Split text into token-safe chunks"""
-    if count_tokens(text) <= max_tokens:
-        return [text]
-    
-    paragraphs = text.split('\n\n')
-    chunks = []
-    current_chunk = ""
-    
-    for paragraph in paragraphs:
-        test_chunk = current_chunk + "\n\n" + paragraph if current_chunk else paragraph
-        
-        if count_tokens(test_chunk) <= max_tokens:
-            current_chunk = test_chunk
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            
-            if count_tokens(paragraph) > max_tokens:
-                sentences = paragraph.split('. ')
-                sent_chunk = ""
-                for sentence in sentences:
-                    test_sent = sent_chunk + ". " + sentence if sent_chunk else sentence
-                    if count_tokens(test_sent) <= max_tokens:
-                        sent_chunk = test_sent
-                    else:
-                        if sent_chunk:
-                            chunks.append(sent_chunk.strip())
-                        sent_chunk = truncate_to_tokens(sentence, max_tokens)
-                if sent_chunk:
-                    chunks.append(sent_chunk.strip())
-            else:
-                current_chunk = paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+    return [chunk.text for chunk in chunk_text(text, max_tokens)]
 
 class IntelligentSummarizer:
     """Token-safe summarizer for any document size"""
     
+    # Token budgets for the tree reduce
+    LEAF_TOKENS = 650     # input per leaf summary call
+    MERGE_TOKENS = 650    # input per merge call (sibling summaries)
+    NODE_TOKENS = 325     # cap per summary node, so any two siblings fit one merge
+    NODE_WORDS = 150      # length requested from leaf/merge calls
+    FINAL_TOKENS = 700    # input budget of the final synthesis prompt
+    
     def __init__(self, llm):
         self.llm = llm
         
@@ -144,27 +137,29 @@ class IntelligentSummarizer:
         else:
             return "large"
     
-    async def process_by_size(self, documents: list, language: str, no_of_words: str):
-        """Process documents based on size with token safety"""
+    async def process_by_size(self, documents: list, language: str, no_of_words: str, progress_callback=None):
+        """
+        Process documents based on size with token safety.
+        Anything that does not fit a single prompt goes through the tree reduce,
+        so no part of the document is dropped.
+        """
         
         total_chars = sum(len(doc.page_content) for doc in documents)
         doc_type = self.classify_document_size(total_chars)
         
         logger.info(f"Document classified as '{doc_type}': {total_chars} chars, {len(documents)} chunks")
         
-        if doc_type == "small":
+        combined_tokens = count_tokens('\n\n'.join(doc.page_content for doc in documents))
+        if combined_tokens <= self.FINAL_TOKENS:
             return await self._process_small(documents, language, no_of_words)
-        elif doc_type == "medium":
-            return await self._process_medium(documents, language, no_of_words)
-        else:
-            return await self._process_large(documents, language, no_of_words)
+        return await self._process_tree(documents, language, no_of_words, progress_callback)
     
     async def _process_small(self, documents: list, language: str, no_of_words: str):
         """Small docs: Single token-safe call"""
         combined_text = '\n\n'.join([doc.page_content for doc in documents])
         
         # Ensure token safety
-        safe_text = truncate_to_tokens(combined_text, 700)
+        safe_text = truncate_to_tokens(combined_text, self.FINAL_TOKENS)
         
         prompt = PromptTemplate(
             input_variables=['text', 'language', 'no_of_words'],
@@ -173,8 +168,8 @@ class IntelligentSummarizer:
         
         chain = prompt | self.llm | StrOutputParser()
         
-        return await asyncio.wait_for(
-            chain.ainvoke({
+        return await llm_governor.run(
+            lambda: chain.ainvoke({
                 "text": safe_text,
                 "language": language,
                 "no_of_words": no_of_words
@@ -182,150 +177,177 @@ class IntelligentSummarizer:
             timeout=30
         )
     
-    async def _process_medium(self, documents: list, language: str, no_of_words: str):
-        """Medium docs: Token-safe batch processing"""
-        
-        # Split all documents into token-safe chunks
-        all_safe_chunks = []
-        for doc in documents:
-            safe_chunks = split_text_safely(doc.page_content, 650)
-            all_safe_chunks.extend(safe_chunks)
-        
-        # Limit to prevent timeout (max 8 chunks)
-        limited_chunks = all_safe_chunks[:8]
-        logger.info(f"Processing {len(limited_chunks)} token-safe chunks")
-        
-        # Process chunks in parallel with semaphore
-        semaphore = asyncio.Semaphore(3)
-        chunk_summaries = []
-        
-        async def summarize_chunk(chunk_text, chunk_num):
-            async with semaphore:
-                try:
-                    prompt = PromptTemplate(
-                        input_variables=['text', 'language'],
-                        template="Summarize key points from this content in {language}:\n\n{text}\n\nKey Points:"
-                    )
-                    
-                    chain = prompt | self.llm | StrOutputParser()
-                    
-                    result = await asyncio.wait_for(
-                        chain.ainvoke({
-                            "text": chunk_text,
-                            "language": language
-                        }),
-                        timeout=25
-                    )
-                    
-                    logger.info(f"Completed chunk {chunk_num + 1}/{len(limited_chunks)}")
-                    return result
-                    
-                except Exception as e:
-                    logger.error(f"Chunk {chunk_num + 1} failed: {e}")
-                    return f"[Section {chunk_num + 1} summary unavailable]"
-        
-        # Process all chunks
-        tasks = [summarize_chunk(chunk, i) for i, chunk in enumerate(limited_chunks)]
-        chunk_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Collect valid summaries
-        for result in chunk_results:
-            if isinstance(result, str) and len(result) > 10:
-                chunk_summaries.append(result)
-        
-        if not chunk_summaries:
-            raise Exception("All chunk processing failed")
-        
-        # Combine and create final summary
-        combined_summaries = '\n\n'.join(chunk_summaries)
-        final_text = truncate_to_tokens(combined_summaries, 700)
-        
-        final_prompt = PromptTemplate(
-            input_variables=['summaries', 'language', 'no_of_words'],
-            template="Create a comprehensive {no_of_words}-word summary in {language} from these key points:\n\n{summaries}\n\nFinal Summary:"
+    @staticmethod
+    def _group_siblings(nodes: List[TextChunk], max_tokens: int) -> List[List[TextChunk]]:
+        """
+        Group consecutive summaries for merging. Every group (except possibly the
+        last) has at least two nodes, so each level at least halves the node count.
+        """
+        groups = []
+        current = []
+        current_tokens = 0
+        for node in nodes:
+            if len(current) >= 2 and current_tokens + node.token_count > max_tokens:
+                groups.append(current)
+                current = []
+                current_tokens = 0
+            current.append(node)
+            current_tokens += node.token_count
+        if current:
+            groups.append(current)
+        return groups
+    
+    async def _summarize_node(self, prompt: PromptTemplate, inputs: dict, fallback_text: str, timeout: int) -> TextChunk:
+        """One tree node: LLM summary capped at NODE_TOKENS (falls back to truncated input)"""
+        chain = prompt | self.llm | StrOutputParser()
+        try:
+            result = await llm_governor.run(lambda: chain.ainvoke(inputs), timeout=timeout)
+        except Exception as e:
+            logger.error(f"Tree summary node failed, keeping truncated input: {e}")
+            result = fallback_text
+        text = truncate_to_tokens(result.strip(), self.NODE_TOKENS)
+        return TextChunk(text, count_tokens(text))
+    
+    @staticmethod
+    def _reporter(progress_callback):
+        def report(stage: str, level: int, nodes: int, estimated_levels: int):
+            if progress_callback is None:
+                return
+            try:
+                progress_callback({
+                    "stage": stage,
+                    "level": level,
+                    "nodes": nodes,
+                    "estimated_levels": estimated_levels
+                })
+            except Exception as e:
+                logger.warning(f"Summary progress callback failed: {e}")
+        return report
+    
+    @staticmethod
+    def _estimated_levels(leaf_count: int) -> int:
+        # Each merge level at least halves the node count
+        return max(1, math.ceil(math.log2(max(2, leaf_count))))
+    
+    async def _summarize_leaf(self, leaf: TextChunk, language: str) -> TextChunk:
+        """Map step: key points of one leaf chunk"""
+        leaf_prompt = PromptTemplate(
+            input_variables=['text', 'language', 'max_words'],
+            template="Summarize the key points and important details of this content in {language}, "
+                     "in at most {max_words} words:\n\n{text}\n\nKey Points:"
         )
-        
-        final_chain = final_prompt | self.llm | StrOutputParser()
-        
-        return await asyncio.wait_for(
-            final_chain.ainvoke({
-                "summaries": final_text,
-                "language": language,
-                "no_of_words": no_of_words
-            }),
-            timeout=45
+        return await self._summarize_node(
+            leaf_prompt,
+            {"text": leaf.text, "language": language, "max_words": self.NODE_WORDS},
+            leaf.text,
+            timeout=30
         )
     
-    async def _process_large(self, documents: list, language: str, no_of_words: str):
-        """Large docs: Hierarchical token-safe processing"""
-        
-        # Split all documents into token-safe chunks
-        all_safe_chunks = []
-        for doc in documents:
-            safe_chunks = split_text_safely(doc.page_content, 600)
-            all_safe_chunks.extend(safe_chunks)
-        
-        # Create batches (4 chunks per batch)
-        batch_size = 4
-        batches = [all_safe_chunks[i:i + batch_size] for i in range(0, len(all_safe_chunks), batch_size)]
+    async def _process_tree(self, documents: list, language: str, no_of_words: str, progress_callback=None):
+        """
+        Hierarchical tree reduce over the whole document:
+        level 0 summarizes every leaf chunk in parallel, each further level merges
+        sibling summaries, until everything fits the final prompt budget.
+        Concurrency is governed by llm_governor; depth grows logarithmically.
+        """
+        report = self._reporter(progress_callback)
+        
+        # Consecutive small documents (pages, paragraphs) share a leaf
+        leaves = chunk_documents((doc.page_content for doc in documents), self.LEAF_TOKENS)
+        if not leaves:
+            raise Exception("No content to summarize")
+        
+        estimated_levels = self._estimated_levels(len(leaves))
+        logger.info(f"Tree summarization: {len(leaves)} leaves "
+                    f"({sum(leaf.token_count for leaf in leaves)} tokens), up to {estimated_levels} merge levels")
+        
+        report("leaves", 0, len(leaves), estimated_levels)
+        nodes = await asyncio.gather(*[self._summarize_leaf(leaf, language) for leaf in leaves])
+        return await self._reduce_tree(nodes, language, no_of_words, report, estimated_levels)
+    
+    async def process_stream(self, chunks, language: str, no_of_words: str, progress_callback=None):
+        """
+        Tree reduce over documents that are still being extracted (async iterator,
+        see app.services.ingestion_pipeline). Leaves are held back only until the
+        content is known not to fit a single prompt; from then on each leaf
+        summary starts as soon as its chunk arrives. Same result as process_by_size.
+        """
+        from app.services.ingestion_pipeline import map_ordered
+        
+        documents = []
+        
+        async def stream_leaves():
+            # Packed like chunk_documents: a leaf is released once the next chunk would not fit
+            packer = ChunkPacker(self.LEAF_TOKENS)
+            async for doc in chunks:
+                documents.append(doc)
+                for chunk in chunk_text(doc.page_content, self.LEAF_TOKENS):
+                    for leaf in packer.add(chunk):
+                        yield leaf
+            for leaf in packer.flush():
+                yield leaf
+        
+        leaves = stream_leaves()
+        head = []
+        head_tokens = 0
+        async for leaf in leaves:
+            head.append(leaf)
+            head_tokens += leaf.token_count
+            if head_tokens > self.FINAL_TOKENS:
+                break
+        else:
+            if not documents:
+                raise Exception("No content to summarize")
+            return await self._process_small(documents, language, no_of_words)
         
-        # Limit total batches (max 12 batches = 48 chunks max)
-        batches = batches[:12]
-        logger.info(f"Processing {len(batches)} batches for large document")
+        async def all_leaves():
+            for leaf in head:
+                yield leaf
+            async for leaf in leaves:
+                yield leaf
+        
+        nodes = await map_ordered(all_leaves(), lambda index, leaf: self._summarize_leaf(leaf, language))
+        estimated_levels = self._estimated_levels(len(nodes))
+        logger.info(f"Streamed tree summarization: {len(documents)} chunks, {len(nodes)} leaves, "
+                    f"up to {estimated_levels} merge levels")
+        report = self._reporter(progress_callback)
+        report("leaves", 0, len(nodes), estimated_levels)
+        return await self._reduce_tree(nodes, language, no_of_words, report, estimated_levels)
+    
+    async def _reduce_tree(self, nodes: List[TextChunk], language: str, no_of_words: str, report, estimated_levels: int):
+        """Merge sibling summaries level by level, then synthesize the final summary"""
+        nodes = [node for node in nodes if node.text]
+        if not nodes:
+            raise Exception("All chunk processing failed")
         
-        # Process batches with controlled concurrency
-        semaphore = asyncio.Semaphore(2)
-        batch_summaries = []
+        merge_prompt = PromptTemplate(
+            input_variables=['summaries', 'language', 'max_words'],
+            template="Merge these consecutive section summaries into one coherent summary in {language}, "
+                     "in at most {max_words} words. Keep every important concept:\n\n{summaries}\n\nMerged Summary:"
+        )
         
-        async def process_batch(batch_chunks, batch_num):
-            async with semaphore:
-                try:
-                    # Combine batch content safely
-                    batch_text = '\n\n'.join(batch_chunks)
-                    safe_batch_text = truncate_to_tokens(batch_text, 650)
-                    
-                    prompt = PromptTemplate(
-                        input_variables=['text', 'language'],
-                        template="Summarize the main concepts and important details in {language}:\n\n{text}\n\nSummary:"
-                    )
-                    
-                    chain = prompt | self.llm | StrOutputParser()
-                    
-                    result = await asyncio.wait_for(
-                        chain.ainvoke({
-                            "text": safe_batch_text,
-                            "language": language
-                        }),
-                        timeout=40
-                    )
-                    
-                    logger.info(f"Completed batch {batch_num + 1}/{len(batches)}")
-                    return result
-                    
-                except Exception as e:
-                    logger.error(f"Batch {batch_num + 1} failed: {e}")
-                    return f"[Batch {batch_num + 1} summary unavailable]"
-        
-        # Process batches with delay between groups
-        for i in range(0, len(batches), 3):  # Process 3 batches at a time
-            batch_group = batches[i:i + 3]
-            tasks = [process_batch(batch, i + j) for j, batch in enumerate(batch_group)]
-            group_results = await asyncio.gather(*tasks, return_exceptions=True)
+        level = 0
+        while len(nodes) > 1 and sum(node.token_count for node in nodes) > self.FINAL_TOKENS:
+            level += 1
+            groups = self._group_siblings(nodes, self.MERGE_TOKENS)
+            report("merge", level, len(groups), estimated_levels)
+            logger.info(f"Tree level {level}: merging {len(nodes)} summaries into {len(groups)}")
             
-            for result in group_results:
-                if isinstance(result, str) and len(result) > 15:
-                    batch_summaries.append(result)
+            async def merge(group: List[TextChunk]) -> TextChunk:
+                if len(group) == 1:
+                    return group[0]
+                joined = '\n\n'.join(node.text for node in group)
+                return await self._summarize_node(
+                    merge_prompt,
+                    {"summaries": joined, "language": language, "max_words": self.NODE_WORDS},
+                    joined,
+                    timeout=40
+                )
             
-            # Small delay between groups
-            if i + 3 < len(batches):
-                await asyncio.sleep(1)
-        
-        if not batch_summaries:
-            raise Exception("All batch processing failed")
+            nodes = await asyncio.gather(*[merge(group) for group in groups])
         
-        # Final synthesis
-        combined_summaries = '\n\n'.join(batch_summaries)
-        final_text = truncate_to_tokens(combined_summaries, 700)
+        report("final", level + 1, 1, estimated_levels)
+        final_text = truncate_to_tokens('\n\n'.join(node.text for node in nodes), self.FINAL_TOKENS)
         
         synthesis_prompt = PromptTemplate(
             input_variables=['summaries', 'language', 'no_of_words'],
@@ -334,8 +356,8 @@ class IntelligentSummarizer:
         
         synthesis_chain = synthesis_prompt | self.llm | StrOutputParser()
         
-        return await asyncio.wait_for(
-            synthesis_chain.ainvoke({
+        return await llm_governor.run(
+            lambda: synthesis_chain.ainvoke({
                 "summaries": final_text,
                 "language": language,
                 "no_of_words": no_of_words
@@ -343,8 +365,8 @@ class IntelligentSummarizer:
             timeout=60
         )
 
-# Create global instance
-intelligent_summarizer = IntelligentSummarizer(llm)
+# Global instance, created on first use
+providers.register("intelligent_summarizer", lambda: IntelligentSummarizer(get_llm()))
 
 # IMPROVED MAP PROMPT (for individual chunks)
 # This creates structured summaries that combine well later
@@ -470,14 +492,19 @@ reduce_prompt_template = PromptTemplate(
 )
 
 # ENHANCED SUMMARY CHAIN with improved prompts
-summary_chain = load_summarize_chain(
-    llm=llm,
-    chain_type="map_reduce",
-    map_prompt=map_prompt_template,
-    combine_prompt=reduce_prompt_template,
-    verbose=False,
-    return_intermediate_steps=False
-)
+def _create_summary_chain():
+    from langchain.chains.summarize import load_summarize_chain
+    return load_summarize_chain(
+        llm=get_llm(),
+        chain_type="map_reduce",
+        map_prompt=map_prompt_template,
+        combine_prompt=reduce_prompt_template,
+        verbose=False,
+        return_intermediate_steps=False
+    )
+
+
+providers.register("summary_chain", _create_summary_chain)
 
 # USAGE FUNCTION with validation
 def generate_optimized_summary(docs, language="English", no_of_words=800):
@@ -486,7 +513,7 @@ def generate_optimized_summary(docs, language="English", no_of_words=800):
     """
     try:
         # Run the improved summary chain
-        result = summary_chain.invoke({
+        result = providers.get("summary_chain").invoke({
             "input_documents": docs,
             "language": language,
             "no_of_words": no_of_words
@@ -533,8 +560,9 @@ def debug_map_reduce_process(docs, language="English", no_of_words=800):
     """
     Debug version that shows intermediate chunk summaries
     """
+    from langchain.chains.summarize import load_summarize_chain
     summary_chain_debug = load_summarize_chain(
-        llm=llm,
+        llm=get_llm(),
         chain_type="map_reduce",
         map_prompt=map_prompt_template,
         combine_prompt=reduce_prompt_template,
@@ -818,64 +846,137 @@ study_guide_prompt = PromptTemplate(
     input_variables=["topic", "text", "language", "difficulty_level"]
 )
 
-# AI Tutor chain setup
-tutor_chain = tutor_explanation_prompt | llm | StrOutputParser()
-concept_chain = concept_explanation_prompt | llm | StrOutputParser()
-problem_chain = problem_solving_prompt | llm | StrOutputParser()
-study_guide_chain = study_guide_prompt | llm | StrOutputParser()
+# AI Tutor chain setup (built on first use)
+providers.register("tutor_chain", lambda: tutor_explanation_prompt | get_llm() | StrOutputParser())
+providers.register("concept_chain", lambda: concept_explanation_prompt | get_llm() | StrOutputParser())
+providers.register("problem_chain", lambda: problem_solving_prompt | get_llm() | StrOutputParser())
+providers.register("study_guide_chain", lambda: study_guide_prompt | get_llm() | StrOutputParser())
 
 
 
-async def generate_quiz(documents: list, quiz_type: str = "mcq", language: str = "English", num_questions: str = "10", difficulty_level: str = "medium"):
+async def generate_quiz(documents: list, quiz_type: str = "mcq", language: str = "English", num_questions: str = "10", difficulty_level: str = "medium", quiz_mode: str = "single"):
     """
-    Generate quiz using LangChain map-reduce for large documents.
+    Generate quiz questions from the documents.
+    quiz_mode="single" prompts once on the beginning of the content (fast, small inputs);
+    quiz_mode="map_reduce" spreads the questions over the whole document.
     Returns a list of quiz questions in JSON format.
+    Results are served from the generation cache when the same content and parameters were seen before,
+    and identical concurrent requests are coalesced into a single generation.
     """
+    if quiz_mode not in QUIZ_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid quiz_mode: must be one of {list(QUIZ_MODES)}")
+
+    cache_key = _quiz_cache_key(documents, quiz_type, language, num_questions, difficulty_level, quiz_mode)
+    cached_questions = await generation_cache.get(cache_key)
+    if cached_questions is not None:
+        logger.info(f"Returning cached quiz ({len(cached_questions)} questions)")
+        return cached_questions
+
+    async def generate_and_store():
+        if quiz_mode == "map_reduce":
+            questions = await _generate_quiz_map_reduce(documents, quiz_type, language, num_questions, difficulty_level)
+        else:
+            questions = await _generate_quiz_uncached(documents, quiz_type, language, num_questions, difficulty_level)
+        if questions:
+            await generation_cache.set(cache_key, questions)
+        return questions
+
+    # Identical requests already in flight (here or in another process) share one generation
+    return await single_flight.do(cache_key, generate_and_store, cache_lookup=lambda: generation_cache.get(cache_key))
+
+
+def _quiz_cache_key(documents, quiz_type: str, language: str, num_questions: str, difficulty_level: str, quiz_mode: str = "single") -> str:
+    """Generation cache key shared by the buffered and streaming quiz paths"""
+    return generation_cache.make_key(
+        "quiz",
+        documents,
+        params={
+            "quiz_type": quiz_type,
+            "language": language,
+            "num_questions": num_questions,
+            "difficulty_level": difficulty_level,
+            "quiz_mode": quiz_mode
+        },
+        model=LLM_CACHE_MODEL_ID,
+        prompt_version=QUIZ_PROMPT_VERSION
+    )
+
+
+def _prepare_quiz_text(documents) -> str:
+    """Combine the documents into the (size-limited) text fed to the quiz prompt"""
+    logger.info(f"the type of document is outside {type(documents)}")   
+
+    # Handle different document formats
+    if isinstance(documents, str):
+        # Convert string to Document objects
+        from langchain.schema import Document
+        documents = [Document(page_content=documents)]
+    elif isinstance(documents, list) and documents:
+        # Check if list contains strings instead of Document objects
+        logger.info(f"the type of document is {type(documents)}")
+        logger.info(f"the type of first document item is {type(documents[0])}")
+        
+        if isinstance(documents[0], str):
+            from langchain.schema import Document
+            logger.info(f"Converting strings to Document objects")
+            documents = [Document(page_content=doc) for doc in documents]
+
+    # Safe way to combine document content for quiz generation
     try:
-        # Convert num_questions to integer
-        num_questions_int = int(num_questions)
+        if documents and hasattr(documents[0], 'page_content'):
+            # Take only first 3 documents and limit size
+            text = " ".join(doc.page_content for doc in documents[:3])
+        elif documents and isinstance(documents[0], str):
+            text = " ".join(documents[:3])
+        else:
+            text = " ".join(str(doc) for doc in documents[:3])
         
-        logger.info(f"the type of document is outside {type(documents)}")   
+        # HARD LIMIT - prevents 214k token bug
+        text = text[:6000]  # Much smaller limit
+        
+        logger.info(f"Quiz text prepared: {len(text)} characters")
+    except Exception as e:
+        logger.error(f"Error extracting text: {e}")
+        text = str(documents)[:6000]
 
-        # Handle different document formats
-        if isinstance(documents, str):
-            # Convert string to Document objects
-            from langchain.schema import Document
-            documents = [Document(page_content=documents)]
-        elif isinstance(documents, list) and documents:
-            # Check if list contains strings instead of Document objects
-            logger.info(f"the type of document is {type(documents)}")
-            logger.info(f"the type of first document item is {type(documents[0])}")
-            
-            if isinstance(documents[0], str):
-                from langchain.schema import Document
-                logger.info(f"Converting strings to Document objects")
-                documents = [Document(page_content=doc) for doc in documents]
+    return text
 
-        # Safe way to combine document content for quiz generation
-        try:
-            if documents and hasattr(documents[0], 'page_content'):
-                # Take only first 3 documents and limit size
-                text = " ".join(doc.page_content for doc in documents[:3])
-            elif documents and isinstance(documents[0], str):
-                text = " ".join(documents[:3])
+
+def _parse_quiz_output(quiz_text: str, quiz_type: str, num_questions_int: int) -> list:
+    """Parse the LLM quiz output into a list of question dicts"""
+    # Parse output as JSON (assuming LLM returns valid JSON)
+    try:
+        questions = json.loads(quiz_text)
+        logger.info(f"these are the questions generated and parsed by json loads {questions}")
+        if not isinstance(questions, list):
+            raise ValueError("Quiz output must be a JSON array")
+    except json.JSONDecodeError:
+        # Fallback: Parse text manually if JSON parsing fails
+        questions = []
+        for q in quiz_text.split("\\n\\n")[:num_questions_int]:
+            lines = q.split("\\n")
+            if quiz_type == "mcq":
+                question = {"question": lines[0], "options": lines[1:5], "answer": lines[5] if len(lines) > 5 else ""}
             else:
-                text = " ".join(str(doc) for doc in documents[:3])
-            
-            # HARD LIMIT - prevents 214k token bug
-            text = text[:6000]  # Much smaller limit
-            
-            logger.info(f"Quiz text prepared: {len(text)} characters")
-        except Exception as e:
-            logger.error(f"Error extracting text: {e}")
-            text = str(documents)[:6000]
-        
+                question = {"question": lines[0], "answer": lines[1] if len(lines) > 1 else ""}
+            questions.append(question)
+    return questions
+
+
+async def _generate_quiz_uncached(documents: list, quiz_type: str, language: str, num_questions: str, difficulty_level: str):
+    """Run the quiz prompt against the LLM (no cache)"""
+    try:
+        # Convert num_questions to integer
+        num_questions_int = int(num_questions)
+
+        text = _prepare_quiz_text(documents)
+
         # Create a simpler LLM chain to avoid complex callback issues
-        quiz_chain = quiz_prompt | llm | StrOutputParser()
+        quiz_chain = quiz_prompt | get_llm() | StrOutputParser()
         
         # Generate quiz with timeout
-        quiz_output = await asyncio.wait_for(
-            quiz_chain.ainvoke({
+        quiz_output = await llm_governor.run(
+            lambda: quiz_chain.ainvoke({
                 "text": text,
                 "quiz_type": quiz_type,
                 "difficulty_level": difficulty_level,
@@ -889,22 +990,7 @@ async def generate_quiz(documents: list, quiz_type: str = "mcq", language: str =
         
         logger.info(f"these are the contents {quiz_text}")
         
-        # Parse output as JSON (assuming LLM returns valid JSON)
-        try:
-            questions = json.loads(quiz_text)
-            logger.info(f"these are the questions generated and parsed by json loads {questions}")
-            if not isinstance(questions, list):
-                raise ValueError("Quiz output must be a JSON array")
-        except json.JSONDecodeError:
-            # Fallback: Parse text manually if JSON parsing fails
-            questions = []
-            for q in quiz_text.split("\\n\\n")[:num_questions_int]:
-                lines = q.split("\\n")
-                if quiz_type == "mcq":
-                    question = {"question": lines[0], "options": lines[1:5], "answer": lines[5] if len(lines) > 5 else ""}
-                else:
-                    question = {"question": lines[0], "answer": lines[1] if len(lines) > 1 else ""}
-                questions.append(question)
+        questions = _parse_quiz_output(quiz_text, quiz_type, num_questions_int)
         
         logger.info(f"Generated quiz with {len(questions)} questions")
         logger.info(f"These are the questions {questions}")
@@ -918,6 +1004,209 @@ async def generate_quiz(documents: list, quiz_type: str = "mcq", language: str =
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
 
 
+
+def _select_quiz_chunks(chunks: List[TextChunk], max_chunks: int) -> List[TextChunk]:
+    """Keep at most max_chunks, evenly spaced so the whole document is still covered"""
+    if len(chunks) <= max_chunks:
+        return chunks
+    step = len(chunks) / max_chunks
+    return [chunks[int(i * step)] for i in range(max_chunks)]
+
+
+async def _map_quiz_chunk(quiz_chain, label: str, chunk: TextChunk, quota: int, quiz_type: str, language: str, difficulty_level: str) -> list:
+    """Map step of the map-reduce quiz: quota questions (plus one spare) from one chunk"""
+    if quota == 0:
+        return []
+    # Ask for one extra question per chunk to leave room for deduplication
+    requested = quota + 1
+    try:
+        quiz_output = await llm_governor.run(
+            lambda: quiz_chain.ainvoke({
+                "text": chunk.text,
+                "quiz_type": quiz_type,
+                "difficulty_level": difficulty_level,
+                "num_questions": requested,
+                "language": language
+            }),
+            timeout=60
+        )
+    except Exception as e:
+        logger.warning(f"Quiz chunk {label} failed: {e}")
+        return []
+
+    questions = _parse_quiz_output(quiz_output, quiz_type, requested)
+    valid = [q for q in questions if isinstance(q, dict) and validate_question_structure([q], quiz_type)]
+    logger.info(f"Quiz chunk {label}: {len(valid)} questions")
+    return valid
+
+
+async def _generate_quiz_map_reduce(documents: list, quiz_type: str, language: str, num_questions: str, difficulty_level: str):
+    """
+    Map: split the full content into token-safe chunks, allocate the questions
+    across chunks by token weight and generate each chunk's share concurrently
+    (bounded by llm_governor).
+    Reduce: drop near-duplicate questions and balance the set back to num_questions.
+    """
+    num_questions_int = int(num_questions)
+    text = documents_to_text(documents)
+
+    chunks = _select_quiz_chunks(chunk_text(text, QUIZ_MAP_CHUNK_TOKENS), QUIZ_MAP_MAX_CHUNKS)
+    if not chunks:
+        raise HTTPException(status_code=400, detail="No content to generate a quiz from")
+
+    allocation = allocate_questions([chunk.token_count for chunk in chunks], num_questions_int)
+    logger.info(
+        f"Map-reduce quiz: {len(chunks)} chunks, "
+        f"{sum(chunk.token_count for chunk in chunks)} tokens, allocation {allocation}"
+    )
+
+    quiz_chain = quiz_prompt | get_llm() | StrOutputParser()
+
+    groups = await asyncio.gather(*[
+        _map_quiz_chunk(quiz_chain, f"{i + 1}/{len(chunks)}", chunk, quota, quiz_type, language, difficulty_level)
+        for i, (chunk, quota) in enumerate(zip(chunks, allocation))
+    ])
+
+    if not any(groups):
+        raise HTTPException(status_code=500, detail="Error generating quiz: all chunks failed")
+
+    questions = balance_questions(dedupe_questions(groups), allocation, num_questions_int)
+    logger.info(f"Map-reduce quiz generated {len(questions)}/{num_questions_int} questions")
+    return questions
+
+
+async def _pack_quiz_chunks(documents, allocator: StreamingAllocator):
+    """Re-chunk arriving documents into QUIZ_MAP_CHUNK_TOKENS chunks; yields (chunk, is_last)"""
+    tail = ""
+    async for doc in documents:
+        metadata = getattr(doc, "metadata", None) or {}
+        unit = metadata.get("page") or metadata.get("slide")
+        if unit:
+            allocator.observe_unit(unit, metadata.get("total_slides"))
+        content = documents_to_text(doc)
+        pieces = chunk_text(f"{tail}\n{content}" if tail else content, QUIZ_MAP_CHUNK_TOKENS)
+        if not pieces:
+            continue
+        for piece in pieces[:-1]:
+            yield piece, False
+        tail = pieces[-1].text
+    if tail:
+        yield TextChunk(tail, count_tokens(tail)), True
+
+
+async def generate_quiz_incremental(chunks, quiz_type: str = "mcq", language: str = "English", num_questions: str = "10", difficulty_level: str = "medium", total_units: int = None):
+    """
+    Map-reduce quiz over documents that are still being extracted (async iterator,
+    see app.services.ingestion_pipeline): each chunk's questions are requested as
+    soon as the chunk arrives. Quotas are assigned before the document length is
+    known (StreamingAllocator, sized by total_units pages/slides when given).
+    The result is cached under the same key generate_quiz(..., quiz_mode="map_reduce")
+    uses for the complete document.
+    """
+    from app.services.ingestion_pipeline import map_ordered
+
+    num_questions_int = int(num_questions)
+    allocator = StreamingAllocator(num_questions_int, QUIZ_MAP_MAX_CHUNKS, QUIZ_MAP_CHUNK_TOKENS, total_units)
+    documents = []
+    quiz_chain = quiz_prompt | get_llm() | StrOutputParser()
+
+    async def collected():
+        async for doc in chunks:
+            documents.append(doc)
+            yield doc
+
+    async def planned():
+        async for chunk, last in _pack_quiz_chunks(collected(), allocator):
+            quota = allocator.next_quota(chunk.token_count, last)
+            if quota:
+                yield chunk, quota
+
+    groups = await map_ordered(planned(), lambda index, item: _map_quiz_chunk(
+        quiz_chain, f"{index + 1}", item[0], item[1], quiz_type, language, difficulty_level
+    ))
+    if not groups:
+        raise HTTPException(status_code=400, detail="No content to generate a quiz from")
+    if not any(groups):
+        raise HTTPException(status_code=500, detail="Error generating quiz: all chunks failed")
+
+    questions = balance_questions(dedupe_questions(groups), allocator.allocation, num_questions_int)
+    logger.info(f"Incremental map-reduce quiz: {len(documents)} documents, {allocator.tokens_seen} tokens, "
+                f"allocation {allocator.allocation}, {len(questions)}/{num_questions_int} questions")
+    if questions:
+        cache_key = _quiz_cache_key(documents, quiz_type, language, num_questions, difficulty_level, "map_reduce")
+        await generation_cache.set(cache_key, questions)
+    return questions
+
+
+async def generate_quiz_stream(documents: list, quiz_type: str = "mcq", language: str = "English", num_questions: str = "10", difficulty_level: str = "medium", timeout: float = 60):
+    """
+    Async generator yielding quiz questions one by one as the LLM streams them.
+    Each question is validated before it is yielded; cache hits are replayed
+    immediately and a completed stream populates the same cache entry as generate_quiz.
+    """
+    cache_key = _quiz_cache_key(documents, quiz_type, language, num_questions, difficulty_level)
+    cached_questions = await generation_cache.get(cache_key)
+    if cached_questions is not None:
+        logger.info(f"Streaming cached quiz ({len(cached_questions)} questions)")
+        for question in cached_questions:
+            yield question
+        return
+
+    num_questions_int = int(num_questions)
+    text = _prepare_quiz_text(documents)
+
+    quiz_chain = quiz_prompt | get_llm() | StrOutputParser()
+    stream = quiz_chain.astream({
+        "text": text,
+        "quiz_type": quiz_type,
+        "difficulty_level": difficulty_level,
+        "num_questions": num_questions_int,
+        "language": language
+    })
+
+    parser = IncrementalJSONArrayParser()
+    questions = []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    try:
+        # One governor slot for the whole stream
+        async with llm_governor.slot():
+            while not parser.done and len(questions) < num_questions_int:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    token = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+
+                for question in parser.feed(token):
+                    if not isinstance(question, dict) or not validate_question_structure([question], quiz_type):
+                        logger.warning(f"Skipping invalid streamed question: {question}")
+                        continue
+                    questions.append(question)
+                    yield question
+                    if len(questions) >= num_questions_int:
+                        break
+
+    except asyncio.TimeoutError:
+        logger.error(f"Quiz streaming timed out after {len(questions)} questions")
+        raise HTTPException(status_code=408, detail="Quiz generation request timed out. Please try with smaller documents.")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming quiz: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
+    finally:
+        # Stop the upstream generation if we finished early or the client went away
+        await stream.aclose()
+
+    logger.info(f"Streamed quiz with {len(questions)} questions")
+    if questions:
+        await generation_cache.set(cache_key, questions)
+
+
     
     
     
@@ -926,8 +1215,8 @@ async def run_summary_with_timeout(summary_chain, documents, language, no_of_wor
     """Run summary chain with proper timeout handling"""
     try:
         # Use ainvoke instead of run for async operation
-        result = await asyncio.wait_for(
-            summary_chain.ainvoke({
+        result = await llm_governor.run(
+            lambda: summary_chain.ainvoke({
                 "input_documents": documents,
                 "language": language,
                 "no_of_words": no_of_words
@@ -940,10 +1229,76 @@ async def run_summary_with_timeout(summary_chain, documents, language, no_of_wor
         raise HTTPException(status_code=408, detail="Summary generation request timed out. Please try with smaller documents.")
 
 # REPLACE the existing generate_summary function with:
-async def generate_summary(documents: list, language: str = "English", no_of_words: str = "400"):
+async def generate_summary(documents: list, language: str = "English", no_of_words: str = "400", progress_callback=None):
     """
     INTELLIGENT summary generation - handles any document size
+    Results are served from the generation cache when the same content and parameters were seen before,
+    and identical concurrent requests are coalesced into a single generation.
+    progress_callback (optional) receives a dict per tree-reduce level: stage, level, nodes, estimated_levels.
     """
+    cache_key = _summary_cache_key(documents, language, no_of_words)
+    cached_summary = await generation_cache.get(cache_key)
+    if cached_summary is not None:
+        logger.info(f"Returning cached summary ({len(cached_summary)} characters)")
+        return cached_summary
+
+    async def generate_and_store():
+        summary = await _generate_summary_uncached(documents, language, no_of_words, progress_callback)
+        if summary:
+            await generation_cache.set(cache_key, summary)
+        return summary
+
+    # Identical requests already in flight (here or in another process) share one generation
+    return await single_flight.do(cache_key, generate_and_store, cache_lookup=lambda: generation_cache.get(cache_key))
+
+
+def _summary_cache_key(documents, language: str, no_of_words: str) -> str:
+    """Generation cache key shared by the buffered and incremental summary paths"""
+    return generation_cache.make_key(
+        "summary",
+        documents,
+        params={
+            "language": language,
+            "no_of_words": no_of_words
+        },
+        model=LLM_CACHE_MODEL_ID,
+        prompt_version=SUMMARY_PROMPT_VERSION
+    )
+
+
+async def generate_summary_incremental(chunks, language: str = "English", no_of_words: str = "400", progress_callback=None):
+    """
+    Summary of documents that are still being extracted (async iterator, see
+    app.services.ingestion_pipeline): leaf summaries start while later pages
+    are parsed. The result is cached under the same key generate_summary uses
+    for the complete document.
+    """
+    documents = []
+
+    async def collected():
+        async for doc in chunks:
+            documents.append(doc)
+            yield doc
+
+    try:
+        summary = await providers.get("intelligent_summarizer").process_stream(collected(), language, no_of_words, progress_callback)
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        logger.error("Summary generation timed out")
+        raise HTTPException(status_code=408, detail="Summary generation timed out")
+    except Exception as e:
+        logger.error(f"Error generating summary: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
+
+    logger.info(f"Generated summary: {len(summary)} characters")
+    if summary:
+        await generation_cache.set(_summary_cache_key(documents, language, no_of_words), summary)
+    return summary
+
+
+async def _generate_summary_uncached(documents: list, language: str, no_of_words: str, progress_callback=None):
+    """Run the size-aware summarizer against the LLM (no cache)"""
     try:
         # Convert and prepare documents
         if isinstance(documents, str):
@@ -956,7 +1311,7 @@ async def generate_summary(documents: list, language: str = "English", no_of_wor
                 documents = [Document(page_content=str(doc)) for doc in documents]
 
         # Use intelligent processing based on document size
-        result = await intelligent_summarizer.process_by_size(documents, language, no_of_words)
+        result = await providers.get("intelligent_summarizer").process_by_size(documents, language, no_of_words, progress_callback)
         
         logger.info(f"Generated summary: {len(result)} characters")
         return result
@@ -985,8 +1340,15 @@ async def youtube_search(query: str):
         if not query or query.strip() == "":
             raise ValueError("Query parameter cannot be None or empty")
         
-        tool = YouTubeSearchTool()
-        top_url_dict = tool.run(query.strip())  # Strip whitespace
+        from app.services.youtube_content_cache import youtube_content_cache
+
+        async def live_search():
+            from langchain_community.tools import YouTubeSearchTool
+            tool = YouTubeSearchTool()
+            return await extraction_executor.run_io(tool.run, query.strip())  # Strip whitespace
+
+        # Popular topics are served from the search cache (normalized query + result count)
+        top_url_dict = await youtube_content_cache.search(query, live_search)
         print(f"the type of result given by this function is {type(top_url_dict)}")  #it returns string 
         return top_url_dict
     
@@ -1000,6 +1362,7 @@ async def youtube_search(query: str):
 
 # function to load the content 
 async def youtube_loader(url_results):
+    from app.services.enhanced_youtube_service import youtube_service
     try:
         print(f"Raw url_results: {url_results}")
         print(f"Type of url_results: {type(url_results)}")
@@ -1015,9 +1378,7 @@ async def youtube_loader(url_results):
         
         print(f"Processed url_results: {url_results}")
         
-        content = []
-        successful_loads = 0
-        
+        cleaned_urls = []
         for i, url in enumerate(url_results):
             print(f"Processing URL {i}: {url}")
             
@@ -1028,36 +1389,12 @@ async def youtube_loader(url_results):
                 continue
             
             print(f"Cleaned URL: {cleaned_url}")
-            
-            try:
-                # Try with minimal parameters first
-                loader = YoutubeLoaderDL.from_youtube_url(
-                    cleaned_url,
-                    add_video_info=True,
-                )
-                
-                content_of_each = loader.load()
-                if content_of_each:
-                    content.append(content_of_each)
-                    successful_loads += 1
-                    print(f"Successfully loaded content for URL {i}")
-                else:
-                    print(f"No content returned for URL {i}")
-                    
-            except Exception as url_error:
-                print(f"Error loading URL {cleaned_url}: {str(url_error)}")
-                
-                try:
-                    print(f"Trying alternative loading method for URL {i}")
-                    simple_loader = YoutubeLoaderDL.from_youtube_url(cleaned_url)
-                    simple_content = simple_loader.load()
-                    if simple_content:
-                        content.append(simple_content)
-                        successful_loads += 1
-                        print(f"Successfully loaded content with simple loader for URL {i}")
-                except Exception as simple_error:
-                    print(f"Simple loader also failed for URL {cleaned_url}: {str(simple_error)}")
-                    continue
+            cleaned_urls.append(cleaned_url)
+        
+        # Video info for every URL is loaded concurrently on the shared YouTube pool
+        loaded = await youtube_service.load_video_metadata(cleaned_urls)
+        content = [content_of_each for content_of_each in loaded if content_of_each]
+        successful_loads = len(content)
         
         print(f"Successfully loaded content from {successful_loads} out of {len(url_results)} URLs")
         
@@ -1116,42 +1453,53 @@ async def youtube_loader(url_results):
 async def fetch_transcripts_async(video_ids):
     """
     Fetch transcripts for multiple videos asynchronously
+    Stored transcripts (app.services.transcript_store) are used first, including
+    videos recently found to have none; new transcripts are stored.
     """
-    loop = asyncio.get_event_loop()
-    
-    # Use ThreadPoolExecutor to run sync transcript fetching in parallel
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-        # Create tasks for each video
-        tasks = []
-        for video_id in video_ids:
-            task = loop.run_in_executor(
-                executor, 
-                you_tube_transcript_from_video_id_sync, 
-                video_id
-            )
-            tasks.append((video_id, task))
-        
-        # Wait for all tasks to complete
-        transcripts = {}
-        for video_id, task in tasks:
-            try:
-                transcript = await task
-                transcripts[video_id] = transcript
-                print(f"Completed transcript fetch for {video_id}")
-            except Exception as e:
-                print(f"Failed to fetch transcript for {video_id}: {e}")
-                transcripts[video_id] = None
-        
+    from app.services.transcript_store import TranscriptRecord, transcript_store
+
+    stored = await transcript_store.get_many(video_ids)
+    transcripts = {video_id: record.transcript for video_id, record in stored.items()}
+    missing = [video_id for video_id in video_ids if video_id not in stored]
+    if stored:
+        print(f"Transcript store: {len(stored)} of {len(video_ids)} videos already known")
+    if not missing:
         return transcripts
 
+    from app.services.enhanced_youtube_service import youtube_service
+
+    # Fetched in parallel on the shared YouTube thread pool
+    tasks = [(video_id, asyncio.ensure_future(youtube_service.run_blocking(you_tube_transcript_from_video_id_sync, video_id)))
+             for video_id in missing]
+    
+    # Wait for all tasks to complete
+    for video_id, task in tasks:
+        try:
+            transcript = await task
+            transcripts[video_id] = transcript
+            print(f"Completed transcript fetch for {video_id}")
+        except Exception as e:
+            print(f"Failed to fetch transcript for {video_id}: {e}")
+            transcripts[video_id] = None
+        # Only successes are stored: this path tries one method, so a miss
+        # here does not mean the enhanced loader would find nothing
+        if transcripts[video_id]:
+            await transcript_store.set(TranscriptRecord(
+                video_id=video_id, language="en", transcript=transcripts[video_id],
+                source="youtube_transcript_api"
+            ))
+    
+    return transcripts
+
 
 def you_tube_transcript_from_video_id_sync(video_id: str):
     """
-    Synchronous version for use with ThreadPoolExecutor
+    Synchronous version, run on the shared YouTube thread pool
     """
     try:
         print(f"Fetching transcript for video ID: {video_id}")
         
+        from youtube_transcript_api import YouTubeTranscriptApi
         ytt_api = YouTubeTranscriptApi()
         
         try:
@@ -1228,8 +1576,8 @@ def clean_youtube_url(url: str) -> str:
 async def run_tutor_with_timeout(chain, input_params, timeout=120):
     """Run tutor chain with proper timeout handling"""
     try:
-        result = await asyncio.wait_for(
-            chain.ainvoke(input_params),
+        result = await llm_governor.run(
+            lambda: chain.ainvoke(input_params),
             timeout=timeout
         )
         return result
@@ -1276,7 +1624,7 @@ async def ai_tutor_explanation(
         
         # Generate tutoring response
         explanation = await run_tutor_with_timeout(
-            tutor_chain,
+            providers.get("tutor_chain"),
             input_params,
             timeout=90
         )
@@ -1318,7 +1666,7 @@ async def explain_concept(
         }
         
         explanation = await run_tutor_with_timeout(
-            concept_chain,
+            providers.get("concept_chain"),
             input_params,
             timeout=90
         )
@@ -1360,7 +1708,7 @@ async def solve_problem_step_by_step(
         }
         
         solution = await run_tutor_with_timeout(
-            problem_chain,
+            providers.get("problem_chain"),
             input_params,
             timeout=90
         )
@@ -1402,7 +1750,7 @@ async def create_study_guide(
         }
         
         study_guide = await run_tutor_with_timeout(
-            study_guide_chain,
+            providers.get("study_guide_chain"),
             input_params,
             timeout=120  # Study guides might need more time
         )
@@ -1454,7 +1802,7 @@ async def interactive_learning_session(
         input_variables=["text", "learning_goal", "language", "difficulty_level"]
     )
     
-    interactive_chain = interactive_prompt | llm | StrOutputParser()
+    interactive_chain = interactive_prompt | get_llm() | StrOutputParser()
     
     try:
         input_params = {
@@ -0,0 +1,337 @@
+# app/models/llm_backends.py
+"""
+Pluggable chat model backends for the module-level `llm` in generate_quizes
+
+LLM_BACKEND selects the backend:
+- groq   : ChatGroq (default, production)
+- fake   : deterministic offline stand-in with configurable latency / token rate
+           and injected 429s and timeouts (load tests, benchmarks)
+- record : ChatGroq, with every response written to LLM_RECORD_DIR
+- replay : answers from LLM_RECORD_DIR without network access
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKENDS = ("groq", "fake", "record", "replay")
+DEFAULT_RECORD_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks", "recordings")
+
+_QUIZ_RE = re.compile(r"Generate EXACTLY (\d+) high-quality (\S+) questions")
+_WORDS_RE = re.compile(r"(\d+)-word summary")
+_VOCAB_RE = re.compile(r"[A-Za-z]{5,}")
+
+
+class FakeRateLimitError(Exception):
+    """Injected 429 (shaped like the Groq SDK error so the governor classifies it)"""
+    status_code = 429
+
+
+class FakeTimeoutError(Exception):
+    """Injected request timeout"""
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(message.content) for message in messages)
+
+
+def _prompt_digest(messages: List[BaseMessage], stop: Optional[List[str]] = None) -> str:
+    material = json.dumps({
+        "messages": [[message.type, str(message.content)] for message in messages],
+        "stop": stop or []
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatGroq.
+    Responses are deterministic per prompt (quiz prompts get a valid JSON array of the
+    requested size, summary prompts roughly the requested word count). Latency is
+    time-to-first-token (lognormal) plus output tokens at a jittered token rate.
+    """
+
+    ttft_ms: float = 400.0
+    ttft_sigma: float = 0.3
+    tokens_per_second: float = 250.0
+    tokens_per_second_jitter: float = 0.2
+    rate_limit_probability: float = 0.0
+    timeout_probability: float = 0.0
+    timeout_seconds: float = 45.0
+    seed: int = 0
+
+    _rng: Any = PrivateAttr(default=None)
+    _rng_lock: Any = PrivateAttr(default=None)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FakeChatModel":
+        return cls(
+            ttft_ms=float(os.getenv("FAKE_LLM_TTFT_MS", 400)),
+            ttft_sigma=float(os.getenv("FAKE_LLM_TTFT_SIGMA", 0.3)),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", 250)),
+            tokens_per_second_jitter=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC_JITTER", 0.2)),
+            rate_limit_probability=float(os.getenv("FAKE_LLM_RATE_LIMIT_PROB", 0)),
+            timeout_probability=float(os.getenv("FAKE_LLM_TIMEOUT_PROB", 0)),
+            timeout_seconds=float(os.getenv("FAKE_LLM_TIMEOUT_SECONDS", 45)),
+            seed=int(os.getenv("FAKE_LLM_SEED", 0))
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    # Response synthesis
+    def render_response(self, prompt: str) -> str:
+        """Deterministic response text for a prompt"""
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+        vocabulary = sorted(set(word.lower() for word in _VOCAB_RE.findall(prompt))) or ["concept"]
+
+        quiz = _QUIZ_RE.search(prompt)
+        if quiz:
+            count, quiz_type = int(quiz.group(1)), quiz.group(2).lower()
+            questions = []
+            for i in range(count):
+                topic = " ".join(rng.sample(vocabulary, min(3, len(vocabulary))))
+                question = {"question": f"Question {i + 1}: what does the text say about {topic}?"}
+                if quiz_type == "mcq":
+                    options = [f"{word} ({j + 1})" for j, word in enumerate(rng.sample(vocabulary * 4, 4))]
+                    question["options"] = options
+                    question["answer"] = options[rng.randrange(4)]
+                else:
+                    question["answer"] = f"The text explains {topic}."
+                question["explanation"] = f"Derived from the passage about {topic}."
+                questions.append(question)
+            return json.dumps(questions, indent=2)
+
+        words = _WORDS_RE.search(prompt)
+        word_count = int(words.group(1)) if words else 150
+        return " ".join(rng.choice(vocabulary) for _ in range(word_count)).capitalize() + "."
+
+    # Timing / fault injection
+    def _plan(self, response: str) -> Dict[str, Any]:
+        with self._rng_lock:
+            roll = self._rng.random()
+            ttft = self._rng.lognormvariate(0, self.ttft_sigma) * self.ttft_ms / 1000
+            rate = max(1.0, self.tokens_per_second * (1 + self._rng.uniform(-1, 1) * self.tokens_per_second_jitter))
+
+        if roll < self.rate_limit_probability:
+            return {"fault": "rate_limited", "delay": min(ttft, 0.2)}
+        if roll < self.rate_limit_probability + self.timeout_probability:
+            return {"fault": "timeout", "delay": self.timeout_seconds}
+
+        output_tokens = max(1, len(response) // 4)
+        return {"fault": None, "ttft": ttft, "per_token": 1 / rate, "tokens": output_tokens}
+
+    @staticmethod
+    def _raise_fault(plan: Dict[str, Any]):
+        if plan["fault"] == "rate_limited":
+            raise FakeRateLimitError("Rate limit reached (fake backend). Please try again in 0.5s.")
+        raise FakeTimeoutError("Request timed out (fake backend).")
+
+    @staticmethod
+    def _token_pieces(response: str) -> List[str]:
+        return [response[i:i + 4] for i in range(0, len(response), 4)]
+
+    # BaseChatModel implementation
+    def _generate(self,
+                  messages: List[BaseMessage],
+                  stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None,
+                  **kwargs: Any) -> ChatResult:
+        response = self.render_response(_prompt_text(messages))
+        plan = self._plan(response)
+        if plan["fault"]:
+            time.sleep(plan["delay"])
+            self._raise_fault(plan)
+        time.sleep(plan["ttft"] + plan["tokens"] * plan["per_token"])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response))])
+
+    async def _agenerate(self,
+                         messages: List[BaseMessage],
+                         stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         **kwargs: Any) -> ChatResult:
+        response = self.render_response(_prompt_text(messages))
+        plan = self._plan(response)
+        if plan["fault"]:
+            await asyncio.sleep(plan["delay"])
+            self._raise_fault(plan)
+        await asyncio.sleep(plan["ttft"] + plan["tokens"] * plan["per_token"])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response))])
+
+    def _stream(self,
+                messages: List[BaseMessage],
+                stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        response = self.render_response(_prompt_text(messages))
+        plan = self._plan(response)
+        if plan["fault"]:
+            time.sleep(plan["delay"])
+            self._raise_fault(plan)
+        time.sleep(plan["ttft"])
+        for piece in self._token_pieces(response):
+            time.sleep(plan["per_token"])
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self,
+                       messages: List[BaseMessage],
+                       stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        response = self.render_response(_prompt_text(messages))
+        plan = self._plan(response)
+        if plan["fault"]:
+            await asyncio.sleep(plan["delay"])
+            self._raise_fault(plan)
+        await asyncio.sleep(plan["ttft"])
+        for piece in self._token_pieces(response):
+            await asyncio.sleep(plan["per_token"])
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """
+    record: forward to `inner` and store each response (and its latency) on disk.
+    replay: answer from disk only; unknown prompts go to `fallback` or raise LookupError.
+    Recordings are keyed by a hash of the messages, one JSON file per prompt.
+    """
+
+    mode: str = "replay"
+    record_dir: str = DEFAULT_RECORD_DIR
+    inner: Optional[BaseChatModel] = None
+    fallback: Optional[BaseChatModel] = None
+    replay_latency: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return f"record-replay-{self.mode}"
+
+    def _path(self, digest: str) -> Path:
+        return Path(self.record_dir) / f"{digest}.json"
+
+    def _load(self, digest: str) -> Optional[Dict[str, Any]]:
+        path = self._path(digest)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, digest: str, messages: List[BaseMessage], content: str, latency: float):
+        path = self._path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "messages": [[message.type, str(message.content)] for message in messages],
+                "content": content,
+                "latency": latency,
+                "recorded_at": time.time()
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _missing(self, digest: str):
+        raise LookupError(
+            f"No recorded response for prompt {digest[:12]} in {self.record_dir}; "
+            f"record it first with LLM_BACKEND=record"
+        )
+
+    def _generate(self,
+                  messages: List[BaseMessage],
+                  stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None,
+                  **kwargs: Any) -> ChatResult:
+        digest = _prompt_digest(messages, stop)
+
+        if self.mode == "record":
+            started = time.perf_counter()
+            message = self.inner.invoke(messages, stop=stop)
+            self._save(digest, messages, str(message.content), time.perf_counter() - started)
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=message.content))])
+
+        recording = self._load(digest)
+        if recording is None:
+            if self.fallback is None:
+                self._missing(digest)
+            return ChatResult(generations=[ChatGeneration(message=self.fallback.invoke(messages, stop=stop))])
+        if self.replay_latency:
+            time.sleep(recording.get("latency", 0))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=recording["content"]))])
+
+    async def _agenerate(self,
+                         messages: List[BaseMessage],
+                         stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         **kwargs: Any) -> ChatResult:
+        digest = _prompt_digest(messages, stop)
+
+        if self.mode == "record":
+            started = time.perf_counter()
+            message = await self.inner.ainvoke(messages, stop=stop)
+            latency = time.perf_counter() - started
+            await asyncio.to_thread(self._save, digest, messages, str(message.content), latency)
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=message.content))])
+
+        recording = await asyncio.to_thread(self._load, digest)
+        if recording is None:
+            if self.fallback is None:
+                self._missing(digest)
+            message = await self.fallback.ainvoke(messages, stop=stop)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        if self.replay_latency:
+            await asyncio.sleep(recording.get("latency", 0))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=recording["content"]))])
+
+
+def backend_requires_api_key(backend: str) -> bool:
+    """Whether the backend talks to Groq (and therefore needs GROQ_API_KEY)"""
+    return backend in ("groq", "record")
+
+
+def create_llm(backend: str, model_name: str, api_key: Optional[str] = None, **groq_kwargs) -> BaseChatModel:
+    """Build the chat model for the selected LLM_BACKEND"""
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}': must be one of {LLM_BACKENDS}")
+
+    if backend == "fake":
+        logger.info("Using the offline fake LLM backend")
+        return FakeChatModel.from_env()
+
+    record_dir = os.getenv("LLM_RECORD_DIR", DEFAULT_RECORD_DIR)
+
+    if backend == "replay":
+        fallback = FakeChatModel.from_env() if os.getenv("LLM_REPLAY_FALLBACK", "").lower() == "fake" else None
+        logger.info(f"Replaying recorded LLM responses from {record_dir}")
+        return RecordReplayChatModel(
+            mode="replay",
+            record_dir=record_dir,
+            fallback=fallback,
+            replay_latency=os.getenv("LLM_REPLAY_LATENCY", "0") == "1"
+        )
+
+    from langchain_groq import ChatGroq
+    groq = ChatGroq(model=model_name, api_key=api_key, **groq_kwargs)
+    if backend == "record":
+        logger.info(f"Recording LLM responses to {record_dir}")
+        return RecordReplayChatModel(mode="record", record_dir=record_dir, inner=groq)
+    return groq
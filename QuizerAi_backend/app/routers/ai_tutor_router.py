@@ -4,19 +4,30 @@ from fastapi.responses import JSONResponse
 from typing import Optional
 import logging
 
-# Import existing data processing functions
-from app.services.data_ingestion_processing import process_pdf, process_image
-from app.models.generate_quizes import (
-    ai_tutor_explanation, 
-    explain_concept, 
-    solve_problem_step_by_step, 
-    create_study_guide,
-    interactive_learning_session       
-)
+from app.core.providers import lazy_import
+from app.services.upload_ingestion import spool_upload
+from app.services.extraction_executor import extraction_executor
+from app.services.extraction_cache import extraction_cache
+from app.services.pdf_engine import extract_pdf
+
+# Existing data processing and tutor functions (imported on first use)
+process_image_path = lazy_import("app.services.data_ingestion_processing", "process_image_path")
+ai_tutor_explanation = lazy_import("app.models.generate_quizes", "ai_tutor_explanation")
+explain_concept = lazy_import("app.models.generate_quizes", "explain_concept")
+solve_problem_step_by_step = lazy_import("app.models.generate_quizes", "solve_problem_step_by_step")
+create_study_guide = lazy_import("app.models.generate_quizes", "create_study_guide")
+interactive_learning_session = lazy_import("app.models.generate_quizes", "interactive_learning_session")
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+
+async def _cached_ocr(upload):
+    """OCR text of a spooled image, shared with the upload path's cache entries ([text])"""
+    async def extract():
+        return [await extraction_executor.run_cpu(process_image_path, upload.path, upload.filename)]
+    return await extraction_cache.get_or_extract(upload.sha256, "image", extract)
+
 @router.post('/user_query_for_ai_tutor')
 async def user_query_for_ai_tutor(
     query: Optional[str] = Form(None),
@@ -59,28 +70,21 @@ async def user_query_for_ai_tutor(
         
         # Process uploaded file if provided
         if file:
+            # Stream to a spool file (50MB limit and magic bytes checked while copying)
+            upload = await spool_upload(file, allowed_kinds=("text", "pdf", "image"))
+            
             try:
-                # Validate file size (50MB limit)
-                max_size = 50 * 1024 * 1024  # 50MB
-                file_content = await file.read()
-                if len(file_content) > max_size:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="File size exceeds 50MB limit."
-                    )
-                
-                # Reset file pointer for processing
-                await file.seek(0)
-                
                 # Handle different file types
-                if file.content_type == "text/plain":
-                    processed_content = file_content.decode('utf-8')
+                if upload.kind == "text":
+                    processed_content = upload.read_text()
                     content_source = "text_file"
                     
-                elif file.content_type == "application/pdf":
+                elif upload.kind == "pdf":
                     logger.info(f"Processing PDF file: {file.filename}")
-                    # Process PDF with 2-page limit
-                    documents = process_pdf(file)  # Assuming process_pdf supports max_pages
+                    documents = await extraction_cache.get_or_extract(
+                        upload.sha256, "pdf",
+                        lambda: extract_pdf(upload.path, upload.filename)
+                    )
                     if documents:
                         # Combine all document content
                         processed_content = "\n\n".join([doc.page_content if hasattr(doc, 'page_content') else str(doc) for doc in documents])
@@ -92,10 +96,10 @@ async def user_query_for_ai_tutor(
                             detail="Could not extract text from PDF. Please ensure the PDF contains readable text."
                         )
                         
-                elif file.content_type in ["image/jpeg", "image/png", "image/jpg"]:
+                elif upload.kind == "image":
                     logger.info(f"Processing image file: {file.filename}")
                     # Process image with OCR
-                    extracted_text = process_image(file)
+                    extracted_text = (await _cached_ocr(upload))[0]
                     if extracted_text and extracted_text.strip():
                         processed_content = extracted_text
                         content_source = "image_file"
@@ -105,11 +109,6 @@ async def user_query_for_ai_tutor(
                             status_code=400,
                             detail="Could not extract readable text from image. Please ensure the image contains clear, readable text."
                         )
-                else:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Unsupported file type: {file.content_type}. Supported types: text/plain, application/pdf, image/jpeg, image/png, image/jpg"
-                    )
                     
             except HTTPException:
                 raise
@@ -119,6 +118,8 @@ async def user_query_for_ai_tutor(
                     status_code=500, 
                     detail=f"Error processing uploaded file: {str(e)}"
                 )
+            finally:
+                upload.cleanup()
         
         # Validate difficulty level
         valid_difficulty_levels = ["beginner", "intermediate", "advanced"]
@@ -370,24 +371,25 @@ async def test_file_processing(
     Test endpoint for file processing capabilities.
     Useful for debugging PDF and image processing.
     """
+    upload = None
     try:
-        # Validate file size
-        max_size = 50 * 1024 * 1024  # 50MB
-        file_content = await file.read()
-        if len(file_content) > max_size:
-            raise HTTPException(status_code=400, detail="File size exceeds 50MB")
-        
-        await file.seek(0)  # Reset file pointer
+        # Stream to a spool file (50MB limit and magic bytes checked while copying)
+        upload = await spool_upload(file, allowed_kinds=("text", "pdf", "image"))
         
         result = {
             "filename": file.filename,
             "content_type": file.content_type,
-            "file_size": len(file_content),
+            "file_size": upload.size,
+            "sha256": upload.sha256,
             "processing_type": processing_type
         }
         
-        if file.content_type == "application/pdf":
-            documents = process_pdf(file, max_pages=2)
+        if upload.kind == "pdf":
+            documents = await extraction_cache.get_or_extract(
+                upload.sha256, "pdf",
+                lambda: extract_pdf(upload.path, upload.filename, max_pages=2),
+                variant="pages=2"
+            )
             if documents:
                 extracted_text = "\n\n".join([doc.page_content if hasattr(doc, 'page_content') else str(doc) for doc in documents])
                 result.update({
@@ -402,8 +404,8 @@ async def test_file_processing(
                     "error": "No text could be extracted from PDF"
                 })
                 
-        elif file.content_type in ["image/jpeg", "image/png", "image/jpg"]:
-            extracted_text = process_image(file)
+        elif upload.kind == "image":
+            extracted_text = (await _cached_ocr(upload))[0]
             if extracted_text and extracted_text.strip():
                 result.update({
                     "extraction_success": True,
@@ -416,24 +418,24 @@ async def test_file_processing(
                     "error": "No readable text found in image"
                 })
                 
-        elif file.content_type == "text/plain":
-            text_content = file_content.decode('utf-8')
+        elif upload.kind == "text":
+            text_content = upload.read_text()
             result.update({
                 "extraction_success": True,
                 "extracted_length": len(text_content),
                 "extracted_preview": text_content[:500] + "..." if len(text_content) > 500 else text_content
             })
-        else:
-            result.update({
-                "extraction_success": False,
-                "error": f"Unsupported file type: {file.content_type}"
-            })
         
         return JSONResponse(content=result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in test file processing: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error processing file: {str(e)}"
-        )
\ No newline at end of file
+        )
+    finally:
+        if upload is not None:
+            upload.cleanup()
\ No newline at end of file
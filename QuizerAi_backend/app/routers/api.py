@@ -471,8 +471,8 @@
 
 # app/routers/api.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 import uuid
@@ -483,14 +483,41 @@ import json
 import asyncio
 
 # Import services and models
-from app.services.data_ingestion_processing import process_pdf, process_image, process_url_selenium, process_pptx
-from app.models.generate_quizes import generate_quiz, generate_summary, youtube_search, youtube_loader
-from app.services.enhanced_youtube_service import enhanced_youtube_loader
-from app.config.youtube_config_enhanced import youtube_config
+from app.core.providers import lazy_import
 from app.services.cache_service import CacheService
+from app.services.generation_cache import generation_cache
+from app.services.llm_governor import llm_governor
+from app.services.single_flight import single_flight
+from app.services.upload_ingestion import spool_object, spool_upload
+from app.services.chunked_upload import chunked_upload_service
+from app.services.extraction_executor import extraction_executor
+from app.services.extraction_cache import extraction_cache
+from app.services.ingestion_pipeline import ingestion_pipeline
+from app.services.pdf_engine import extract_pdf
+from app.services.ocr_engine import ocr_engine
+from app.services.url_fetcher import url_fetcher
+from app.services.transcript_store import transcript_store
+from app.services.transcript_hedging import transcript_hedger
+from app.services.segmented_transcription import segmented_transcriber
+from app.services.youtube_content_cache import video_ids_from, youtube_content_cache
 from app.tasks.quiz_generation_tasks import generate_quiz_async, generate_summary_async
 from app.tasks.document_processing_tasks import process_document_async
 
+# Heavy dependencies (LLM stack, document loaders, OCR, YouTube tooling, NumPy)
+# are imported on first use so pods serving other routes start fast
+process_spooled_upload = lazy_import("app.services.data_ingestion_processing", "process_spooled_upload")
+generate_quiz = lazy_import("app.models.generate_quizes", "generate_quiz")
+generate_quiz_stream = lazy_import("app.models.generate_quizes", "generate_quiz_stream")
+generate_summary = lazy_import("app.models.generate_quizes", "generate_summary")
+generate_quiz_incremental = lazy_import("app.models.generate_quizes", "generate_quiz_incremental")
+generate_summary_incremental = lazy_import("app.models.generate_quizes", "generate_summary_incremental")
+youtube_search = lazy_import("app.models.generate_quizes", "youtube_search")
+youtube_loader = lazy_import("app.models.generate_quizes", "youtube_loader")
+enhanced_youtube_loader = lazy_import("app.services.enhanced_youtube_service", "enhanced_youtube_loader")
+youtube_service = lazy_import("app.services.enhanced_youtube_service", "youtube_service")
+extractive_selector = lazy_import("app.services.extractive_selector", "extractive_selector")
+default_budget = lazy_import("app.services.extractive_selector", "default_budget")
+
 # Import authentication dependencies (adjust path as needed)
 # from app.dependencies import get_current_user, get_db
 # from app.models.user import User
@@ -511,6 +538,8 @@ class GenerateQuizRequest(BaseModel):
     language: str = "English"
     num_questions: int = 10
     difficulty_level: str = "medium"
+    quiz_mode: str = "single"  # "single" or "map_reduce" (whole-document coverage)
+    extractive_budget: Optional[int] = None  # token budget for extractive pre-selection (0 disables)
     source: Optional[str] = None
     source_url: Optional[str] = None
     file_type: Optional[str] = None
@@ -519,6 +548,12 @@ class GenerateSummaryRequest(BaseModel):
     document_text: str
     language: str = "English"
     word_count: int = 400
+    extractive_budget: Optional[int] = None  # token budget for extractive pre-selection (0 disables)
+
+class InitiateUploadRequest(BaseModel):
+    filename: str
+    size: int  # bytes
+    content_type: Optional[str] = None
 
 
 @router.get("/test")
@@ -558,6 +593,8 @@ async def generate_quiz_async_endpoint(
             language=request.language,
             num_questions=str(request.num_questions),
             difficulty_level=request.difficulty_level,
+            quiz_mode=request.quiz_mode,
+            extractive_budget=request.extractive_budget,
             user_id=None,  # Replace with current_user.id when auth is enabled
             source_metadata={
                 'source': request.source,
@@ -615,6 +652,7 @@ async def generate_summary_async_endpoint(
             content=request.document_text,
             language=request.language,
             word_count=str(request.word_count),
+            extractive_budget=request.extractive_budget,
             user_id=None  # Replace with current_user.id when auth is enabled
         )
         
@@ -630,6 +668,120 @@ async def generate_summary_async_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/generation-cache/stats")
+async def get_generation_cache_stats():
+    """
+    Hit/miss metrics of the quiz/summary generation cache (this process)
+    """
+    return generation_cache.stats()
+
+
+@router.get("/llm-governor/stats")
+async def get_llm_governor_stats():
+    """
+    Current adaptive concurrency limit and call outcomes for Groq calls (this process)
+    """
+    return llm_governor.stats()
+
+
+@router.get("/single-flight/stats")
+async def get_single_flight_stats():
+    """
+    How many generation requests were coalesced onto an in-flight duplicate (this process)
+    """
+    return single_flight.stats()
+
+
+@router.get("/extraction-executor/stats")
+async def get_extraction_executor_stats():
+    """
+    Queue depth, wait time and run time of the content extraction pools (this process)
+    """
+    return extraction_executor.stats()
+
+
+@router.get("/extraction-cache/stats")
+async def get_extraction_cache_stats():
+    """
+    Hit/miss and compression metrics of the content-hash extraction cache (this process)
+    """
+    # stats() sizes the disk tier by listing its directory: off the event loop
+    return await asyncio.to_thread(extraction_cache.stats)
+
+
+@router.get("/url-fetcher/stats")
+async def get_url_fetcher_stats():
+    """
+    Page cache, conditional GET and browser fallback counts for URL ingestion (this process)
+    """
+    return url_fetcher.stats()
+
+
+@router.get("/ocr/stats")
+async def get_ocr_stats():
+    """
+    Pages and images OCR'd, page cache hits and empty results of the OCR engine (this process)
+    """
+    return ocr_engine.stats()
+
+
+@router.get("/transcript-store/stats")
+async def get_transcript_store_stats():
+    """
+    Hits per tier, unavailable (negative) hits and producing methods of stored YouTube transcripts (this process)
+    """
+    # stats() sizes the disk tier by listing its directory: off the event loop
+    return await asyncio.to_thread(transcript_store.stats)
+
+
+@router.get("/transcript-hedging/stats")
+async def get_transcript_hedging_stats():
+    """
+    Winning methods, paid hedges started and the shared per-method success rate / latency of transcript races
+    """
+    return await asyncio.to_thread(transcript_hedger.stats)
+
+
+@router.get("/segmented-transcription/stats")
+async def get_segmented_transcription_stats():
+    """
+    Segments transcribed, served from the per-segment cache or failed, and the audio length processed
+    """
+    return segmented_transcriber.stats()
+
+
+@router.get("/youtube-service/stats")
+async def get_youtube_service_stats():
+    """
+    Shared YouTube thread pool use, HTTP sessions created and video metadata loads
+    """
+    return youtube_service.stats()
+
+
+@router.get("/youtube-content-cache/stats")
+async def get_youtube_content_cache_stats():
+    """
+    Search cache hit ratio, bundle serves/builds and the most requested videos
+    """
+    return await asyncio.to_thread(youtube_content_cache.stats)
+
+
+@router.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """
+    Runs, chunks and extraction/total time of the incremental extract -> generate pipeline (this process)
+    """
+    return ingestion_pipeline.stats()
+
+
+@router.get("/extractive/stats")
+async def get_extractive_stats():
+    """
+    Tokens removed by extractive pre-selection before generation (this process)
+    """
+    return extractive_selector.stats()
+
+
 @router.delete("/task/{task_id}")
 async def cancel_task(
     task_id: str,
@@ -655,6 +807,175 @@ async def cancel_task(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _validate_quiz_params(quiz_type: str, difficulty_level: str, num_questions: str, language: str):
+    """Validate quiz form parameters (raises HTTPException 400)"""
+    valid_quiz_types = ["mcq", "short", "long"]
+    valid_difficulties = ["easy", "medium", "hard"]
+    try:
+        num_questions_int = int(num_questions)
+        if not 1 <= num_questions_int <= 50:
+            raise ValueError("Number of questions must be between 1 and 50")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid num_questions: must be a number between 1 and 50")
+    
+    if quiz_type not in valid_quiz_types:
+        raise HTTPException(status_code=400, detail=f"Invalid quiz_type: must be one of {valid_quiz_types}")
+    if difficulty_level not in valid_difficulties:
+        raise HTTPException(status_code=400, detail=f"Invalid difficulty_level: must be one of {valid_difficulties}")
+    if len(language) > 50:  # Basic validation for language
+        raise HTTPException(status_code=400, detail="Language name too long")
+
+
+async def _extract_upload(upload):
+    """PDFs are extracted page-parallel; other kinds in a single extraction process"""
+    if upload.kind == "pdf":
+        return await extract_pdf(upload.path, upload.filename)
+    return await extraction_executor.run_cpu(process_spooled_upload, upload)
+
+
+UPLOAD_KINDS = ("pdf", "pptx", "ppt", "image")
+
+
+async def _spool(file: Optional[UploadFile], session=None):
+    """
+    Spool a form upload (size limit and magic bytes checked while copying), or
+    materialize a completed chunked upload session from the object store
+    """
+    if session is not None:
+        return await spool_object(session.key, session.filename, allowed_kinds=UPLOAD_KINDS)
+    return await spool_upload(file, allowed_kinds=UPLOAD_KINDS)
+
+
+async def _extract_documents(file: Optional[UploadFile], url: Optional[str], session=None):
+    """Extract documents from an uploaded file (form or chunked upload) or a URL (shared by the upload endpoints)"""
+    if file or session is not None:
+        with await _spool(file, session) as upload:
+            logger.info(f"🔄 Processing {upload.kind}: {upload.filename}")
+            # Same bytes (any filename, any earlier upload or Celery job) -> cached chunks
+            documents = await extraction_cache.get_or_extract(
+                upload.sha256, upload.kind,
+                lambda: _extract_upload(upload)
+            )
+            logger.info(f"✅ {upload.kind} processing complete: {len(documents)} chunks")
+    else:
+        logger.info(f"🔄 Processing URL: {url}")
+        # Pooled HTTP fetch + main-content extraction; a headless browser only for JavaScript pages
+        documents = await url_fetcher.load(url)
+        logger.info(f"✅ URL processing complete ({documents[0].metadata['fetched_via']})")
+
+    return documents
+
+
+def _extractive_budget(action: str, quiz_mode: str, extractive_budget: Optional[int]) -> int:
+    """The request's pre-selection budget, or the per-action default when none was given"""
+    return default_budget(action, quiz_mode) if extractive_budget is None else extractive_budget
+
+
+def _incremental_applies(has_file: bool, action: str, quiz_mode: str, extractive_budget: Optional[int]) -> bool:
+    """
+    Uploads that go to generation in full (no budget given and none configured,
+    or pre-selection disabled) and whose generator has a map step: summaries and
+    map-reduce quizzes
+    """
+    if not has_file or (action != "summary" and quiz_mode != "map_reduce"):
+        return False
+    return _extractive_budget(action, quiz_mode, extractive_budget) <= 0
+
+
+async def _generate_incremental(file: Optional[UploadFile], session, action: str, quiz_type: str, language: str,
+                                num_questions: str, difficulty_level: str, no_of_words: str, quiz_mode: str):
+    """
+    On an extraction cache miss, PDF/PPTX pages are streamed straight into the
+    map step while later pages are still being extracted
+    (app.services.ingestion_pipeline); both caches are filled afterwards.
+    Anything else takes the buffered path. Returns (result, pipeline timings or None).
+    """
+    with await _spool(file, session) as upload:
+        cache_key = extraction_cache.make_key(upload.sha256, upload.kind)
+        documents = await extraction_cache.get(cache_key)
+
+        if documents is None and ingestion_pipeline.supports(upload.kind):
+            logger.info(f"🔄 Streaming {upload.kind} into {action} generation: {upload.filename}")
+            if action == "summary":
+                async def generate(chunks):
+                    return await generate_summary_incremental(chunks, language, no_of_words)
+            else:
+                total_units = await ingestion_pipeline.total_units(upload)
+
+                async def generate(chunks):
+                    return await generate_quiz_incremental(chunks, quiz_type, language, num_questions,
+                                                           difficulty_level, total_units)
+
+            params = json.dumps([action, quiz_type, language, num_questions, difficulty_level, no_of_words])
+            # Identical uploads arriving together share one run
+            return await single_flight.do(
+                f"pipeline:{cache_key}:{params}",
+                lambda: ingestion_pipeline.run(upload, generate,
+                                               on_documents=lambda docs: extraction_cache.set(cache_key, docs))
+            )
+
+        if documents is None:
+            documents = await _extract_upload(upload)
+            await extraction_cache.set(cache_key, documents)
+
+    if action == "summary":
+        return await generate_summary(documents, language, no_of_words), None
+    return await generate_quiz(documents, quiz_type, language, num_questions, difficulty_level, quiz_mode), None
+
+
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _preselect(documents, action: str, quiz_mode: str, extractive_budget: Optional[int]):
+    """Shrink the documents to the extractive token budget; returns (documents, selection info or None)"""
+    budget = _extractive_budget(action, quiz_mode, extractive_budget)
+    documents, selection = await asyncio.to_thread(extractive_selector.select_documents, documents, budget)
+    return documents, (selection.to_dict() if selection else None)
+
+
+@router.post("/uploads", status_code=201)
+async def initiate_chunked_upload(request: InitiateUploadRequest):
+    """
+    Start a resumable upload (PDF, PPTX, PPT, images; 50MB limit).
+    PUT each part to /uploads/{session_id}/parts/{n} (part_size bytes each, the last
+    one shorter; any order, failed parts retried on their own), then POST
+    /uploads/{session_id}/complete and pass the session_id as upload_id to /upload.
+    The file is used once: /upload deletes it after generating, and sessions not used
+    within CHUNKED_UPLOAD_SESSION_TTL are discarded.
+    """
+    session = await chunked_upload_service.initiate(request.filename, request.size, request.content_type,
+                                                    allowed_kinds=UPLOAD_KINDS)
+    return session.to_dict()
+
+
+@router.put("/uploads/{session_id}/parts/{part_number}")
+async def put_chunked_upload_part(session_id: str, part_number: int, request: Request):
+    """Upload one part as the raw request body; it is streamed straight into storage"""
+    return await chunked_upload_service.put_part(session_id, part_number, request.stream())
+
+
+@router.get("/uploads/{session_id}")
+async def get_chunked_upload(session_id: str):
+    """Session state with the received and missing parts (to resume an interrupted upload)"""
+    return await chunked_upload_service.status(session_id)
+
+
+@router.post("/uploads/{session_id}/complete")
+async def complete_chunked_upload(session_id: str):
+    """Assemble the parts; 409 with missing_parts if any part is still missing"""
+    session = await chunked_upload_service.complete(session_id)
+    return {**session.to_dict(), "upload_id": session.session_id}
+
+
+@router.delete("/uploads/{session_id}")
+async def abort_chunked_upload(session_id: str):
+    """Abort an upload and discard its parts"""
+    await chunked_upload_service.abort(session_id)
+    return {"status": "aborted", "session_id": session_id}
+
+
 @router.post("/upload")
 async def upload_resource(
     file: UploadFile = File(None),
@@ -664,7 +985,10 @@ async def upload_resource(
     difficulty_level: str = Form("medium"),  # Optional: defaults to "medium"
     num_questions: str = Form("10"),  # Optional: defaults to "10"
     language: str = Form("English"),  # Optional: defaults to "English"
-    no_of_words: str = Form("400")
+    no_of_words: str = Form("400"),
+    quiz_mode: str = Form("single"),  # Optional: "single" or "map_reduce"
+    extractive_budget: Optional[int] = Form(None),  # Optional: token budget for pre-selection, 0 disables
+    upload_id: Optional[str] = Form(None)  # Optional: completed chunked upload (/uploads) instead of file
 ):
     """
     Handle resource uploads (PDF, PowerPoint, image, URL) and process them for quiz or summary generation.
@@ -672,103 +996,166 @@ async def upload_resource(
     - Supported file types: PDF, PPTX, PPT, PNG, JPG, JPEG
     - Action: Generate quiz or summary
     - Quiz parameters: quiz_type (mcq, short, long), difficulty_level (easy, medium, hard), num_questions (1-50), language
+    - quiz_mode: "single" (first part of the content) or "map_reduce" (questions spread over the whole document)
+    - extractive_budget: keep only the highest-ranked sentences within this many tokens before
+      generation (single-mode quizzes default to EXTRACTIVE_QUIZ_BUDGET; summaries and map-reduce
+      quizzes send the full content unless a budget is given; 0 disables). Sent in full, PDF/PPTX
+      summaries and map-reduce quizzes start generating while later pages are still extracted
+    - upload_id: a file sent through the resumable chunked upload endpoints (/uploads); it is
+      deleted once the quiz or summary has been generated
     """
     # Validate inputs
-    if not file and not url:
-        raise HTTPException(status_code=400, detail="Either file or URL must be provided")
+    if not file and not url and not upload_id:
+        raise HTTPException(status_code=400, detail="Either file, upload_id or URL must be provided")
     
     if action not in ["quiz", "summary"]:
         raise HTTPException(status_code=400, detail="Action must be 'quiz' or 'summary'")
     
     if action == "quiz":
-        valid_quiz_types = ["mcq", "short", "long"]
-        valid_difficulties = ["easy", "medium", "hard"]
-        try:
-            num_questions_int = int(num_questions)
-            if not 1 <= num_questions_int <= 50:
-                raise ValueError("Number of questions must be between 1 and 50")
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid num_questions: must be a number between 1 and 50")
-        
-        if quiz_type not in valid_quiz_types:
-            raise HTTPException(status_code=400, detail=f"Invalid quiz_type: must be one of {valid_quiz_types}")
-        if difficulty_level not in valid_difficulties:
-            raise HTTPException(status_code=400, detail=f"Invalid difficulty_level: must be one of {valid_difficulties}")
-        if len(language) > 50:  # Basic validation for language
-            raise HTTPException(status_code=400, detail="Language name too long")
+        _validate_quiz_params(quiz_type, difficulty_level, num_questions, language)
+        if quiz_mode not in ["single", "map_reduce"]:
+            raise HTTPException(status_code=400, detail="Invalid quiz_mode: must be 'single' or 'map_reduce'")
 
     try:
-        if file:
-            # Validate file size and type
-            max_size = 50 * 1024 * 1024  # 50MB
-            file_size = await file.read()
-            if len(file_size) > max_size:
-                raise HTTPException(status_code=400, detail="File size exceeds 50MB")
-            await file.seek(0)  # Reset file pointer
-
-            # Determine file type and process
-            filename_lower = file.filename.lower()
-            
-            if filename_lower.endswith(".pdf"):
-                logger.info(f"🔄 Processing PDF: {file.filename}")
-                documents = process_pdf(file)
-                logger.info(f"✅ PDF processing complete: {len(documents)} chunks")
-                
-            elif filename_lower.endswith((".pptx", ".ppt")):
-                logger.info(f"🔄 Processing PowerPoint: {file.filename}")
-                documents = process_pptx(file)  # New PowerPoint processing
-                logger.info(f"✅ PowerPoint processing complete: {len(documents)} chunks")
-                
-            elif filename_lower.endswith((".png", ".jpg", ".jpeg")):
-                logger.info(f"🔄 Processing image: {file.filename}")
-                text = process_image(file)
-                documents = [text]  # Wrap text as a single document
-                logger.info(f"✅ Image processing complete")
-                
-            else:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Unsupported file type. Supported formats: PDF, PPTX, PPT, PNG, JPG, JPEG"
-                )
+        session = await chunked_upload_service.resolve(upload_id) if upload_id and not file else None
+        filename = file.filename if file else session.filename if session else None
+        pipeline = None
+        generated = False
+        if _incremental_applies(filename is not None, action, quiz_mode, extractive_budget):
+            # Full-content generation: extraction overlaps with the map step
+            result, pipeline = await _generate_incremental(file, session, action, quiz_type, language, num_questions,
+                                                           difficulty_level, no_of_words, quiz_mode)
+            extraction = None
+            generated = True
         else:
-            logger.info(f"🔄 Processing URL: {url}")
-            text = process_url_selenium(url)
-            documents = [text]  # Wrap text as a single document
-            logger.info(f"✅ URL processing complete")
+            documents = await _extract_documents(file, url, session)
+            documents, extraction = await _preselect(documents, action, quiz_mode, extractive_budget)
 
         # Generate quiz or summary based on action
         if action == "quiz":
-            logger.info(f"🎯 Generating {quiz_type} quiz with {num_questions} questions")
-            result = await generate_quiz(documents, quiz_type, language, num_questions, difficulty_level)
+            if not generated:
+                logger.info(f"🎯 Generating {quiz_type} quiz with {num_questions} questions")
+                result = await generate_quiz(documents, quiz_type, language, num_questions, difficulty_level, quiz_mode)
+            if session is not None:
+                await chunked_upload_service.release(session)
             return JSONResponse(content={
                 "result": "quiz", 
                 "data": result,
                 "metadata": {
-                    "file_type": file.filename.split('.')[-1] if file else "url",
+                    "file_type": filename.split('.')[-1] if filename else "url",
                     "quiz_type": quiz_type,
                     "num_questions": len(result) if isinstance(result, list) else num_questions,
                     "difficulty": difficulty_level,
-                    "language": language
+                    "language": language,
+                    "quiz_mode": quiz_mode,
+                    "extraction": extraction,
+                    "pipeline": pipeline
                 }
             })
         elif action == "summary":
-            logger.info(f"📝 Generating summary with {no_of_words} words")
-            result = await generate_summary(documents, language, no_of_words)
+            if not generated:
+                logger.info(f"📝 Generating summary with {no_of_words} words")
+                result = await generate_summary(documents, language, no_of_words)
+            if session is not None:
+                await chunked_upload_service.release(session)
             return JSONResponse(content={
                 "result": "summary", 
                 "data": result,
                 "metadata": {
-                    "file_type": file.filename.split('.')[-1] if file else "url",
+                    "file_type": filename.split('.')[-1] if filename else "url",
                     "word_count": no_of_words,
-                    "language": language
+                    "language": language,
+                    "extraction": extraction,
+                    "pipeline": pipeline
                 }
             })
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in upload_resource: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/upload/stream")
+async def upload_resource_stream(
+    file: UploadFile = File(None),
+    url: str = Form(None),
+    quiz_type: str = Form("mcq"),
+    difficulty_level: str = Form("medium"),
+    num_questions: str = Form("10"),
+    language: str = Form("English"),
+    extractive_budget: Optional[int] = Form(None),
+    upload_id: Optional[str] = Form(None)
+):
+    """
+    Streaming variant of /upload for quizzes (Server-Sent Events).
+    Emits a `question` event as soon as each question is generated and validated,
+    then a `done` event with metadata, or an `error` event if generation fails midway.
+    """
+    if not file and not url and not upload_id:
+        raise HTTPException(status_code=400, detail="Either file, upload_id or URL must be provided")
+
+    _validate_quiz_params(quiz_type, difficulty_level, num_questions, language)
+
+    try:
+        session = await chunked_upload_service.resolve(upload_id) if upload_id and not file else None
+        filename = file.filename if file else session.filename if session else None
+        documents = await _extract_documents(file, url, session)
+        documents, extraction = await _preselect(documents, "quiz", "single", extractive_budget)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in upload_resource_stream: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    metadata = {
+        "file_type": filename.split('.')[-1] if filename else "url",
+        "quiz_type": quiz_type,
+        "difficulty": difficulty_level,
+        "language": language,
+        "extraction": extraction
+    }
+
+    async def event_stream():
+        count = 0
+        try:
+            async for question in generate_quiz_stream(documents, quiz_type, language, num_questions, difficulty_level):
+                count += 1
+                yield _sse_event("question", {"index": count, "question": question})
+            yield _sse_event("done", {"result": "quiz", "metadata": {**metadata, "num_questions": count}})
+            if session is not None:
+                await chunked_upload_service.release(session)
+        except HTTPException as e:
+            yield _sse_event("error", {"status_code": e.status_code, "detail": e.detail, "questions_sent": count})
+        except Exception as e:
+            logger.error(f"Error while streaming quiz: {str(e)}")
+            yield _sse_event("error", {"status_code": 500, "detail": str(e), "questions_sent": count})
+
+    logger.info(f"🎯 Streaming {quiz_type} quiz with {num_questions} questions")
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _youtube_bundle_response(video_ids, action, quiz_type, language, num_questions,
+                                   difficulty_level, no_of_words) -> Optional[dict]:
+    """The /you_tube_searcher response built from precomputed video bundles, or None for the live path"""
+    bundles = await youtube_content_cache.get_bundles(video_ids, language)
+    if not bundles:
+        return None
+    if action == "quiz":
+        questions = youtube_content_cache.quiz_from_bundles(bundles, quiz_type, difficulty_level, num_questions)
+        return {"result": "quiz", "data": questions} if questions else None
+    if action == "summary":
+        summary = await youtube_content_cache.summary_from_bundles(bundles, no_of_words, language)
+        return {"result": "summary", "data": summary} if summary else None
+    content_list = youtube_content_cache.content_from_bundles(bundles)
+    return {"result": "youtube_content", "data": json.dumps(content_list, ensure_ascii=False, indent=2)}
+
+
 async def smart_youtube_loader(url_results):
     """Smart loader with fallback to original method"""
     try:
@@ -815,11 +1202,10 @@ async def give_prompt_searcher(
         if query:
             combined_query = f"{query},{top_ranker}"
             url_results = await youtube_search(combined_query)
-            url_content = await smart_youtube_loader(url_results)
             
         elif youtube_url:
             logger.info(f"URL provided by user: {youtube_url}")
-            url_content = await smart_youtube_loader(youtube_url)
+            url_results = youtube_url
         else:
             raise HTTPException(status_code=400, detail={
                 "message": "Validation Error",
@@ -829,6 +1215,17 @@ async def give_prompt_searcher(
                 }]
             })
         
+        # Hot videos are answered from their precomputed bundles
+        video_ids = video_ids_from(url_results)
+        await youtube_content_cache.record_hits(video_ids)
+        bundled = await _youtube_bundle_response(
+            video_ids, action, quiz_type, language, num_questions, difficulty_level, no_of_words
+        )
+        if bundled is not None:
+            logger.info(f"YouTube {action} served from bundles for {len(video_ids)} videos")
+            return JSONResponse(content=bundled)
+        
+        url_content = await smart_youtube_loader(url_results)
         content_list = []
         
         if action == "quiz":
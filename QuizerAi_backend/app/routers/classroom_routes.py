@@ -1449,9 +1449,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query ,BackgroundTasks 
 from sqlalchemy.orm import Session ,joinedload
 from fastapi.responses import StreamingResponse
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+# openpyxl is imported inside the Excel export endpoints (only they need it)
 import io
 from datetime import datetime
 import re
@@ -2420,6 +2418,10 @@ async def export_assignment_results_excel(
     db: Session = Depends(get_db)
 ):
     """Export assignment results to Excel file"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
+    
     # Verify teacher owns the classroom
     classroom = db.query(Classroom).filter(
         Classroom.id == classroom_id,
@@ -2678,6 +2680,10 @@ async def export_classroom_performance_excel(
     db: Session = Depends(get_db)
 ):
     """Export all students' performance across all assignments in Excel format"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
+    
     # Verify teacher owns the classroom
     classroom = db.query(Classroom).filter(
         Classroom.id == classroom_id,
@@ -16,10 +16,12 @@ from pydantic import BaseModel, Field, validator
 
 # Import your existing components
 from app.services.enhanced_youtube_service import (
-    EnhancedYouTubeService, 
     TranscriptionResult,
-    enhanced_youtube_loader
+    enhanced_youtube_loader,
+    youtube_service
 )
+from app.services.transcript_store import transcript_store
+from app.services.youtube_content_cache import video_ids_from, youtube_content_cache
 from app.models.generate_quizes import (
     generate_quiz,
     generate_summary,
@@ -92,10 +94,6 @@ class ContentGenerationResponse(BaseModel):
     processing_time: float
 
 
-# Initialize service
-youtube_service = EnhancedYouTubeService()
-
-
 @enhanced_youtube_router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_youtube_videos(request: YouTubeURLRequest):
     """
@@ -117,6 +115,10 @@ async def transcribe_youtube_videos(request: YouTubeURLRequest):
                 for vid in valid_ids
             ]
             results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Later (non-forced) requests for these videos are served from the transcript store
+            for result in results:
+                if isinstance(result, TranscriptionResult) and result.transcript:
+                    await transcript_store.set(youtube_service.record_from_result(result))
         else:
             # Use comprehensive fallback strategy
             results = await youtube_service.process_multiple_videos(request.urls)
@@ -298,6 +300,34 @@ async def generate_summary_from_youtube(request: SummaryRequest):
         raise HTTPException(status_code=500, detail=f"Summary generation failed: {str(e)}")
 
 
+async def _bundle_content(video_ids: List[str], request: YouTubeSearchRequest):
+    """(transcription_results, content) from precomputed video bundles, or None for the live path"""
+    bundles = await youtube_content_cache.get_bundles(video_ids, request.language)
+    if not bundles:
+        return None
+    
+    content = {}
+    if request.generate_summary:
+        summary = await youtube_content_cache.summary_from_bundles(bundles, "500", request.language)
+        if summary is None:
+            return None
+        content["summary"] = summary
+    if request.generate_quiz:
+        quiz_questions = youtube_content_cache.quiz_from_bundles(bundles, "mcq", "medium", "10")
+        if quiz_questions is None:
+            return None
+        content["quiz"] = quiz_questions
+    
+    transcription_results = [{
+        "video_id": bundle["video_id"],
+        "url": f"https://youtube.com/watch?v={bundle['video_id']}",
+        "success": True,
+        "source": bundle["transcript_source"],
+        "confidence_score": bundle["confidence_score"]
+    } for bundle in bundles]
+    return transcription_results, content
+
+
 @enhanced_youtube_router.post("/search-and-generate", response_model=ContentGenerationResponse)
 async def search_youtube_and_generate_content(request: YouTubeSearchRequest):
     """
@@ -306,8 +336,8 @@ async def search_youtube_and_generate_content(request: YouTubeSearchRequest):
     try:
         start_time = asyncio.get_event_loop().time()
         
-        # Search YouTube using existing function
-        search_results = await youtube_search(request.query)
+        # Search YouTube using existing function (cached per query and result count)
+        search_results = await youtube_search(f"{request.query},{request.num_videos}")
         
         # Parse search results to extract URLs
         if isinstance(search_results, str):
@@ -321,6 +351,28 @@ async def search_youtube_and_generate_content(request: YouTubeSearchRequest):
         if not urls:
             raise HTTPException(status_code=404, detail="No YouTube videos found for the query")
         
+        # Hot videos are answered from their precomputed bundles
+        video_ids = video_ids_from(urls)
+        await youtube_content_cache.record_hits(video_ids)
+        bundled = await _bundle_content(video_ids, request)
+        if bundled is not None:
+            transcription_results, content = bundled
+            return ContentGenerationResponse(
+                success=True,
+                message=f"Successfully processed {len(urls)} videos from search query",
+                transcription_results=transcription_results,
+                content={
+                    **content,
+                    "search_metadata": {
+                        "query": request.query,
+                        "videos_found": len(urls),
+                        "videos_processed": len(transcription_results),
+                        "served_from_bundles": True
+                    }
+                },
+                processing_time=asyncio.get_event_loop().time() - start_time
+            )
+        
         # Get transcriptions
         documents = await enhanced_youtube_loader(urls)
         
@@ -491,13 +543,13 @@ async def batch_process_youtube_videos(
             # Save results or send notification
             if notification_webhook:
                 # Send results to webhook
-                import aiohttp
-                async with aiohttp.ClientSession() as session:
-                    await session.post(notification_webhook, json={
-                        "user_id": user_id,
-                        "status": "completed", 
-                        "results": [r.dict() for r in all_results]
-                    })
+                session = await youtube_service.get_session()
+                async with session.post(notification_webhook, json={
+                    "user_id": user_id,
+                    "status": "completed", 
+                    "results": [r.dict() for r in all_results]
+                }):
+                    pass
             
             logger.info(f"Batch processing completed for user {user_id}: {len(all_results)} videos")
             
@@ -505,13 +557,13 @@ async def batch_process_youtube_videos(
             logger.error(f"Batch processing failed for user {user_id}: {e}")
             
             if notification_webhook:
-                import aiohttp
-                async with aiohttp.ClientSession() as session:
-                    await session.post(notification_webhook, json={
-                        "user_id": user_id,
-                        "status": "failed",
-                        "error": str(e)
-                    })
+                session = await youtube_service.get_session()
+                async with session.post(notification_webhook, json={
+                    "user_id": user_id,
+                    "status": "failed",
+                    "error": str(e)
+                }):
+                    pass
     
     # Add to background tasks
     background_tasks.add_task(process_batch)
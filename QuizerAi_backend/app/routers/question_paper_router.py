@@ -5,7 +5,7 @@ Production-ready implementation for mathematical and complex content extraction
 """
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import logging
@@ -22,6 +22,13 @@ from app.services.dots_ocr_service import (
     batch_process_question_papers
 )
 from app.models.enhanced_question_extractor import extract_questions_from_structured_content
+from app.services.upload_ingestion import spool_upload
+from app.services.ocr_engine import ocr_engine
+from app.services.pdf_engine import pdf_engine
+from app.services.cache_service import CacheService
+from app.config.redis_config import redis_service
+from app.services.question_paper_pipeline import cancel_upload_cleanup, save_upload_files
+from app.tasks.question_paper_tasks import process_question_paper_async
 from app.models.question_paper_models import QuestionPaper, PaperQuestion, QuestionType, PaperStatus
 from app.models.user_models import User
 from app.database.connection import get_db
@@ -34,6 +41,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
+cache_service = CacheService()
+
+# Seconds between task status reads while streaming job progress
+QUESTION_PAPER_EVENT_POLL = 1.0
+# Seconds a failure stays claimed by the /retry call that re-queued it
+QUESTION_PAPER_RETRY_GUARD = 3600
 
 # Enhanced Pydantic models with mathematical content support
 class QuestionPaperMetadata(BaseModel):
@@ -157,6 +170,33 @@ async def validate_file_for_dots_ocr(file: UploadFile, max_size_mb: int = 50) ->
         logger.error(f"Error validating file: {str(e)}")
         raise HTTPException(status_code=400, detail="Error validating file")
 
+async def extract_text_with_ocr_engine(files: List[UploadFile]) -> str:
+    """
+    Text of the uploaded papers through the parallel OCR engine: PDF pages with
+    a text layer are read directly, scanned pages and images are OCR'd one page
+    per task across the extraction process pool (all images of the upload at once)
+    """
+    uploads = []
+    try:
+        for file in files:
+            uploads.append(await spool_upload(file, allowed_kinds=("pdf", "image")))
+
+        image_paths = [upload.path for upload in uploads if upload.kind == "image"]
+        image_text = dict(zip(image_paths, await ocr_engine.ocr_images(image_paths))) if image_paths else {}
+
+        sections = []
+        for upload in uploads:
+            if upload.kind == "pdf":
+                pages = [f"Page {number}\n{text}" async for number, text in pdf_engine.stream_pages(upload.path)]
+                text = "\n\n".join(pages)
+            else:
+                text = image_text[upload.path]
+            sections.append(f"=== {upload.filename} ===\n{text}")
+        return "\n\n".join(sections)
+    finally:
+        for upload in uploads:
+            upload.cleanup()
+
 def format_enhanced_questions_for_frontend(
     questions_data: List[Dict], 
     metadata: Dict
@@ -208,6 +248,7 @@ async def upload_question_paper_with_dots_ocr(
     """
     Enhanced question paper upload with dots.ocr processing
     Handles mathematical symbols, complex layouts, and multilingual content
+    (large or multi-file papers: use /upload/async to avoid request timeouts)
     """
     start_time = asyncio.get_event_loop().time()
     
@@ -239,9 +280,12 @@ async def upload_question_paper_with_dots_ocr(
         
         logger.info(f"Starting dots.ocr processing for {len(files)} files")
         
-        # Process files with dots.ocr
+        # Process files with dots.ocr (ocr_only: parallel Tesseract OCR engine)
         try:
-            if len(files) == 1:
+            if extraction_mode == "ocr_only":
+                structured_content = await extract_text_with_ocr_engine(files)
+                processed_files = [f.filename for f in files if f.filename]
+            elif len(files) == 1:
                 # Single file processing
                 structured_content = await process_question_paper_with_dots_ocr(
                     files[0], 
@@ -315,7 +359,7 @@ async def upload_question_paper_with_dots_ocr(
             "processed_files": processed_files,
             "content_length": len(structured_content),
             "processing_time": processing_time,
-            "extraction_method": "dots.ocr"
+            "extraction_method": "tesseract" if extraction_mode == "ocr_only" else "dots.ocr"
         })
         
         extraction_details = {
@@ -347,6 +391,200 @@ async def upload_question_paper_with_dots_ocr(
             detail=f"Enhanced processing failed after {processing_time:.2f}s: {str(e)}"
         )
 
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _job_key(task_id: str) -> str:
+    return f"question_paper:{task_id}:job"
+
+async def _get_owned_job(task_id: str, current_user: dict) -> Dict[str, Any]:
+    """The stored background job, if it belongs to the current user"""
+    job = await asyncio.to_thread(cache_service.get, _job_key(task_id))
+    if not isinstance(job, dict):
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if job.get("user_id") != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return job
+
+def _claim_retry(task_id: str, failure: Dict[str, Any]) -> bool:
+    """Let one of several concurrent /retry calls for the same failure through"""
+    try:
+        client = redis_service.get_sync_client()
+        # Each failure status has its own timestamp, so a later failure can be retried again
+        key = f"question_paper:{task_id}:retry:{failure.get('updated_at')}"
+        return bool(client.set(key, "1", nx=True, ex=QUESTION_PAPER_RETRY_GUARD))
+    except Exception as e:
+        logger.warning(f"Could not claim retry for {task_id}: {e}")
+        return True
+
+def _enqueue_question_paper_job(task_id: str, job: Dict[str, Any]):
+    process_question_paper_async.delay(
+        task_id=task_id,
+        files=job["files"],
+        extraction_mode=job["extraction_mode"],
+        generate_answers=job["generate_answers"],
+        user_id=job["user_id"]
+    )
+
+@router.post("/upload/async")
+async def upload_question_paper_async(
+    files: List[UploadFile] = File(...),
+    title: str = Form(...),
+    subject: str = Form(...),
+    exam_type: Optional[str] = Form(None),
+    year: Optional[int] = Form(None),
+    difficulty: str = Form("medium"),
+    time_limit: int = Form(180),
+    instructions: Optional[str] = Form(None),
+    is_public: bool = Form(False),
+    generate_answers: bool = Form(True),
+    extraction_mode: str = Form("full_layout"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Background variant of /upload for large and multi-file papers.
+    Returns a task_id immediately; pages are extracted and turned into questions
+    concurrently by a Celery job. Follow it with GET /upload/{task_id}/events
+    (Server-Sent Events) or /api/task-status/{task_id}.
+    """
+    try:
+        metadata = QuestionPaperMetadata(
+            title=title,
+            subject=subject,
+            exam_type=exam_type,
+            year=year,
+            difficulty=difficulty,
+            time_limit=time_limit,
+            instructions=instructions,
+            is_public=is_public,
+            generate_answers=generate_answers,
+            extraction_mode=extraction_mode
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
+
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+
+    task_id = str(uuid.uuid4())
+    uploads = []
+    try:
+        for file in files:
+            # Size limit and magic bytes are checked while streaming to disk
+            uploads.append(await spool_upload(file, allowed_kinds=("pdf", "image")))
+        saved = await asyncio.to_thread(save_upload_files, task_id, uploads)
+    finally:
+        for upload in uploads:
+            upload.cleanup()
+
+    job = {
+        "files": saved,
+        "extraction_mode": extraction_mode,
+        "generate_answers": generate_answers,
+        "user_id": current_user["id"],
+        "metadata": metadata.dict()
+    }
+    # Kept for /retry; page checkpoints live alongside it
+    cache_service.set(_job_key(task_id), job, ttl=86400)
+    cache_service.set_task_status(task_id, {
+        'status': 'queued',
+        'progress': 0,
+        'message': f'Queued {len(saved)} files',
+        'questions': []
+    })
+    _enqueue_question_paper_job(task_id, job)
+
+    logger.info(f"Queued question paper {task_id}: {len(saved)} files, mode {extraction_mode}")
+    return JSONResponse(status_code=202, content={
+        "status": "accepted",
+        "task_id": task_id,
+        "message": "Question paper extraction started",
+        "status_url": f"/api/task-status/{task_id}",
+        "events_url": f"/api/question-papers/upload/{task_id}/events"
+    })
+
+@router.get("/upload/{task_id}/events")
+async def stream_question_paper_progress(task_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Server-Sent Events for a background question paper job: a `progress` event
+    with the questions found so far whenever another page finishes, then `done`
+    with the final result or `error` (the job can be resumed with /retry)
+    """
+    await _get_owned_job(task_id, current_user)
+    if await cache_service.get_task_status(task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def event_stream():
+        reported = -1
+        while True:
+            status = await cache_service.get_task_status(task_id) or {}
+            state = status.get("status")
+            if state == "completed":
+                yield _sse_event("done", status.get("result"))
+                return
+            if state == "failed" and not status.get("retrying"):
+                yield _sse_event("error", {"detail": status.get("error"), "task_id": task_id})
+                return
+            completed = status.get("pages_completed", 0)
+            if completed != reported:
+                reported = completed
+                yield _sse_event("progress", {
+                    "pages_completed": completed,
+                    "pages_total": status.get("pages_total"),
+                    "questions": status.get("questions", [])
+                })
+            await asyncio.sleep(QUESTION_PAPER_EVENT_POLL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/upload/{task_id}/retry")
+async def retry_question_paper_job(task_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Re-run a job that failed for good; pages that already finished are not processed again.
+    409 while the job is queued, running, being retried by Celery or completed.
+    """
+    job = await _get_owned_job(task_id, current_user)
+    status = await cache_service.get_task_status(task_id) or {}
+    if status.get("status") != "failed" or status.get("retrying"):
+        raise HTTPException(status_code=409, detail={
+            "message": "Only failed jobs can be retried",
+            "status": status.get("status"),
+            "retrying": bool(status.get("retrying"))
+        })
+    if status.get("resumable") is False:
+        # The stored files are gone and the same input would fail the same way
+        raise HTTPException(status_code=409, detail={
+            "message": "This job cannot be retried, upload the paper again",
+            "status": "failed",
+            "error": status.get("error")
+        })
+    if not await asyncio.to_thread(_claim_retry, task_id, status):
+        raise HTTPException(status_code=409, detail={"message": "A retry is already starting", "status": "failed"})
+    try:
+        await asyncio.to_thread(cancel_upload_cleanup, task_id, job["files"])
+    except Exception as e:
+        logger.warning(f"Could not cancel the file cleanup of question paper {task_id}: {e}")
+
+    cache_service.set_task_status(task_id, {
+        'status': 'queued',
+        'progress': status.get('progress', 0),
+        'message': 'Resuming from the last completed page',
+        'pages_total': status.get('pages_total'),
+        'pages_completed': status.get('pages_completed', 0),
+        'questions': status.get('questions', [])
+    })
+    _enqueue_question_paper_job(task_id, job)
+    return {
+        "status": "accepted",
+        "task_id": task_id,
+        "events_url": f"/api/question-papers/upload/{task_id}/events"
+    }
+
 @router.post("/save", response_model=dict)
 async def save_enhanced_question_paper(
     request: EnhancedQuestionPaperSaveRequest,
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import shutil
+import asyncio
 import os
 from pathlib import Path
 import uuid
@@ -11,12 +11,14 @@ from datetime import datetime, timedelta
 from app.database.feedback import FeedbackCreate, FeedbackResponse, FeedbackStats, FeedbackListResponse
 from app.database.connection import get_db
 from app.models.feedbackmodels import Feedback
+from app.services.object_store import get_object_store
+from app.services.upload_ingestion import UPLOAD_CHUNK_BYTES
 
 router = APIRouter()
 
-# Configure upload directory
-UPLOAD_DIR = Path("uploads/feedback")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Screenshots are stored under this prefix of the object store
+# (the local store is rooted at uploads/, so they are still served from /uploads/feedback)
+SCREENSHOT_PREFIX = "feedback"
 
 @router.post("/", response_model=FeedbackResponse, status_code=status.HTTP_201_CREATED)
 async def create_feedback(
@@ -74,6 +76,7 @@ async def upload_screenshots(
     """
     try:
         uploaded_files = []
+        store = get_object_store()
         
         for file in files:
             # Validate file type
@@ -83,22 +86,28 @@ async def upload_screenshots(
                     detail=f"File {file.filename} is not an image"
                 )
             
-            # Generate unique filename
+            # Generate unique object key
             file_extension = Path(file.filename).suffix
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            file_path = UPLOAD_DIR / unique_filename
+            key = f"{SCREENSHOT_PREFIX}/{uuid.uuid4()}{file_extension}"
             
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            # Stream into the object store chunk by chunk
+            writer = await asyncio.to_thread(store.open_writer, key)
+            try:
+                while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                    await asyncio.to_thread(writer.write, chunk)
+                await asyncio.to_thread(writer.commit)
+            except BaseException:
+                await asyncio.to_thread(writer.discard)
+                raise
             
-            uploaded_files.append(str(file_path))
+            uploaded_files.append(key)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "message": f"Successfully uploaded {len(uploaded_files)} files",
-                "file_paths": uploaded_files
+                "file_paths": [store.location(key) for key in uploaded_files],
+                "object_keys": uploaded_files
             }
         )
         
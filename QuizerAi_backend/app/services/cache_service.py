@@ -135,16 +135,18 @@ class CacheService:
         key = f"document:{doc_hash}"
         return await self.get_async(key)
     
-    # Transcript caching
-    async def cache_transcript(self, video_id: str, transcript: str, ttl: int = 86400):
-        """Cache YouTube transcript (24 hours)"""
-        key = f"transcript:{video_id}"
-        await self.set_async(key, transcript, ttl)
+    # Transcript caching (kept for compatibility: backed by app.services.transcript_store)
+    async def cache_transcript(self, video_id: str, transcript: str, ttl: int = 86400, source: str = "unknown"):
+        """Store a YouTube transcript (memory, Redis and disk tiers; ttl is the store's)"""
+        from app.services.transcript_store import TranscriptRecord, transcript_store
+        await transcript_store.set(TranscriptRecord(video_id=video_id, language="en", transcript=transcript,
+                                                    source=source))
     
     async def get_cached_transcript(self, video_id: str) -> Optional[str]:
-        """Get cached transcript"""
-        key = f"transcript:{video_id}"
-        return await self.get_async(key)
+        """Get a stored transcript (None if unknown or known to be unavailable)"""
+        from app.services.transcript_store import transcript_store
+        record = await transcript_store.get(video_id)
+        return record.transcript if record else None
     
     # Rate limiting
     async def check_rate_limit(self, user_id: int, action: str, limit: int = 10, window: int = 60) -> bool:
@@ -0,0 +1,253 @@
+# app/services/chunked_upload.py
+"""
+Resumable chunked uploads
+A client initiates an upload session for a file of known size, PUTs the file
+in fixed-size parts (any order, any part retried on its own after a network
+error), checks which parts arrived, and completes the session. Each part is
+streamed from the request body into a multipart upload of the object store
+(see object_store for how each backend holds a part until it is stored); the
+store assembles the parts on completion. The finished object is then read by
+key from any API node or Celery worker (upload_ingestion.open_object) and
+deleted once it has been ingested. Sessions that expire before that are
+cleaned up when next loaded and by sweep_expired (a periodic Celery task).
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import AsyncIterable, Dict, Iterable, List
+
+from fastapi import HTTPException
+
+from app.services.object_store import ObjectNotFound, get_object_store
+from app.services.upload_ingestion import (
+    FILE_KINDS, UPLOAD_MAX_BYTES, _MAGIC_PREFIX_BYTES, _format_limit, check_magic, detect_kind
+)
+
+logger = logging.getLogger(__name__)
+
+# Size of every part but the last (S3 requires at least 5MB for all but the last part)
+CHUNKED_UPLOAD_PART_BYTES = int(os.getenv("CHUNKED_UPLOAD_PART_BYTES", 8 * 1024 * 1024))
+# Sessions (and completed files never ingested) are discarded after this long
+CHUNKED_UPLOAD_SESSION_TTL = int(os.getenv("CHUNKED_UPLOAD_SESSION_TTL", 24 * 3600))
+
+_SESSION_PREFIX = ".uploads"
+
+
+@dataclass
+class UploadSession:
+    session_id: str
+    key: str  # object key of the finished file
+    store_upload_id: str
+    filename: str
+    content_type: str
+    kind: str
+    size: int
+    part_size: int
+    created_at: float
+    completed: bool = False
+
+    @property
+    def total_parts(self) -> int:
+        return max(1, -(-self.size // self.part_size))
+
+    def expected_part_size(self, part_number: int) -> int:
+        if part_number < self.total_parts:
+            return self.part_size
+        return self.size - self.part_size * (self.total_parts - 1)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["total_parts"] = self.total_parts
+        return data
+
+
+class ChunkedUploadService:
+    """Upload sessions; the session manifest is itself an object, so any node can serve any part"""
+
+    def __init__(self, store=None, part_bytes: int = None, max_bytes: int = None):
+        self._store = store
+        self.part_bytes = part_bytes or CHUNKED_UPLOAD_PART_BYTES
+        self.max_bytes = max_bytes or UPLOAD_MAX_BYTES
+
+    @property
+    def store(self):
+        return self._store or get_object_store()
+
+    def _manifest_key(self, session_id: str) -> str:
+        return f"{_SESSION_PREFIX}/{session_id}.json"
+
+    def _save(self, session: UploadSession):
+        self.store.put_bytes(self._manifest_key(session.session_id), json.dumps(asdict(session)).encode("utf-8"))
+
+    def _load(self, session_id: str) -> UploadSession:
+        if not session_id.isalnum():
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        try:
+            data = json.loads(self.store.get_bytes(self._manifest_key(session_id)))
+        except ObjectNotFound:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        session = UploadSession(**data)
+        if self._expired(session):
+            try:
+                self._discard(session)
+            except Exception as e:
+                logger.warning(f"Could not discard expired upload session {session_id}: {e}")
+            raise HTTPException(status_code=410, detail="Upload session expired")
+        return session
+
+    @staticmethod
+    def _expired(session: UploadSession, now: float = None) -> bool:
+        return (now or time.time()) - session.created_at > CHUNKED_UPLOAD_SESSION_TTL
+
+    def _discard(self, session: UploadSession):
+        """Drop the session's parts (or its finished file) and then its manifest"""
+        if session.completed:
+            self.store.delete(session.key)
+        else:
+            self.store.abort_multipart_upload(session.key, session.store_upload_id)
+        self.store.delete(self._manifest_key(session.session_id))
+
+    async def initiate(self,
+                       filename: str,
+                       size: int,
+                       content_type: str = None,
+                       allowed_kinds: Iterable[str] = None,
+                       prefix: str = "documents") -> UploadSession:
+        allowed = tuple(allowed_kinds or FILE_KINDS)
+        kind = detect_kind(filename, content_type)
+        if kind not in allowed:
+            extensions = ", ".join(ext.lstrip(".").upper() for k in allowed for ext in FILE_KINDS[k][0])
+            raise HTTPException(status_code=400, detail=f"Unsupported file type. Supported formats: {extensions}")
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="File size must be positive")
+        if size > self.max_bytes:
+            raise HTTPException(status_code=400, detail=f"File size exceeds {_format_limit(self.max_bytes)}")
+
+        session_id = uuid.uuid4().hex
+        extension = os.path.splitext(filename)[1].lower() or FILE_KINDS[kind][0][0]
+        key = f"{prefix}/{session_id}{extension}"
+        store_upload_id = await asyncio.to_thread(self.store.create_multipart_upload, key)
+        session = UploadSession(session_id=session_id, key=key, store_upload_id=store_upload_id,
+                                filename=filename, content_type=content_type, kind=kind, size=size,
+                                part_size=self.part_bytes, created_at=time.time())
+        await asyncio.to_thread(self._save, session)
+        logger.info(f"Upload session {session_id}: {filename} ({size} bytes, {session.total_parts} parts)")
+        return session
+
+    async def put_part(self, session_id: str, part_number: int, chunks: AsyncIterable[bytes]) -> Dict:
+        """Stream one part into the store; its size must match the session's part layout exactly"""
+        session = await asyncio.to_thread(self._load, session_id)
+        if session.completed:
+            raise HTTPException(status_code=409, detail="Upload session already completed")
+        if not 1 <= part_number <= session.total_parts:
+            raise HTTPException(status_code=400, detail=f"Part number must be between 1 and {session.total_parts}")
+        expected = session.expected_part_size(part_number)
+        extension = os.path.splitext(session.key)[1]
+
+        try:
+            writer = await asyncio.to_thread(
+                self.store.open_part_writer, session.key, session.store_upload_id, part_number
+            )
+        except ObjectNotFound:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if part_number == 1 and writer.size == 0:
+                    check_magic(session.kind, chunk[:_MAGIC_PREFIX_BYTES], extension)
+                if writer.size + len(chunk) > expected:
+                    raise HTTPException(status_code=400, detail=f"Part {part_number} must be {expected} bytes")
+                await asyncio.to_thread(writer.write, chunk)
+            if writer.size != expected:
+                raise HTTPException(status_code=400,
+                                    detail=f"Part {part_number} must be {expected} bytes, got {writer.size}")
+            etag = await asyncio.to_thread(writer.commit)
+        except BaseException:
+            await asyncio.to_thread(writer.discard)
+            raise
+        return {"session_id": session_id, "part_number": part_number, "size": expected, "etag": etag}
+
+    async def status(self, session_id: str) -> Dict:
+        session = await asyncio.to_thread(self._load, session_id)
+        data = session.to_dict()
+        if session.completed:
+            data.update(received_parts=list(range(1, session.total_parts + 1)), missing_parts=[])
+            return data
+        parts = await self._parts(session)
+        received = sorted(part["part_number"] for part in parts
+                          if part["size"] == session.expected_part_size(part["part_number"]))
+        data["received_parts"] = received
+        data["missing_parts"] = sorted(set(range(1, session.total_parts + 1)) - set(received))
+        return data
+
+    async def _parts(self, session: UploadSession) -> List[Dict]:
+        try:
+            return await asyncio.to_thread(self.store.list_parts, session.key, session.store_upload_id)
+        except ObjectNotFound:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+
+    async def complete(self, session_id: str) -> UploadSession:
+        """Assemble the parts into the final object (idempotent once completed)"""
+        session = await asyncio.to_thread(self._load, session_id)
+        if session.completed:
+            return session
+
+        parts = {part["part_number"]: part for part in await self._parts(session)}
+        missing = [number for number in range(1, session.total_parts + 1)
+                   if number not in parts or parts[number]["size"] != session.expected_part_size(number)]
+        if missing:
+            raise HTTPException(status_code=409, detail={"message": "Upload incomplete", "missing_parts": missing})
+
+        await asyncio.to_thread(
+            self.store.complete_multipart_upload, session.key, session.store_upload_id,
+            [(number, parts[number].get("etag", "")) for number in range(1, session.total_parts + 1)]
+        )
+        session.completed = True
+        await asyncio.to_thread(self._save, session)
+        logger.info(f"Upload session {session_id} completed: {session.key}")
+        return session
+
+    async def abort(self, session_id: str):
+        session = await asyncio.to_thread(self._load, session_id)
+        await asyncio.to_thread(self._discard, session)
+
+    async def release(self, session: UploadSession):
+        """The session's file has been ingested: delete it and the session"""
+        try:
+            await asyncio.to_thread(self._discard, session)
+        except Exception as e:
+            # sweep_expired removes it later
+            logger.warning(f"Could not release upload session {session.session_id}: {e}")
+
+    async def resolve(self, session_id: str) -> UploadSession:
+        """A completed session, for endpoints that take an uploaded object by session id"""
+        session = await asyncio.to_thread(self._load, session_id)
+        if not session.completed:
+            raise HTTPException(status_code=409, detail="Upload session not completed")
+        return session
+
+    def sweep_expired(self, now: float = None) -> int:
+        """Discard every expired session (abandoned parts, files never ingested); blocking"""
+        swept = 0
+        for key in self.store.list_keys(f"{_SESSION_PREFIX}/"):
+            if not key.endswith(".json"):
+                continue
+            try:
+                session = UploadSession(**json.loads(self.store.get_bytes(key)))
+                if self._expired(session, now):
+                    self._discard(session)
+                    swept += 1
+            except ObjectNotFound:
+                continue
+            except Exception as e:
+                logger.warning(f"Could not sweep upload session {key}: {e}")
+        return swept
+
+
+# Global instance
+chunked_upload_service = ChunkedUploadService()
@@ -1,5 +1,4 @@
 # IN this we are writing the code to give process the data 
-from langchain_community.document_loaders import PyPDFLoader  # Fixed deprecated import
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import pytesseract
 from PIL import Image
@@ -12,8 +11,6 @@ import tempfile
 import shutil
 import re
 from langchain_community.document_loaders import SeleniumURLLoader
-import xml.etree.ElementTree as ET
-import zipfile
 from pathlib import Path
 from langchain.schema import Document
 
@@ -59,50 +56,24 @@ def sanitize_filename(filename: str) -> str:
     sanitized = re.sub(r'\s+', '_', sanitized)
     return sanitized
 
-def process_pdf(file: UploadFile):
+def process_pdf(file: UploadFile, max_pages: int = None):
     """
-    Process PDF files using PyPDFLoader and split into chunks.
+    Process PDF files with the PyMuPDF engine and split into chunks.
     Returns a list of LangChain Document objects.
+    Prefer process_pdf_path with a spooled upload (app.services.upload_ingestion).
     """
     temp_path = None
     try:
         # Reset file pointer to beginning
         file.file.seek(0)
         
-        # Sanitize filename
-        safe_filename = sanitize_filename(file.filename)
-        
         # Create temporary file with proper extension
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf', prefix='upload_') as tmp_file:
             temp_path = tmp_file.name
             # Copy uploaded file content to temporary file
             shutil.copyfileobj(file.file, tmp_file)
         
-        # Verify file was created and has content
-        if not os.path.exists(temp_path):
-            raise FileNotFoundError(f"Temporary file was not created: {temp_path}")
-        
-        file_size = os.path.getsize(temp_path)
-        if file_size == 0:
-            raise ValueError(f"Uploaded file is empty: {file.filename}")
-        
-        logger.info(f"Temporary file created: {temp_path} (size: {file_size} bytes)")
-        
-        # Load and split PDF
-        loader = PyPDFLoader(temp_path)
-        documents = loader.load()
-        
-        if not documents:
-            raise ValueError(f"No content extracted from PDF: {file.filename}")
-        
-        documents = text_splitter.split_documents(documents)
-        
-        logger.info(f"Processed PDF: {file.filename}, {len(documents)} chunks")
-        return documents
-        
-    except Exception as e:
-        logger.error(f"Error processing PDF {file.filename}: {str(e)}")
-        raise HTTPException(status_code=400, detail=f"Error processing PDF: {str(e)}")
+        return process_pdf_path(temp_path, file.filename, max_pages=max_pages)
     
     finally:
         # Clean up temporary file in finally block to ensure cleanup
@@ -113,6 +84,47 @@ def process_pdf(file: UploadFile):
             except Exception as cleanup_error:
                 logger.warning(f"Failed to cleanup temporary file {temp_path}: {cleanup_error}")
 
+def process_pdf_path(path: str, filename: str = None, max_pages: int = None):
+    """
+    Process a PDF already on disk (e.g. a spooled upload) with the PyMuPDF engine and split into chunks.
+    Runs serially in the calling process (Celery task, extraction worker); async callers
+    use pdf_engine.extract_documents to fan pages out across the process pool.
+    Returns a list of LangChain Document objects.
+    """
+    from app.services.pdf_engine import pdf_engine
+
+    filename = filename or os.path.basename(path)
+    try:
+        file_size = os.path.getsize(path)
+        if file_size == 0:
+            raise ValueError(f"Uploaded file is empty: {filename}")
+        
+        documents = pdf_engine.extract_documents_sync(path, filename, max_pages=max_pages, splitter=text_splitter)
+        
+        logger.info(f"Processed PDF: {filename} ({file_size} bytes), {len(documents)} chunks")
+        return documents
+        
+    except Exception as e:
+        logger.error(f"Error processing PDF {filename}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Error processing PDF: {str(e)}")
+
+def process_image_path(path: str, filename: str = None):
+    """
+    OCR an image already on disk (e.g. a spooled upload): preprocessed and
+    cached per image by app.services.ocr_engine.
+    Returns a single text string.
+    """
+    from app.services.ocr_engine import ocr_image_file
+
+    filename = filename or os.path.basename(path)
+    try:
+        text, _ = ocr_image_file(path)
+        logger.info(f"Processed image: {filename}, {len(text)} characters")
+        return text
+    except Exception as e:
+        logger.error(f"Error processing image {filename}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
+
 def process_image(file: UploadFile):
     """
     Process image files using OCR.
@@ -155,177 +167,55 @@ class PowerPointProcessor:
             chunk_size=2000, 
             chunk_overlap=200
         )
-        
-        # XML namespaces for PowerPoint
-        self.namespaces = {
-            'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-            'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-            'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-        }
     
     def process_pptx(self, file: UploadFile):
         """
         Process PPTX files following Quizerai's pattern.
         Returns a list of LangChain Document objects - same as PDF processing.
+        The archive is read straight from the upload's file object (no temp copy).
         """
-        temp_path = None
-        temp_dir = None
-        
         try:
             # Reset file pointer to beginning (same as PDF processing)
             file.file.seek(0)
-            
-            # Sanitize filename (same function as PDF)
-            safe_filename = sanitize_filename(file.filename)
-            
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pptx', prefix='upload_') as tmp_file:
-                temp_path = tmp_file.name
-                shutil.copyfileobj(file.file, tmp_file)
-            
-            # Verify file was created
-            if not os.path.exists(temp_path):
-                raise FileNotFoundError(f"Temporary file was not created: {temp_path}")
-            
-            file_size = os.path.getsize(temp_path)
-            if file_size == 0:
-                raise ValueError(f"Uploaded file is empty: {file.filename}")
-            
-            logger.info(f"Temporary PPTX file created: {temp_path} (size: {file_size} bytes)")
-            
-            # Extract PowerPoint content
-            documents = self._extract_pptx_content(temp_path)
-            
-            if not documents:
-                raise ValueError(f"No content extracted from PowerPoint: {file.filename}")
-            
-            # Split documents into chunks (same as PDF processing)
-            documents = self.text_splitter.split_documents(documents)
-            
-            logger.info(f"Processed PowerPoint: {file.filename}, {len(documents)} chunks")
-            return documents
-            
+            return self._split_slides(file.file, file.filename)
         except Exception as e:
             logger.error(f"Error processing PowerPoint {file.filename}: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Error processing PowerPoint: {str(e)}")
-        
-        finally:
-            # Clean up temporary files
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                    logger.info(f"Cleaned up temporary file: {temp_path}")
-                except Exception as cleanup_error:
-                    logger.warning(f"Failed to cleanup temporary file {temp_path}: {cleanup_error}")
-            
-            if temp_dir and os.path.exists(temp_dir):
-                try:
-                    shutil.rmtree(temp_dir)
-                except Exception as cleanup_error:
-                    logger.warning(f"Failed to cleanup temporary directory {temp_dir}: {cleanup_error}")
     
-    def _extract_pptx_content(self, file_path: str):
+    def process_pptx_path(self, path: str, filename: str = None):
         """
-        Extract text content from PPTX file using ZIP extraction.
-        Returns list of Document objects with slide content.
+        Process a PPTX already on disk (e.g. a spooled upload).
+        Returns a list of LangChain Document objects.
         """
-        documents = []
-        temp_dir = None
-        
+        filename = filename or os.path.basename(path)
         try:
-            # Create temporary directory for extraction
-            temp_dir = tempfile.mkdtemp(prefix='pptx_extract_')
-            
-            # Extract PPTX file (it's a ZIP archive)
-            with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-            
-            # Get slide files
-            slides_dir = os.path.join(temp_dir, 'ppt', 'slides')
-            if not os.path.exists(slides_dir):
-                raise ValueError("No slides found in PowerPoint file")
-            
-            # Process each slide
-            slide_files = sorted([f for f in os.listdir(slides_dir) if f.startswith('slide') and f.endswith('.xml')])
-            
-            for i, slide_file in enumerate(slide_files, 1):
-                slide_path = os.path.join(slides_dir, slide_file)
-                slide_text = self._extract_slide_text(slide_path)
-                
-                if slide_text.strip():  # Only add slides with content
-                    doc = Document(
-                        page_content=slide_text,
-                        metadata={
-                            "slide": i,
-                            "source": file_path,
-                            "file_type": "pptx",
-                            "total_slides": len(slide_files)
-                        }
-                    )
-                    documents.append(doc)
+            file_size = os.path.getsize(path)
+            if file_size == 0:
+                raise ValueError(f"Uploaded file is empty: {filename}")
             
-            # Extract speaker notes if they exist
-            notes_dir = os.path.join(temp_dir, 'ppt', 'notesSlides')
-            if os.path.exists(notes_dir):
-                notes_files = sorted([f for f in os.listdir(notes_dir) if f.startswith('notesSlide') and f.endswith('.xml')])
-                
-                for i, notes_file in enumerate(notes_files, 1):
-                    notes_path = os.path.join(notes_dir, notes_file)
-                    notes_text = self._extract_slide_text(notes_path)
-                    
-                    if notes_text.strip():
-                        # Add notes to existing slide document or create new one
-                        if i <= len(documents):
-                            documents[i-1].page_content += f"\n\nSpeaker Notes: {notes_text}"
-                        else:
-                            doc = Document(
-                                page_content=f"Speaker Notes (Slide {i}): {notes_text}",
-                                metadata={
-                                    "slide": i,
-                                    "source": file_path,
-                                    "file_type": "pptx_notes",
-                                    "content_type": "speaker_notes"
-                                }
-                            )
-                            documents.append(doc)
+            documents = self._split_slides(path, filename)
             
+            logger.info(f"Processed PowerPoint: {filename} ({file_size} bytes), {len(documents)} chunks")
             return documents
             
         except Exception as e:
-            raise Exception(f"Error extracting PowerPoint content: {str(e)}")
-        
-        finally:
-            # Cleanup temporary directory
-            if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+            logger.error(f"Error processing PowerPoint {filename}: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Error processing PowerPoint: {str(e)}")
     
-    def _extract_slide_text(self, slide_xml_path: str):
+    def _split_slides(self, source, filename: str):
         """
-        Extract text from a single slide XML file.
+        Stream slides out of the archive (app.services.office_extraction) and
+        split each one into chunks as it is read.
         """
-        try:
-            tree = ET.parse(slide_xml_path)
-            root = tree.getroot()
-            
-            # Find all text elements
-            text_elements = []
-            
-            # Look for text in various PowerPoint text containers
-            for text_elem in root.findall('.//a:t', self.namespaces):
-                if text_elem.text:
-                    text_elements.append(text_elem.text.strip())
-            
-            # Join all text with spaces
-            slide_text = ' '.join(text_elements)
-            
-            # Clean up text
-            slide_text = self._clean_text(slide_text)
-            
-            return slide_text
-            
-        except Exception as e:
-            logger.warning(f"Could not extract text from slide {slide_xml_path}: {e}")
-            return ""
+        from app.services.office_extraction import iter_pptx_slides
+        
+        documents = []
+        for slide in iter_pptx_slides(source, filename):
+            documents.extend(self.text_splitter.split_documents([slide]))
+        
+        if not documents:
+            raise ValueError(f"No content extracted from PowerPoint: {filename}")
+        return documents
     
     def _clean_text(self, text: str):
         """
@@ -353,6 +243,10 @@ def process_pptx(file: UploadFile):
     """
     return pptx_processor.process_pptx(file)
 
+def process_pptx_path(path: str, filename: str = None):
+    """Path-based variant of process_pptx (spooled uploads)"""
+    return pptx_processor.process_pptx_path(path, filename)
+
 # Alternative processing function for PPT files (older format)
 def process_ppt(file: UploadFile):
     """
@@ -417,6 +311,26 @@ def process_uploaded_file(file: UploadFile):
             detail=f"Unsupported file type. Supported formats: PDF, PPTX, PNG, JPG, JPEG"
         )
 
+def process_spooled_upload(upload):
+    """
+    Dispatcher for uploads streamed to disk by app.services.upload_ingestion.spool_upload.
+    Returns a list of documents (Document objects, or text for images).
+    """
+    if upload.kind == 'pdf':
+        return process_pdf_path(upload.path, upload.filename)
+    elif upload.kind == 'pptx':
+        return process_pptx_path(upload.path, upload.filename)
+    elif upload.kind == 'ppt':
+        raise HTTPException(
+            status_code=400,
+            detail="PPT files are not supported yet. Please convert to PPTX format and try again."
+        )
+    elif upload.kind == 'image':
+        return [process_image_path(upload.path, upload.filename)]
+    elif upload.kind == 'text':
+        return [upload.read_text()]
+    raise HTTPException(status_code=400, detail=f"Unsupported file type: {upload.filename}")
+
 # Health check function for PowerPoint processing
 def check_pptx_capabilities():
     """
@@ -0,0 +1,123 @@
+# app/services/disk_cache.py
+"""
+Size-bounded directory of compressed cache entries
+The disk tier behind app.services.extraction_cache and
+app.services.transcript_store: one file per key (SHA-256 of the key), written
+atomically, expired by mtime on read and pruned oldest-first above max_bytes.
+Pruning lists the directory, so it runs every prune_every writes or as soon as
+the bytes written since the last listing could exceed max_bytes.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DISK_CACHE_PRUNE_EVERY = int(os.getenv("DISK_CACHE_PRUNE_EVERY", 64))
+
+
+class DiskCache:
+    """Compressed entries on disk with a TTL and a byte budget (shared by processes using the same directory)"""
+
+    def __init__(self, directory: str, ttl: int, max_bytes: int, name: str = "Disk cache",
+                 prune_every: int = None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.name = name
+        self.prune_every = prune_every or DISK_CACHE_PRUNE_EVERY
+
+        self._lock = threading.Lock()
+        # Bytes on disk at the last listing (None: not listed yet) plus bytes written since
+        self._estimated_bytes: Optional[int] = None
+        self._writes_since_prune = 0
+        self.errors = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".z")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """The stored payload, or None if missing or older than ttl (expired files are removed)"""
+        path = self.path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"{self.name} disk read failed for {key}: {e}")
+            self._failed()
+            return None
+
+    def set(self, key: str, payload: bytes) -> bool:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path(key))
+        except OSError as e:
+            logger.warning(f"{self.name} disk write failed for {key}: {e}")
+            self._failed()
+            return False
+
+        with self._lock:
+            self._writes_since_prune += 1
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += len(payload)
+            due = (self._estimated_bytes is None
+                   or self._estimated_bytes > self.max_bytes
+                   or self._writes_since_prune >= self.prune_every)
+        if due:
+            self.prune()
+        return True
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """(path, size, mtime) of every entry"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(".z"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def prune(self):
+        """Remove the oldest entries until the directory fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        with self._lock:
+            self._estimated_bytes = total
+            self._writes_since_prune = 0
+
+    def _failed(self):
+        with self._lock:
+            self.errors += 1
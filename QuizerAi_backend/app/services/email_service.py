@@ -4,7 +4,6 @@ import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
-from jinja2 import Template
 import os
 from fastapi import HTTPException
 import traceback
@@ -13,6 +12,12 @@ import traceback
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _jinja_template(source: str):
+    """jinja2 Template; jinja2 is imported on first render to keep auth/classroom startup light"""
+    from jinja2 import Template
+    return Template(source)
+
+
 class EmailService:
     def __init__(self):
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -172,7 +177,7 @@ class EmailService:
             """
 
         # Render template
-        template = Template(html_template)
+        template = _jinja_template(html_template)
         html_content = template.render(user_name=user_name, otp_code=otp_code)
         
         # Text version for accessibility
@@ -498,7 +503,7 @@ class EmailService:
         # Get app URL from environment or use default
         app_url = os.getenv("FRONTEND_URL", "https://quizerai.com")
         
-        template = Template(html_template)
+        template = _jinja_template(html_template)
         html_content = template.render(user_name=user_name, app_url=app_url)
         
         text_content = f"""
@@ -689,7 +694,7 @@ class EmailService:
             
             # Render template safely
             try:
-                template = Template(html_template)
+                template = _jinja_template(html_template)
                 html_content = template.render(
                     student_name=student_name,
                     teacher_name=teacher_name,
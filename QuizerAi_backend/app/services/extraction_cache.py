@@ -0,0 +1,227 @@
+# app/services/extraction_cache.py
+"""
+Content-hash keyed cache of extracted document chunks
+Keyed by the SHA-256 of the file bytes plus the extractor version, so
+re-uploading the same chapter (under any name, from any path) skips
+extraction. Shared by the API upload path and the Celery ingestion tasks.
+Entries are zlib-compressed JSON: small ones live in Redis with a TTL,
+large ones (and everything while Redis is down) in a disk tier.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config.redis_config import RedisCircuitBreaker, redis_service
+from app.services.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Bump the version of a kind whenever its extractor or chunking changes
+EXTRACTOR_VERSIONS = {
+    "pdf": "pdf-3",  # PyMuPDF page engine, scanned pages OCR'd
+    "pptx": "pptx-2",  # streamed slides, presentation order
+    "image": "ocr-2",  # preprocessed (grayscale, downscale, deskew)
+    "ocr_page": "ocr-page-1",  # single page/image OCR results, keyed by image hash
+    "whisper_segment": "whisper-segment-1",  # segmented_transcription, keyed by audio hash + bounds
+    "text": "text-1",
+    "docx": "docx-2",  # office_extraction
+    "xlsx": "xlsx-2",
+}
+
+EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", 7 * 86400))
+# Compressed entries above this size go to the disk tier instead of Redis
+EXTRACTION_CACHE_REDIS_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_REDIS_MAX_BYTES", 512 * 1024))
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "quizer_extraction_cache")
+EXTRACTION_CACHE_DISK_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_DISK_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def sha256_file(path: str) -> str:
+    """SHA-256 of a file, read in fixed-size chunks"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def encode_documents(documents: List[Any]) -> bytes:
+    """Documents (LangChain Documents or plain strings) -> compressed JSON"""
+    items = []
+    for doc in documents:
+        if hasattr(doc, "page_content"):
+            items.append({"c": doc.page_content, "m": getattr(doc, "metadata", None) or {}})
+        else:
+            items.append({"t": str(doc)})
+    return zlib.compress(json.dumps(items, default=str).encode("utf-8"), 6)
+
+
+def decode_documents(payload: bytes) -> List[Any]:
+    """Inverse of encode_documents"""
+    items = json.loads(zlib.decompress(payload).decode("utf-8"))
+    if any("c" in item for item in items):
+        from langchain_core.documents import Document
+    return [
+        Document(page_content=item["c"], metadata=item["m"]) if "c" in item else item["t"]
+        for item in items
+    ]
+
+
+class ExtractionCache(RedisCircuitBreaker):
+    """
+    Two-tier cache for extraction results:
+    - Redis tier (binary values, TTL) for entries up to redis_max_bytes compressed
+    - disk tier for larger entries, pruned oldest-first above disk_max_bytes
+    """
+    redis_unavailable_message = "Extraction cache Redis tier unavailable"
+
+    def __init__(self,
+                 ttl: int = None,
+                 redis_max_bytes: int = None,
+                 cache_dir: str = None,
+                 disk_max_bytes: int = None,
+                 redis_retry_after: int = 30):
+        self.ttl = ttl or EXTRACTION_CACHE_TTL
+        self.redis_max_bytes = redis_max_bytes or EXTRACTION_CACHE_REDIS_MAX_BYTES
+        self.cache_dir = cache_dir or EXTRACTION_CACHE_DIR
+        self.disk_max_bytes = disk_max_bytes or EXTRACTION_CACHE_DISK_MAX_BYTES
+        self.redis_retry_after = redis_retry_after
+        self._disk = DiskCache(self.cache_dir, self.ttl, self.disk_max_bytes, name="Extraction cache")
+
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "redis_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "redis_sets": 0,
+            "disk_sets": 0,
+            "raw_bytes": 0,
+            "stored_bytes": 0
+        }
+
+    def make_key(self, sha256: str, kind: str, variant: str = "") -> str:
+        """Key from the content hash, the extractor version and any extraction options (e.g. max_pages)"""
+        version = EXTRACTOR_VERSIONS.get(kind, f"{kind}-1")
+        suffix = f":{variant}" if variant else ""
+        return f"extract:{version}:{sha256}{suffix}"
+
+    # Lookup / store (sync: Celery tasks, process pool workers)
+    def get_sync(self, key: str) -> Optional[List[Any]]:
+        """Look up extracted documents: Redis first, then disk"""
+        payload = self._redis_get(key)
+        tier = "redis_hits"
+        if payload is None:
+            payload = self._disk.get(key)
+            tier = "disk_hits"
+
+        if payload is not None:
+            try:
+                documents = decode_documents(payload)
+            except Exception as e:
+                logger.warning(f"Discarding unreadable extraction cache entry {key}: {e}")
+                documents = None
+            if documents is not None:
+                with self._lock:
+                    self._stats[tier] += 1
+                return documents
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set_sync(self, key: str, documents: List[Any]):
+        """Store extracted documents; empty results are not cached"""
+        if not documents:
+            return
+        try:
+            payload = encode_documents(documents)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Extraction result for {key} is not serializable: {e}")
+            return
+
+        raw_size = sum(len(getattr(doc, "page_content", doc) or "") for doc in documents)
+        with self._lock:
+            self._stats["sets"] += 1
+            self._stats["raw_bytes"] += raw_size
+            self._stats["stored_bytes"] += len(payload)
+
+        if len(payload) <= self.redis_max_bytes and self._redis_set(key, payload):
+            return
+        if self._disk.set(key, payload):
+            with self._lock:
+                self._stats["disk_sets"] += 1
+
+    # Async wrappers (API path): Redis/disk I/O runs in a thread
+    async def get(self, key: str) -> Optional[List[Any]]:
+        return await asyncio.to_thread(self.get_sync, key)
+
+    async def set(self, key: str, documents: List[Any]):
+        await asyncio.to_thread(self.set_sync, key, documents)
+
+    async def get_or_extract(self,
+                             sha256: str,
+                             kind: str,
+                             extract: Callable[[], Awaitable[List[Any]]],
+                             variant: str = "") -> List[Any]:
+        """Return cached documents for this content, or run extract() and cache its result"""
+        key = self.make_key(sha256, kind, variant)
+        documents = await self.get(key)
+        if documents is not None:
+            logger.info(f"Extraction cache hit for {kind} {sha256[:12]}")
+            return documents
+
+        documents = await extract()
+        await self.set(key, documents)
+        return documents
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss and compression metrics for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["redis_errors"] = self.redis_errors
+        lookups = stats["redis_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["redis_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["compression_ratio"] = (
+            round(stats["stored_bytes"] / stats["raw_bytes"], 4) if stats["raw_bytes"] else 0.0
+        )
+        stats["disk_errors"] = self._disk.errors
+        stats["disk_bytes"] = self._disk.total_bytes()
+        stats["redis_max_bytes"] = self.redis_max_bytes
+        stats["disk_max_bytes"] = self.disk_max_bytes
+        return stats
+
+    # Redis tier
+    def _redis_get(self, key: str) -> Optional[bytes]:
+        if not self._redis_available():
+            return None
+        try:
+            # Binary client: cache_client decodes responses, which would mangle zlib payloads
+            return redis_service.get_sync_client(decode_responses=False).get(key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    def _redis_set(self, key: str, payload: bytes) -> bool:
+        if not self._redis_available():
+            return False
+        try:
+            redis_service.get_sync_client(decode_responses=False).setex(key, self.ttl, payload)
+        except Exception as e:
+            self._redis_failed(e)
+            return False
+        with self._lock:
+            self._stats["redis_sets"] += 1
+        return True
+
+
+# Global instance shared by the routers and the Celery tasks
+extraction_cache = ExtractionCache()
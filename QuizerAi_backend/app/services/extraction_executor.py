@@ -0,0 +1,217 @@
+# app/services/extraction_executor.py
+"""
+Extraction executor: keeps blocking content extraction off the event loop
+CPU-bound work (PDF parsing, OCR, PPTX parsing) runs in a process pool and
+I/O-bound loaders (Selenium, YouTube loaders) in a thread pool. Each pool has a
+queue-depth limit; when it is full new work is rejected with 503 instead of
+piling up. Queue depth, wait time and run time are tracked per pool.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_PROCESS_WORKERS = int(os.getenv("EXTRACTION_PROCESS_WORKERS", min(4, os.cpu_count() or 1)))
+EXTRACTION_THREAD_WORKERS = int(os.getenv("EXTRACTION_THREAD_WORKERS", 8))
+# Jobs allowed per pool (running + waiting) before new ones are rejected
+EXTRACTION_PROCESS_QUEUE = int(os.getenv("EXTRACTION_PROCESS_QUEUE", 16))
+EXTRACTION_THREAD_QUEUE = int(os.getenv("EXTRACTION_THREAD_QUEUE", 32))
+# spawn: workers do not inherit the server's event loop, sockets or locks
+EXTRACTION_START_METHOD = os.getenv("EXTRACTION_START_METHOD", "spawn")
+
+# Samples kept for the wait/run time percentiles
+_SAMPLES = 500
+
+
+class WorkerHTTPError(Exception):
+    """
+    An HTTPException raised inside a worker process. HTTPException itself cannot
+    be unpickled (status_code is a required argument), which would break the
+    whole process pool; this carries the same status and detail across instead.
+    """
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    """Runs in the worker: returns (result, started, finished) wall-clock times"""
+    started = time.time()
+    try:
+        result = fn(*args, **kwargs)
+    except HTTPException as e:
+        raise WorkerHTTPError(e.status_code, e.detail) from None
+    return result, started, time.time()
+
+
+class _PoolMetrics:
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_ms = deque(maxlen=_SAMPLES)
+        self.run_ms = deque(maxlen=_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_ms": _summary(self.wait_ms),
+            "run_ms": _summary(self.run_ms)
+        }
+
+
+def _summary(samples) -> Dict[str, float]:
+    if not samples:
+        return {"avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "avg": round(sum(ordered) / len(ordered), 2),
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max": round(ordered[-1], 2)
+    }
+
+
+class ExtractionExecutor:
+    """Bounded process/thread pools for blocking extractors"""
+
+    def __init__(self,
+                 process_workers: int = None,
+                 thread_workers: int = None,
+                 process_queue: int = None,
+                 thread_queue: int = None):
+        self._metrics = {
+            "process": _PoolMetrics("process", process_workers or EXTRACTION_PROCESS_WORKERS,
+                                    process_queue or EXTRACTION_PROCESS_QUEUE),
+            "thread": _PoolMetrics("thread", thread_workers or EXTRACTION_THREAD_WORKERS,
+                                   thread_queue or EXTRACTION_THREAD_QUEUE)
+        }
+        # Pools are created on first use so importing this module stays cheap
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    async def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a CPU-bound extractor in the process pool.
+        fn and its arguments must be picklable (module-level functions, lazy_import
+        references, plain data such as a SpooledUpload). An HTTPException raised
+        by fn is re-raised here with its status code; other exceptions must be
+        picklable too.
+        """
+        return await self._run("process", fn, args, kwargs)
+
+    async def run_io(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking I/O-bound loader in the thread pool"""
+        return await self._run("thread", fn, args, kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: metrics.snapshot() for name, metrics in self._metrics.items()}
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            pools = [self._process_pool, self._thread_pool]
+            self._process_pool = None
+            self._thread_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+
+    async def _run(self, pool_name: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        metrics = self._metrics[pool_name]
+        with self._lock:
+            if metrics.in_flight >= metrics.max_queue:
+                metrics.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Content extraction is busy, please retry shortly",
+                    headers={"Retry-After": "5"}
+                )
+            metrics.in_flight += 1
+            metrics.submitted += 1
+            pool = self._get_pool(pool_name)
+
+        submitted = time.time()
+        try:
+            future = pool.submit(_timed_call, fn, args, kwargs)
+        except BaseException:
+            self._finished(metrics, ok=False)
+            raise
+        # The job keeps its slot until the worker is done, even if the caller goes away
+        future.add_done_callback(
+            lambda f: self._finished(metrics, ok=not f.cancelled() and f.exception() is None)
+        )
+
+        try:
+            result, started, finished = await asyncio.wrap_future(future)
+        except WorkerHTTPError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for later jobs
+            self._discard_process_pool(pool)
+            logger.error("Extraction worker process died; process pool recreated")
+            raise HTTPException(status_code=500, detail="Content extraction worker crashed")
+
+        with self._lock:
+            metrics.wait_ms.append(max(0.0, started - submitted) * 1000)
+            metrics.run_ms.append((finished - started) * 1000)
+        return result
+
+    def _finished(self, metrics: _PoolMetrics, ok: bool):
+        with self._lock:
+            metrics.in_flight -= 1
+            if ok:
+                metrics.completed += 1
+            else:
+                metrics.failed += 1
+
+    def _get_pool(self, pool_name: str):
+        if pool_name == "thread":
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self._metrics["thread"].workers,
+                    thread_name_prefix="extraction"
+                )
+            return self._thread_pool
+
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self._metrics["process"].workers,
+                mp_context=multiprocessing.get_context(EXTRACTION_START_METHOD)
+            )
+        return self._process_pool
+
+    def _discard_process_pool(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._process_pool is pool:
+                self._process_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance shared by the routers
+extraction_executor = ExtractionExecutor()
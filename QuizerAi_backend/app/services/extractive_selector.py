@@ -0,0 +1,278 @@
+# app/services/extractive_selector.py
+"""
+CPU-side extractive pre-selection in front of quiz/summary generation
+Scores sentences (TF-IDF centroid similarity, or TextRank for smaller inputs)
+with vectorized NumPy operations and keeps the top-ranked content within a
+token budget, in original order. Repeated boilerplate (running headers,
+duplicated definitions) is dropped before scoring.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.generation_cache import documents_to_text
+from app.utils.text_chunker import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# TextRank builds a dense similarity matrix; above this many units TF-IDF is used instead
+TEXTRANK_MAX_UNITS = 500
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9]+")
+_NORMALIZE_RE = re.compile(r"[\d\W_]+")
+
+_STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same she should so some such than
+that the their theirs them themselves then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+@dataclass
+class SelectionResult:
+    """Selected text plus what the selection saved"""
+    text: str
+    original_tokens: int
+    selected_tokens: int
+    tokens_saved: int
+    units_total: int
+    units_kept: int
+    method: str
+    elapsed_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("text")
+        return data
+
+
+def default_budget(action: str, quiz_mode: str = "single") -> int:
+    """
+    Per-action default token budget (0 disables the stage).
+    Summaries and map-reduce quizzes cover the whole document unless a budget
+    is configured; single-call quizzes only ever saw the first ~6000 characters,
+    so there the stage picks what fits instead.
+    """
+    if action == "summary":
+        return int(os.getenv("EXTRACTIVE_SUMMARY_BUDGET", 0))
+    if quiz_mode == "map_reduce":
+        return int(os.getenv("EXTRACTIVE_QUIZ_MAP_REDUCE_BUDGET", 0))
+    # Matches what the single-call quiz prompt can take (~6000 characters)
+    return int(os.getenv("EXTRACTIVE_QUIZ_BUDGET", 1500))
+
+
+def split_units(text: str) -> List[Tuple[int, str]]:
+    """Split into (paragraph_index, sentence) units; single newlines are line wraps"""
+    units = []
+    for p_index, paragraph in enumerate(_PARAGRAPH_RE.split(text)):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        for sentence in _SENTENCE_RE.split(paragraph):
+            if sentence.strip():
+                units.append((p_index, sentence.strip()))
+    return units
+
+
+def _tokenize(unit: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(unit.lower()) if token not in _STOPWORDS]
+
+
+def _tfidf(units_tokens: List[List[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Sparse (COO) L2-normalized TF-IDF matrix: returns rows, cols, values, vocabulary size.
+    Only the vocabulary lookup is a Python loop; everything else is vectorized.
+    """
+    vocabulary: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, tokens in enumerate(units_tokens):
+        for token in tokens:
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+            rows.append(i)
+
+    n_units = len(units_tokens)
+    n_terms = len(vocabulary)
+    if not cols:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0), n_terms
+
+    keys = np.asarray(rows, dtype=np.int64) * n_terms + np.asarray(cols, dtype=np.int64)
+    unique_keys, term_freq = np.unique(keys, return_counts=True)
+    r = unique_keys // n_terms
+    c = unique_keys % n_terms
+
+    doc_freq = np.bincount(c, minlength=n_terms)
+    idf = np.log((1 + n_units) / (1 + doc_freq)) + 1.0
+    values = (1.0 + np.log(term_freq)) * idf[c]
+
+    norms = np.sqrt(np.bincount(r, weights=values ** 2, minlength=n_units))
+    values = values / np.where(norms[r] > 0, norms[r], 1.0)
+    return r, c, values, n_terms
+
+
+def _score_tfidf(r: np.ndarray, c: np.ndarray, values: np.ndarray, n_units: int, n_terms: int) -> np.ndarray:
+    """Cosine similarity of every unit to the document centroid"""
+    centroid = np.bincount(c, weights=values, minlength=n_terms) / max(n_units, 1)
+    norm = np.linalg.norm(centroid)
+    if norm == 0:
+        return np.zeros(n_units)
+    return np.bincount(r, weights=values * centroid[c], minlength=n_units) / norm
+
+
+def _score_textrank(r: np.ndarray, c: np.ndarray, values: np.ndarray, n_units: int, n_terms: int,
+                    damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """PageRank over the cosine-similarity graph of the units"""
+    matrix = np.zeros((n_units, n_terms), dtype=np.float32)
+    matrix[r, c] = values
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.zeros_like(similarity), where=out_weight > 0)
+
+    scores = np.full(n_units, 1.0 / n_units, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n_units + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+class ExtractiveSelector:
+    """Ranks sentences and keeps the best ones within a token budget"""
+
+    def __init__(self, method: str = None):
+        self.method = method or os.getenv("EXTRACTIVE_METHOD", "tfidf")
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "skipped": 0,
+            "tokens_in": 0,
+            "tokens_out": 0,
+            "tokens_saved": 0,
+            "total_ms": 0.0
+        }
+
+    def select(self, text: str, token_budget: int, method: str = None) -> SelectionResult:
+        """Keep the top-ranked sentences of text that fit token_budget (original order)"""
+        started = time.perf_counter()
+        method = method or self.method
+
+        units = split_units(text)
+        unit_tokens = np.asarray([count_tokens(unit) for _, unit in units], dtype=np.int64)
+        original_tokens = int(unit_tokens.sum())
+
+        if not units or original_tokens <= token_budget:
+            return self._finish(text, original_tokens, original_tokens, len(units), len(units), "none", started)
+
+        # Exact repeats (ignoring digits/punctuation) are boilerplate: page headers, repeated definitions
+        seen = set()
+        duplicate = np.zeros(len(units), dtype=bool)
+        for i, (_, unit) in enumerate(units):
+            key = _NORMALIZE_RE.sub(" ", unit.lower()).strip()
+            if key in seen:
+                duplicate[i] = True
+            seen.add(key)
+
+        units_tokens = [_tokenize(unit) for _, unit in units]
+        r, c, values, n_terms = _tfidf(units_tokens)
+
+        if method == "textrank" and len(units) > TEXTRANK_MAX_UNITS:
+            method = "tfidf"
+        if method == "textrank":
+            scores = _score_textrank(r, c, values, len(units), n_terms)
+        else:
+            method = "tfidf"
+            scores = _score_tfidf(r, c, values, len(units), n_terms)
+
+        # Headers and fragments carry little content
+        word_counts = np.asarray([len(tokens) for tokens in units_tokens])
+        scores = scores * np.where(word_counts < 4, 0.5, 1.0)
+        scores[duplicate] = -np.inf
+
+        keep = np.zeros(len(units), dtype=bool)
+        remaining = token_budget
+        for i in np.argsort(-scores, kind="stable"):
+            if scores[i] == -np.inf or remaining <= 0:
+                break
+            if unit_tokens[i] <= remaining:
+                keep[i] = True
+                remaining -= int(unit_tokens[i])
+
+        paragraphs: List[List[str]] = []
+        last_paragraph = None
+        for i in np.flatnonzero(keep):
+            p_index, unit = units[i]
+            if p_index != last_paragraph:
+                paragraphs.append([])
+                last_paragraph = p_index
+            paragraphs[-1].append(unit)
+        selected = "\n\n".join(" ".join(sentences) for sentences in paragraphs)
+
+        selected_tokens = int(unit_tokens[keep].sum())
+        return self._finish(selected, original_tokens, selected_tokens, len(units), int(keep.sum()), method, started)
+
+    def select_documents(self, documents: Any, token_budget: Optional[int]) -> Tuple[Any, Optional[SelectionResult]]:
+        """
+        Apply the budget to whatever the generators accept (str, Documents, nested lists).
+        Returns the documents unchanged when the stage is disabled (budget 0/None).
+        """
+        if not token_budget or token_budget <= 0:
+            with self._lock:
+                self._stats["skipped"] += 1
+            return documents, None
+
+        result = self.select(documents_to_text(documents), token_budget)
+        logger.info(
+            f"Extractive selection ({result.method}): {result.original_tokens} -> {result.selected_tokens} tokens, "
+            f"saved {result.tokens_saved} in {result.elapsed_ms:.1f} ms"
+        )
+        if result.method == "none":
+            return documents, result
+        return result.text, result
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate savings (this process)"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["total_ms"] = round(stats["total_ms"], 2)
+        stats["saved_ratio"] = round(stats["tokens_saved"] / stats["tokens_in"], 4) if stats["tokens_in"] else 0.0
+        return stats
+
+    def _finish(self, text: str, original_tokens: int, selected_tokens: int,
+                units_total: int, units_kept: int, method: str, started: float) -> SelectionResult:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        result = SelectionResult(
+            text=text,
+            original_tokens=original_tokens,
+            selected_tokens=selected_tokens,
+            tokens_saved=original_tokens - selected_tokens,
+            units_total=units_total,
+            units_kept=units_kept,
+            method=method,
+            elapsed_ms=round(elapsed_ms, 2)
+        )
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["tokens_in"] += original_tokens
+            self._stats["tokens_out"] += selected_tokens
+            self._stats["tokens_saved"] += result.tokens_saved
+            self._stats["total_ms"] += elapsed_ms
+        return result
+
+
+# Global instance
+extractive_selector = ExtractiveSelector()
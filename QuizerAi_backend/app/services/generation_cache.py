@@ -0,0 +1,192 @@
+# app/services/generation_cache.py
+"""
+Content-addressed cache for LLM generation results (quizzes, summaries)
+Shared by the synchronous API path and the Celery workers
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config.redis_config import RedisCircuitBreaker, redis_service
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so that whitespace/unicode-only differences hash the same"""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def documents_to_text(documents: Any) -> str:
+    """
+    Flatten whatever the generators accept (str, Documents, strings,
+    nested lists of Documents from the YouTube loaders) into one string
+    """
+    if documents is None:
+        return ""
+    if isinstance(documents, str):
+        return documents
+    if hasattr(documents, "page_content"):
+        return documents.page_content or ""
+    if isinstance(documents, (list, tuple)):
+        return "\n".join(documents_to_text(doc) for doc in documents)
+    return str(documents)
+
+
+class GenerationCache(RedisCircuitBreaker):
+    """
+    Two-tier cache for generation results:
+    - in-process LRU bounded by entry count and bytes
+    - Redis tier with TTL (shared across API pods and Celery workers)
+    """
+    redis_unavailable_message = "Generation cache Redis tier unavailable"
+
+    def __init__(self,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 ttl: int = None,
+                 redis_retry_after: int = 30):
+        self.max_entries = max_entries or int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", 512))
+        self.max_bytes = max_bytes or int(os.getenv("GENERATION_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        self.ttl = ttl or int(os.getenv("GENERATION_CACHE_TTL", 86400))
+        self.redis_retry_after = redis_retry_after
+
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0
+        }
+
+    # Key construction
+    def make_key(self, kind: str, documents: Any, params: Dict[str, Any], model: str, prompt_version: str) -> str:
+        """
+        Build the cache key from the full normalized text, every prompt
+        parameter, the model name and the prompt version
+        """
+        text_digest = hashlib.sha256(normalize_text(documents_to_text(documents)).encode("utf-8")).hexdigest()
+        material = json.dumps({
+            "kind": kind,
+            "text": text_digest,
+            "params": {k: str(v) for k, v in params.items()},
+            "model": model,
+            "prompt_version": prompt_version
+        }, sort_keys=True)
+        digest = hashlib.sha256(material.encode("utf-8")).hexdigest()
+        return f"gen:{kind}:{digest}"
+
+    # Lookup / store
+    async def get(self, key: str) -> Optional[Any]:
+        """Look up a result: memory first, then Redis"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return json.loads(payload)
+
+        payload = await self._redis_get(key)
+        if payload is not None:
+            self._remember(key, payload)
+            with self._lock:
+                self._stats["redis_hits"] += 1
+            return json.loads(payload)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        """Store a result in both tiers"""
+        try:
+            payload = json.dumps(value, default=str)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Generation result for {key} is not serializable: {e}")
+            return
+
+        self._remember(key, payload)
+        with self._lock:
+            self._stats["sets"] += 1
+        await self._redis_set(key, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["redis_errors"] = self.redis_errors
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["memory_hits"] + stats["redis_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["memory_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def clear(self):
+        """Drop the in-process tier (Redis entries expire by TTL)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # In-process LRU
+    def _remember(self, key: str, payload: str):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+
+            self._entries[key] = payload
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    # Redis tier
+    async def _redis_get(self, key: str) -> Optional[str]:
+        if not self._redis_available():
+            return None
+        try:
+            if redis_service.cache_client is not None:
+                data = await redis_service.cache_client.get(key)
+            else:
+                client = redis_service.get_sync_client(decode_responses=True)
+                data = await asyncio.to_thread(client.get, key)
+            return data
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    async def _redis_set(self, key: str, payload: str):
+        if not self._redis_available():
+            return
+        try:
+            if redis_service.cache_client is not None:
+                await redis_service.cache_client.setex(key, self.ttl, payload)
+            else:
+                client = redis_service.get_sync_client(decode_responses=True)
+                await asyncio.to_thread(client.setex, key, self.ttl, payload)
+        except Exception as e:
+            self._redis_failed(e)
+
+
+# Global instance
+generation_cache = GenerationCache()
@@ -14,7 +14,6 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc, func
 from fastapi import HTTPException, status
 import redis.asyncio as redis
-from geopy.distance import geodesic
 
 from app.models.quiz_security import (
     QuizSecurityConfig, SecuritySession, SecurityViolation,
@@ -465,6 +464,7 @@ class GeofencingService:
         lat2: float, lng2: float
     ) -> float:
         """Calculate distance between two points in meters"""
+        from geopy.distance import geodesic
         try:
             point1 = (lat1, lng1)
             point2 = (lat2, lng2)
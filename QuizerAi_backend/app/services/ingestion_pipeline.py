@@ -0,0 +1,273 @@
+# app/services/ingestion_pipeline.py
+"""
+Incremental extract -> clean -> chunk -> generate pipeline
+Stages are async iterators connected by bounded queues: pages are extracted
+(and cleaned, for PDFs in the extraction workers) while earlier chunks are
+already going through the map step of summarization / quiz generation. The
+map step keeps at most PIPELINE_MAX_IN_FLIGHT calls pending; when it is full
+it stops pulling chunks, the queues fill up and extraction pauses, so memory
+stays bounded and end-to-end latency approaches max(extract, generate)
+instead of their sum.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Items buffered between two stages
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 8))
+# Map calls started but not finished (the LLM calls themselves are limited by llm_governor)
+PIPELINE_MAX_IN_FLIGHT = int(os.getenv("PIPELINE_MAX_IN_FLIGHT", 16))
+PIPELINE_ENABLED = os.getenv("INGESTION_PIPELINE_ENABLED", "true").lower() == "true"
+# Upload kinds that can be extracted page by page / slide by slide
+PIPELINE_KINDS = ("pdf", "pptx")
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def buffered(source: AsyncIterator, maxsize: int = None) -> AsyncIterator:
+    """
+    Run an async iterator in its own task, up to maxsize items ahead of the
+    consumer. The producer waits (backpressure) while the queue is full.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize or PIPELINE_QUEUE_SIZE)
+
+    async def pump():
+        try:
+            async for item in source:
+                await queue.put(item)
+            await queue.put(_DONE)
+        except Exception as e:
+            await queue.put(_Failure(e))
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def iterate_in_thread(make_iterator: Callable[[], Iterator], maxsize: int = None) -> AsyncIterator:
+    """
+    Consume a blocking generator (e.g. an Office extractor) from a worker
+    thread of the extraction executor, at most maxsize items ahead of the consumer
+    """
+    from app.services.extraction_executor import extraction_executor
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(maxsize or PIPELINE_QUEUE_SIZE)
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            for item in make_iterator():
+                # Block while the consumer is behind; give up if it went away
+                while not slots.acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+                if stopped.is_set():
+                    return
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, _Failure(e))
+
+    producer = asyncio.ensure_future(extraction_executor.run_io(produce))
+    try:
+        while True:
+            if producer.done():
+                # Surfaces executor errors (e.g. a full queue -> 503); otherwise the rest is queued
+                producer.result()
+                item = await queue.get()
+            else:
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                item = getter.result()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+        if not producer.done():
+            producer.cancel()
+
+
+async def map_ordered(items: AsyncIterator,
+                      fn: Callable[[int, Any], Awaitable[Any]],
+                      max_in_flight: int = None) -> List[Any]:
+    """
+    Start fn(index, item) as soon as each item arrives; return the results in
+    input order. While max_in_flight calls are pending no further items are
+    pulled, which propagates backpressure to the stages upstream.
+    """
+    limit = asyncio.Semaphore(max_in_flight or PIPELINE_MAX_IN_FLIGHT)
+    tasks: List[asyncio.Task] = []
+    try:
+        async for item in items:
+            await limit.acquire()
+            task = asyncio.create_task(fn(len(tasks), item))
+            task.add_done_callback(lambda _: limit.release())
+            tasks.append(task)
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def _pdf_chunks(upload, engine=None) -> AsyncIterator:
+    """Pages extracted page-parallel (cleaned in the workers), de-duplicated and split as they arrive"""
+    from app.services.pdf_engine import PageChunker, pdf_engine
+
+    engine = engine or pdf_engine
+    chunker = PageChunker(upload.path, upload.filename)
+    async for page_number, text in engine.stream_pages(upload.path):
+        for chunk in chunker.add(page_number, text):
+            yield chunk
+    chunker.finish()
+
+
+async def _pptx_chunks(upload) -> AsyncIterator:
+    """Slides streamed out of the archive in a thread and split like PowerPointProcessor does"""
+    from app.services.data_ingestion_processing import pptx_processor
+    from app.services.office_extraction import iter_pptx_slides
+
+    splitter = pptx_processor.text_splitter
+    produced = False
+    async for slide in iterate_in_thread(lambda: iter_pptx_slides(upload.path, upload.filename)):
+        for chunk in splitter.split_documents([slide]):
+            produced = True
+            yield chunk
+    if not produced:
+        raise ValueError(f"No content extracted from PowerPoint: {upload.filename}")
+
+
+class IngestionPipeline:
+    """Streams a spooled upload's chunks into a generator that consumes them as they arrive"""
+
+    def __init__(self, queue_size: int = None, pdf_engine=None):
+        self.queue_size = queue_size or PIPELINE_QUEUE_SIZE
+        self.pdf_engine = pdf_engine
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "failures": 0,
+            "chunks": 0,
+            "extract_ms": 0.0,
+            "total_ms": 0.0
+        }
+
+    def supports(self, kind: str) -> bool:
+        return PIPELINE_ENABLED and kind in PIPELINE_KINDS
+
+    def chunks(self, upload) -> AsyncIterator:
+        """Extraction stage for a spooled upload (pdf or pptx), buffered ahead of the consumer"""
+        if upload.kind == "pdf":
+            source = _pdf_chunks(upload, self.pdf_engine)
+        elif upload.kind == "pptx":
+            source = _pptx_chunks(upload)
+        else:
+            raise HTTPException(status_code=400, detail=f"Incremental ingestion does not support {upload.kind} files")
+        return buffered(source, self.queue_size)
+
+    async def total_units(self, upload) -> Optional[int]:
+        """Page count of a PDF, so consumers can size their work before extraction ends (slides carry it in metadata)"""
+        if upload.kind != "pdf":
+            return None
+        from app.services.extraction_executor import extraction_executor
+        from app.services.pdf_engine import page_count
+
+        try:
+            return await extraction_executor.run_cpu(page_count, upload.path)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not count pages of {upload.filename}: {e}")
+            return None
+
+    async def run(self,
+                  upload,
+                  generate: Callable[[AsyncIterator], Awaitable[Any]],
+                  on_documents: Optional[Callable[[List[Any]], Awaitable[None]]] = None):
+        """
+        Run generate(chunk iterator) while the upload is still being extracted.
+        Returns (result, timings). on_documents receives every chunk once the
+        run succeeded (e.g. to fill the extraction cache).
+        """
+        documents: List[Any] = []
+        timings: Dict[str, Optional[float]] = {"first_chunk_ms": None, "extract_ms": None}
+        start = time.perf_counter()
+
+        async def collect():
+            try:
+                async for chunk in self.chunks(upload):
+                    if timings["first_chunk_ms"] is None:
+                        timings["first_chunk_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                    documents.append(chunk)
+                    yield chunk
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error extracting {upload.filename}: {str(e)}")
+                raise HTTPException(status_code=400, detail=f"Error processing {upload.kind.upper()}: {str(e)}")
+            timings["extract_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        try:
+            result = await generate(collect())
+        except BaseException:
+            with self._lock:
+                self._stats["failures"] += 1
+            raise
+        timings["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        timings["chunks"] = len(documents)
+
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["chunks"] += len(documents)
+            self._stats["extract_ms"] += timings["extract_ms"] or 0.0
+            self._stats["total_ms"] += timings["total_ms"]
+
+        logger.info(f"Pipeline {upload.filename}: {len(documents)} chunks, first after {timings['first_chunk_ms']} ms, "
+                    f"extraction {timings['extract_ms']} ms, total {timings['total_ms']} ms")
+        if on_documents is not None and documents:
+            await on_documents(documents)
+        return result, timings
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        for name in ("extract_ms", "total_ms"):
+            stats[name] = round(stats[name], 1)
+        stats["enabled"] = PIPELINE_ENABLED
+        stats["queue_size"] = self.queue_size
+        stats["max_in_flight"] = PIPELINE_MAX_IN_FLIGHT
+        return stats
+
+
+# Global instance
+ingestion_pipeline = IngestionPipeline()
@@ -0,0 +1,363 @@
+# app/services/llm_governor.py
+"""
+Adaptive (AIMD) concurrency governor for Groq calls
+One budget per API key, shared by every API process and Celery worker through Redis:
+concurrency grows additively while calls succeed and is cut multiplicatively
+on 429s and timeouts. Falls back to a per-process limit when Redis is unavailable.
+"""
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config.redis_config import RedisCircuitBreaker, redis_service
+
+logger = logging.getLogger(__name__)
+
+# Atomically drop expired leases and take one if the shared limit allows it.
+# Returns 0 when granted, the remaining cooldown in ms, or -1 when the budget is full.
+_ACQUIRE_SCRIPT = """
+local cooldown = redis.call('PTTL', KEYS[3])
+if cooldown > 0 then
+    return cooldown
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local limit = tonumber(redis.call('GET', KEYS[2])) or tonumber(ARGV[3])
+if redis.call('ZCARD', KEYS[1]) < math.floor(limit) then
+    redis.call('ZADD', KEYS[1], tonumber(ARGV[1]) + tonumber(ARGV[2]), ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 0
+end
+return -1
+"""
+
+# Apply one AIMD step to the shared limit. Decreases are applied at most once per
+# guard window so a burst of 429s from calls already in flight halves the limit once.
+_FEEDBACK_SCRIPT = """
+local limit = tonumber(redis.call('GET', KEYS[1])) or tonumber(ARGV[2])
+if ARGV[1] == 'success' then
+    limit = math.min(tonumber(ARGV[4]), limit + tonumber(ARGV[5]) / limit)
+else
+    if redis.call('SET', KEYS[3], '1', 'NX', 'PX', ARGV[8]) then
+        limit = math.max(tonumber(ARGV[3]), limit * tonumber(ARGV[6]))
+    end
+    -- Timeouts carry no cooldown, and SET rejects PX 0
+    if tonumber(ARGV[7]) > 0 and tonumber(ARGV[7]) > redis.call('PTTL', KEYS[2]) then
+        redis.call('SET', KEYS[2], '1', 'PX', ARGV[7])
+    end
+end
+redis.call('SET', KEYS[1], tostring(limit), 'EX', 3600)
+return tostring(limit)
+"""
+
+_RETRY_IN_RE = re.compile(r"try again in ([\d.]+)\s*(ms|s)", re.IGNORECASE)
+
+
+def classify_error(error: BaseException) -> str:
+    """Map an exception to 'rate_limited', 'timeout' or 'error'"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+
+    name = type(error).__name__.lower()
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    message = str(error).lower()
+    if status == 429 or "ratelimit" in name or "rate limit" in message or "429" in message:
+        return "rate_limited"
+    if "timeout" in name or "timed out" in message:
+        return "timeout"
+    return "error"
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Extract the provider's suggested wait from a 429 (Retry-After header or message)"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None:
+        try:
+            value = headers.get("retry-after")
+            if value is not None:
+                return float(value)
+        except (TypeError, ValueError):
+            pass
+
+    match = _RETRY_IN_RE.search(str(error))
+    if match:
+        value = float(match.group(1))
+        return value / 1000 if match.group(2).lower() == "ms" else value
+    return None
+
+
+class LLMGovernor(RedisCircuitBreaker):
+    """
+    AIMD concurrency limiter for LLM / transcription calls.
+    Thread-safe and not bound to an event loop, so the same instance works in the
+    API loop and in the per-task loops Celery workers create.
+    """
+    redis_unavailable_message = "LLM governor falling back to per-process limits"
+
+    def __init__(self,
+                 initial_limit: float = None,
+                 min_limit: float = None,
+                 max_limit: float = None,
+                 increase: float = None,
+                 decrease_factor: float = None,
+                 cooldown: float = None,
+                 lease_ttl: float = None,
+                 redis_retry_after: int = 30):
+        self.initial_limit = initial_limit or float(os.getenv("LLM_GOVERNOR_INITIAL_LIMIT", 4))
+        self.min_limit = min_limit or float(os.getenv("LLM_GOVERNOR_MIN_LIMIT", 1))
+        self.max_limit = max_limit or float(os.getenv("LLM_GOVERNOR_MAX_LIMIT", 16))
+        self.increase = increase or float(os.getenv("LLM_GOVERNOR_INCREASE", 1.0))
+        self.decrease_factor = decrease_factor or float(os.getenv("LLM_GOVERNOR_DECREASE_FACTOR", 0.5))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("LLM_GOVERNOR_COOLDOWN", 2))
+        self.lease_ttl = lease_ttl or float(os.getenv("LLM_GOVERNOR_LEASE_TTL", 180))
+        self.redis_retry_after = redis_retry_after
+        # One decrease per window (roughly one round trip of in-flight calls)
+        self.decrease_interval = 1.0
+
+        self._lock = threading.Lock()
+        self._limit = float(self.initial_limit)
+        self._in_flight = 0
+        self._waiters = deque()
+        self._cooldown_until = 0.0
+        self._last_decrease = 0.0
+        self._key_prefix = None
+
+        self._stats = {
+            "calls": 0,
+            "successes": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "shared_waits": 0
+        }
+
+    # Public API
+    async def run(self, coro_factory: Callable[[], Awaitable[Any]], timeout: float = None) -> Any:
+        """
+        Run one LLM call under the governor. coro_factory is called once a slot
+        is available; timeout applies to the call itself, not to queueing.
+        """
+        async with self.slot():
+            if timeout:
+                return await asyncio.wait_for(coro_factory(), timeout=timeout)
+            return await coro_factory()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one slot for the duration of the block (e.g. a streaming call)"""
+        await self._acquire_local()
+        try:
+            lease = await self._acquire_shared()
+        except BaseException:
+            self._release_local()
+            raise
+
+        with self._lock:
+            self._stats["calls"] += 1
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            raise
+        except BaseException as e:
+            await self._record(classify_error(e), e)
+            raise
+        else:
+            await self._record("success")
+        finally:
+            self._release_local()
+            if lease is not None:
+                await self._release_shared(lease)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, queue depth and outcome counters (this process)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["redis_errors"] = self.redis_errors
+            stats["limit"] = round(self._limit, 2)
+            stats["in_flight"] = self._in_flight
+            stats["queued"] = len(self._waiters)
+            stats["cooldown_remaining"] = round(max(0.0, self._cooldown_until - time.monotonic()), 2)
+        stats["shared"] = self._redis_available()
+        return stats
+
+    # Local (per-process) slots
+    def _cooldown_remaining(self) -> float:
+        return self._cooldown_until - time.monotonic()
+
+    async def _acquire_local(self):
+        while True:
+            wait = self._cooldown_remaining()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                if not self._waiters and self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return
+                future = loop.create_future()
+                waiter = (loop, future)
+                self._waiters.append(waiter)
+
+            try:
+                await future
+                return
+            except asyncio.CancelledError:
+                with self._lock:
+                    try:
+                        self._waiters.remove(waiter)
+                        granted = False
+                    except ValueError:
+                        # A releaser already handed us the slot
+                        granted = True
+                if granted:
+                    self._release_local()
+                raise
+
+    def _release_local(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._wake_waiters_locked()
+
+    def _wake_waiters_locked(self):
+        while self._waiters and self._in_flight < int(self._limit):
+            loop, future = self._waiters.popleft()
+            self._in_flight += 1
+            try:
+                loop.call_soon_threadsafe(self._grant, future)
+            except RuntimeError:
+                # The waiter's loop is closed; give the slot back
+                self._in_flight -= 1
+
+    @staticmethod
+    def _grant(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    # AIMD feedback
+    async def _record(self, outcome: str, error: BaseException = None):
+        counter = {"success": "successes", "rate_limited": "rate_limited", "timeout": "timeouts"}.get(outcome, "errors")
+        with self._lock:
+            self._stats[counter] += 1
+
+        if outcome == "error":
+            return
+
+        cooldown = 0.0
+        if outcome == "rate_limited":
+            cooldown = retry_after_seconds(error) or self.cooldown
+            logger.warning(f"LLM rate limited, cooling down {cooldown:.2f}s (limit {self._limit:.2f})")
+        elif outcome == "timeout":
+            logger.warning(f"LLM call timed out (limit {self._limit:.2f})")
+
+        self._adjust_local(outcome, cooldown)
+
+        shared_limit = await self._feedback_shared(outcome, cooldown)
+        if shared_limit is not None:
+            with self._lock:
+                self._limit = max(self.min_limit, min(self.max_limit, shared_limit))
+                self._wake_waiters_locked()
+
+    def _adjust_local(self, outcome: str, cooldown: float):
+        now = time.monotonic()
+        with self._lock:
+            if outcome == "success":
+                self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+            else:
+                if now - self._last_decrease >= self.decrease_interval:
+                    self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+                    self._last_decrease = now
+                if cooldown:
+                    self._cooldown_until = max(self._cooldown_until, now + cooldown)
+            self._wake_waiters_locked()
+
+    # Shared (Redis) budget
+    def _keys(self) -> Dict[str, str]:
+        if self._key_prefix is None:
+            # Resolved lazily: the API key is loaded from .env after this module is imported
+            key_hash = hashlib.sha256(os.getenv("GROQ_API_KEY", "").encode("utf-8")).hexdigest()[:16]
+            self._key_prefix = f"llm:governor:{key_hash}"
+        prefix = self._key_prefix
+        return {
+            "leases": f"{prefix}:leases",
+            "limit": f"{prefix}:limit",
+            "cooldown": f"{prefix}:cooldown",
+            "decrease": f"{prefix}:decrease"
+        }
+
+    async def _redis_call(self, method: str, *args):
+        if redis_service.cache_client is not None:
+            return await getattr(redis_service.cache_client, method)(*args)
+        client = redis_service.get_sync_client(decode_responses=True)
+        return await asyncio.to_thread(getattr(client, method), *args)
+
+    async def _acquire_shared(self) -> Optional[str]:
+        if not self._redis_available():
+            return None
+
+        keys = self._keys()
+        lease = uuid.uuid4().hex
+        backoff = 0.05
+        waited = False
+        while True:
+            try:
+                result = int(await self._redis_call(
+                    "eval", _ACQUIRE_SCRIPT, 3,
+                    keys["leases"], keys["limit"], keys["cooldown"],
+                    int(time.time() * 1000), int(self.lease_ttl * 1000), self.initial_limit, lease
+                ))
+            except Exception as e:
+                self._redis_failed(e)
+                return None
+
+            if result == 0:
+                return lease
+
+            if not waited:
+                waited = True
+                with self._lock:
+                    self._stats["shared_waits"] += 1
+
+            if result > 0:
+                await asyncio.sleep(result / 1000)
+            else:
+                await asyncio.sleep(backoff * (0.5 + random.random()))
+                backoff = min(backoff * 2, 1.0)
+
+    async def _release_shared(self, lease: str):
+        try:
+            await self._redis_call("zrem", self._keys()["leases"], lease)
+        except Exception as e:
+            # The lease expires on its own
+            logger.debug(f"Could not release LLM lease {lease}: {e}")
+
+    async def _feedback_shared(self, outcome: str, cooldown: float) -> Optional[float]:
+        if not self._redis_available():
+            return None
+
+        keys = self._keys()
+        try:
+            result = await self._redis_call(
+                "eval", _FEEDBACK_SCRIPT, 3,
+                keys["limit"], keys["cooldown"], keys["decrease"],
+                outcome, self.initial_limit, self.min_limit, self.max_limit,
+                self.increase, self.decrease_factor,
+                int(cooldown * 1000), int(self.decrease_interval * 1000)
+            )
+            return float(result)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+
+# Global instance shared by every Groq call site in this process
+llm_governor = LLMGovernor()
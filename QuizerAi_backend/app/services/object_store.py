@@ -0,0 +1,355 @@
+# app/services/object_store.py
+"""
+Object storage for uploads (S3-compatible interface)
+Uploaded files are stored under an object key instead of on one pod's disk,
+so any API node or Celery worker can read them. Multipart uploads follow the
+S3 model (create / upload part / complete / abort) and are assembled by the
+store. The local store writes each part straight to its file; the S3 store
+spools each part to a temp file (only its first megabyte in memory) and
+uploads it when the part is complete.
+- LocalObjectStore: a directory (default "uploads", also served as /uploads); tests and single-node setups
+- S3ObjectStore: any S3-compatible service through boto3 (optional dependency)
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.providers import providers
+
+logger = logging.getLogger(__name__)
+
+OBJECT_STORE_BACKEND = os.getenv("OBJECT_STORE_BACKEND", "local")
+OBJECT_STORE_ROOT = os.getenv("OBJECT_STORE_ROOT", "uploads")
+OBJECT_STORE_BUCKET = os.getenv("OBJECT_STORE_BUCKET", "quizerai-uploads")
+OBJECT_STORE_ENDPOINT = os.getenv("OBJECT_STORE_ENDPOINT") or None  # e.g. MinIO; None: AWS
+OBJECT_STORE_REGION = os.getenv("OBJECT_STORE_REGION") or None
+
+_COPY_BYTES = 1024 * 1024
+# Parts of S3 multipart uploads are kept in memory up to this size, then spill to disk
+_PART_SPOOL_BYTES = 1024 * 1024
+
+
+class ObjectNotFound(KeyError):
+    pass
+
+
+def _append_file(source_path: str, target) -> int:
+    """Append a file to an open binary file, in the kernel where possible"""
+    copied = 0
+    with open(source_path, "rb") as source:
+        size = os.fstat(source.fileno()).st_size
+        target.flush()
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < size:
+                    sent = os.copy_file_range(source.fileno(), target.fileno(), size - copied)
+                    if sent == 0:
+                        break
+                    copied += sent
+                if copied == size:
+                    return copied
+            except OSError:
+                pass
+            source.seek(copied)
+            target.seek(0, os.SEEK_END)
+        shutil.copyfileobj(source, target, _COPY_BYTES)
+    return size
+
+
+class _LocalWriter:
+    """Writes into a temp file next to the target and renames it into place on commit"""
+
+    def __init__(self, target: str):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        self._target = target
+        self._file = tempfile.NamedTemporaryFile(delete=False, dir=os.path.dirname(target), suffix=".tmp")
+        self._md5 = hashlib.md5()
+        self.size = 0
+
+    def write(self, data: bytes):
+        self._file.write(data)
+        self._md5.update(data)
+        self.size += len(data)
+
+    def commit(self) -> str:
+        self._file.close()
+        os.replace(self._file.name, self._target)
+        return self._md5.hexdigest()
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self._file.name)
+        except FileNotFoundError:
+            pass
+
+
+class LocalObjectStore:
+    """Objects are files under root; multipart parts live in root/.multipart/<upload id>/"""
+
+    def __init__(self, root: str = None):
+        self.root = os.path.abspath(root or OBJECT_STORE_ROOT)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def _part_dir(self, upload_id: str) -> str:
+        if not upload_id.isalnum():
+            raise ValueError(f"Invalid upload id: {upload_id}")
+        return os.path.join(self.root, ".multipart", upload_id)
+
+    def _part_path(self, upload_id: str, part_number: int) -> str:
+        return os.path.join(self._part_dir(upload_id), f"{part_number:05d}.part")
+
+    # Objects
+    def open_writer(self, key: str) -> _LocalWriter:
+        """Writer for a whole object; visible under key once committed"""
+        return _LocalWriter(self._path(key))
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        writer = self.open_writer(key)
+        writer.write(data)
+        return writer.commit()
+
+    def put_file(self, key: str, path: str):
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+
+    def get_bytes(self, key: str) -> bytes:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+
+    def download_to(self, key: str, path: str):
+        """Materialize an object at path (hard link when on the same filesystem)"""
+        source = self._path(key)
+        if not os.path.exists(source):
+            raise ObjectNotFound(key)
+        try:
+            os.link(source, path)
+        except OSError:
+            shutil.copyfile(source, path)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def location(self, key: str) -> str:
+        """Where the object can be found (a path relative to the working directory for local storage)"""
+        return os.path.relpath(self._path(key))
+
+    def list_keys(self, prefix: str) -> List[str]:
+        """Keys of the committed objects under prefix ("dir/")"""
+        directory = self._path(prefix.rstrip("/"))
+        keys = []
+        for parent, _, names in os.walk(directory):
+            for name in names:
+                if not name.endswith(".tmp"):
+                    keys.append(os.path.relpath(os.path.join(parent, name), self.root).replace(os.sep, "/"))
+        return sorted(keys)
+
+    # Multipart uploads
+    def create_multipart_upload(self, key: str) -> str:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._part_dir(upload_id))
+        return upload_id
+
+    def open_part_writer(self, key: str, upload_id: str, part_number: int) -> _LocalWriter:
+        """Writer for one part; a retried part replaces the earlier attempt on commit"""
+        if not os.path.isdir(self._part_dir(upload_id)):
+            raise ObjectNotFound(upload_id)
+        return _LocalWriter(self._part_path(upload_id, part_number))
+
+    def list_parts(self, key: str, upload_id: str) -> List[Dict]:
+        directory = self._part_dir(upload_id)
+        if not os.path.isdir(directory):
+            raise ObjectNotFound(upload_id)
+        parts = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".part"):
+                parts.append({
+                    "part_number": int(name[:-5]),
+                    "size": os.path.getsize(os.path.join(directory, name))
+                })
+        return parts
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: Sequence[Tuple[int, str]]):
+        """Concatenate the parts (part number, etag) in order into the object"""
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for part_number, _ in sorted(parts):
+                    _append_file(self._part_path(upload_id, part_number), f)
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        shutil.rmtree(self._part_dir(upload_id), ignore_errors=True)
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        shutil.rmtree(self._part_dir(upload_id), ignore_errors=True)
+
+
+class _S3Writer:
+    """
+    Spools one object or part (the first _PART_SPOOL_BYTES in memory, the rest
+    on disk) and uploads it on commit: put_object/upload_part need the whole
+    body with a known length, and a failed upload must be replayable
+    """
+
+    def __init__(self, upload):
+        self._file = tempfile.SpooledTemporaryFile(max_size=_PART_SPOOL_BYTES)
+        self._upload = upload
+        self.size = 0
+
+    def write(self, data: bytes):
+        self._file.write(data)
+        self.size += len(data)
+
+    def commit(self) -> str:
+        try:
+            self._file.seek(0)
+            return self._upload(self._file)
+        finally:
+            self._file.close()
+
+    def discard(self):
+        self._file.close()
+
+
+class S3ObjectStore:
+    """S3-compatible storage (AWS S3, MinIO, R2, ...) through boto3"""
+
+    def __init__(self, bucket: str = None, endpoint_url: str = None, region: str = None, client=None):
+        self.bucket = bucket or OBJECT_STORE_BUCKET
+        if client is None:
+            import boto3  # optional: only needed with OBJECT_STORE_BACKEND=s3
+            client = boto3.client("s3", endpoint_url=endpoint_url or OBJECT_STORE_ENDPOINT,
+                                  region_name=region or OBJECT_STORE_REGION)
+        self.client = client
+
+    def _missing(self, error) -> bool:
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NoSuchUpload")
+
+    def open_writer(self, key: str) -> _S3Writer:
+        def upload(body) -> str:
+            return self.client.put_object(Bucket=self.bucket, Key=key, Body=body)["ETag"].strip('"')
+        return _S3Writer(upload)
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        return self.client.put_object(Bucket=self.bucket, Key=key, Body=data)["ETag"].strip('"')
+
+    def put_file(self, key: str, path: str):
+        self.client.upload_file(path, self.bucket, key)
+
+    def get_bytes(self, key: str) -> bytes:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except Exception as e:
+            if self._missing(e):
+                raise ObjectNotFound(key)
+            raise
+
+    def download_to(self, key: str, path: str):
+        try:
+            self.client.download_file(self.bucket, key, path)
+        except Exception as e:
+            if self._missing(e):
+                raise ObjectNotFound(key)
+            raise
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except Exception as e:
+            if self._missing(e):
+                return None
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def list_keys(self, prefix: str) -> List[str]:
+        keys = []
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(item["Key"] for item in page.get("Contents", []))
+        return sorted(keys)
+
+    def create_multipart_upload(self, key: str) -> str:
+        return self.client.create_multipart_upload(Bucket=self.bucket, Key=key)["UploadId"]
+
+    def open_part_writer(self, key: str, upload_id: str, part_number: int) -> _S3Writer:
+        def upload(body) -> str:
+            response = self.client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                               PartNumber=part_number, Body=body)
+            return response["ETag"].strip('"')
+        return _S3Writer(upload)
+
+    def list_parts(self, key: str, upload_id: str) -> List[Dict]:
+        parts = []
+        paginator = self.client.get_paginator("list_parts")
+        try:
+            for page in paginator.paginate(Bucket=self.bucket, Key=key, UploadId=upload_id):
+                for part in page.get("Parts", []):
+                    parts.append({"part_number": part["PartNumber"], "size": part["Size"],
+                                  "etag": part["ETag"].strip('"')})
+        except Exception as e:
+            if self._missing(e):
+                raise ObjectNotFound(upload_id)
+            raise
+        return parts
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: Sequence[Tuple[int, str]]):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": number, "ETag": f'"{etag}"'} for number, etag in sorted(parts)]}
+        )
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+        except Exception as e:
+            if not self._missing(e):
+                raise
+
+
+def create_object_store():
+    if OBJECT_STORE_BACKEND == "s3":
+        return S3ObjectStore()
+    return LocalObjectStore()
+
+
+# Built on first use, so boto3 is only imported when it is configured
+providers.register("object_store", create_object_store)
+
+
+def get_object_store():
+    """The store shared by the routers and the Celery tasks"""
+    return providers.get("object_store")
@@ -0,0 +1,225 @@
+# app/services/ocr_engine.py
+"""
+Parallel OCR engine for scanned PDFs and image uploads
+PDF pages with (almost) no text layer over an embedded image are treated as
+scanned: they are rasterized with PyMuPDF at OCR_DPI, preprocessed (grayscale,
+downscale to the target DPI, deskew) and run through Tesseract in the
+extraction process pool, one page per task. Every page result is cached by
+the hash of its image, so re-uploaded scans skip Tesseract entirely.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.pdf_engine import DocumentCleaner, open_mapped
+
+logger = logging.getLogger(__name__)
+
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() == "true"
+# Rasterization / target resolution for Tesseract
+OCR_DPI = int(os.getenv("OCR_DPI", 300))
+# Longest image side after downscaling (A4 at 300 DPI is 3508 px)
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", 3600))
+# Text-layer characters per square inch below which a page with an image counts as scanned
+OCR_MIN_TEXT_DENSITY = float(os.getenv("OCR_MIN_TEXT_DENSITY", 2.0))
+# Largest skew (degrees) searched for when deskewing
+OCR_MAX_SKEW = float(os.getenv("OCR_MAX_SKEW", 5.0))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+# LSTM engine, automatic page segmentation
+OCR_TESSERACT_CONFIG = os.getenv("OCR_TESSERACT_CONFIG", "--oem 1 --psm 3")
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+# Tesseract binary when it is not on PATH (e.g. C:\Program Files\Tesseract-OCR\tesseract.exe)
+OCR_TESSERACT_CMD = os.getenv("OCR_TESSERACT_CMD")
+
+# Pages already run in parallel across processes; keep Tesseract itself single-threaded
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+_SKEW_STEP = 0.5
+_SKEW_SAMPLE_SIDE = 800
+
+_cleaner = DocumentCleaner()
+
+
+def is_scanned_page(page, text: str) -> bool:
+    """Little text for the page area, but at least one embedded image"""
+    area = max(1.0, page.rect.width * page.rect.height / (72 * 72))
+    return len(text) / area < OCR_MIN_TEXT_DENSITY and bool(page.get_images(full=False))
+
+
+def estimate_skew(image) -> float:
+    """
+    Rotation (degrees) that makes text lines horizontal: the angle whose
+    row-ink profile is sharpest, searched on a downscaled copy
+    """
+    import numpy as np
+    from PIL import Image
+
+    sample = image.copy()
+    sample.thumbnail((_SKEW_SAMPLE_SIDE, _SKEW_SAMPLE_SIDE))
+    # Ink = 255, paper = 0
+    ink = sample.point(lambda value: 255 if value < 128 else 0)
+
+    best_angle, best_score = 0.0, -1.0
+    steps = int(OCR_MAX_SKEW / _SKEW_STEP)
+    for step in range(-steps, steps + 1):
+        angle = step * _SKEW_STEP
+        rows = np.asarray(ink.rotate(angle, resample=Image.NEAREST), dtype=np.float32).sum(axis=1)
+        score = float(np.square(np.diff(rows)).sum())
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def preprocess_image(image, source_dpi: Optional[float] = None):
+    """Grayscale, downscale to OCR_DPI / OCR_MAX_SIDE, deskew"""
+    from PIL import Image
+
+    image = image.convert("L")
+    scale = 1.0
+    if source_dpi and source_dpi > OCR_DPI:
+        scale = OCR_DPI / source_dpi
+    longest = max(image.size)
+    if longest * scale > OCR_MAX_SIDE:
+        scale = OCR_MAX_SIDE / longest
+    if scale < 1.0:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+
+    angle = estimate_skew(image)
+    if angle:
+        image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    return image
+
+
+def _cache_key(digest: str) -> str:
+    from app.services.extraction_cache import extraction_cache
+    return extraction_cache.make_key(digest, "ocr_page")
+
+
+def _cached_text(digest: str) -> Optional[str]:
+    if not OCR_CACHE_ENABLED:
+        return None
+    from app.services.extraction_cache import extraction_cache
+    cached = extraction_cache.get_sync(_cache_key(digest))
+    return cached[0] if cached else None
+
+
+def _recognize(image, digest: str, source_dpi: Optional[float] = None) -> str:
+    import pytesseract
+
+    if OCR_TESSERACT_CMD:
+        pytesseract.pytesseract.tesseract_cmd = OCR_TESSERACT_CMD
+    text = pytesseract.image_to_string(preprocess_image(image, source_dpi), lang=OCR_LANG, config=OCR_TESSERACT_CONFIG)
+    text = _cleaner.clean_content(text)
+    if OCR_CACHE_ENABLED:
+        from app.services.extraction_cache import extraction_cache
+        extraction_cache.set_sync(_cache_key(digest), [text])
+    return text
+
+
+def ocr_pdf_page(path: str, page_number: int) -> Tuple[str, bool]:
+    """
+    Runs in a worker: rasterize and OCR one PDF page (1-based).
+    Returns (cleaned text, cache hit); errors give empty text.
+    """
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    try:
+        document, release = open_mapped(path)
+        try:
+            pixmap = document[page_number - 1].get_pixmap(dpi=OCR_DPI, colorspace=fitz.csGRAY, alpha=False)
+        finally:
+            release()
+
+        digest = hashlib.sha256(f"{pixmap.width}x{pixmap.height}:".encode() + pixmap.samples).hexdigest()
+        cached = _cached_text(digest)
+        if cached is not None:
+            return cached, True
+        # Rendered at OCR_DPI already; only deskewing is left
+        image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+        return _recognize(image, digest), False
+    except Exception as e:
+        logger.warning(f"OCR failed for page {page_number} of {os.path.basename(path)}: {e}")
+        return "", False
+
+
+def ocr_image_file(path: str) -> Tuple[str, bool]:
+    """
+    Runs in a worker: OCR one image file.
+    Returns (cleaned text, cache hit); unreadable images raise.
+    """
+    from PIL import Image
+
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    cached = _cached_text(digest)
+    if cached is not None:
+        return cached, True
+
+    with Image.open(io.BytesIO(data)) as image:
+        dpi = image.info.get("dpi")
+        return _recognize(image, digest, source_dpi=dpi[0] if dpi else None), False
+
+
+class OCREngine:
+    """Fans OCR work out across the extraction process pool, one page or image per task"""
+
+    def __init__(self, window: int = None, executor=None):
+        # Pages in flight at once per call (default: one per extraction process)
+        self.window = window
+        # Default: the shared extraction_executor (bounded process pool)
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._stats = {
+            "pages": 0,
+            "images": 0,
+            "cache_hits": 0,
+            "empty": 0
+        }
+
+    def _executor(self):
+        if self.executor is not None:
+            return self.executor
+        from app.services.extraction_executor import extraction_executor
+        return extraction_executor
+
+    async def _run_all(self, fn, arguments: Sequence[tuple], counter: str) -> List[str]:
+        executor = self._executor()
+        limit = asyncio.Semaphore(self.window or executor.stats()["process"]["workers"])
+
+        async def run(args: tuple) -> Tuple[str, bool]:
+            async with limit:
+                return await executor.run_cpu(fn, *args)
+
+        results = await asyncio.gather(*[run(args) for args in arguments])
+        with self._lock:
+            self._stats[counter] += len(results)
+            self._stats["cache_hits"] += sum(1 for _, hit in results if hit)
+            self._stats["empty"] += sum(1 for text, _ in results if not text)
+        return [text for text, _ in results]
+
+    async def ocr_pdf_pages(self, path: str, page_numbers: Sequence[int]) -> Dict[int, str]:
+        """Cleaned OCR text of the given (1-based) PDF pages"""
+        texts = await self._run_all(ocr_pdf_page, [(path, number) for number in page_numbers], "pages")
+        return dict(zip(page_numbers, texts))
+
+    async def ocr_images(self, paths: Sequence[str]) -> List[str]:
+        """Cleaned OCR text of each image file, in input order"""
+        return await self._run_all(ocr_image_file, [(path,) for path in paths], "images")
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["enabled"] = OCR_ENABLED
+        stats["dpi"] = OCR_DPI
+        stats["lang"] = OCR_LANG
+        return stats
+
+
+# Global instance
+ocr_engine = OCREngine()
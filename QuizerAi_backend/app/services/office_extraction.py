@@ -0,0 +1,283 @@
+# app/services/office_extraction.py
+"""
+In-memory Office extraction (PPTX, DOCX, XLSX)
+Members are read straight from the ZIP archive (no temp file, no extracted
+directory) and their XML is parsed incrementally with iterparse, clearing
+elements as it goes. Each extractor is a generator: one Document per slide,
+per sheet, or per block of paragraphs, so callers can chunk as they consume.
+Sources can be a path or a seekable binary file object (e.g. UploadFile.file).
+"""
+import logging
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+Source = Union[str, BinaryIO]
+
+NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+_NOTES_REL_TYPE = "/notesSlide"
+
+# DOCX paragraphs are grouped into Documents of roughly this many characters
+DOCX_BLOCK_CHARS = 4000
+
+
+def _q(prefix: str, tag: str) -> str:
+    return f"{{{NS[prefix]}}}{tag}"
+
+
+def _document(page_content: str, metadata: dict):
+    from langchain.schema import Document
+    return Document(page_content=page_content, metadata=metadata)
+
+
+def clean_slide_text(text: str) -> str:
+    """Same cleanup the PowerPoint processor always applied to slide text"""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s\-.,!?;:()\[\]{}"\']', ' ', text)
+    text = re.sub(r'[.]{3,}', '...', text)
+    text = re.sub(r'[-]{3,}', '---', text)
+    return text.strip()
+
+
+def _has(archive: zipfile.ZipFile, member: str) -> bool:
+    try:
+        archive.getinfo(member)
+        return True
+    except KeyError:
+        return False
+
+
+def _iter_text(archive: zipfile.ZipFile, member: str, text_tag: str) -> Iterator[str]:
+    """Stream the text of every text_tag element of one XML member"""
+    with archive.open(member) as stream:
+        for _, element in ET.iterparse(stream, events=("end",)):
+            if element.tag == text_tag and element.text:
+                yield element.text
+            element.clear()
+
+
+def _relationships(archive: zipfile.ZipFile, part: str) -> Dict[str, tuple]:
+    """rId -> (type, absolute target) for a part (e.g. ppt/presentation.xml)"""
+    directory, name = posixpath.split(part)
+    rels_member = posixpath.join(directory, "_rels", f"{name}.rels")
+    if not _has(archive, rels_member):
+        return {}
+    relationships = {}
+    with archive.open(rels_member) as stream:
+        for _, element in ET.iterparse(stream, events=("end",)):
+            if element.tag == _q("rel", "Relationship"):
+                target = element.get("Target", "")
+                if not target.startswith("/"):
+                    target = posixpath.normpath(posixpath.join(directory, target))
+                relationships[element.get("Id")] = (element.get("Type", ""), target.lstrip("/"))
+            element.clear()
+    return relationships
+
+
+def _numbered(names: List[str], pattern: str) -> List[str]:
+    regex = re.compile(pattern)
+    matches = [(int(m.group(1)), name) for name in names for m in [regex.fullmatch(name)] if m]
+    return [name for _, name in sorted(matches)]
+
+
+# PPTX
+def _slide_order(archive: zipfile.ZipFile) -> List[str]:
+    """Slide parts in presentation order (sldIdLst), falling back to slide number order"""
+    relationships = _relationships(archive, "ppt/presentation.xml")
+    ordered = []
+    if _has(archive, "ppt/presentation.xml"):
+        with archive.open("ppt/presentation.xml") as stream:
+            for _, element in ET.iterparse(stream, events=("end",)):
+                if element.tag == _q("p", "sldId"):
+                    target = relationships.get(element.get(_q("r", "id")), (None, None))[1]
+                    if target and _has(archive, target):
+                        ordered.append(target)
+                element.clear()
+    return ordered or _numbered(archive.namelist(), r"ppt/slides/slide(\d+)\.xml")
+
+
+def iter_pptx_slides(source: Source, filename: Optional[str] = None) -> Iterator:
+    """One Document per slide with content; speaker notes are appended to their slide"""
+    with zipfile.ZipFile(source) as archive:
+        slides = _slide_order(archive)
+        if not slides:
+            raise ValueError("No slides found in PowerPoint file")
+        text_tag = _q("a", "t")
+        for number, slide in enumerate(slides, 1):
+            text = clean_slide_text(" ".join(part.strip() for part in _iter_text(archive, slide, text_tag)))
+
+            notes = ""
+            for rel_type, target in _relationships(archive, slide).values():
+                if rel_type.endswith(_NOTES_REL_TYPE) and _has(archive, target):
+                    notes = clean_slide_text(" ".join(part.strip() for part in _iter_text(archive, target, text_tag)))
+            if notes:
+                text = f"{text}\n\nSpeaker Notes: {notes}" if text else f"Speaker Notes (Slide {number}): {notes}"
+
+            if text.strip():
+                yield _document(text, {
+                    "slide": number,
+                    "source": filename or (source if isinstance(source, str) else "pptx"),
+                    "file_type": "pptx",
+                    "total_slides": len(slides)
+                })
+
+
+# DOCX
+def iter_docx_documents(source: Source, filename: Optional[str] = None, block_chars: int = None) -> Iterator:
+    """Paragraph text of word/document.xml, yielded in blocks of about block_chars characters"""
+    block_chars = block_chars or DOCX_BLOCK_CHARS
+    paragraph_tag, text_tag, tab_tag = _q("w", "p"), _q("w", "t"), _q("w", "tab")
+    block, block_size, block_index, paragraph = [], 0, 0, []
+
+    def flush():
+        return _document("\n".join(block), {
+            "block": block_index,
+            "source": filename or (source if isinstance(source, str) else "docx"),
+            "file_type": "docx"
+        })
+
+    with zipfile.ZipFile(source) as archive:
+        if not _has(archive, "word/document.xml"):
+            raise ValueError("Not a Word document (word/document.xml missing)")
+        with archive.open("word/document.xml") as stream:
+            for _, element in ET.iterparse(stream, events=("end",)):
+                if element.tag == text_tag:
+                    paragraph.append(element.text or "")
+                elif element.tag == tab_tag:
+                    paragraph.append("\t")
+                elif element.tag == paragraph_tag:
+                    text = "".join(paragraph).strip()
+                    paragraph = []
+                    if text:
+                        block.append(text)
+                        block_size += len(text) + 1
+                    if block_size >= block_chars:
+                        block_index += 1
+                        yield flush()
+                        block, block_size = [], 0
+                    # Only clear at paragraph level: runs are needed until their paragraph ends
+                    element.clear()
+    if block:
+        block_index += 1
+        yield flush()
+
+
+# XLSX
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if not _has(archive, "xl/sharedStrings.xml"):
+        return []
+    strings, parts = [], []
+    with archive.open("xl/sharedStrings.xml") as stream:
+        for _, element in ET.iterparse(stream, events=("end",)):
+            if element.tag == _q("s", "t"):
+                parts.append(element.text or "")
+            elif element.tag == _q("s", "si"):
+                strings.append("".join(parts))
+                parts = []
+                element.clear()
+    return strings
+
+
+def _sheets(archive: zipfile.ZipFile) -> List[tuple]:
+    """(name, part) in workbook order"""
+    relationships = _relationships(archive, "xl/workbook.xml")
+    sheets = []
+    with archive.open("xl/workbook.xml") as stream:
+        for _, element in ET.iterparse(stream, events=("end",)):
+            if element.tag == _q("s", "sheet"):
+                target = relationships.get(element.get(_q("r", "id")), (None, None))[1]
+                if target:
+                    sheets.append((element.get("name"), target))
+            element.clear()
+    return sheets
+
+
+def _cell_value(cell, shared: List[str]) -> str:
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(_q("s", "t")))
+    value = cell.find(_q("s", "v"))
+    if value is None or value.text is None:
+        return ""
+    if cell_type == "s":
+        index = int(value.text)
+        return shared[index] if index < len(shared) else ""
+    if cell_type == "b":
+        return "TRUE" if value.text == "1" else "FALSE"
+    return value.text
+
+
+def _column_index(reference: Optional[str]) -> Optional[int]:
+    if not reference:
+        return None
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def iter_xlsx_sheets(source: Source, filename: Optional[str] = None) -> Iterator:
+    """One Document per non-empty sheet: 'Sheet: name' then one 'a | b | c' line per row"""
+    with zipfile.ZipFile(source) as archive:
+        if not _has(archive, "xl/workbook.xml"):
+            raise ValueError("Not an Excel workbook (xl/workbook.xml missing)")
+        shared = _shared_strings(archive)
+        row_tag, cell_tag = _q("s", "row"), _q("s", "c")
+        for sheet_index, (name, part) in enumerate(_sheets(archive), 1):
+            if not _has(archive, part):
+                continue
+            lines = [f"Sheet: {name}"]
+            with archive.open(part) as stream:
+                for _, element in ET.iterparse(stream, events=("end",)):
+                    if element.tag != row_tag:
+                        continue
+                    cells = []
+                    for cell in element.iter(cell_tag):
+                        column = _column_index(cell.get("r"))
+                        if column is not None:
+                            # Keep empty columns so values stay under their headers
+                            cells.extend([""] * (column - len(cells)))
+                        cells.append(_cell_value(cell, shared))
+                    row_text = " | ".join(cells)
+                    if row_text.strip(" |"):
+                        lines.append(row_text)
+                    element.clear()
+            if len(lines) > 1:
+                yield _document("\n".join(lines), {
+                    "sheet": name,
+                    "sheet_index": sheet_index,
+                    "source": filename or (source if isinstance(source, str) else "xlsx"),
+                    "file_type": "xlsx"
+                })
+
+
+EXTRACTORS = {
+    "pptx": iter_pptx_slides,
+    "docx": iter_docx_documents,
+    "xlsx": iter_xlsx_sheets,
+}
+
+
+def extract_office(source: Source, kind: str, filename: Optional[str] = None) -> List:
+    """All Documents of an Office file (kind: pptx, docx or xlsx)"""
+    try:
+        extractor = EXTRACTORS[kind]
+    except KeyError:
+        raise ValueError(f"Unsupported Office file type: {kind}")
+    try:
+        return list(extractor(source, filename))
+    except zipfile.BadZipFile:
+        raise ValueError(f"Corrupt or invalid {kind.upper()} file")
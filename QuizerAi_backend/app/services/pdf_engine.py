@@ -0,0 +1,312 @@
+# app/services/pdf_engine.py
+"""
+Page-parallel PDF extraction engine (PyMuPDF)
+The PDF is never copied to a temp file: workers memory-map the spooled upload
+and open it from that buffer. Page ranges are fanned out across the extraction
+process pool, cleaned in the worker, merged back in page order and streamed to
+the chunker as each range completes. Scanned pages go through the OCR engine. There is no document-size ceiling; large
+textbooks are handled page range by page range.
+"""
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import re
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+PDF_ENGINE_PAGES_PER_TASK = int(os.getenv("PDF_ENGINE_PAGES_PER_TASK", 16))
+# Pages with less text than this are skipped (covers, blank pages, page numbers only)
+PDF_ENGINE_MIN_PAGE_CHARS = int(os.getenv("PDF_ENGINE_MIN_PAGE_CHARS", 50))
+PDF_CHUNK_SIZE = 2000
+PDF_CHUNK_OVERLAP = 200
+
+
+class DocumentCleaner:
+    """Cleans PDF content to prevent token explosion"""
+
+    def __init__(self):
+        # Patterns that caused your 214k token bug
+        self.metadata_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in (
+            r'page\d+',
+            r'creationdate',
+            r'total_pages\d+',
+            r'page_label\d+',
+            r'producerPyPDF',
+            r'creatorGoogle',
+            r'source/tmp/upload_.*\.pdf'
+        )]
+
+        # Duplicate patterns from your PDF
+        self.duplicate_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in (
+            r'^S$',
+            r'^\d+\+\d+$',
+            r'^OPERATING SYSTEM.*ARCHITECTURE.*S$',
+            r'^THANK YOU.*$'
+        )]
+
+    def clean_content(self, raw_content: str) -> str:
+        """Remove metadata and duplicates that cause token explosion"""
+
+        # Remove metadata patterns
+        for pattern in self.metadata_patterns:
+            raw_content = pattern.sub('', raw_content)
+
+        # Remove duplicate lines
+        unique_lines = []
+        seen_lines = set()
+
+        for line in raw_content.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            # Skip duplicate patterns
+            if any(pattern.match(line) for pattern in self.duplicate_patterns):
+                continue
+
+            if line in seen_lines:
+                continue
+
+            seen_lines.add(line)
+            unique_lines.append(line)
+
+        # Clean whitespace
+        cleaned = '\n'.join(unique_lines)
+        cleaned = re.sub(r'\n{3,}', '\n\n', cleaned)
+        cleaned = re.sub(r' {2,}', ' ', cleaned)
+
+        return cleaned.strip()
+
+
+_cleaner = DocumentCleaner()
+
+
+def open_mapped(path: str):
+    """Open a PDF from a read-only memory map; returns (document, release callback)"""
+    import fitz  # PyMuPDF
+
+    f = open(path, "rb")
+    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        document = fitz.open(stream=view, filetype="pdf")
+    except Exception:
+        view.release()
+        mapped.close()
+        f.close()
+        raise
+
+    def release():
+        document.close()
+        try:
+            view.release()
+            mapped.close()
+        except BufferError:
+            # PyMuPDF still references the buffer; the map goes away with it
+            pass
+        f.close()
+
+    return document, release
+
+
+def page_count(path: str) -> int:
+    document, release = open_mapped(path)
+    try:
+        return document.page_count
+    finally:
+        release()
+
+
+def _clean_pages(document, start: int, stop: int) -> List[Tuple[int, Optional[str]]]:
+    from app.services.ocr_engine import OCR_ENABLED, is_scanned_page
+
+    pages = []
+    for index in range(start, min(stop, document.page_count)):
+        page = document[index]
+        text = page.get_text().strip()
+        if OCR_ENABLED and is_scanned_page(page, text):
+            # Scanned page: OCR'd by the caller, one page per task
+            pages.append((index + 1, None))
+            continue
+        if len(text) < PDF_ENGINE_MIN_PAGE_CHARS:
+            continue
+        pages.append((index + 1, _cleaner.clean_content(text)))
+    return pages
+
+
+def extract_page_range(path: str, start: int, stop: int) -> List[Tuple[int, Optional[str]]]:
+    """
+    Runs in a worker: cleaned text of pages [start, stop) as (page number, text).
+    Pages under PDF_ENGINE_MIN_PAGE_CHARS are left out; scanned pages come back
+    with text None so they can be OCR'd in parallel.
+    """
+    document, release = open_mapped(path)
+    try:
+        return _clean_pages(document, start, stop)
+    finally:
+        release()
+
+
+def page_ranges(total_pages: int, pages_per_task: int = None) -> List[Tuple[int, int]]:
+    pages_per_task = max(1, pages_per_task or PDF_ENGINE_PAGES_PER_TASK)
+    return [(start, min(start + pages_per_task, total_pages)) for start in range(0, total_pages, pages_per_task)]
+
+
+def default_splitter():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=PDF_CHUNK_SIZE, chunk_overlap=PDF_CHUNK_OVERLAP)
+
+
+class PDFEngine:
+    """Extracts a PDF on disk into cleaned, de-duplicated page Documents and chunks"""
+
+    def __init__(self, pages_per_task: int = None, window: int = None, executor=None, ocr=None):
+        self.pages_per_task = pages_per_task or PDF_ENGINE_PAGES_PER_TASK
+        # Page ranges in flight at once (default: one per extraction process)
+        self.window = window
+        # Default: the shared extraction_executor (bounded process pool)
+        self.executor = executor
+        # Default: an OCREngine on the same executor
+        self.ocr = ocr
+
+    async def stream_pages(self, path: str, max_pages: int = None) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Yield (page number, cleaned text) in page order. Ranges run in the
+        extraction process pool; a bounded window of ranges is in flight and each
+        is yielded as soon as every range before it has completed. Scanned pages
+        of a range are OCR'd in parallel (app.services.ocr_engine) before it is yielded.
+        """
+        executor = self.executor
+        if executor is None:
+            from app.services.extraction_executor import extraction_executor as executor
+        ocr = self.ocr
+        if ocr is None:
+            from app.services.ocr_engine import OCREngine, ocr_engine
+            ocr = ocr_engine if self.executor is None else OCREngine(executor=executor)
+
+        total = await executor.run_cpu(page_count, path)
+        if max_pages:
+            total = min(total, max_pages)
+        ranges = page_ranges(total, self.pages_per_task)
+        window = self.window or executor.stats()["process"]["workers"]
+
+        pending = []
+        next_range = 0
+        try:
+            while next_range < len(ranges) or pending:
+                while next_range < len(ranges) and len(pending) < window:
+                    start, stop = ranges[next_range]
+                    pending.append(asyncio.ensure_future(
+                        executor.run_cpu(extract_page_range, path, start, stop)
+                    ))
+                    next_range += 1
+                pages = await pending.pop(0)
+                scanned = [number for number, text in pages if text is None]
+                ocr_text = await ocr.ocr_pdf_pages(path, scanned) if scanned else {}
+                for number, text in pages:
+                    if text is None:
+                        text = ocr_text[number]
+                        if len(text) < PDF_ENGINE_MIN_PAGE_CHARS:
+                            continue
+                    yield number, text
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def iter_pages(self, path: str, max_pages: int = None) -> Iterator[Tuple[int, str]]:
+        """
+        In-process (serial) page iterator for callers that already run inside a
+        worker process or a Celery task, where fanning out again would oversubscribe.
+        """
+        document, release = open_mapped(path)
+        try:
+            total = document.page_count
+            if max_pages:
+                total = min(total, max_pages)
+            for start, stop in page_ranges(total, self.pages_per_task):
+                for number, text in _clean_pages(document, start, stop):
+                    if text is None:
+                        from app.services.ocr_engine import ocr_pdf_page
+                        text, _ = ocr_pdf_page(path, number)
+                        if len(text) < PDF_ENGINE_MIN_PAGE_CHARS:
+                            continue
+                    yield number, text
+        finally:
+            release()
+
+    async def extract_documents(self,
+                                path: str,
+                                filename: str = None,
+                                max_pages: int = None,
+                                splitter=None) -> List:
+        """Page-parallel extraction; pages are chunked as they arrive"""
+        chunker = PageChunker(path, filename, splitter)
+        async for page_number, text in self.stream_pages(path, max_pages=max_pages):
+            chunker.add(page_number, text)
+        return chunker.finish()
+
+    def extract_documents_sync(self,
+                               path: str,
+                               filename: str = None,
+                               max_pages: int = None,
+                               splitter=None) -> List:
+        """Serial counterpart of extract_documents (same output)"""
+        chunker = PageChunker(path, filename, splitter)
+        for page_number, text in self.iter_pages(path, max_pages=max_pages):
+            chunker.add(page_number, text)
+        return chunker.finish()
+
+
+class PageChunker:
+    """Drops repeated pages and splits each new page into chunks as it arrives"""
+
+    def __init__(self, path: str, filename: Optional[str], splitter=None):
+        from langchain.schema import Document
+
+        self._document = Document
+        self._splitter = splitter or default_splitter()
+        self._source = filename or os.path.basename(path)
+        self._seen = set()
+        self.chunks = []
+        self.pages = 0
+
+    def add(self, page_number: int, text: str) -> List:
+        """Chunk one page; returns the chunks it added (none for empty or repeated pages)"""
+        content_hash = hashlib.md5(text.encode()).hexdigest()
+        if not text or content_hash in self._seen:
+            return []
+        self._seen.add(content_hash)
+        self.pages += 1
+        page = self._document(
+            page_content=text,
+            metadata={"page": page_number, "source": self._source, "content_length": len(text)}
+        )
+        chunks = self._splitter.split_documents([page])
+        self.chunks.extend(chunks)
+        return chunks
+
+    def finish(self) -> List:
+        if not self.chunks:
+            raise ValueError(f"No readable content found in PDF: {self._source}")
+        logger.info(f"PDF engine: {self._source}, {self.pages} pages, {len(self.chunks)} chunks")
+        return self.chunks
+
+
+# Global instance
+pdf_engine = PDFEngine()
+
+
+async def extract_pdf(path: str, filename: str = None, max_pages: int = None) -> List:
+    """Router entry point: page-parallel extraction, failures surfaced as HTTP 400"""
+    try:
+        return await pdf_engine.extract_documents(path, filename, max_pages=max_pages)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing PDF {filename or path}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Error processing PDF: {str(e)}")
@@ -0,0 +1,370 @@
+# app/services/question_paper_pipeline.py
+"""
+Page-level question paper pipeline
+A paper (one or more PDFs / images) is split into pages. Each page goes
+through layout/OCR extraction and then LLM question extraction on its own,
+with up to QUESTION_PAPER_PAGE_CONCURRENCY pages in flight. A page's LLM call
+also sees the start of the next page, so a question that runs over a page
+break is not cut in half (the duplicates this creates are dropped at the end).
+Finished pages are checkpointed; a retried job resumes after them.
+Uploaded files are kept in the object store until the job succeeds, so a
+retry can run on any worker. A job that fails for good drops them, unless the
+failure was transient: then they stay until /retry can no longer use them.
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.utils.quiz_allocation import dedupe_questions
+
+logger = logging.getLogger(__name__)
+
+QUESTION_PAPER_PAGE_CONCURRENCY = int(os.getenv("QUESTION_PAPER_PAGE_CONCURRENCY", 4))
+# Characters of the next page appended to a page's content
+QUESTION_PAPER_OVERLAP_CHARS = int(os.getenv("QUESTION_PAPER_OVERLAP_CHARS", 600))
+# Pages with less content than this produce no LLM call
+QUESTION_PAPER_MIN_PAGE_CHARS = int(os.getenv("QUESTION_PAPER_MIN_PAGE_CHARS", 20))
+QUESTION_PAPER_CHECKPOINT_TTL = int(os.getenv("QUESTION_PAPER_CHECKPOINT_TTL", 86400))
+# Worker-local copies of a job's files (the originals are in the object store)
+QUESTION_PAPER_UPLOAD_DIR = os.getenv("QUESTION_PAPER_UPLOAD_DIR") or os.path.join(
+    tempfile.gettempdir(), "quizer_question_papers"
+)
+# Failed jobs whose files are deleted once their job record (and /retry) has expired
+QUESTION_PAPER_CLEANUP_KEY = "question_paper:cleanup"
+
+# Exception classes (or bases) that mean the network or the provider failed, not the input
+_TRANSIENT_ERROR_NAMES = frozenset({
+    "ConnectionError", "APIConnectionError", "ClientError", "TransportError", "InternalServerError"
+})
+
+
+@dataclass
+class PaperPage:
+    """One page of a question paper: a PDF page or a whole image"""
+    index: int  # position across every file of the paper
+    path: str
+    filename: str
+    kind: str  # pdf | image
+    page_number: int  # 1-based, within its file
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def list_pages(files: Sequence[Dict[str, str]]) -> List[PaperPage]:
+    """Pages of every file ({"path", "filename", "kind"}) in upload order"""
+    from app.services.pdf_engine import page_count
+
+    pages = []
+    for file in files:
+        count = page_count(file["path"]) if file["kind"] == "pdf" else 1
+        for number in range(1, count + 1):
+            pages.append(PaperPage(len(pages), file["path"], file["filename"], file["kind"], number))
+    return pages
+
+
+def extract_page_text(page: PaperPage) -> str:
+    """
+    Text of one page: the PDF text layer, or Tesseract for scanned pages and
+    images (app.services.ocr_engine, page cache included). Blocking.
+    """
+    from app.services.ocr_engine import is_scanned_page, ocr_image_file, ocr_pdf_page
+    from app.services.pdf_engine import DocumentCleaner, open_mapped
+
+    if page.kind == "image":
+        return ocr_image_file(page.path)[0]
+
+    document, release = open_mapped(page.path)
+    try:
+        pdf_page = document[page.page_number - 1]
+        text = pdf_page.get_text().strip()
+        scanned = is_scanned_page(pdf_page, text)
+    finally:
+        release()
+    if scanned:
+        return ocr_pdf_page(page.path, page.page_number)[0]
+    return DocumentCleaner().clean_content(text)
+
+
+def render_page_png(page: PaperPage) -> bytes:
+    """PNG of one page (images are passed through unchanged). Blocking."""
+    if page.kind == "image":
+        with open(page.path, "rb") as f:
+            return f.read()
+
+    from app.services.ocr_engine import OCR_DPI
+    from app.services.pdf_engine import open_mapped
+
+    document, release = open_mapped(page.path)
+    try:
+        return document[page.page_number - 1].get_pixmap(dpi=OCR_DPI).tobytes("png")
+    finally:
+        release()
+
+
+async def extract_page_content(page: PaperPage, extraction_mode: str) -> str:
+    """
+    Layout/OCR extraction of a single page: dots.ocr on a one-page image for
+    full_layout / layout_only, the Tesseract engine for ocr_only
+    """
+    if extraction_mode == "ocr_only":
+        return await asyncio.to_thread(extract_page_text, page)
+
+    from fastapi import UploadFile
+    from app.services.dots_ocr_service import process_question_paper_with_dots_ocr
+
+    data = await asyncio.to_thread(render_page_png, page)
+    stem = os.path.splitext(page.filename)[0]
+    upload = UploadFile(file=io.BytesIO(data), filename=f"{stem}-page{page.page_number}.png")
+    return await process_question_paper_with_dots_ocr(upload, extraction_mode)
+
+
+async def _extract_questions(content: str, generate_answers: bool) -> List[Dict]:
+    from app.models.enhanced_question_extractor import extract_questions_from_structured_content
+    return await extract_questions_from_structured_content(content, generate_answers)
+
+
+def save_upload_files(job_id: str, uploads: Sequence, store=None) -> List[Dict[str, str]]:
+    """Store spooled uploads in the object store; returns the job's file list ({"key", "filename", "kind"})"""
+    from app.services.object_store import get_object_store
+
+    store = store or get_object_store()
+    files = []
+    for position, upload in enumerate(uploads):
+        key = f"question_papers/{job_id}/{position}{upload.extension}"
+        store.put_file(key, upload.path)
+        files.append({"key": key, "filename": upload.filename, "kind": upload.kind})
+    return files
+
+
+def materialize_upload_files(job_id: str, files: Sequence[Dict[str, str]], store=None) -> List[Dict[str, str]]:
+    """Local copies of a job's stored files (reused across retries on the same worker); adds "path" """
+    from app.services.object_store import get_object_store
+
+    store = store or get_object_store()
+    directory = os.path.join(QUESTION_PAPER_UPLOAD_DIR, job_id)
+    os.makedirs(directory, exist_ok=True)
+    local = []
+    for file in files:
+        if "key" not in file:
+            local.append(dict(file))
+            continue
+        path = os.path.join(directory, os.path.basename(file["key"]))
+        if not os.path.exists(path):
+            partial = f"{path}.download"
+            if os.path.exists(partial):
+                os.remove(partial)
+            store.download_to(file["key"], partial)
+            os.replace(partial, path)
+        local.append({**file, "path": path})
+    return local
+
+
+def remove_upload_files(job_id: str, files: Sequence[Dict[str, str]] = (), store=None):
+    """Delete a job's stored files and this worker's copies"""
+    keys = [file["key"] for file in files if "key" in file]
+    if keys:
+        from app.services.object_store import get_object_store
+
+        store = store or get_object_store()
+        for key in keys:
+            store.delete(key)
+    shutil.rmtree(os.path.join(QUESTION_PAPER_UPLOAD_DIR, job_id), ignore_errors=True)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Network errors, LLM rate limits, timeouts and 5xx responses: worth running the job again"""
+    from app.services.llm_governor import classify_error
+
+    if classify_error(error) in ("rate_limited", "timeout"):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return any(cls.__name__ in _TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def release_failed_upload_files(job_id: str, files: Sequence[Dict[str, str]], resumable: bool,
+                                delay: int = None, client=None, store=None):
+    """
+    Final failure of a job. This worker's copies go now; the stored files too,
+    unless the job can still be resumed with /retry, in which case they are
+    queued for sweep_upload_files once the job record has expired.
+    """
+    shutil.rmtree(os.path.join(QUESTION_PAPER_UPLOAD_DIR, job_id), ignore_errors=True)
+    if resumable:
+        delay = QUESTION_PAPER_CHECKPOINT_TTL if delay is None else delay
+        try:
+            if client is None:
+                from app.config.redis_config import redis_service
+                client = redis_service.get_sync_client(decode_responses=True)
+            client.zadd(QUESTION_PAPER_CLEANUP_KEY, {_cleanup_entry(job_id, files): time.time() + delay})
+            return
+        except Exception as e:
+            logger.warning(f"Could not schedule cleanup of question paper {job_id}, removing its files now: {e}")
+    remove_upload_files(job_id, files, store=store)
+
+
+def _cleanup_entry(job_id: str, files: Sequence[Dict[str, str]]) -> str:
+    return json.dumps({"job_id": job_id, "files": list(files)}, sort_keys=True)
+
+
+def cancel_upload_cleanup(job_id: str, files: Sequence[Dict[str, str]], client=None):
+    """A failed job is being retried: its files are needed again"""
+    if client is None:
+        from app.config.redis_config import redis_service
+        client = redis_service.get_sync_client(decode_responses=True)
+    client.zrem(QUESTION_PAPER_CLEANUP_KEY, _cleanup_entry(job_id, files))
+
+
+def sweep_upload_files(now: float = None, client=None, store=None) -> int:
+    """Delete the files of failed jobs whose retry window is over; returns how many jobs were swept"""
+    if client is None:
+        from app.config.redis_config import redis_service
+        client = redis_service.get_sync_client(decode_responses=True)
+    swept = 0
+    for entry in client.zrangebyscore(QUESTION_PAPER_CLEANUP_KEY, "-inf", now or time.time()):
+        # Several beat workers may sweep at once; whoever removes the entry deletes the files
+        if not client.zrem(QUESTION_PAPER_CLEANUP_KEY, entry):
+            continue
+        job = json.loads(entry)
+        remove_upload_files(job["job_id"], job["files"], store=store)
+        swept += 1
+    return swept
+
+
+class PageCheckpoints:
+    """Questions of each finished page, kept in Redis (CacheService) so a retry skips those pages"""
+
+    def __init__(self, job_id: str, cache=None, ttl: int = None):
+        if cache is None:
+            from app.services.cache_service import CacheService
+            cache = CacheService()
+        self.job_id = job_id
+        self.cache = cache
+        self.ttl = ttl or QUESTION_PAPER_CHECKPOINT_TTL
+
+    def _key(self, index: int) -> str:
+        return f"question_paper:{self.job_id}:page:{index}"
+
+    def load(self, pages: Sequence[PaperPage]) -> Dict[int, List[Dict]]:
+        done = {}
+        for page in pages:
+            questions = self.cache.get(self._key(page.index))
+            if isinstance(questions, list):
+                done[page.index] = questions
+        return done
+
+    def save(self, index: int, questions: List[Dict]):
+        self.cache.set(self._key(index), questions, ttl=self.ttl)
+
+
+class QuestionPaperJob:
+    """
+    Runs extraction + question extraction page by page, concurrently.
+    on_page(page, questions) is awaited as each page finishes.
+    """
+
+    def __init__(self,
+                 job_id: str,
+                 pages: Sequence[PaperPage],
+                 extraction_mode: str = "full_layout",
+                 generate_answers: bool = True,
+                 checkpoints: PageCheckpoints = None,
+                 extract_page: Callable[[PaperPage, str], Awaitable[str]] = None,
+                 extract_questions: Callable[[str, bool], Awaitable[List[Dict]]] = None,
+                 concurrency: int = None,
+                 overlap_chars: int = None):
+        self.job_id = job_id
+        self.pages = list(pages)
+        self.extraction_mode = extraction_mode
+        self.generate_answers = generate_answers
+        self.checkpoints = checkpoints or PageCheckpoints(job_id)
+        self.extract_page = extract_page or extract_page_content
+        self.extract_questions = extract_questions or _extract_questions
+        self.concurrency = concurrency or QUESTION_PAPER_PAGE_CONCURRENCY
+        self.overlap_chars = QUESTION_PAPER_OVERLAP_CHARS if overlap_chars is None else overlap_chars
+        self.results: Dict[int, List[Dict]] = {}
+        self.resumed_pages = 0
+        self._content: Dict[int, asyncio.Task] = {}
+
+    def _next_page(self, page: PaperPage) -> Optional[PaperPage]:
+        """The following page of the same file"""
+        if page.index + 1 < len(self.pages):
+            following = self.pages[page.index + 1]
+            if following.path == page.path:
+                return following
+        return None
+
+    def _page_content(self, page: PaperPage) -> "asyncio.Task":
+        # Shared: a page is extracted once, whether for itself or as the previous page's overlap
+        if page.index not in self._content:
+            self._content[page.index] = asyncio.ensure_future(self.extract_page(page, self.extraction_mode))
+        return self._content[page.index]
+
+    async def _page_questions(self, page: PaperPage) -> List[Dict]:
+        text = (await self._page_content(page) or "").strip()
+        if len(text) < QUESTION_PAPER_MIN_PAGE_CHARS:
+            return []
+
+        following = self._next_page(page)
+        if following is not None and self.overlap_chars:
+            try:
+                tail = (await self._page_content(following) or "")[:self.overlap_chars].strip()
+            except Exception as e:
+                logger.warning(f"Overlap for page {page.page_number} of {page.filename} unavailable: {e}")
+                tail = ""
+            if tail:
+                text = f"{text}\n\n[Start of the next page]\n{tail}"
+
+        questions = await self.extract_questions(text, self.generate_answers) or []
+        questions = [question for question in questions if isinstance(question, dict)]
+        for question in questions:
+            question.setdefault("page_number", page.page_number)
+            question["source_file"] = page.filename
+        return questions
+
+    def partial_questions(self) -> List[Dict]:
+        """Questions of the finished pages, in page order, de-duplicated"""
+        groups = [self.results[page.index] for page in self.pages if page.index in self.results]
+        return [question for group in dedupe_questions(groups) for question in group]
+
+    async def run(self, on_page: Callable[[PaperPage, List[Dict]], Awaitable[None]] = None) -> List[Dict]:
+        done = await asyncio.to_thread(self.checkpoints.load, self.pages)
+        self.results.update(done)
+        self.resumed_pages = len(done)
+        if done:
+            logger.info(f"Question paper {self.job_id}: resuming with {len(done)}/{len(self.pages)} pages done")
+
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def process(page: PaperPage):
+            async with limit:
+                questions = await self._page_questions(page)
+            await asyncio.to_thread(self.checkpoints.save, page.index, questions)
+            self.results[page.index] = questions
+            logger.info(f"Question paper {self.job_id}: page {page.page_number} of {page.filename}, "
+                        f"{len(questions)} questions ({len(self.results)}/{len(self.pages)} pages)")
+            if on_page is not None:
+                await on_page(page, questions)
+
+        try:
+            outcomes = await asyncio.gather(
+                *[process(page) for page in self.pages if page.index not in done],
+                return_exceptions=True
+            )
+        finally:
+            for task in self._content.values():
+                task.cancel()
+        # Every other page is checkpointed before the first failure is raised
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if errors:
+            raise errors[0]
+        return self.partial_questions()
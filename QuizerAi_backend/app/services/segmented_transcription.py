@@ -0,0 +1,282 @@
+# app/services/segmented_transcription.py
+"""
+Segmented Whisper transcription for long audio
+The audio file is split into ~WHISPER_SEGMENT_SECONDS pieces, cut inside a
+silence near each target boundary (ffmpeg silencedetect) so no word is split;
+where no silence is found, the cut is hard and neighbouring segments overlap
+by WHISPER_SEGMENT_OVERLAP_SECONDS. Segments are re-encoded small (mono 16 kHz
+Opus, well under the Groq upload limit), transcribed concurrently under the
+shared Groq budget (llm_governor), and the texts are stitched back together
+with the words repeated in an overlap removed. A two-hour lecture takes about
+as long as its slowest segment instead of failing on the file size limit.
+Each segment's text is cached (extraction_cache, keyed by the audio hash, the
+segment bounds and the model), so a retry only transcribes the segments that
+failed.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from app.services.llm_governor import llm_governor
+
+logger = logging.getLogger(__name__)
+
+WHISPER_SEGMENT_SECONDS = float(os.getenv("WHISPER_SEGMENT_SECONDS", 600))
+# A cut is looked for in a silence up to this far before the target boundary
+WHISPER_SEGMENT_SEARCH_SECONDS = float(os.getenv("WHISPER_SEGMENT_SEARCH_SECONDS", 60))
+WHISPER_SEGMENT_OVERLAP_SECONDS = float(os.getenv("WHISPER_SEGMENT_OVERLAP_SECONDS", 3))
+WHISPER_SILENCE_DB = float(os.getenv("WHISPER_SILENCE_DB", -35))
+WHISPER_SILENCE_MIN_SECONDS = float(os.getenv("WHISPER_SILENCE_MIN_SECONDS", 0.4))
+WHISPER_SEGMENT_CONCURRENCY = int(os.getenv("WHISPER_SEGMENT_CONCURRENCY", 8))
+WHISPER_SEGMENT_TIMEOUT = float(os.getenv("WHISPER_SEGMENT_TIMEOUT", 120))
+WHISPER_SEGMENT_BITRATE = os.getenv("WHISPER_SEGMENT_BITRATE", "32k")
+WHISPER_MAX_AUDIO_SECONDS = float(os.getenv("WHISPER_MAX_AUDIO_SECONDS", 4 * 3600))
+WHISPER_CACHE_ENABLED = os.getenv("WHISPER_CACHE_ENABLED", "true").lower() == "true"
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+_WORD_RE = re.compile(r"[^\w']+")
+
+
+@dataclass
+class AudioSegment:
+    index: int
+    start: float  # seconds
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class SegmentsFailed(Exception):
+    """Some segments could not be transcribed (the finished ones are cached)"""
+
+    def __init__(self, failed: int, total: int, error: BaseException):
+        super().__init__(f"{failed} of {total} audio segments failed: {error}")
+        self.failed = failed
+        self.total = total
+
+
+def plan_segments(duration: float,
+                  silences: Sequence[Tuple[float, float]],
+                  segment_seconds: float = None,
+                  search_seconds: float = None,
+                  overlap_seconds: float = None) -> List[AudioSegment]:
+    """
+    Segment bounds for audio of this duration: each cut at the middle of the
+    longest silence within search_seconds before the target boundary, or a
+    hard cut at the target with the next segment starting overlap_seconds earlier
+    """
+    segment_seconds = segment_seconds or WHISPER_SEGMENT_SECONDS
+    search_seconds = WHISPER_SEGMENT_SEARCH_SECONDS if search_seconds is None else search_seconds
+    overlap_seconds = WHISPER_SEGMENT_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+
+    segments = []
+    start = 0.0
+    while duration - start > segment_seconds:
+        target = start + segment_seconds
+        candidates = [(end - begin, (begin + end) / 2) for begin, end in silences
+                      if target - search_seconds <= (begin + end) / 2 <= target and (begin + end) / 2 > start]
+        if candidates:
+            cut = max(candidates)[1]
+            next_start = cut
+        else:
+            cut = target
+            next_start = cut - overlap_seconds
+        segments.append(AudioSegment(len(segments), start, cut))
+        start = next_start
+    segments.append(AudioSegment(len(segments), start, duration))
+    return segments
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in _WORD_RE.split(text.lower()) if word]
+
+
+def stitch_transcripts(texts: Sequence[str], max_overlap_words: int = 40, min_match: float = 0.8,
+                       exact_below: int = 6) -> str:
+    """
+    Join segment texts, dropping the start of a segment that repeats the end
+    of the previous one (the overlap of a hard cut); Whisper may transcribe the
+    overlap slightly differently, so min_match of the words must agree (all of
+    them for overlaps shorter than exact_below words, where a near match is
+    more likely ordinary repeated phrasing)
+    """
+    result: List[str] = []
+    for text in texts:
+        tokens = (text or "").split()
+        if not tokens:
+            continue
+        previous = _words(" ".join(result[-max_overlap_words:]))
+        for size in range(min(max_overlap_words, len(previous), len(tokens)), 2, -1):
+            head = _words(" ".join(tokens[:size]))
+            tail = previous[-len(head):] if head else []
+            required = len(head) if len(head) < exact_below else min_match * len(head)
+            if head and len(head) == len(tail) and sum(a == b for a, b in zip(tail, head)) >= required:
+                tokens = tokens[size:]
+                break
+        result.extend(tokens)
+    return " ".join(result)
+
+
+async def _run(*args: str) -> Tuple[int, str, str]:
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    return process.returncode, stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+
+
+async def probe_duration(path: str) -> float:
+    code, stdout, stderr = await _run(FFPROBE_BIN, "-v", "error", "-show_entries", "format=duration",
+                                      "-of", "default=noprint_wrappers=1:nokey=1", path)
+    if code != 0:
+        raise RuntimeError(f"ffprobe failed: {stderr.strip()[-300:]}")
+    return float(stdout.strip())
+
+
+async def detect_silences(path: str) -> List[Tuple[float, float]]:
+    """(start, end) of every silence in the audio (ffmpeg silencedetect)"""
+    code, _, stderr = await _run(FFMPEG_BIN, "-hide_banner", "-nostats", "-i", path, "-af",
+                                 f"silencedetect=noise={WHISPER_SILENCE_DB}dB:d={WHISPER_SILENCE_MIN_SECONDS}",
+                                 "-f", "null", "-")
+    if code != 0:
+        raise RuntimeError(f"ffmpeg silencedetect failed: {stderr.strip()[-300:]}")
+    silences, start = [], None
+    for kind, value in _SILENCE_RE.findall(stderr):
+        if kind == "start":
+            start = max(0.0, float(value))
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    return silences
+
+
+async def extract_segment(path: str, segment: AudioSegment, directory: str) -> str:
+    """Re-encode one segment as mono 16 kHz Opus"""
+    output = os.path.join(directory, f"segment_{segment.index:04d}.ogg")
+    code, _, stderr = await _run(FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+                                 "-ss", f"{segment.start:.3f}", "-t", f"{segment.duration:.3f}", "-i", path,
+                                 "-vn", "-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", WHISPER_SEGMENT_BITRATE,
+                                 output)
+    if code != 0:
+        raise RuntimeError(f"ffmpeg segment {segment.index} failed: {stderr.strip()[-300:]}")
+    return output
+
+
+def _cache_key(audio_digest: str, segment: AudioSegment, model: str) -> str:
+    from app.services.extraction_cache import extraction_cache
+    material = f"{audio_digest}:{segment.start:.3f}:{segment.end:.3f}"
+    return extraction_cache.make_key(hashlib.sha256(material.encode("utf-8")).hexdigest(), "whisper_segment", model)
+
+
+class SegmentedTranscriber:
+    """Splits, transcribes concurrently and stitches (see module docstring)"""
+
+    def __init__(self, concurrency: int = None, segment_seconds: float = None):
+        self.concurrency = concurrency or WHISPER_SEGMENT_CONCURRENCY
+        self.segment_seconds = segment_seconds or WHISPER_SEGMENT_SECONDS
+        self._lock = threading.Lock()
+        self._stats = {
+            "files": 0,
+            "segments": 0,
+            "segments_cached": 0,
+            "segments_failed": 0,
+            "silence_cuts": 0,
+            "audio_seconds": 0.0
+        }
+
+    async def transcribe(self,
+                         audio_path: str,
+                         model: str,
+                         transcribe_file: Callable[[str], str],
+                         run_blocking: Callable[..., Awaitable[Any]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Transcribe an audio file of any length. transcribe_file(path) is the
+        blocking Whisper call for one segment file; it and the audio hashing run
+        through run_blocking(fn, *args), the caller's bounded thread pool
+        (youtube_service.run_blocking). Returns (text, info).
+        Raises SegmentsFailed if any segment failed after the others finished.
+        """
+        from app.services.extraction_cache import extraction_cache, sha256_file
+
+        duration = await probe_duration(audio_path)
+        if duration > WHISPER_MAX_AUDIO_SECONDS:
+            raise ValueError(f"Audio too long: {duration / 3600:.1f}h (limit {WHISPER_MAX_AUDIO_SECONDS / 3600:.1f}h)")
+        silences = await detect_silences(audio_path) if duration > self.segment_seconds else []
+        segments = plan_segments(duration, silences, self.segment_seconds)
+        digest = await run_blocking(sha256_file, audio_path)
+
+        limit = asyncio.Semaphore(self.concurrency)
+        directory = tempfile.mkdtemp(prefix="whisper_segments_")
+        cached = 0
+
+        async def transcribe_segment(segment: AudioSegment) -> str:
+            nonlocal cached
+            key = _cache_key(digest, segment, model)
+            if WHISPER_CACHE_ENABLED:
+                hit = await extraction_cache.get(key)
+                if hit:
+                    cached += 1
+                    return hit[0]
+            async with limit:
+                segment_path = await extract_segment(audio_path, segment, directory)
+                try:
+                    text = await llm_governor.run(
+                        lambda: run_blocking(transcribe_file, segment_path),
+                        timeout=WHISPER_SEGMENT_TIMEOUT
+                    )
+                finally:
+                    os.remove(segment_path)
+            text = (text or "").strip()
+            if WHISPER_CACHE_ENABLED and text:
+                await extraction_cache.set(key, [text])
+            return text
+
+        try:
+            outcomes = await asyncio.gather(*[transcribe_segment(segment) for segment in segments],
+                                            return_exceptions=True)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        silence_cuts = sum(1 for previous, following in zip(segments, segments[1:]) if following.start == previous.end)
+        with self._lock:
+            self._stats["files"] += 1
+            self._stats["segments"] += len(segments)
+            self._stats["segments_cached"] += cached
+            self._stats["segments_failed"] += len(errors)
+            self._stats["silence_cuts"] += silence_cuts
+            self._stats["audio_seconds"] += duration
+        if errors:
+            raise SegmentsFailed(len(errors), len(segments), errors[0])
+
+        info = {
+            "segments": len(segments),
+            "segments_cached": cached,
+            "silence_cuts": silence_cuts,
+            "audio_seconds": round(duration, 1)
+        }
+        logger.info(f"Transcribed {duration / 60:.1f} min of audio in {len(segments)} segments ({cached} cached)")
+        return stitch_transcripts(outcomes), info
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["audio_seconds"] = round(stats["audio_seconds"], 1)
+        stats["concurrency"] = self.concurrency
+        stats["segment_seconds"] = self.segment_seconds
+        return stats
+
+
+# Global instance
+segmented_transcriber = SegmentedTranscriber()
@@ -0,0 +1,271 @@
+# app/services/single_flight.py
+"""
+Single-flight coalescing of identical in-flight generation requests
+Within a process, concurrent callers with the same key await one shared future.
+Across processes (API pods, Celery workers) a Redis lock elects one leader;
+the others wait on a Redis channel and read the result from the generation cache.
+The leader extends the lock while it runs, so a generation longer than the lock
+TTL is not started a second time; a leader that dies stops extending and its
+lock expires after at most SINGLE_FLIGHT_LOCK_TTL.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config.redis_config import RedisCircuitBreaker, redis_service
+
+logger = logging.getLogger(__name__)
+
+# Delete the lock only if we still own it
+_UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Extend the lock only if we still own it
+_EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class LeaderCancelled(Exception):
+    """The caller doing the work was cancelled; a waiter should take over"""
+
+
+class SingleFlight(RedisCircuitBreaker):
+    """Coalesce concurrent calls that share a key into a single execution"""
+    redis_unavailable_message = "Single-flight falling back to in-process coalescing"
+
+    def __init__(self,
+                 lock_ttl: int = None,
+                 wait_timeout: float = None,
+                 poll_interval: float = 1.0,
+                 redis_retry_after: int = 30):
+        self.lock_ttl = lock_ttl or int(os.getenv("SINGLE_FLIGHT_LOCK_TTL", 180))
+        self.wait_timeout = wait_timeout or float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", 240))
+        self.poll_interval = poll_interval
+        self.redis_retry_after = redis_retry_after
+
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "leaders": 0,
+            "local_coalesced": 0,
+            "remote_coalesced": 0,
+            "wait_timeouts": 0
+        }
+
+    async def do(self,
+                 key: str,
+                 fn: Callable[[], Awaitable[Any]],
+                 cache_lookup: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """
+        Run fn() once per key at a time and hand its result to every concurrent caller.
+        cache_lookup (e.g. a generation cache get) lets callers in other processes
+        pick up the result stored by the leader; without it only local calls coalesce.
+        """
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                is_leader = future is None
+                if is_leader:
+                    future = concurrent.futures.Future()
+                    self._inflight[key] = future
+
+            if not is_leader:
+                with self._lock:
+                    self._stats["local_coalesced"] += 1
+                try:
+                    # shield: a cancelled waiter must not cancel the shared future
+                    return await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(future)),
+                        timeout=self.wait_timeout
+                    )
+                except LeaderCancelled:
+                    continue
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        self._stats["wait_timeouts"] += 1
+                    logger.warning(f"Single-flight wait for {key} timed out, running independently")
+                    return await fn()
+
+            try:
+                result = await self._lead(key, fn, cache_lookup)
+            except asyncio.CancelledError:
+                future.set_exception(LeaderCancelled())
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing counters (this process)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["redis_errors"] = self.redis_errors
+            stats["in_flight"] = len(self._inflight)
+        return stats
+
+    # Leader path
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]], cache_lookup) -> Any:
+        token = None
+        if cache_lookup is not None:
+            token, held_elsewhere = await self._try_lock(key)
+            if held_elsewhere:
+                found, result = await self._await_remote(key, cache_lookup)
+                if found:
+                    with self._lock:
+                        self._stats["remote_coalesced"] += 1
+                    return result
+                # The other leader finished without a result or died: take over
+                token, _ = await self._try_lock(key)
+
+        with self._lock:
+            self._stats["leaders"] += 1
+        heartbeat = asyncio.create_task(self._keep_lock(key, token)) if token is not None else None
+        try:
+            return await fn()
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            if token is not None:
+                await self._unlock(key, token)
+
+    async def _await_remote(self, key: str, cache_lookup) -> Tuple[bool, Any]:
+        """Wait for another process's leader; returns (found, result)"""
+        pubsub = await self._subscribe(self._channel(key))
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while True:
+                result = await cache_lookup()
+                if result is not None:
+                    return True, result
+                if not await self._lock_held(key):
+                    return False, None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        self._stats["wait_timeouts"] += 1
+                    return False, None
+                await self._wait_message(pubsub, min(self.poll_interval, remaining))
+        finally:
+            await self._close_pubsub(pubsub)
+
+    # Redis helpers
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"singleflight:{key}"
+
+    @staticmethod
+    def _channel(key: str) -> str:
+        return f"singleflight:done:{key}"
+
+    async def _redis_call(self, method: str, *args, **kwargs):
+        if redis_service.cache_client is not None:
+            return await getattr(redis_service.cache_client, method)(*args, **kwargs)
+        client = redis_service.get_sync_client(decode_responses=True)
+        return await asyncio.to_thread(getattr(client, method), *args, **kwargs)
+
+    async def _try_lock(self, key: str) -> Tuple[Optional[str], bool]:
+        """Returns (token, held_elsewhere); token is None when Redis is unavailable or the lock is taken"""
+        if not self._redis_available():
+            return None, False
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self._redis_call("set", self._lock_key(key), token, nx=True, ex=self.lock_ttl)
+        except Exception as e:
+            self._redis_failed(e)
+            return None, False
+        return (token, False) if acquired else (None, True)
+
+    async def _lock_held(self, key: str) -> bool:
+        if not self._redis_available():
+            return False
+        try:
+            return bool(await self._redis_call("exists", self._lock_key(key)))
+        except Exception as e:
+            self._redis_failed(e)
+            return False
+
+    async def _keep_lock(self, key: str, token: str):
+        """Heartbeat: re-arm the lock TTL every third of it while the leader runs"""
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                extended = await self._redis_call("eval", _EXTEND_SCRIPT, 1, self._lock_key(key), token,
+                                                  int(self.lock_ttl * 1000))
+            except Exception as e:
+                # Retried on the next beat; the lock still has two thirds of its TTL
+                logger.debug(f"Could not extend single-flight lock for {key}: {e}")
+                continue
+            if not extended:
+                logger.warning(f"Single-flight lock for {key} was lost; another process may run it too")
+                return
+
+    async def _unlock(self, key: str, token: str):
+        try:
+            await self._redis_call("eval", _UNLOCK_SCRIPT, 1, self._lock_key(key), token)
+            await self._redis_call("publish", self._channel(key), "done")
+        except Exception as e:
+            # The lock expires on its own; waiters fall back to polling
+            logger.debug(f"Could not release single-flight lock for {key}: {e}")
+
+    async def _subscribe(self, channel: str):
+        try:
+            if redis_service.cache_client is not None:
+                pubsub = redis_service.cache_client.pubsub()
+                await pubsub.subscribe(channel)
+            else:
+                pubsub = redis_service.get_sync_client(decode_responses=True).pubsub()
+                await asyncio.to_thread(pubsub.subscribe, channel)
+            return pubsub
+        except Exception as e:
+            logger.debug(f"Single-flight subscribe failed, polling instead: {e}")
+            return None
+
+    async def _wait_message(self, pubsub, timeout: float):
+        if pubsub is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            if redis_service.cache_client is not None:
+                await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+            else:
+                await asyncio.to_thread(pubsub.get_message, True, timeout)
+        except Exception:
+            await asyncio.sleep(timeout)
+
+    async def _close_pubsub(self, pubsub):
+        if pubsub is None:
+            return
+        try:
+            if redis_service.cache_client is not None:
+                close = getattr(pubsub, "aclose", None) or pubsub.close
+                await close()
+            else:
+                await asyncio.to_thread(pubsub.close)
+        except Exception:
+            pass
+
+
+# Global instance shared by the generation entry points
+single_flight = SingleFlight()
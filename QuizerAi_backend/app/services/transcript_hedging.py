@@ -0,0 +1,246 @@
+# app/services/transcript_hedging.py
+"""
+Hedged transcript acquisition
+Instead of trying each method in turn (where a slow yt-dlp failure costs its
+whole timeout before the transcript API is even tried), the free methods are
+started together and the first result that passes the quality check wins;
+the others are cancelled. Paid methods (Groq Whisper) are hedges: the first
+starts after TRANSCRIPT_HEDGE_DELAY seconds (or at once if every free method
+has already failed), the next only if it fails.
+Success rate and latency per method are counted in Redis (daily buckets, so
+they follow recent behaviour) and shared by every process. They order the paid
+methods, and move a free method that keeps failing behind the hedge delay.
+Cancelling a loser stops waiting for it; a blocking call already running in a
+worker thread finishes in the background and its result is discarded.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config.redis_config import RedisCircuitBreaker, redis_service
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_HEDGE_DELAY = float(os.getenv("TRANSCRIPT_HEDGE_DELAY", 8.0))
+TRANSCRIPT_MIN_CHARS = int(os.getenv("TRANSCRIPT_MIN_CHARS", 50))
+# A free method below this success rate (after TRANSCRIPT_STATS_MIN_ATTEMPTS tries) waits for the hedge delay
+TRANSCRIPT_DEMOTE_SUCCESS_RATE = float(os.getenv("TRANSCRIPT_DEMOTE_SUCCESS_RATE", 0.1))
+TRANSCRIPT_STATS_MIN_ATTEMPTS = int(os.getenv("TRANSCRIPT_STATS_MIN_ATTEMPTS", 20))
+# Days of daily buckets read back
+TRANSCRIPT_STATS_DAYS = int(os.getenv("TRANSCRIPT_STATS_DAYS", 2))
+_STATS_REFRESH_SECONDS = 30
+
+
+@dataclass
+class TranscriptMethod:
+    """One way to get a transcript; fetch(video_id) returns a result with .transcript"""
+    name: str
+    fetch: Callable[[str], Awaitable[Any]]
+    paid: bool = False
+    expected_latency: float = 5.0  # seconds, used until there are stats
+
+
+def acceptable_transcript(result: Any) -> bool:
+    """Quality check for a method's result"""
+    text = (getattr(result, "transcript", None) or "").strip()
+    return len(text) > TRANSCRIPT_MIN_CHARS and len(text.split()) >= 10
+
+
+class MethodStats(RedisCircuitBreaker):
+    """Attempts, successes and latency per method: Redis hash per day, local counters as fallback"""
+    redis_unavailable_message = "Transcript method stats Redis tier unavailable"
+
+    def __init__(self, key_prefix: str = "transcript_methods", redis_retry_after: int = 30):
+        self.key_prefix = key_prefix
+        self.redis_retry_after = redis_retry_after
+        self._local: Dict[str, Dict[str, float]] = {}
+        self._snapshot: Dict[str, Dict[str, float]] = {}
+        self._snapshot_at = 0.0
+        self._lock = threading.Lock()
+
+    def _day_key(self, day: datetime) -> str:
+        return f"{self.key_prefix}:{day.strftime('%Y%m%d')}"
+
+    def record_sync(self, name: str, success: bool, latency: float):
+        with self._lock:
+            counters = self._local.setdefault(name, {"attempts": 0, "successes": 0, "latency": 0.0})
+            counters["attempts"] += 1
+            counters["successes"] += int(success)
+            counters["latency"] += latency
+        if not self._redis_available():
+            return
+        key = self._day_key(datetime.utcnow())
+        try:
+            pipe = redis_service.get_sync_client(decode_responses=True).pipeline()
+            pipe.hincrby(key, f"{name}:attempts", 1)
+            pipe.hincrby(key, f"{name}:successes", int(success))
+            pipe.hincrbyfloat(key, f"{name}:latency", round(latency, 3))
+            pipe.expire(key, (TRANSCRIPT_STATS_DAYS + 1) * 86400)
+            pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    def snapshot_sync(self, fresh: bool = False) -> Dict[str, Dict[str, float]]:
+        """{name: {attempts, successes, latency}} over the last TRANSCRIPT_STATS_DAYS days (cached briefly)"""
+        if not fresh and time.monotonic() - self._snapshot_at < _STATS_REFRESH_SECONDS:
+            return self._snapshot
+        totals: Dict[str, Dict[str, float]] = {}
+        if self._redis_available():
+            try:
+                client = redis_service.get_sync_client(decode_responses=True)
+                today = datetime.utcnow()
+                for offset in range(TRANSCRIPT_STATS_DAYS):
+                    for field_name, value in (client.hgetall(self._day_key(today - timedelta(days=offset))) or {}).items():
+                        name, _, counter = field_name.rpartition(":")
+                        entry = totals.setdefault(name, {"attempts": 0, "successes": 0, "latency": 0.0})
+                        entry[counter] = entry.get(counter, 0) + float(value)
+            except Exception as e:
+                self._redis_failed(e)
+                totals = {}
+        if not totals:
+            with self._lock:
+                totals = {name: dict(counters) for name, counters in self._local.items()}
+        self._snapshot = totals
+        self._snapshot_at = time.monotonic()
+        return totals
+
+    async def record(self, name: str, success: bool, latency: float):
+        await asyncio.to_thread(self.record_sync, name, success, latency)
+
+    async def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return await asyncio.to_thread(self.snapshot_sync)
+
+
+def expected_time(method: TranscriptMethod, counters: Optional[Dict[str, float]]) -> float:
+    """Expected seconds to a usable transcript: mean latency / success rate (smoothed)"""
+    attempts = (counters or {}).get("attempts", 0)
+    successes = (counters or {}).get("successes", 0)
+    latency = counters["latency"] / attempts if attempts else method.expected_latency
+    return latency / ((successes + 1) / (attempts + 2))
+
+
+def plan_methods(methods: Sequence[TranscriptMethod],
+                 stats: Dict[str, Dict[str, float]]) -> Tuple[List[TranscriptMethod], List[TranscriptMethod]]:
+    """(started at once, hedges in order): free methods first, each group by expected time"""
+    def rank(method):
+        return expected_time(method, stats.get(method.name))
+
+    def demoted(method):
+        counters = stats.get(method.name) or {}
+        attempts = counters.get("attempts", 0)
+        return (attempts >= TRANSCRIPT_STATS_MIN_ATTEMPTS
+                and counters.get("successes", 0) / attempts < TRANSCRIPT_DEMOTE_SUCCESS_RATE)
+
+    free = sorted((method for method in methods if not method.paid), key=rank)
+    immediate = [method for method in free if not demoted(method)] or free[:1]
+    hedges = [method for method in free if method not in immediate]
+    hedges += sorted((method for method in methods if method.paid), key=rank)
+    return immediate, hedges
+
+
+class HedgedAcquirer:
+    """Races transcript methods for one video (see module docstring)"""
+
+    def __init__(self, hedge_delay: float = None, stats: MethodStats = None,
+                 accept: Callable[[Any], bool] = None):
+        self.hedge_delay = TRANSCRIPT_HEDGE_DELAY if hedge_delay is None else hedge_delay
+        self.method_stats = stats or MethodStats()
+        self.accept = accept or acceptable_transcript
+        self._lock = threading.Lock()
+        self._stats = {
+            "acquisitions": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "paid_started": 0,
+            "cancelled": 0
+        }
+        self._wins: Dict[str, int] = {}
+
+    async def acquire(self, video_id: str, methods: Sequence[TranscriptMethod]) -> Tuple[Optional[Any], List[Dict]]:
+        """(winning result or None, [{method, success, latency, error}] of the finished attempts)"""
+        immediate, hedges = plan_methods(methods, await self.method_stats.snapshot())
+        loop = asyncio.get_running_loop()
+        pending: Dict[asyncio.Task, Tuple[TranscriptMethod, float]] = {}
+        attempts: List[Dict] = []
+
+        def start(method: TranscriptMethod):
+            logger.info(f"Starting {method.name} for video {video_id}")
+            pending[asyncio.ensure_future(method.fetch(video_id))] = (method, loop.time())
+            if method.paid:
+                with self._lock:
+                    self._stats["paid_started"] += 1
+
+        with self._lock:
+            self._stats["acquisitions"] += 1
+        for method in immediate:
+            start(method)
+        hedge_at = loop.time() + self.hedge_delay
+
+        try:
+            while pending or hedges:
+                # A paid hedge never runs alongside another paid method
+                ready = bool(hedges) and not (hedges[0].paid and any(m.paid for m, _ in pending.values()))
+                if ready and (not pending or loop.time() >= hedge_at):
+                    start(hedges.pop(0))
+                    hedge_at = loop.time() + self.hedge_delay
+                    continue
+
+                timeout = max(0.0, hedge_at - loop.time()) if ready else None
+                done, _ = await asyncio.wait(set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    method, started = pending.pop(task)
+                    latency = loop.time() - started
+                    error = None
+                    try:
+                        result = task.result()
+                        success = self.accept(result)
+                        if not success:
+                            error = getattr(result, "error_message", None) or "insufficient content"
+                    except Exception as e:
+                        result, success, error = None, False, str(e)
+                    attempts.append({"method": method.name, "success": success,
+                                     "latency": round(latency, 3), "error": error})
+                    await self.method_stats.record(method.name, success, latency)
+                    if success:
+                        logger.info(f"{method.name} won for video {video_id} in {latency:.1f}s")
+                        with self._lock:
+                            self._stats["succeeded"] += 1
+                            self._wins[method.name] = self._wins.get(method.name, 0) + 1
+                        return result, attempts
+                    logger.info(f"{method.name} failed for video {video_id}: {error}")
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                with self._lock:
+                    self._stats["cancelled"] += len(pending)
+
+        with self._lock:
+            self._stats["failed"] += 1
+        return None, attempts
+
+    def stats(self) -> Dict[str, Any]:
+        """Race outcomes (this process) and the shared per-method success rate / latency"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["wins"] = dict(self._wins)
+        methods = {}
+        for name, counters in self.method_stats.snapshot_sync(fresh=True).items():
+            attempts = counters.get("attempts", 0)
+            methods[name] = {
+                "attempts": int(attempts),
+                "success_rate": round(counters.get("successes", 0) / attempts, 4) if attempts else 0.0,
+                "avg_latency": round(counters.get("latency", 0.0) / attempts, 3) if attempts else 0.0
+            }
+        stats["methods"] = methods
+        stats["hedge_delay"] = self.hedge_delay
+        return stats
+
+
+# Global instance
+transcript_hedger = HedgedAcquirer()
@@ -0,0 +1,288 @@
+# app/services/transcript_store.py
+"""
+Persistent transcript store for YouTube videos
+Keyed by video ID, so a popular lecture is transcribed once (yt-dlp
+subtitles, the transcript API or paid Groq Whisper) and then served to every
+later request. The loaders take whichever language they find first (English
+subtitles preferred), so a video has one transcript; each record keeps its
+language and the method that produced it. Videos
+with no obtainable transcript are cached as unavailable for a short TTL, so
+they are not retried by every request, but are retried soon after.
+Tiers: in-process LRU -> Redis (zlib JSON, TTL) -> compressed files on disk
+(longer TTL, survives Redis eviction and restarts). Hits are promoted upwards.
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config.redis_config import RedisCircuitBreaker, redis_service
+from app.services.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Bump when transcript extraction changes in a way that invalidates stored text
+TRANSCRIPT_STORE_VERSION = "v2"
+TRANSCRIPT_STORE_TTL = int(os.getenv("TRANSCRIPT_STORE_TTL", 7 * 86400))
+TRANSCRIPT_STORE_DISK_TTL = int(os.getenv("TRANSCRIPT_STORE_DISK_TTL", 30 * 86400))
+# "No transcript available" is remembered this long
+TRANSCRIPT_STORE_NEGATIVE_TTL = int(os.getenv("TRANSCRIPT_STORE_NEGATIVE_TTL", 600))
+TRANSCRIPT_STORE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_STORE_MAX_ENTRIES", 256))
+TRANSCRIPT_STORE_MAX_BYTES = int(os.getenv("TRANSCRIPT_STORE_MAX_BYTES", 64 * 1024 * 1024))
+TRANSCRIPT_STORE_DIR = os.getenv("TRANSCRIPT_STORE_DIR") or os.path.join(tempfile.gettempdir(), "quizer_transcripts")
+TRANSCRIPT_STORE_DISK_MAX_BYTES = int(os.getenv("TRANSCRIPT_STORE_DISK_MAX_BYTES", 1024 * 1024 * 1024))
+
+
+@dataclass
+class TranscriptRecord:
+    """A stored transcript, or the record that none could be obtained (transcript None)"""
+    video_id: str
+    language: str  # language of the transcript text
+    transcript: Optional[str]
+    source: str  # method that produced it: yt_dlp, youtube_native, groq_whisper, ...
+    fetched_at: float = field(default_factory=time.time)
+    error_message: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def available(self) -> bool:
+        return self.transcript is not None
+
+    def encode(self) -> bytes:
+        return zlib.compress(json.dumps(asdict(self), default=str).encode("utf-8"), 6)
+
+    @classmethod
+    def decode(cls, payload: bytes) -> "TranscriptRecord":
+        return cls(**json.loads(zlib.decompress(payload).decode("utf-8")))
+
+
+class TranscriptStore(RedisCircuitBreaker):
+    """
+    Three-tier transcript store:
+    - in-process LRU bounded by entry count and transcript bytes
+    - Redis tier (binary values, TTL) shared by the API pods and Celery workers
+    - disk tier with a longer TTL, pruned oldest-first above disk_max_bytes
+    Unavailable records live in memory and Redis only, with negative_ttl.
+    """
+    redis_unavailable_message = "Transcript store Redis tier unavailable"
+
+    def __init__(self,
+                 ttl: int = None,
+                 disk_ttl: int = None,
+                 negative_ttl: int = None,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 cache_dir: str = None,
+                 disk_max_bytes: int = None,
+                 redis_retry_after: int = 30):
+        self.ttl = ttl or TRANSCRIPT_STORE_TTL
+        self.disk_ttl = disk_ttl or TRANSCRIPT_STORE_DISK_TTL
+        self.negative_ttl = negative_ttl or TRANSCRIPT_STORE_NEGATIVE_TTL
+        self.max_entries = max_entries or TRANSCRIPT_STORE_MAX_ENTRIES
+        self.max_bytes = max_bytes or TRANSCRIPT_STORE_MAX_BYTES
+        self.cache_dir = cache_dir or TRANSCRIPT_STORE_DIR
+        self.disk_max_bytes = disk_max_bytes or TRANSCRIPT_STORE_DISK_MAX_BYTES
+        self.redis_retry_after = redis_retry_after
+        self._disk = DiskCache(self.cache_dir, self.disk_ttl, self.disk_max_bytes, name="Transcript store")
+
+        # key -> (expires at, record)
+        self._entries: "OrderedDict[str, Tuple[float, TranscriptRecord]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "negative_sets": 0,
+            "evictions": 0
+        }
+        self._sources: Dict[str, int] = {}
+
+    def make_key(self, video_id: str) -> str:
+        return f"transcript:{TRANSCRIPT_STORE_VERSION}:{video_id}"
+
+    # Lookup / store (sync: Celery tasks, worker threads)
+    def get_sync(self, video_id: str) -> Optional[TranscriptRecord]:
+        """A stored transcript or unavailable record: memory, then Redis, then disk"""
+        key = self.make_key(video_id)
+        record = self._memory_get(key)
+        tier = "memory_hits"
+        if record is None:
+            record = self._decode(key, self._redis_get(key))
+            tier = "redis_hits"
+            if record is None:
+                record = self._decode(key, self._disk.get(key))
+                tier = "disk_hits"
+                if record is not None:
+                    self._redis_set(key, record.encode(), self.ttl)
+            if record is not None:
+                self._remember(key, record)
+
+        with self._lock:
+            if record is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats[tier if record.available else "negative_hits"] += 1
+        return record
+
+    def set_sync(self, record: TranscriptRecord):
+        """Store a transcript in every tier (an empty transcript is stored as unavailable)"""
+        if not record.available or not record.transcript.strip():
+            self.set_unavailable_sync(record.video_id, record.error_message or "Empty transcript", record.source)
+            return
+        key = self.make_key(record.video_id)
+        payload = record.encode()
+        self._remember(key, record)
+        self._redis_set(key, payload, self.ttl)
+        self._disk.set(key, payload)
+        with self._lock:
+            self._stats["sets"] += 1
+            self._sources[record.source] = self._sources.get(record.source, 0) + 1
+
+    def set_unavailable_sync(self, video_id: str, reason: str = None, source: str = "all_failed"):
+        """Remember for negative_ttl that no transcript could be obtained"""
+        key = self.make_key(video_id)
+        record = TranscriptRecord(video_id=video_id, language="", transcript=None, source=source,
+                                  error_message=reason)
+        self._remember(key, record)
+        self._redis_set(key, record.encode(), self.negative_ttl)
+        with self._lock:
+            self._stats["negative_sets"] += 1
+
+    # Async wrappers (API path): Redis/disk I/O runs in a thread
+    async def get(self, video_id: str) -> Optional[TranscriptRecord]:
+        record = self._memory_get(self.make_key(video_id))
+        if record is not None:
+            with self._lock:
+                self._stats["memory_hits" if record.available else "negative_hits"] += 1
+            return record
+        return await asyncio.to_thread(self.get_sync, video_id)
+
+    async def get_many(self, video_ids: List[str]) -> Dict[str, TranscriptRecord]:
+        """Stored records of the videos that have one"""
+        records = await asyncio.gather(*[self.get(video_id) for video_id in video_ids])
+        return {video_id: record for video_id, record in zip(video_ids, records) if record is not None}
+
+    async def set(self, record: TranscriptRecord):
+        await asyncio.to_thread(self.set_sync, record)
+
+    async def set_unavailable(self, video_id: str, reason: str = None, source: str = "all_failed"):
+        await asyncio.to_thread(self.set_unavailable_sync, video_id, reason, source)
+
+    async def get_or_fetch(self,
+                           video_id: str,
+                           fetch: Callable[[], Awaitable[TranscriptRecord]]) -> TranscriptRecord:
+        """
+        The stored record, or fetch() and store its result. Concurrent requests
+        for the same video (in any process) share one fetch.
+        """
+        record = await self.get(video_id)
+        if record is not None:
+            return record
+
+        from app.services.single_flight import single_flight
+
+        async def fetch_and_store() -> TranscriptRecord:
+            fetched = await fetch()
+            await self.set(fetched)
+            return fetched
+
+        return await single_flight.do(
+            self.make_key(video_id),
+            fetch_and_store,
+            cache_lookup=lambda: asyncio.to_thread(self.get_sync, video_id)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics and the methods that produced the stored transcripts (this process)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["redis_errors"] = self.redis_errors
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["sources"] = dict(self._sources)
+        hits = stats["memory_hits"] + stats["redis_hits"] + stats["disk_hits"] + stats["negative_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["disk_errors"] = self._disk.errors
+        stats["disk_bytes"] = self._disk.total_bytes()
+        return stats
+
+    def clear(self):
+        """Drop the in-process tier"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _decode(self, key: str, payload: Optional[bytes]) -> Optional[TranscriptRecord]:
+        if payload is None:
+            return None
+        try:
+            return TranscriptRecord.decode(payload)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable transcript entry {key}: {e}")
+            return None
+
+    # In-process LRU
+    def _memory_get(self, key: str) -> Optional[TranscriptRecord]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, record = entry
+            if time.time() >= expires_at:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return record
+
+    def _drop(self, key: str):
+        _, record = self._entries.pop(key)
+        self._bytes -= len(record.transcript or "")
+
+    def _remember(self, key: str, record: TranscriptRecord):
+        size = len(record.transcript or "")
+        if size > self.max_bytes:
+            return
+        expires_at = time.time() + (self.ttl if record.available else self.negative_ttl)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires_at, record)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    # Redis tier
+    def _redis_get(self, key: str) -> Optional[bytes]:
+        if not self._redis_available():
+            return None
+        try:
+            return redis_service.get_sync_client(decode_responses=False).get(key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    def _redis_set(self, key: str, payload: bytes, ttl: int):
+        if not self._redis_available():
+            return
+        try:
+            redis_service.get_sync_client(decode_responses=False).setex(key, ttl, payload)
+        except Exception as e:
+            self._redis_failed(e)
+
+
+# Global instance shared by the YouTube loaders, the routers and the Celery tasks
+transcript_store = TranscriptStore()
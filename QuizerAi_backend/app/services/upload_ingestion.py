@@ -0,0 +1,233 @@
+# app/services/upload_ingestion.py
+"""
+Streaming upload ingestion (front door for file uploads)
+The upload is copied to a spool file in fixed-size chunks: the size limit is
+enforced while streaming, the first chunk is checked against the expected
+magic bytes, and a SHA-256 of the content is computed on the way through.
+Extractors then work from the spool file path (or a memory map), so peak
+memory per upload is one chunk buffer instead of several copies of the file.
+The UploadFile has already been received in full by the form parser (spooled
+by starlette); the size of the request itself is capped before and while it
+streams by app.middleware.upload_limit (UPLOAD_REQUEST_MAX_BYTES).
+"""
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from fastapi import HTTPException, UploadFile
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 50 * 1024 * 1024))
+# Whole multipart request (every file plus the form fields): leaves room for multi-file question papers
+UPLOAD_REQUEST_MAX_BYTES = int(os.getenv("UPLOAD_REQUEST_MAX_BYTES", 4 * UPLOAD_MAX_BYTES))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None  # None: system temp dir
+
+# kind -> (extensions, content types, accepted leading magic bytes; empty = not checked)
+FILE_KINDS = {
+    "pdf": ((".pdf",), ("application/pdf",), (b"%PDF-",)),
+    "pptx": ((".pptx",), ("application/vnd.openxmlformats-officedocument.presentationml.presentation",),
+             (b"PK\x03\x04",)),
+    "ppt": ((".ppt",), ("application/vnd.ms-powerpoint",), (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",)),
+    "image": ((".png", ".jpg", ".jpeg", ".tiff", ".tif", ".bmp"),
+              ("image/png", "image/jpeg", "image/jpg", "image/tiff", "image/bmp"),
+              (b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff", b"II*\x00", b"MM\x00*", b"BM")),
+    "text": ((".txt",), ("text/plain",), ()),
+}
+_MAGIC_PREFIX_BYTES = 8
+
+
+@dataclass
+class SpooledUpload:
+    """An upload streamed to disk; delete it with cleanup() (or use as a context manager)"""
+    path: str
+    filename: str
+    content_type: Optional[str]
+    kind: str
+    size: int
+    sha256: str
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.filename or "")[1].lower()
+
+    @contextmanager
+    def mmap(self) -> Iterator[mmap.mmap]:
+        """Read-only memory map of the spooled content (no copy into the heap)"""
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+
+    def read_text(self, encoding: str = "utf-8") -> str:
+        with open(self.path, "r", encoding=encoding, errors="replace") as f:
+            return f.read()
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove spooled upload {self.path}: {e}")
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+
+def detect_kind(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """File kind from the extension, falling back to the declared content type"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    for kind, (extensions, _, _) in FILE_KINDS.items():
+        if extension in extensions:
+            return kind
+    for kind, (_, content_types, _) in FILE_KINDS.items():
+        if content_type in content_types:
+            return kind
+    return None
+
+
+def _format_limit(max_bytes: int) -> str:
+    return f"{max_bytes // (1024 * 1024)}MB" if max_bytes >= 1024 * 1024 else f"{max_bytes} bytes"
+
+
+async def spool_upload(file: UploadFile,
+                       allowed_kinds: Iterable[str] = None,
+                       max_bytes: int = None,
+                       chunk_size: int = None) -> SpooledUpload:
+    """
+    Stream an UploadFile to a spool file in chunk_size pieces.
+    Raises HTTPException 400 for an unsupported kind, a magic-byte mismatch,
+    an empty file or one over max_bytes. The limit applies to this copy: the
+    form parser has already received the file (the request as a whole is
+    capped by UploadSizeLimitMiddleware).
+    """
+    max_bytes = max_bytes or UPLOAD_MAX_BYTES
+    chunk_size = chunk_size or UPLOAD_CHUNK_BYTES
+    allowed = tuple(allowed_kinds or FILE_KINDS)
+
+    kind = detect_kind(file.filename, file.content_type)
+    if kind not in allowed:
+        extensions = ", ".join(ext.lstrip(".").upper() for k in allowed for ext in FILE_KINDS[k][0])
+        raise HTTPException(status_code=400, detail=f"Unsupported file type. Supported formats: {extensions}")
+
+    # Size known from the form parser: reject before copying
+    declared_size = getattr(file, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise HTTPException(status_code=400, detail=f"File size exceeds {_format_limit(max_bytes)}")
+
+    extension = os.path.splitext(file.filename or "")[1].lower() or FILE_KINDS[kind][0][0]
+    spool = tempfile.NamedTemporaryFile(delete=False, prefix="upload_", suffix=extension, dir=UPLOAD_SPOOL_DIR)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with spool:
+            await file.seek(0)
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                if size == 0:
+                    check_magic(kind, chunk[:_MAGIC_PREFIX_BYTES], extension)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=400, detail=f"File size exceeds {_format_limit(max_bytes)}")
+                hasher.update(chunk)
+                await asyncio.to_thread(spool.write, chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail=f"Uploaded file is empty: {file.filename}")
+    except BaseException:
+        try:
+            os.remove(spool.name)
+        except OSError:
+            pass
+        raise
+
+    upload = SpooledUpload(
+        path=spool.name,
+        filename=file.filename,
+        content_type=file.content_type,
+        kind=kind,
+        size=size,
+        sha256=hasher.hexdigest()
+    )
+    logger.info(f"Spooled upload {file.filename}: {size} bytes, kind={kind}, sha256={upload.sha256[:12]}")
+    return upload
+
+
+def check_magic(kind: str, prefix: bytes, extension: str):
+    signatures = FILE_KINDS[kind][2]
+    if signatures and not any(prefix.startswith(signature) for signature in signatures):
+        raise HTTPException(
+            status_code=400,
+            detail=f"File content does not match its {extension or kind} type"
+        )
+
+
+def open_object(key: str,
+                filename: str = None,
+                allowed_kinds: Iterable[str] = None,
+                store=None) -> SpooledUpload:
+    """
+    Materialize an object from app.services.object_store as a SpooledUpload
+    (hard link for the local store, download otherwise), with the same kind,
+    magic-byte and SHA-256 handling as spool_upload. Blocking: Celery tasks
+    call it directly, the API through spool_object.
+    """
+    from app.services.object_store import ObjectNotFound, get_object_store
+
+    store = store or get_object_store()
+    filename = filename or os.path.basename(key)
+    allowed = tuple(allowed_kinds or FILE_KINDS)
+    kind = detect_kind(filename, None)
+    if kind not in allowed:
+        extensions = ", ".join(ext.lstrip(".").upper() for k in allowed for ext in FILE_KINDS[k][0])
+        raise HTTPException(status_code=400, detail=f"Unsupported file type. Supported formats: {extensions}")
+
+    extension = os.path.splitext(filename)[1].lower()
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=extension, dir=UPLOAD_SPOOL_DIR)
+    os.close(fd)
+    os.remove(path)
+    try:
+        try:
+            store.download_to(key, path)
+        except ObjectNotFound:
+            raise HTTPException(status_code=404, detail=f"Uploaded object not found: {key}")
+
+        hasher = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+                if size == 0:
+                    check_magic(kind, chunk[:_MAGIC_PREFIX_BYTES], extension)
+                size += len(chunk)
+                hasher.update(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail=f"Uploaded file is empty: {filename}")
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+
+    return SpooledUpload(path=path, filename=filename, content_type=None, kind=kind, size=size,
+                         sha256=hasher.hexdigest())
+
+
+async def spool_object(key: str, filename: str = None, allowed_kinds: Iterable[str] = None, store=None) -> SpooledUpload:
+    """Async open_object for the API (the copy/download runs in a thread)"""
+    return await asyncio.to_thread(open_object, key, filename, allowed_kinds, store)
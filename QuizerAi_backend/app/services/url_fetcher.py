@@ -0,0 +1,399 @@
+# app/services/url_fetcher.py
+"""
+URL ingestion engine
+Pages are fetched with a pooled aiohttp client (keep-alive connections reused
+per host) and the main content is extracted readability-style with
+BeautifulSoup. A small pool of reused headless browsers is used only when the
+page clearly needs JavaScript to render its content. Fetched pages are kept in
+an LRU; stale entries are revalidated with a conditional GET (ETag /
+Last-Modified) instead of being downloaded again.
+"""
+import asyncio
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+URL_FETCH_TIMEOUT = float(os.getenv("URL_FETCH_TIMEOUT", 15))
+URL_FETCH_MAX_BYTES = int(os.getenv("URL_FETCH_MAX_BYTES", 5 * 1024 * 1024))
+URL_FETCH_MAX_CONNECTIONS = int(os.getenv("URL_FETCH_MAX_CONNECTIONS", 64))
+URL_FETCH_PER_HOST = int(os.getenv("URL_FETCH_PER_HOST", 8))
+URL_FETCH_CACHE_ENTRIES = int(os.getenv("URL_FETCH_CACHE_ENTRIES", 256))
+# Extracted text kept across all cached pages (the raw HTML is not kept)
+URL_FETCH_CACHE_MAX_BYTES = int(os.getenv("URL_FETCH_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Cached pages younger than this are served without contacting the server
+URL_FETCH_FRESH_SECONDS = int(os.getenv("URL_FETCH_FRESH_SECONDS", 600))
+# Extracted text shorter than this (with JavaScript markers present) triggers the browser fallback
+URL_FETCH_MIN_CONTENT_CHARS = int(os.getenv("URL_FETCH_MIN_CONTENT_CHARS", 400))
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 2))
+BROWSER_PAGE_TIMEOUT = int(os.getenv("BROWSER_PAGE_TIMEOUT", 30))
+
+USER_AGENT = "Mozilla/5.0 (compatible; QuizerAI/1.0; +https://quizerai.com)"
+
+_READ_CHUNK_BYTES = 64 * 1024
+_BOILERPLATE_TAGS = ("script", "style", "noscript", "nav", "header", "footer", "aside",
+                     "form", "svg", "iframe", "button", "template")
+_CONTENT_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "pre", "blockquote", "td")
+_JS_MARKERS = re.compile(
+    r'id=["\'](?:root|app|__next|__nuxt)["\']|data-reactroot|ng-app|'
+    r'enable javascript|javascript is (?:required|disabled)|requires javascript',
+    re.IGNORECASE
+)
+
+
+@dataclass
+class FetchedPage:
+    """An extracted page; only what serving and revalidation need is kept (no raw HTML)"""
+    url: str
+    final_url: str
+    status: int
+    title: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+    via: str = "http"  # http | browser
+
+
+# Content extraction
+def _parser() -> str:
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+def _block_text(element) -> str:
+    parts = []
+    for node in element.find_all(_CONTENT_TAGS):
+        # Skip containers whose text is already collected through a nested content tag
+        if node.find(_CONTENT_TAGS):
+            continue
+        text = node.get_text(" ", strip=True)
+        if text:
+            parts.append(text)
+    return "\n".join(parts)
+
+
+def _score(element) -> float:
+    """Paragraph text weighted down by link density (menus, link lists)"""
+    paragraphs = element.find_all("p")
+    text_length = sum(len(p.get_text(" ", strip=True)) for p in paragraphs)
+    if not text_length:
+        return 0.0
+    link_length = sum(len(a.get_text(" ", strip=True)) for a in element.find_all("a"))
+    total_length = len(element.get_text(" ", strip=True)) or 1
+    return text_length * (1 - min(1.0, link_length / total_length)) + 25 * len(paragraphs)
+
+
+def extract_main_content(html: str) -> Tuple[str, str]:
+    """Readability-style extraction: (title, main text)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, _parser())
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    for tag in soup(_BOILERPLATE_TAGS):
+        tag.decompose()
+
+    body = soup.body or soup
+    candidates = body.find_all(["article", "main"]) + body.find_all(attrs={"role": "main"})
+    if not candidates:
+        candidates = body.find_all(["div", "section", "td"]) or [body]
+
+    best = max(candidates, key=_score)
+    text = _block_text(best) if _score(best) else ""
+    if not text:
+        text = body.get_text("\n", strip=True)
+    return title, re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def needs_javascript(html: str, text: str) -> bool:
+    """True when the static HTML has almost no content and looks like a client-rendered app"""
+    if len(text) >= URL_FETCH_MIN_CONTENT_CHARS:
+        return False
+    scripts = len(re.findall(r"<script\b", html, re.IGNORECASE))
+    return bool(_JS_MARKERS.search(html)) or scripts >= 5
+
+
+# Headless browser fallback
+class BrowserPool:
+    """A few headless Chrome instances started on demand and reused across requests"""
+
+    def __init__(self, size: int = None, page_timeout: int = None):
+        self.size = size or BROWSER_POOL_SIZE
+        self.page_timeout = page_timeout or BROWSER_PAGE_TIMEOUT
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def _create_driver(self):
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        for argument in ("--headless=new", "--no-sandbox", "--disable-dev-shm-usage",
+                         "--disable-gpu", "--blink-settings=imagesEnabled=false"):
+            options.add_argument(argument)
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(self.page_timeout)
+        return driver
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if not create:
+            # Every browser is busy: wait for one to come back
+            return self._idle.get(timeout=self.page_timeout * 2)
+        try:
+            return self._create_driver()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _discard(self, driver):
+        with self._lock:
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def render(self, url: str) -> str:
+        """Blocking: load url in a pooled browser and return the rendered HTML"""
+        driver = self._acquire()
+        try:
+            driver.get(url)
+            html = driver.page_source
+        except Exception:
+            self._discard(driver)
+            raise
+        self._idle.put(driver)
+        self.renders += 1
+        return html
+
+    def shutdown(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+
+class URLFetcher:
+    """Pooled HTTP fetcher with an LRU of pages and a browser fallback for JavaScript pages"""
+
+    def __init__(self,
+                 browser_pool: BrowserPool = None,
+                 cache_entries: int = None,
+                 cache_max_bytes: int = None,
+                 fresh_seconds: int = None,
+                 timeout: float = None,
+                 max_bytes: int = None):
+        self.browser_pool = browser_pool or BrowserPool()
+        self.cache_entries = cache_entries or URL_FETCH_CACHE_ENTRIES
+        self.cache_max_bytes = cache_max_bytes or URL_FETCH_CACHE_MAX_BYTES
+        self.fresh_seconds = URL_FETCH_FRESH_SECONDS if fresh_seconds is None else fresh_seconds
+        self.timeout = timeout or URL_FETCH_TIMEOUT
+        self.max_bytes = max_bytes or URL_FETCH_MAX_BYTES
+
+        self._pages: "OrderedDict[str, FetchedPage]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_loop = None
+
+        self._stats = {
+            "fresh_hits": 0,
+            "revalidated": 0,
+            "fetched": 0,
+            "browser_renders": 0,
+            "errors": 0
+        }
+
+    # Session (one per event loop: the API loop, or a Celery task's own loop)
+    async def _get_session(self):
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=URL_FETCH_MAX_CONNECTIONS,
+                limit_per_host=URL_FETCH_PER_HOST,
+                ttl_dns_cache=300,
+                keepalive_timeout=30
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5"}
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        await asyncio.to_thread(self.browser_pool.shutdown)
+
+    # Fetching
+    async def fetch(self, url: str) -> FetchedPage:
+        """Fetch and extract a page, using the cache and conditional GET when possible"""
+        _validate_url(url)
+        cached = self._cached(url)
+        if cached is not None and time.time() - cached.fetched_at < self.fresh_seconds:
+            self._count("fresh_hits")
+            return cached
+
+        headers = {}
+        if cached is not None and cached.via == "http":
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        session = await self._get_session()
+        try:
+            async with session.get(url, headers=headers, allow_redirects=True) as response:
+                if response.status == 304 and cached is not None:
+                    cached.fetched_at = time.time()
+                    self._remember(cached)
+                    self._count("revalidated")
+                    return cached
+                if response.status >= 400:
+                    raise HTTPException(status_code=400,
+                                        detail=f"Error processing URL: server returned {response.status}")
+                html = await self._read_body(response)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                final_url = str(response.url)
+                status = response.status
+        except HTTPException:
+            self._count("errors")
+            raise
+        except Exception as e:
+            self._count("errors")
+            logger.error(f"Error fetching URL {url}: {e}")
+            raise HTTPException(status_code=400, detail=f"Error processing URL: {str(e)}")
+
+        title, text = await asyncio.to_thread(extract_main_content, html)
+        page = FetchedPage(url=url, final_url=final_url, status=status, title=title, text=text,
+                           etag=etag, last_modified=last_modified, fetched_at=time.time())
+        self._count("fetched")
+
+        if needs_javascript(html, text):
+            page = await self._render(url, page)
+
+        self._remember(page)
+        return page
+
+    async def load(self, url: str) -> List[Any]:
+        """Fetch a URL as LangChain Documents (same shape as the other extractors)"""
+        from langchain.schema import Document
+
+        page = await self.fetch(url)
+        if not page.text:
+            raise HTTPException(status_code=400, detail=f"No readable content found at URL: {url}")
+        return [Document(
+            page_content=page.text,
+            metadata={"source": page.final_url, "title": page.title, "fetched_via": page.via}
+        )]
+
+    async def _render(self, url: str, page: FetchedPage) -> FetchedPage:
+        from app.services.extraction_executor import extraction_executor
+
+        logger.info(f"{url} needs JavaScript; rendering in a pooled browser")
+        try:
+            html = await extraction_executor.run_io(self.browser_pool.render, url)
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Keep whatever the static HTML had rather than failing the request
+            logger.warning(f"Browser rendering failed for {url}: {e}")
+            return page
+
+        title, text = await asyncio.to_thread(extract_main_content, html)
+        self._count("browser_renders")
+        return FetchedPage(url=url, final_url=page.final_url, status=page.status,
+                           title=title or page.title, text=text, fetched_at=time.time(), via="browser")
+
+    async def _read_body(self, response) -> str:
+        declared = response.content_length
+        if declared is not None and declared > self.max_bytes:
+            raise HTTPException(status_code=400, detail="Error processing URL: page is too large")
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(_READ_CHUNK_BYTES):
+            body.extend(chunk)
+            if len(body) > self.max_bytes:
+                raise HTTPException(status_code=400, detail="Error processing URL: page is too large")
+        try:
+            encoding = response.get_encoding()
+        except Exception:
+            encoding = "utf-8"
+        return bytes(body).decode(encoding, errors="replace")
+
+    # Page cache
+    def _cached(self, url: str) -> Optional[FetchedPage]:
+        with self._lock:
+            page = self._pages.get(url)
+            if page is not None:
+                self._pages.move_to_end(url)
+            return page
+
+    def _remember(self, page: FetchedPage):
+        size = len(page.text or "")
+        if size > self.cache_max_bytes:
+            return
+        with self._lock:
+            previous = self._pages.pop(page.url, None)
+            if previous is not None:
+                self._bytes -= len(previous.text or "")
+            self._pages[page.url] = page
+            self._bytes += size
+            while len(self._pages) > self.cache_entries or self._bytes > self.cache_max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self._bytes -= len(evicted.text or "")
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_pages"] = len(self._pages)
+            stats["cached_bytes"] = self._bytes
+        stats["browsers"] = self.browser_pool._created
+        stats["browser_pool_size"] = self.browser_pool.size
+        return stats
+
+
+def _validate_url(url: str):
+    parsed = urlparse(url or "")
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise HTTPException(status_code=400, detail="Please provide a valid http(s) URL")
+
+
+# Global instance shared by the routers and Celery tasks
+url_fetcher = URLFetcher()
@@ -0,0 +1,316 @@
+# app/services/youtube_content_cache.py
+"""
+YouTube search cache and precomputed content bundles for hot videos
+Many students search the same syllabus topics, so:
+- search results are cached by normalized query + top_ranker (TTL), instead of
+  calling the YouTube search tool for every request;
+- every video served counts a hit in a Redis sorted set, and a periodic
+  background job (app.tasks.youtube_tasks) builds a bundle (transcript,
+  summary and quiz at the default settings) for the most requested videos;
+- a search whose videos all have bundles is answered from them: the quiz is
+  assembled from the per-video quizzes (deduplicated and balanced like
+  per-chunk quizzes) with no YouTube or LLM calls, the summary is the video's
+  own or, for several videos, one reduce call over their summaries.
+Hit counts are halved on every job run, so the ranking follows recent demand.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config.redis_config import RedisCircuitBreaker, redis_service
+from app.services.generation_cache import GenerationCache, normalize_text
+from app.services.single_flight import single_flight
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_SEARCH_CACHE_TTL = int(os.getenv("YOUTUBE_SEARCH_CACHE_TTL", 6 * 3600))
+YOUTUBE_BUNDLE_TTL = int(os.getenv("YOUTUBE_BUNDLE_TTL", 2 * 86400))
+# Bundles older than this are rebuilt by the job while the video stays hot
+YOUTUBE_BUNDLE_REFRESH_AGE = int(os.getenv("YOUTUBE_BUNDLE_REFRESH_AGE", 86400))
+YOUTUBE_HOT_VIDEOS = int(os.getenv("YOUTUBE_HOT_VIDEOS", 50))
+YOUTUBE_HOT_MIN_HITS = float(os.getenv("YOUTUBE_HOT_MIN_HITS", 3))
+YOUTUBE_HOT_DECAY = float(os.getenv("YOUTUBE_HOT_DECAY", 0.5))
+YOUTUBE_BUNDLE_LANGUAGES = [language.strip() for language in
+                            os.getenv("YOUTUBE_BUNDLE_LANGUAGES", "English").split(",") if language.strip()]
+# Settings the bundles are generated with; requests for other settings take the live path
+YOUTUBE_BUNDLE_QUIZ_TYPE = os.getenv("YOUTUBE_BUNDLE_QUIZ_TYPE", "mcq")
+YOUTUBE_BUNDLE_DIFFICULTY = os.getenv("YOUTUBE_BUNDLE_DIFFICULTY", "medium")
+YOUTUBE_BUNDLE_QUESTIONS = int(os.getenv("YOUTUBE_BUNDLE_QUESTIONS", 10))
+# One summary per length: 400 is the /you_tube_searcher default, 500 what /search-and-generate asks for
+YOUTUBE_BUNDLE_SUMMARY_WORDS = [int(words) for words in
+                                os.getenv("YOUTUBE_BUNDLE_SUMMARY_WORDS", "400,500").split(",") if words.strip()]
+# YouTubeSearchTool returns this many results when the query has no ",<count>"
+YOUTUBE_SEARCH_DEFAULT_RESULTS = 2
+
+_VIDEO_ID_RE = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/embed/)([A-Za-z0-9_-]{11})")
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and punctuation-insensitive form of a search query"""
+    text = normalize_text(query).casefold()
+    text = re.sub(r"[^\w\s+#.-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip(" .-")
+
+
+def split_search_query(query: str) -> Tuple[str, int]:
+    """'photosynthesis class 10,5' -> ('photosynthesis class 10', 5), as YouTubeSearchTool reads it"""
+    terms, _, count = query.strip().rpartition(",")
+    if terms and count.strip().isdigit():
+        return terms.strip(), int(count)
+    return query.strip(), YOUTUBE_SEARCH_DEFAULT_RESULTS
+
+
+def video_ids_from(results: Any) -> List[str]:
+    """Video IDs (in order, unique) in a search result string or a list of URLs"""
+    text = results if isinstance(results, str) else " ".join(str(result) for result in results or [])
+    return list(dict.fromkeys(_VIDEO_ID_RE.findall(text)))
+
+
+class YouTubeContentCache(RedisCircuitBreaker):
+    """Search results, hit counts and per-video bundles (see module docstring)"""
+    redis_unavailable_message = "YouTube hot video Redis tier unavailable"
+
+    def __init__(self,
+                 search_ttl: int = None,
+                 bundle_ttl: int = None,
+                 hot_key: str = "youtube:hot_videos",
+                 redis_retry_after: int = 30):
+        self.search_cache = GenerationCache(ttl=search_ttl or YOUTUBE_SEARCH_CACHE_TTL)
+        self.bundle_cache = GenerationCache(ttl=bundle_ttl or YOUTUBE_BUNDLE_TTL)
+        self.hot_key = hot_key
+        self.redis_retry_after = redis_retry_after
+
+        self._lock = threading.Lock()
+        self._local_hits: Counter = Counter()
+        self._stats = {
+            "search_hits": 0,
+            "search_misses": 0,
+            "bundle_serves": 0,
+            "bundle_misses": 0,
+            "bundles_built": 0,
+            "bundle_failures": 0
+        }
+
+    # Search results
+    def search_key(self, query: str) -> str:
+        terms, count = split_search_query(query)
+        digest = hashlib.sha256(normalize_query(terms).encode("utf-8")).hexdigest()
+        return f"yt_search:v1:{digest}:{count}"
+
+    async def search(self, query: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached search result for 'terms,top_ranker'; fetch() runs the live search on a miss"""
+        key = self.search_key(query)
+        cached = await self.search_cache.get(key)
+        if cached is not None:
+            self._count("search_hits")
+            return cached
+        self._count("search_misses")
+
+        async def fetch_and_store():
+            results = await fetch()
+            if video_ids_from(results):
+                await self.search_cache.set(key, results)
+            return results
+
+        return await single_flight.do(key, fetch_and_store, cache_lookup=lambda: self.search_cache.get(key))
+
+    # Hit counts
+    async def record_hits(self, video_ids: Sequence[str]):
+        if video_ids:
+            await asyncio.to_thread(self.record_hits_sync, list(video_ids))
+
+    def record_hits_sync(self, video_ids: Sequence[str]):
+        with self._lock:
+            self._local_hits.update(video_ids)
+        if not self._redis_available():
+            return
+        try:
+            pipe = redis_service.get_sync_client(decode_responses=True).pipeline()
+            for video_id in video_ids:
+                pipe.zincrby(self.hot_key, 1, video_id)
+            pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    def hot_videos_sync(self, limit: int = None, min_hits: float = None) -> List[Tuple[str, float]]:
+        """Most requested video IDs with their (decayed) hit counts"""
+        limit = limit or YOUTUBE_HOT_VIDEOS
+        min_hits = YOUTUBE_HOT_MIN_HITS if min_hits is None else min_hits
+        if self._redis_available():
+            try:
+                client = redis_service.get_sync_client(decode_responses=True)
+                return [(video_id, float(score)) for video_id, score in
+                        client.zrevrangebyscore(self.hot_key, "+inf", min_hits, start=0, num=limit, withscores=True)]
+            except Exception as e:
+                self._redis_failed(e)
+        with self._lock:
+            return [(video_id, float(hits)) for video_id, hits in self._local_hits.most_common(limit)
+                    if hits >= min_hits]
+
+    def decay_sync(self, factor: float = None):
+        """Scale every hit count by factor and drop videos that fall below one hit"""
+        factor = YOUTUBE_HOT_DECAY if factor is None else factor
+        with self._lock:
+            self._local_hits = Counter({video_id: hits * factor for video_id, hits in self._local_hits.items()
+                                        if hits * factor >= 1})
+        if not self._redis_available():
+            return
+        try:
+            client = redis_service.get_sync_client(decode_responses=True)
+            client.zunionstore(self.hot_key, {self.hot_key: factor})
+            client.zremrangebyscore(self.hot_key, "-inf", "(1")
+        except Exception as e:
+            self._redis_failed(e)
+
+    # Bundles
+    def bundle_key(self, video_id: str, language: str) -> str:
+        return f"yt_bundle:v1:{video_id}:{normalize_query(language)}"
+
+    async def get_bundle(self, video_id: str, language: str = "English") -> Optional[Dict[str, Any]]:
+        return await self.bundle_cache.get(self.bundle_key(video_id, language))
+
+    async def set_bundle(self, bundle: Dict[str, Any]):
+        await self.bundle_cache.set(self.bundle_key(bundle["video_id"], bundle["language"]), bundle)
+
+    async def get_bundles(self, video_ids: Sequence[str], language: str = "English") -> Optional[List[Dict[str, Any]]]:
+        """Bundles for every video, in order, or None if any is missing"""
+        if not video_ids:
+            return None
+        bundles = await asyncio.gather(*[self.get_bundle(video_id, language) for video_id in video_ids])
+        if any(bundle is None for bundle in bundles):
+            self._count("bundle_misses")
+            return None
+        return list(bundles)
+
+    def quiz_from_bundles(self,
+                          bundles: Sequence[Dict[str, Any]],
+                          quiz_type: str,
+                          difficulty_level: str,
+                          num_questions: Any) -> Optional[List[Dict]]:
+        """num_questions spread over the videos' quizzes, or None if the bundles cannot answer"""
+        from app.utils.quiz_allocation import allocate_questions, balance_questions, dedupe_questions
+
+        try:
+            total = int(num_questions)
+        except (TypeError, ValueError):
+            return None
+        if any(bundle["quiz_type"] != quiz_type or bundle["difficulty_level"] != difficulty_level
+               for bundle in bundles):
+            return None
+        groups = dedupe_questions([bundle["quiz"] for bundle in bundles])
+        if sum(len(group) for group in groups) < total:
+            return None
+        questions = balance_questions(groups, allocate_questions([1.0] * len(groups), total), total)
+        self._count("bundle_serves")
+        return questions
+
+    def content_from_bundles(self, bundles: Sequence[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """[{"channel": video_id, "content": transcript}] as the content action returns it"""
+        self._count("bundle_serves")
+        return [{"channel": bundle["video_id"], "content": bundle["transcript"]} for bundle in bundles]
+
+    async def summary_from_bundles(self, bundles: Sequence[Dict[str, Any]], no_of_words: Any,
+                                   language: str = "English") -> Optional[str]:
+        """
+        One no_of_words summary, as the live path returns, or None for another length.
+        A single video's summary is served as is; several videos' summaries are
+        reduced to one with a single LLM call instead of summarizing their transcripts.
+        """
+        from app.models.generate_quizes import generate_summary
+
+        length = str(no_of_words).strip()
+        if any(length not in bundle["summaries"] for bundle in bundles):
+            return None
+        self._count("bundle_serves")
+        if len(bundles) == 1:
+            return bundles[0]["summaries"][length]
+        sections = "\n\n".join(f"{bundle.get('title') or bundle['video_id']}\n{bundle['summaries'][length]}"
+                                for bundle in bundles)
+        return await generate_summary(sections, language=language, no_of_words=length)
+
+    async def build_bundle(self, video_id: str, language: str = "English") -> Optional[Dict[str, Any]]:
+        """Transcript + summary + quiz for one video at the bundle settings; None without a transcript"""
+        from app.models.generate_quizes import generate_quiz, generate_summary
+        from app.services.enhanced_youtube_service import youtube_service
+
+        try:
+            result = await youtube_service.get_transcript_comprehensive(video_id)
+            if not result.transcript:
+                logger.info(f"No bundle for {video_id}: {result.error_message or 'no transcript'}")
+                return None
+            documents = [group[0] for group in await youtube_service.convert_to_legacy_format([result])]
+            summaries = {}
+            for words in YOUTUBE_BUNDLE_SUMMARY_WORDS:
+                summaries[str(words)] = await generate_summary(documents, language=language, no_of_words=str(words))
+            quiz = await generate_quiz(documents, quiz_type=YOUTUBE_BUNDLE_QUIZ_TYPE, language=language,
+                                       num_questions=str(YOUTUBE_BUNDLE_QUESTIONS),
+                                       difficulty_level=YOUTUBE_BUNDLE_DIFFICULTY)
+        except Exception as e:
+            logger.warning(f"Bundle for {video_id} failed: {e}")
+            self._count("bundle_failures")
+            return None
+        if not isinstance(quiz, list) or not quiz or not all(summaries.values()):
+            logger.warning(f"Bundle for {video_id} failed: empty quiz or summary")
+            self._count("bundle_failures")
+            return None
+
+        bundle = {
+            "video_id": video_id,
+            "language": language,
+            "title": result.metadata.get("title", ""),
+            "transcript": result.transcript,
+            "transcript_source": result.source,
+            "confidence_score": result.confidence_score,
+            "summaries": summaries,
+            "quiz": quiz,
+            "quiz_type": YOUTUBE_BUNDLE_QUIZ_TYPE,
+            "difficulty_level": YOUTUBE_BUNDLE_DIFFICULTY,
+            "generated_at": time.time()
+        }
+        await self.set_bundle(bundle)
+        self._count("bundles_built")
+        return bundle
+
+    async def precompute_hot_bundles(self, limit: int = None, concurrency: int = 3) -> Dict[str, int]:
+        """Build missing or stale bundles for the hot videos, then decay the hit counts"""
+        hot = await asyncio.to_thread(self.hot_videos_sync, limit)
+        semaphore = asyncio.Semaphore(concurrency)
+        outcome = {"hot_videos": len(hot), "fresh": 0, "built": 0, "skipped": 0}
+
+        async def refresh(video_id: str, language: str):
+            bundle = await self.get_bundle(video_id, language)
+            if bundle is not None and time.time() - bundle["generated_at"] < YOUTUBE_BUNDLE_REFRESH_AGE:
+                outcome["fresh"] += 1
+                return
+            async with semaphore:
+                built = await self.build_bundle(video_id, language)
+            outcome["built" if built else "skipped"] += 1
+
+        await asyncio.gather(*[refresh(video_id, language)
+                               for video_id, _ in hot for language in YOUTUBE_BUNDLE_LANGUAGES])
+        await asyncio.to_thread(self.decay_sync)
+        logger.info(f"Hot video bundles: {outcome}")
+        return outcome
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        searches = stats["search_hits"] + stats["search_misses"]
+        stats["search_hit_ratio"] = round(stats["search_hits"] / searches, 4) if searches else 0.0
+        stats["hot_videos"] = [{"video_id": video_id, "hits": round(hits, 2)}
+                               for video_id, hits in self.hot_videos_sync(10, 0)]
+        return stats
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+# Global instance
+youtube_content_cache = YouTubeContentCache()
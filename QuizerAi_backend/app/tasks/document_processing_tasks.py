@@ -6,13 +6,14 @@ Handles file uploads, OCR, and text extraction
 import asyncio
 import logging
 import os
+import tempfile
 from typing import Dict, Any
 from celery import Task
 from celery.exceptions import SoftTimeLimitExceeded
-import hashlib
 
 from app.celery_app import celery_app
 from app.services.cache_service import CacheService
+from app.services.extraction_cache import extraction_cache, sha256_file
 
 logger = logging.getLogger(__name__)
 cache_service = CacheService()
@@ -30,11 +31,14 @@ def process_document_async(self,
                           task_id: str,
                           file_path: str,
                           file_type: str,
-                          user_id: int = None):
+                          user_id: int = None,
+                          object_key: str = None):
     """
     Async document processing task
     Handles PDF, DOCX, images with OCR
+    object_key: read the file from the object store (any worker) instead of file_path
     """
+    local_copy = None
     try:
         # Update task status
         cache_service.set_task_status(task_id, {
@@ -43,47 +47,38 @@ def process_document_async(self,
             'message': 'Starting document processing...'
         })
         
+        if object_key:
+            local_copy = _download_object(object_key)
+            file_path = local_copy
+        
         # Check if file exists
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        # Check cache first
-        cache_key = f"doc:{hashlib.md5(f'{file_path}:{file_type}'.encode()).hexdigest()}"
-        cached_result = cache_service.get(cache_key)
+        kind = _file_kind(file_type)
+        if kind is None:
+            raise ValueError(f"Unsupported file type: {file_type}")
+        
+        # Check cache first: keyed by the file bytes + extractor version (shared with the API path)
+        cache_key = extraction_cache.make_key(sha256_file(file_path), kind)
+        documents = extraction_cache.get_sync(cache_key)
+        from_cache = documents is not None
         
-        if cached_result:
-            logger.info(f"Returning cached document for task {task_id}")
+        if not from_cache:
+            # Update progress
             cache_service.set_task_status(task_id, {
-                'status': 'completed',
-                'progress': 100,
-                'result': cached_result
+                'status': 'processing',
+                'progress': 30,
+                'message': f'Processing {file_type} file...'
             })
-            return {'task_id': task_id, 'from_cache': True}
-        
-        # Update progress
-        cache_service.set_task_status(task_id, {
-            'status': 'processing',
-            'progress': 30,
-            'message': f'Processing {file_type} file...'
-        })
-        
-        # Process based on file type
-        extracted_text = ""
-        
-        if file_type in ['pdf', 'application/pdf']:
-            extracted_text = process_pdf(file_path)
-        elif file_type in ['docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-            extracted_text = process_docx(file_path)
-        elif file_type in ['txt', 'text/plain']:
-            extracted_text = process_text(file_path)
-        elif file_type in ['png', 'jpg', 'jpeg', 'image/png', 'image/jpeg']:
-            extracted_text = process_image_ocr(file_path)
-        elif file_type in ['pptx', 'application/vnd.openxmlformats-officedocument.presentationml.presentation']:
-            extracted_text = process_pptx(file_path)
-        elif file_type in ['xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
-            extracted_text = process_xlsx(file_path)
+            documents = extract_documents(file_path, kind)
+            extraction_cache.set_sync(cache_key, documents)
         else:
-            raise ValueError(f"Unsupported file type: {file_type}")
+            logger.info(f"Extraction cache hit for task {task_id}")
+        
+        extracted_text = "\n\n".join(
+            doc.page_content if hasattr(doc, 'page_content') else str(doc) for doc in documents
+        ).strip()
         
         # Update progress
         cache_service.set_task_status(task_id, {
@@ -95,16 +90,14 @@ def process_document_async(self,
         # Prepare result
         result = {
             'text': extracted_text,
-            'file_path': file_path,
+            'file_path': object_key or file_path,
             'file_type': file_type,
             'word_count': len(extracted_text.split()),
             'char_count': len(extracted_text),
-            'user_id': user_id
+            'user_id': user_id,
+            'from_cache': from_cache
         }
         
-        # Cache result
-        cache_service.set(cache_key, result, ttl=3600)
-        
         # Store final result
         cache_service.set_task_status(task_id, {
             'status': 'completed',
@@ -113,7 +106,7 @@ def process_document_async(self,
         })
         
         logger.info(f"Document processing completed for task {task_id}")
-        return {'task_id': task_id, 'success': True}
+        return {'task_id': task_id, 'success': True, 'from_cache': from_cache}
         
     except SoftTimeLimitExceeded:
         logger.error(f"Task {task_id} timed out")
@@ -130,33 +123,74 @@ def process_document_async(self,
             'error': str(e)
         })
         raise
+    
+    finally:
+        if local_copy:
+            try:
+                os.remove(local_copy)
+            except OSError:
+                pass
 
-def process_pdf(file_path: str) -> str:
-    """Extract text from PDF"""
-    try:
-        import PyPDF2
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text.strip()
-    except Exception as e:
-        logger.error(f"PDF processing error: {str(e)}")
-        raise
+def _download_object(object_key: str) -> str:
+    """Copy an object to a local temp file (removed by the task when done)"""
+    from app.services.object_store import get_object_store
+    fd, path = tempfile.mkstemp(prefix="task_", suffix=os.path.splitext(object_key)[1])
+    os.close(fd)
+    os.remove(path)
+    get_object_store().download_to(object_key, path)
+    return path
 
-def process_docx(file_path: str) -> str:
-    """Extract text from DOCX"""
-    try:
-        import docx
-        doc = docx.Document(file_path)
-        text = "\n".join([paragraph.text for paragraph in doc.paragraphs if paragraph.text])
-        return text.strip()
-    except Exception as e:
-        logger.error(f"DOCX processing error: {str(e)}")
-        raise
+# file_type (extension or content type) -> extraction kind
+_FILE_KINDS = {
+    'pdf': ('pdf', 'application/pdf'),
+    'docx': ('docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    'text': ('txt', 'text/plain'),
+    'image': ('png', 'jpg', 'jpeg', 'image/png', 'image/jpeg'),
+    'pptx': ('pptx', 'application/vnd.openxmlformats-officedocument.presentationml.presentation'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+def _file_kind(file_type: str):
+    for kind, file_types in _FILE_KINDS.items():
+        if file_type in file_types:
+            return kind
+    return None
+
+def extract_documents(file_path: str, kind: str) -> list:
+    """
+    Extract a file into documents.
+    PDF, PPTX and images go through the same extractors as the upload API, so both
+    paths produce (and reuse) the same extraction cache entries.
+    """
+    if kind in ('pdf', 'pptx', 'image'):
+        from app.services.data_ingestion_processing import process_spooled_upload
+        from app.services.upload_ingestion import SpooledUpload
+        upload = SpooledUpload(
+            path=file_path,
+            filename=os.path.basename(file_path),
+            content_type=None,
+            kind=kind,
+            size=os.path.getsize(file_path),
+            sha256=''
+        )
+        return process_spooled_upload(upload)
+    elif kind == 'text':
+        return [process_text(file_path)]
+    elif kind in ('docx', 'xlsx'):
+        # Streamed from the ZIP with iterparse: one Document per block of paragraphs / per sheet
+        from app.services.office_extraction import extract_office
+        return extract_office(file_path, kind, os.path.basename(file_path))
+    raise ValueError(f"Unsupported file type: {kind}")
+
+@celery_app.task(name='sweep_chunked_uploads')
+def sweep_chunked_uploads():
+    """Discard expired chunked upload sessions: abandoned parts and files never ingested"""
+    from app.services.chunked_upload import chunked_upload_service
+
+    swept = chunked_upload_service.sweep_expired()
+    if swept:
+        logger.info(f"Discarded {swept} expired upload sessions")
+    return swept
 
 def process_text(file_path: str) -> str:
     """Read plain text file"""
@@ -170,57 +204,3 @@ def process_text(file_path: str) -> str:
     except Exception as e:
         logger.error(f"Text processing error: {str(e)}")
         raise
-
-def process_image_ocr(file_path: str) -> str:
-    """Extract text from image using OCR"""
-    try:
-        import pytesseract
-        from PIL import Image
-        
-        image = Image.open(file_path)
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        text = pytesseract.image_to_string(image, lang='eng')
-        return text.strip()
-    except ImportError:
-        logger.warning("pytesseract not available, returning empty string")
-        return ""
-    except Exception as e:
-        logger.error(f"OCR processing error: {str(e)}")
-        return ""
-
-def process_pptx(file_path: str) -> str:
-    """Extract text from PowerPoint"""
-    try:
-        from pptx import Presentation
-        prs = Presentation(file_path)
-        text = ""
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    text += shape.text + "\n"
-        return text.strip()
-    except Exception as e:
-        logger.error(f"PPTX processing error: {str(e)}")
-        raise
-
-def process_xlsx(file_path: str) -> str:
-    """Extract text from Excel"""
-    try:
-        import openpyxl
-        workbook = openpyxl.load_workbook(file_path, data_only=True)
-        text = ""
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
-            text += f"Sheet: {sheet_name}\n"
-            for row in sheet.iter_rows(values_only=True):
-                row_text = " | ".join([str(cell) if cell is not None else "" for cell in row])
-                if row_text.strip():
-                    text += row_text + "\n"
-            text += "\n"
-        return text.strip()
-    except Exception as e:
-        logger.error(f"XLSX processing error: {str(e)}")
-        raise
\ No newline at end of file
@@ -0,0 +1,158 @@
+# app/tasks/question_paper_tasks.py
+"""
+Background question paper extraction using Celery
+Pages are extracted and turned into questions concurrently
+(app.services.question_paper_pipeline); the task status carries the questions
+found so far, so clients can show them while later pages are still running.
+"""
+import asyncio
+import logging
+from typing import Dict, List
+
+from celery import Task
+from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+
+from app.celery_app import celery_app
+from app.services.cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+cache_service = CacheService()
+
+
+class QuestionPaperTask(Task):
+    """
+    Transient failures (network, LLM rate limits, timeouts) are retried and
+    resume from the last checkpointed page; anything else fails the job at once
+    """
+    max_retries = 3
+    default_retry_delay = 5
+    soft_time_limit = 1800  # 30 minutes for large multi-file papers
+    time_limit = 1860
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        """The job failed for good: release its uploaded files (kept for /retry if it can resume)"""
+        from app.services.question_paper_pipeline import is_transient_error, release_failed_upload_files
+
+        job_id = kwargs.get('task_id')
+        if not job_id:
+            return
+        resumable = isinstance(exc, (SoftTimeLimitExceeded, TimeLimitExceeded)) or is_transient_error(exc)
+        try:
+            release_failed_upload_files(job_id, kwargs.get('files') or [], resumable)
+        except Exception as e:
+            logger.error(f"Could not release the files of question paper {job_id}: {e}")
+
+
+@celery_app.task(bind=True, base=QuestionPaperTask, name='process_question_paper_async')
+def process_question_paper_async(self,
+                                 task_id: str,
+                                 files: List[Dict],
+                                 extraction_mode: str = "full_layout",
+                                 generate_answers: bool = True,
+                                 user_id: int = None):
+    """
+    Page-level question paper extraction
+    files: [{"key", "filename", "kind"}] stored by the upload endpoint (object store keys)
+    """
+    from app.services.question_paper_pipeline import (
+        QuestionPaperJob, is_transient_error, list_pages, materialize_upload_files, remove_upload_files
+    )
+
+    try:
+        # Any worker can run (or resume) the job: the files are read from the object store
+        pages = list_pages(materialize_upload_files(task_id, files))
+        if not pages:
+            raise ValueError("No pages found in the uploaded files")
+
+        job = QuestionPaperJob(task_id, pages, extraction_mode, generate_answers)
+
+        def report(message: str):
+            completed = len(job.results)
+            questions = job.partial_questions()
+            cache_service.set_task_status(task_id, {
+                'status': 'processing',
+                'progress': 5 + int(90 * completed / len(pages)),
+                'message': message,
+                'pages_total': len(pages),
+                'pages_completed': completed,
+                'completed_pages': sorted(job.results),
+                'questions': questions
+            })
+
+        async def on_page(page, questions):
+            report(f"Page {page.page_number} of {page.filename}: {len(questions)} questions")
+
+        cache_service.set_task_status(task_id, {
+            'status': 'processing',
+            'progress': 5,
+            'message': f'Extracting {len(pages)} pages...',
+            'pages_total': len(pages),
+            'pages_completed': 0,
+            'questions': []
+        })
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            questions = loop.run_until_complete(job.run(on_page))
+        finally:
+            loop.close()
+
+        if not questions:
+            raise ValueError("No questions could be extracted from the processed content")
+
+        cache_service.set_task_status(task_id, {
+            'status': 'completed',
+            'progress': 100,
+            'pages_total': len(pages),
+            'pages_completed': len(pages),
+            'result': {
+                'questions': questions,
+                'metadata': {
+                    'processed_files': [file['filename'] for file in files],
+                    'pages': len(pages),
+                    'resumed_pages': job.resumed_pages,
+                    'extraction_mode': extraction_mode,
+                    'extraction_method': 'tesseract' if extraction_mode == 'ocr_only' else 'dots.ocr'
+                }
+            }
+        })
+        # Files are only needed for retries
+        remove_upload_files(task_id, files)
+
+        logger.info(f"Question paper {task_id}: {len(questions)} questions from {len(pages)} pages")
+        return {'task_id': task_id, 'success': True, 'questions': len(questions)}
+
+    except SoftTimeLimitExceeded:
+        logger.error(f"Task {task_id} timed out")
+        cache_service.set_task_status(task_id, {
+            'status': 'failed',
+            'error': 'Task timed out. Retry to continue from the last completed page.',
+            'resumable': True
+        })
+        raise
+
+    except Exception as e:
+        logger.error(f"Error in question paper task {task_id}: {str(e)}")
+        transient = is_transient_error(e)
+        retrying = transient and self.request.retries < self.max_retries
+        cache_service.set_task_status(task_id, {
+            'status': 'failed',
+            'error': str(e),
+            'retrying': retrying,
+            'resumable': transient
+        })
+        if retrying:
+            raise self.retry(exc=e)
+        raise
+
+
+@celery_app.task(name='sweep_question_paper_files')
+def sweep_question_paper_files():
+    """Delete the stored files of failed jobs that can no longer be retried"""
+    from app.services.question_paper_pipeline import sweep_upload_files
+
+    swept = sweep_upload_files()
+    if swept:
+        logger.info(f"Removed the files of {swept} expired question paper jobs")
+    return swept
@@ -9,13 +9,8 @@ import logging
 from typing import Dict, Any, List
 from celery import Task
 from celery.exceptions import SoftTimeLimitExceeded
-import hashlib
 
 from app.celery_app import celery_app
-from app.models.generate_quizes import (
-    llm, generate_quiz, generate_summary, 
-    ai_tutor_explanation, intelligent_summarizer
-)
 from app.config.redis_config import redis_service
 from app.services.cache_service import CacheService
 
@@ -23,10 +18,9 @@ logger = logging.getLogger(__name__)
 cache_service = CacheService()
 
 class QuizGenerationTask(Task):
-    """Base task with rate limiting and error handling"""
+    """Base task with error handling (LLM concurrency is governed by llm_governor)"""
     autoretry_for = (Exception,)
     retry_kwargs = {'max_retries': 3, 'countdown': 5}
-    rate_limit = '10/m'  # 10 tasks per minute per worker
 
 @celery_app.task(bind=True, base=QuizGenerationTask, name='generate_quiz_async')
 def generate_quiz_async(self, 
@@ -37,11 +31,17 @@ def generate_quiz_async(self,
                         num_questions: str = "10",
                         difficulty_level: str = "medium",
                         user_id: int = None,
-                        source_metadata: Dict = None):
+                        source_metadata: Dict = None,
+                        quiz_mode: str = "single",
+                        extractive_budget: int = None):
     """
     Async quiz generation task
     Returns task_id for status checking
     """
+    # Imported here so workers only serving other queues never load the LLM stack
+    from app.models.generate_quizes import generate_quiz
+    from app.services.extractive_selector import extractive_selector, default_budget
+    
     try:
         # Update task status
         cache_service.set_task_status(task_id, {
@@ -50,18 +50,8 @@ def generate_quiz_async(self,
             'message': 'Starting quiz generation...'
         })
         
-        # Check cache first
-        cache_key = f"quiz:{hashlib.md5(f'{content[:500]}:{quiz_type}:{num_questions}'.encode()).hexdigest()}"
-        cached_quiz = cache_service.get(cache_key)
-        
-        if cached_quiz:
-            logger.info(f"Returning cached quiz for task {task_id}")
-            cache_service.set_task_status(task_id, {
-                'status': 'completed',
-                'progress': 100,
-                'result': cached_quiz
-            })
-            return {'task_id': task_id, 'from_cache': True}
+        # Caching happens inside generate_quiz (content-addressed generation cache
+        # shared with the synchronous /api/upload path)
         
         # Update progress
         cache_service.set_task_status(task_id, {
@@ -70,22 +60,23 @@ def generate_quiz_async(self,
             'message': 'Processing content with AI...'
         })
         
+        # Same pre-selection as the API path, so both produce the same cache key
+        budget = default_budget("quiz", quiz_mode) if extractive_budget is None else extractive_budget
+        documents, selection = extractive_selector.select_documents(content, budget)
+        
         # Run async generation in sync context
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
         try:
-            # Split content into manageable chunks
-            content_chunks = content[:8000]  # Limit content size
-            
-            # Generate quiz
             questions = loop.run_until_complete(
                 generate_quiz(
-                    documents=content_chunks,
+                    documents=documents,
                     quiz_type=quiz_type,
                     language=language,
                     num_questions=num_questions,
-                    difficulty_level=difficulty_level
+                    difficulty_level=difficulty_level,
+                    quiz_mode=quiz_mode
                 )
             )
             
@@ -104,13 +95,12 @@ def generate_quiz_async(self,
                     'type': quiz_type,
                     'language': language,
                     'difficulty': difficulty_level,
-                    'source': source_metadata
+                    'quiz_mode': quiz_mode,
+                    'source': source_metadata,
+                    'extraction': selection.to_dict() if selection else None
                 }
             }
             
-            # Cache result
-            cache_service.set(cache_key, result, ttl=3600)
-            
             # Store final result
             cache_service.set_task_status(task_id, {
                 'status': 'completed',
@@ -146,8 +136,12 @@ def generate_summary_async(self,
                            content: str,
                            language: str = "English",
                            word_count: str = "400",
-                           user_id: int = None):
+                           user_id: int = None,
+                           extractive_budget: int = None):
     """Async summary generation task"""
+    from app.models.generate_quizes import generate_summary
+    from app.services.extractive_selector import extractive_selector, default_budget
+    
     try:
         cache_service.set_task_status(task_id, {
             'status': 'processing',
@@ -155,27 +149,32 @@ def generate_summary_async(self,
             'message': 'Starting summary generation...'
         })
         
-        # Check cache
-        cache_key = f"summary:{hashlib.md5(f'{content[:500]}:{language}:{word_count}'.encode()).hexdigest()}"
-        cached_summary = cache_service.get(cache_key)
-        
-        if cached_summary:
+        def report_progress(update: Dict):
+            # Tree-reduce levels map onto the 20-90% range
+            levels = update['estimated_levels'] + 2
+            progress = 20 + int(70 * min(update['level'] + 1, levels) / levels)
             cache_service.set_task_status(task_id, {
-                'status': 'completed',
-                'result': cached_summary
+                'status': 'processing',
+                'progress': progress,
+                'message': f"Summarizing: {update['stage']} level {update['level']} ({update['nodes']} sections)",
+                'stage': update['stage'],
+                'level': update['level']
             })
-            return {'task_id': task_id, 'from_cache': True}
         
-        # Generate summary
+        budget = default_budget("summary") if extractive_budget is None else extractive_budget
+        documents, selection = extractive_selector.select_documents(content, budget)
+        
+        # Generate summary (generate_summary consults the shared generation cache)
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
         try:
             summary = loop.run_until_complete(
                 generate_summary(
-                    documents=content,
+                    documents=documents,
                     language=language,
-                    no_of_words=word_count
+                    no_of_words=word_count,
+                    progress_callback=report_progress
                 )
             )
             
@@ -183,12 +182,12 @@ def generate_summary_async(self,
                 'summary': summary,
                 'metadata': {
                     'language': language,
-                    'word_count': word_count
+                    'word_count': word_count,
+                    'extraction': selection.to_dict() if selection else None
                 }
             }
             
-            # Cache and store result
-            cache_service.set(cache_key, result, ttl=3600)
+            # Store result
             cache_service.set_task_status(task_id, {
                 'status': 'completed',
                 'result': result
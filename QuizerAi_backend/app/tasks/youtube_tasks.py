@@ -0,0 +1,47 @@
+# app/tasks/youtube_tasks.py
+"""
+Background YouTube tasks using Celery
+Precomputes transcript + summary + quiz bundles for the most requested videos
+(app.services.youtube_content_cache) so popular topic searches are answered
+from cache.
+"""
+import asyncio
+import logging
+import os
+
+from celery import Task
+
+from app.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_BUNDLE_CONCURRENCY = int(os.getenv("YOUTUBE_BUNDLE_CONCURRENCY", 3))
+
+
+class YouTubeBundleTask(Task):
+    """Periodic: a failed run is simply redone by the next one"""
+    soft_time_limit = 1500  # 25 minutes: a run builds up to YOUTUBE_HOT_VIDEOS bundles
+    time_limit = 1560
+
+
+@celery_app.task(bind=True, base=YouTubeBundleTask, name='precompute_hot_video_bundles')
+def precompute_hot_video_bundles(self, limit: int = None):
+    """Build missing or stale bundles for the hot videos, then decay their hit counts"""
+    # Imported here so workers only serving other queues never load the LLM stack
+    from app.services.enhanced_youtube_service import youtube_service
+    from app.services.youtube_content_cache import youtube_content_cache
+
+    async def refresh():
+        # The service's HTTP session belongs to this loop: close it before the loop goes
+        async with youtube_service.task_session():
+            return await youtube_content_cache.precompute_hot_bundles(limit, concurrency=YOUTUBE_BUNDLE_CONCURRENCY)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        outcome = loop.run_until_complete(refresh())
+    finally:
+        loop.close()
+
+    logger.info(f"Hot video bundles refreshed: {outcome}")
+    return outcome
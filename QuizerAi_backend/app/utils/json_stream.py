@@ -0,0 +1,85 @@
+# app/utils/json_stream.py
+"""
+Incremental parser for a JSON array of objects arriving token by token
+(e.g. an LLM streaming a quiz). Emits each top-level object as soon as it
+is complete instead of waiting for the closing bracket.
+"""
+import json
+import logging
+from typing import Any, List
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONArrayParser:
+    """
+    Feed partial text, get back the objects completed so far.
+    Anything before the opening '[' (prose, code fences) is ignored and
+    objects that fail to parse are skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+        self.done = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Consume more text and return the newly completed objects"""
+        if self.done or not text:
+            return []
+
+        self._buffer += text
+        buffer = self._buffer
+        completed = []
+        i = self._pos
+
+        while i < len(buffer):
+            ch = buffer[i]
+
+            if not self._in_array:
+                if ch == "[":
+                    self._in_array = True
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    raw = buffer[self._object_start:i + 1]
+                    self._object_start = None
+                    try:
+                        completed.append(json.loads(raw))
+                    except json.JSONDecodeError as e:
+                        logger.debug(f"Skipping malformed streamed object: {e}")
+            elif ch == "]" and self._depth == 0:
+                self.done = True
+                i += 1
+                break
+
+            i += 1
+
+        # Keep only the unfinished object (if any) in the buffer
+        if self._object_start is not None:
+            self._buffer = buffer[self._object_start:]
+            self._pos = i - self._object_start
+            self._object_start = 0
+        else:
+            self._buffer = ""
+            self._pos = 0
+
+        return completed
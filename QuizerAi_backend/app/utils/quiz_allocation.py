@@ -0,0 +1,156 @@
+# app/utils/quiz_allocation.py
+"""
+Helpers for map-reduce quiz generation: spread a question budget across
+chunks, then deduplicate and balance the per-chunk results.
+"""
+import math
+import re
+from typing import Dict, List, Optional, Sequence
+
+# Questions whose word sets overlap at least this much are treated as duplicates
+DUPLICATE_SIMILARITY = 0.8
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def allocate_questions(weights: Sequence[float], total: int) -> List[int]:
+    """
+    Split `total` questions across chunks in proportion to their weights
+    (largest remainder method). The result always sums to `total`; when there
+    are more chunks than questions the heaviest chunks win.
+    """
+    if total <= 0 or not weights:
+        return [0] * len(weights)
+
+    weights = [max(float(w), 0.0) for w in weights]
+    weight_sum = sum(weights)
+    if weight_sum == 0:
+        weights = [1.0] * len(weights)
+        weight_sum = float(len(weights))
+
+    quotas = [w * total / weight_sum for w in weights]
+    allocation = [int(q) for q in quotas]
+
+    remaining = total - sum(allocation)
+    by_remainder = sorted(
+        range(len(weights)),
+        key=lambda i: (quotas[i] - allocation[i], weights[i]),
+        reverse=True
+    )
+    for i in by_remainder[:remaining]:
+        allocation[i] += 1
+
+    return allocation
+
+
+class StreamingAllocator:
+    """
+    Question quotas for chunks that arrive one at a time, before the document
+    length is known (incremental ingestion pipeline). The total size is
+    estimated from the tokens seen so far and a size hint (pages or slides
+    seen out of the total); about max_chunks chunks, evenly spaced over that
+    estimate, get a quota. Fractional shares carry over and the last chunk
+    takes whatever is left, so the quotas always sum to `total`.
+    """
+
+    def __init__(self, total: int, max_chunks: int, chunk_tokens: int, total_units: Optional[int] = None):
+        self.total = total
+        self.max_chunks = max(1, max_chunks)
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.total_units = total_units
+        self.units_seen = 0
+        self.tokens_seen = 0
+        self.allocation: List[int] = []
+        self._position = 0
+        self._credit = 0.0
+        self._assigned = 0
+
+    def observe_unit(self, unit: int, total_units: Optional[int] = None):
+        """Record that page/slide `unit` has been reached (optionally with the total count)"""
+        self.units_seen = max(self.units_seen, unit)
+        if total_units:
+            self.total_units = total_units
+
+    def estimated_tokens(self) -> float:
+        if self.total_units and self.units_seen and self.tokens_seen:
+            estimate = self.tokens_seen * self.total_units / min(self.units_seen, self.total_units)
+        else:
+            # No size hint: assume a document that fills every map slot
+            estimate = self.max_chunks * self.chunk_tokens
+        return max(estimate, self.tokens_seen, 1)
+
+    def next_quota(self, tokens: int, last: bool = False) -> int:
+        """Quota for the next chunk in document order (0: skip the chunk)"""
+        self.tokens_seen += tokens
+        position = self._position
+        self._position += 1
+        remaining = self.total - self._assigned
+
+        if last:
+            quota = remaining
+        else:
+            estimated = self.estimated_tokens()
+            stride = max(1, math.ceil(estimated / self.chunk_tokens / self.max_chunks))
+            if position % stride or len(self.allocation) >= self.max_chunks:
+                return 0
+            # This chunk stands in for itself and the `stride - 1` chunks skipped after it
+            self._credit += self.total * tokens * stride / estimated
+            quota = min(int(self._credit), remaining)
+            self._credit -= quota
+
+        self._assigned += quota
+        if quota:
+            self.allocation.append(quota)
+        return quota
+
+
+def _question_words(question: Dict) -> frozenset:
+    text = str(question.get("question", "")) if isinstance(question, dict) else str(question)
+    return frozenset(word.lower() for word in _WORD_RE.findall(text))
+
+
+def _is_duplicate(words: frozenset, seen: List[frozenset], threshold: float) -> bool:
+    if not words:
+        return False
+    for other in seen:
+        union = words | other
+        if union and len(words & other) / len(union) >= threshold:
+            return True
+    return False
+
+
+def dedupe_questions(groups: List[List[Dict]], threshold: float = DUPLICATE_SIMILARITY) -> List[List[Dict]]:
+    """Drop questions that (nearly) repeat an earlier one, keeping the per-chunk grouping"""
+    seen: List[frozenset] = []
+    deduped = []
+    for group in groups:
+        kept = []
+        for question in group:
+            words = _question_words(question)
+            if _is_duplicate(words, seen, threshold):
+                continue
+            seen.append(words)
+            kept.append(question)
+        deduped.append(kept)
+    return deduped
+
+
+def balance_questions(groups: List[List[Dict]], allocation: Sequence[int], total: int) -> List[Dict]:
+    """
+    Take up to each chunk's allocation first, then fill any shortfall
+    round-robin from the leftovers so the quiz still reaches `total`.
+    Questions keep document order.
+    """
+    selected = [group[:quota] for group, quota in zip(groups, allocation)]
+    leftovers = [group[quota:] for group, quota in zip(groups, allocation)]
+
+    missing = total - sum(len(group) for group in selected)
+    while missing > 0 and any(leftovers):
+        for i, extra in enumerate(leftovers):
+            if missing <= 0:
+                break
+            if extra:
+                selected[i].append(extra.pop(0))
+                missing -= 1
+
+    return [question for group in selected for question in group][:total]
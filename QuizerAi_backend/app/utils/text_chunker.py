@@ -0,0 +1,182 @@
+# app/utils/text_chunker.py
+"""
+Token-aware text chunking with a process-wide cached tiktoken encoder
+Each paragraph/sentence is encoded once and token counts are accumulated
+incrementally, so chunking is linear in document size.
+"""
+import functools
+import logging
+from typing import Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING_MODEL = "gpt-3.5-turbo"
+
+# Fallback estimation when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+class TextChunk(NamedTuple):
+    """A chunk of text together with its token count"""
+    text: str
+    token_count: int
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(model_name: str = DEFAULT_ENCODING_MODEL):
+    """Return the shared tiktoken encoder (None if tiktoken is unavailable)"""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model_name)
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, falling back to character estimates: {e}")
+        return None
+
+
+def _encode(text: str) -> Optional[List[int]]:
+    encoder = get_encoder()
+    if encoder is None:
+        return None
+    return encoder.encode(text, disallowed_special=())
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens accurately using tiktoken"""
+    tokens = _encode(text)
+    if tokens is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(tokens)
+
+
+def truncate_to_tokens(text: str, max_tokens: int = 700) -> str:
+    """Truncate text to specific token count"""
+    tokens = _encode(text)
+    if tokens is None:
+        max_chars = max_tokens * 3
+        return text[:max_chars]
+    if len(tokens) <= max_tokens:
+        return text
+    return get_encoder().decode(tokens[:max_tokens])
+
+
+def _split_by_tokens(text: str, max_tokens: int) -> List[TextChunk]:
+    """Hard-split a single oversized piece into windows of max_tokens"""
+    tokens = _encode(text)
+    if tokens is None:
+        window = max_tokens * CHARS_PER_TOKEN
+        return [
+            TextChunk(text[i:i + window].strip(), len(text[i:i + window]) // CHARS_PER_TOKEN)
+            for i in range(0, len(text), window)
+            if text[i:i + window].strip()
+        ]
+
+    encoder = get_encoder()
+    pieces = []
+    for i in range(0, len(tokens), max_tokens):
+        window = tokens[i:i + max_tokens]
+        piece = encoder.decode(window).strip()
+        if piece:
+            pieces.append(TextChunk(piece, len(window)))
+    return pieces
+
+
+def _pack(pieces: List[str], separator: str, max_tokens: int) -> List[TextChunk]:
+    """
+    Greedily pack pieces into chunks of at most max_tokens.
+    Every piece is encoded exactly once; the chunk count is the sum of its
+    pieces plus separators, which matches tiktoken on the joined text up to
+    merges across piece boundaries.
+    """
+    separator_tokens = count_tokens(separator)
+    chunks: List[TextChunk] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(TextChunk(separator.join(current).strip(), current_tokens))
+        current = []
+        current_tokens = 0
+
+    for piece in pieces:
+        if not piece.strip():
+            continue
+
+        piece_tokens = count_tokens(piece)
+
+        if piece_tokens > max_tokens:
+            flush()
+            if separator == "\n\n":
+                # Oversized paragraph: fall back to sentences
+                chunks.extend(_pack(piece.split(". "), ". ", max_tokens))
+            else:
+                chunks.extend(_split_by_tokens(piece, max_tokens))
+            continue
+
+        added = piece_tokens + (separator_tokens if current else 0)
+        if current_tokens + added <= max_tokens:
+            current.append(piece)
+            current_tokens += added
+        else:
+            flush()
+            current.append(piece)
+            current_tokens = piece_tokens
+
+    flush()
+    return chunks
+
+
+def chunk_text(text: str, max_tokens: int = 700) -> List[TextChunk]:
+    """
+    Split text into token-safe chunks (paragraphs, then sentences, then
+    hard token windows). Returns chunks together with their token counts.
+    """
+    if not text or not text.strip():
+        return []
+    return _pack(text.split("\n\n"), "\n\n", max_tokens)
+
+
+class ChunkPacker:
+    """
+    Packs chunks arriving one at a time (e.g. from consecutive documents) into
+    chunks of at most max_tokens, so many small documents share a chunk instead
+    of producing one each. Chunks are only combined, never split or reordered.
+    """
+
+    def __init__(self, max_tokens: int, separator: str = "\n\n"):
+        self.max_tokens = max_tokens
+        self.separator = separator
+        self._separator_tokens = count_tokens(separator)
+        self._current: List[str] = []
+        self._current_tokens = 0
+
+    def add(self, chunk: TextChunk) -> List[TextChunk]:
+        """Add one chunk; returns the chunks completed by it (zero or one)"""
+        added = chunk.token_count + (self._separator_tokens if self._current else 0)
+        if self._current and self._current_tokens + added > self.max_tokens:
+            completed = self.flush()
+            self._current, self._current_tokens = [chunk.text], chunk.token_count
+            return completed
+        self._current.append(chunk.text)
+        self._current_tokens += added
+        return []
+
+    def flush(self) -> List[TextChunk]:
+        """The chunk being filled, if any"""
+        if not self._current:
+            return []
+        chunk = TextChunk(self.separator.join(self._current), self._current_tokens)
+        self._current, self._current_tokens = [], 0
+        return [chunk]
+
+
+def chunk_documents(texts: Iterable[str], max_tokens: int = 700) -> List[TextChunk]:
+    """chunk_text over consecutive documents, packing small documents together"""
+    packer = ChunkPacker(max_tokens)
+    chunks: List[TextChunk] = []
+    for text in texts:
+        for chunk in chunk_text(text, max_tokens):
+            chunks.extend(packer.add(chunk))
+    chunks.extend(packer.flush())
+    return chunks
@@ -0,0 +1,262 @@
+# benchmarks/bench_generation.py
+"""
+End-to-end generation benchmark against an offline LLM backend
+
+Drives /api/upload (PDF -> quiz/summary), /api/generate-quiz-async (with an
+in-process worker pool standing in for Celery) and the IntelligentSummarizer
+size classes, and reports p50/p95 latency and throughput. Runs without network
+access: the LLM is the fake backend (or replayed recordings), Redis is optional.
+
+Run from QuizerAi_backend/:
+    python -m benchmarks.bench_generation
+    python -m benchmarks.bench_generation --scenario upload --requests 40 --concurrency 10
+    FAKE_LLM_RATE_LIMIT_PROB=0.05 python -m benchmarks.bench_generation --scenario summarizer
+    python -m benchmarks.bench_generation --backend replay    # uses LLM_RECORD_DIR
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.bench_text_chunker import make_document
+
+
+def make_pdf(text: str, chars_per_line: int = 90, lines_per_page: int = 60) -> bytes:
+    """Minimal text PDF (Helvetica, one content stream per page), no extra dependencies"""
+    words = text.split()
+    lines, current = [], ""
+    for word in words:
+        if current and len(current) + len(word) + 1 > chars_per_line:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for page_lines in pages:
+        body = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({escape(line)}) Tj T*" for line in page_lines) + " ET"
+        stream = body.encode("latin-1", "replace")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode('latin-1')}\nendstream")
+        content_ref = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>")
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(name: str, make_call: Callable[[int], Awaitable[None]], requests: int, concurrency: int) -> Dict:
+    """Issue `requests` calls with at most `concurrency` in flight; collect latencies"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await make_call(i)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    wall = time.perf_counter() - wall_started
+
+    return {
+        "scenario": name,
+        "ok": len(latencies),
+        "errors": len(errors),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "max": max(latencies) if latencies else 0.0,
+        "mean": statistics.mean(latencies) if latencies else 0.0,
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "wall": wall,
+        "sample_error": errors[0] if errors else ""
+    }
+
+
+def print_report(results: List[Dict]):
+    print(f"{'scenario':<28} {'ok':>5} {'err':>4} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'req/s':>8} {'wall s':>8}")
+    for r in results:
+        print(f"{r['scenario']:<28} {r['ok']:>5} {r['errors']:>4} {r['p50']:>8.3f} {r['p95']:>8.3f} "
+              f"{r['max']:>8.3f} {r['throughput']:>8.2f} {r['wall']:>8.2f}")
+        if r["sample_error"]:
+            print(f"    first error: {r['sample_error'][:160]}")
+
+
+def build_app():
+    """The /api router on its own (no database / auth startup)"""
+    from fastapi import FastAPI
+    from app.routers.api import router as api_router
+
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api")
+    return app
+
+
+def content_for(i: int, size: int, duplicates: bool) -> str:
+    # Distinct documents by default so the generation cache does not short-circuit the LLM
+    return make_document(size, seed=0 if duplicates else 1000 + i)
+
+
+async def bench_upload(args) -> List[Dict]:
+    import httpx
+
+    app = build_app()
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for action in ("quiz", "summary"):
+            pdfs = [make_pdf(content_for(i, args.doc_chars, args.duplicates)) for i in range(args.requests)]
+
+            async def call(i: int, action=action, pdfs=pdfs):
+                response = await client.post(
+                    "/api/upload",
+                    files={"file": (f"doc{i}.pdf", pdfs[i], "application/pdf")},
+                    data={"action": action, "num_questions": str(args.num_questions), "quiz_mode": args.quiz_mode}
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+            results.append(await run_load(f"/api/upload {action}", call, args.requests, args.concurrency))
+    return results
+
+
+async def bench_quiz_async(args) -> List[Dict]:
+    import httpx
+    from app.tasks import quiz_generation_tasks
+
+    app = build_app()
+    transport = httpx.ASGITransport(app=app)
+    workers = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="bench-worker")
+    pending: Dict[str, "asyncio.Future"] = {}
+    loop = asyncio.get_running_loop()
+
+    # Stand-in for the broker: run the Celery task body on a local worker pool
+    def fake_delay(**kwargs):
+        future = workers.submit(quiz_generation_tasks.generate_quiz_async.apply, kwargs=kwargs)
+        pending[kwargs["task_id"]] = asyncio.wrap_future(future, loop=loop)
+
+    original_delay = quiz_generation_tasks.generate_quiz_async.delay
+    import app.routers.api as api_module
+    api_module.generate_quiz_async.delay = fake_delay
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            async def call(i: int):
+                response = await client.post("/api/generate-quiz-async", json={
+                    "document_text": content_for(i, args.doc_chars, args.duplicates),
+                    "num_questions": args.num_questions,
+                    "quiz_mode": args.quiz_mode
+                })
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+                result = await pending.pop(response.json()["task_id"])
+                if result.failed():
+                    raise RuntimeError(str(result.result))
+
+            return [await run_load("/api/generate-quiz-async", call, args.requests, args.concurrency)]
+    finally:
+        api_module.generate_quiz_async.delay = original_delay
+        workers.shutdown(wait=False)
+
+
+async def bench_summarizer(args) -> List[Dict]:
+    from langchain.schema import Document
+    from app.models.generate_quizes import intelligent_summarizer
+
+    size_classes = {"small": 3_000, "medium": 10_000, "large": 40_000}
+    results = []
+    for size_class, chars in size_classes.items():
+        def documents(i: int, chars=chars):
+            text = content_for(i, chars, args.duplicates)
+            return [Document(page_content=part) for part in text.split("\n\n") if part.strip()]
+
+        async def call(i: int, documents=documents, size_class=size_class):
+            docs = documents(i)
+            total_chars = sum(len(doc.page_content) for doc in docs)
+            assert intelligent_summarizer.classify_document_size(total_chars) == size_class
+            await intelligent_summarizer.process_by_size(docs, "English", "200")
+
+        results.append(await run_load(f"summarizer {size_class}", call, args.requests, args.concurrency))
+    return results
+
+
+async def main_async(args):
+    from app.services.llm_governor import llm_governor
+    from app.services.single_flight import single_flight
+    from app.services.generation_cache import generation_cache
+
+    scenarios = {
+        "upload": bench_upload,
+        "quiz-async": bench_quiz_async,
+        "summarizer": bench_summarizer
+    }
+    selected = list(scenarios) if args.scenario == "all" else [args.scenario]
+
+    results = []
+    for name in selected:
+        results.extend(await scenarios[name](args))
+
+    print()
+    print(f"LLM backend: {os.environ['LLM_BACKEND']}  requests/scenario: {args.requests}  "
+          f"concurrency: {args.concurrency}  doc chars: {args.doc_chars}")
+    print_report(results)
+    print()
+    print(f"llm_governor:     {llm_governor.stats()}")
+    print(f"single_flight:    {single_flight.stats()}")
+    print(f"generation_cache: {generation_cache.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generation pipeline against an offline LLM")
+    parser.add_argument("--scenario", choices=["all", "upload", "quiz-async", "summarizer"], default="all")
+    parser.add_argument("--backend", choices=["fake", "replay"], default="fake")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4, help="simulated Celery worker threads")
+    parser.add_argument("--doc-chars", type=int, default=12_000)
+    parser.add_argument("--num-questions", type=int, default=10)
+    parser.add_argument("--quiz-mode", choices=["single", "map_reduce"], default="single")
+    parser.add_argument("--duplicates", action="store_true", help="send identical documents (exercises cache/coalescing)")
+    args = parser.parse_args()
+
+    # Must be set before app.models.generate_quizes is imported
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_ingestion_pipeline.py
+"""
+Benchmark: buffered (extract everything, then summarize) vs the incremental
+pipeline (leaf summaries start while later pages are extracted) on a
+generated PDF, with the offline FakeChatModel standing in for the LLM.
+
+Run from QuizerAi_backend/:
+    python -m benchmarks.bench_ingestion_pipeline
+    python -m benchmarks.bench_ingestion_pipeline --pages 400 --ttft-ms 150
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def make_pdf(path: str, pages: int):
+    import fitz
+
+    document = fitz.open()
+    for number in range(1, pages + 1):
+        page = document.new_page()
+        lines = [f"Chapter {number} line {line}: ribosomes translate messenger RNA into protein {number * line}."
+                 for line in range(45)]
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), "\n".join(lines), fontsize=7)
+    document.save(path)
+    document.close()
+
+
+class Upload:
+    kind = "pdf"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.filename = os.path.basename(path)
+
+
+async def buffered_run(summarizer, path: str):
+    from app.services.pdf_engine import pdf_engine
+
+    start = time.perf_counter()
+    documents = await pdf_engine.extract_documents(path)
+    extracted = time.perf_counter() - start
+    await summarizer.process_by_size(documents, "English", "300")
+    return extracted, time.perf_counter() - start
+
+
+async def pipelined_run(summarizer, path: str):
+    from app.services.ingestion_pipeline import ingestion_pipeline
+
+    async def generate(chunks):
+        return await summarizer.process_stream(chunks, "English", "300")
+
+    _, timings = await ingestion_pipeline.run(Upload(path), generate)
+    return timings["extract_ms"] / 1000, timings["total_ms"] / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the incremental ingestion pipeline")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--ttft-ms", type=float, default=100)
+    parser.add_argument("--tokens-per-second", type=float, default=2000)
+    args = parser.parse_args()
+
+    from app.models.generate_quizes import IntelligentSummarizer
+    from app.models.llm_backends import FakeChatModel
+    from app.services.extraction_executor import extraction_executor
+
+    summarizer = IntelligentSummarizer(FakeChatModel(ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "book.pdf")
+        make_pdf(path, args.pages)
+        print(f"PDF: {args.pages} pages, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        print(f"{'strategy':<10} {'extract s':>10} {'total s':>8}")
+        try:
+            # Warm the worker processes so neither run pays the spawn cost
+            asyncio.run(buffered_run(summarizer, path))
+            for name, run in (("buffered", buffered_run), ("pipelined", pipelined_run)):
+                extracted, total = asyncio.run(run(summarizer, path))
+                print(f"{name:<10} {extracted:>10.2f} {total:>8.2f}")
+        finally:
+            extraction_executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_office_extraction.py
+"""
+Benchmark: PPTX extraction, legacy extractall + ElementTree vs streamed iterparse
+Reports wall time, bytes written to disk and peak Python heap (tracemalloc)
+on a generated deck with embedded media (which extractall copies to disk).
+
+Run from QuizerAi_backend/:
+    python -m benchmarks.bench_office_extraction
+    python -m benchmarks.bench_office_extraction --slides 500 --media-kb 300
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import zipfile
+import xml.etree.ElementTree as ET
+
+from app.services.office_extraction import iter_pptx_slides
+
+A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+
+
+def make_pptx(path: str, slides: int, media_kb: int):
+    media = os.urandom(media_kb * 1024)
+    paragraph = "Mitochondria produce energy for the cell through respiration. " * 4
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for n in range(1, slides + 1):
+            runs = "".join(f"<a:p><a:r><a:t>Slide {n} point {i}: {paragraph}</a:t></a:r></a:p>" for i in range(8))
+            archive.writestr(f"ppt/slides/slide{n}.xml",
+                             f'<p:sld xmlns:p="{P}" xmlns:a="{A}"><p:cSld><p:spTree><p:sp><p:txBody>'
+                             f'{runs}</p:txBody></p:sp></p:spTree></p:cSld></p:sld>')
+            archive.writestr(f"ppt/media/image{n}.png", media, compress_type=zipfile.ZIP_STORED)
+
+
+def legacy_extract(path: str):
+    """The previous PowerPointProcessor._extract_pptx_content approach"""
+    temp_dir = tempfile.mkdtemp(prefix="pptx_extract_")
+    try:
+        with zipfile.ZipFile(path, "r") as archive:
+            archive.extractall(temp_dir)
+        written = sum(os.path.getsize(os.path.join(root, name))
+                      for root, _, names in os.walk(temp_dir) for name in names)
+        slides_dir = os.path.join(temp_dir, "ppt", "slides")
+        texts = []
+        for name in sorted(f for f in os.listdir(slides_dir) if f.endswith(".xml")):
+            root = ET.parse(os.path.join(slides_dir, name)).getroot()
+            texts.append(" ".join(t.text.strip() for t in root.findall(".//a:t", {"a": A}) if t.text))
+        return texts, written
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def streamed_extract(path: str):
+    return [doc.page_content for doc in iter_pptx_slides(path)], 0
+
+
+def measure(fn, path: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    texts, written = fn(path)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, written, peak, len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PPTX extraction")
+    parser.add_argument("--slides", type=int, default=300)
+    parser.add_argument("--media-kb", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Warm-up on a one-slide deck: lazy imports (LangChain's Document) stay out of the measured region
+        warmup = os.path.join(directory, "warmup.pptx")
+        make_pptx(warmup, 1, 1)
+        for fn in (legacy_extract, streamed_extract):
+            fn(warmup)
+
+        path = os.path.join(directory, "deck.pptx")
+        make_pptx(path, args.slides, args.media_kb)
+        print(f"Deck: {args.slides} slides, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        print(f"{'strategy':<12} {'seconds':>8} {'disk MB':>8} {'peak MB':>8} {'slides':>7}")
+        for name, fn in (("legacy", legacy_extract), ("streamed", streamed_extract)):
+            seconds, written, peak, count = measure(fn, path)
+            print(f"{name:<12} {seconds:>8.3f} {written / 1024 / 1024:>8.1f} {peak / 1024 / 1024:>8.2f} {count:>7}")
+
+
+if __name__ == "__main__":
+    main()
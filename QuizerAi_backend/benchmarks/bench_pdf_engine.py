@@ -0,0 +1,93 @@
+# benchmarks/bench_pdf_engine.py
+"""
+Benchmark: PDF extraction on a generated textbook
+- serial PyPDFLoader (the previous upload path)
+- serial PyMuPDF (PDFEngine.extract_documents_sync)
+- page-parallel PyMuPDF (PDFEngine.extract_documents over a process pool)
+
+Run from QuizerAi_backend/:
+    python -m benchmarks.bench_pdf_engine
+    python -m benchmarks.bench_pdf_engine --pages 500 --workers 4 --pages-per-task 16
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from app.services.extraction_executor import ExtractionExecutor
+from app.services.pdf_engine import PDFEngine
+
+WORDS = (
+    "cell energy mitochondria protein synthesis membrane nucleus photosynthesis "
+    "chlorophyll glucose oxygen carbon dioxide respiration enzyme substrate "
+    "diffusion osmosis transport gradient equilibrium reaction"
+).split()
+
+
+def make_pdf(path: str, pages: int, seed: int = 42):
+    """Deterministic textbook-like PDF, ~45 lines of prose per page"""
+    import fitz
+
+    rng = random.Random(seed)
+    document = fitz.open()
+    for number in range(1, pages + 1):
+        lines = [f"Chapter {number // 20 + 1}, page {number}"]
+        for _ in range(45):
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14))).capitalize() + ".")
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), "\n".join(lines), fontsize=8)
+    document.save(path)
+    document.close()
+
+
+def bench_pypdfloader(path: str):
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=2000, chunk_overlap=200)
+    return splitter.split_documents(PyPDFLoader(path).load())
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction strategies")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "textbook.pdf")
+        make_pdf(path, args.pages)
+        print(f"PDF: {args.pages} pages, {os.path.getsize(path) / 1024 / 1024:.1f} MB, "
+              f"workers={args.workers}, pages/task={args.pages_per_task}")
+
+        executor = ExtractionExecutor(process_workers=args.workers, process_queue=args.workers * 4)
+        engine = PDFEngine(pages_per_task=args.pages_per_task, executor=executor)
+        # Start the worker processes outside the timed region (the API keeps them warm)
+        asyncio.run(executor.run_cpu(os.getpid))
+
+        results = []
+        try:
+            results.append(("serial PyPDFLoader", *timed(lambda: bench_pypdfloader(path))))
+        except ImportError as e:
+            print(f"serial PyPDFLoader skipped: {e}")
+        results.append(("serial PyMuPDF", *timed(lambda: engine.extract_documents_sync(path))))
+        results.append(("parallel PyMuPDF", *timed(lambda: asyncio.run(engine.extract_documents(path)))))
+        executor.shutdown(wait=True)
+
+    baseline = results[0][1]
+    print(f"{'strategy':<22} {'seconds':>9} {'pages/s':>9} {'speedup':>8} {'chunks':>7}")
+    for name, seconds, chunks in results:
+        print(f"{name:<22} {seconds:>9.3f} {args.pages / seconds:>9.1f} {baseline / seconds:>7.1f}x {len(chunks):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start import cost of the API and worker entry points (python -X importtime)
+
+Run from QuizerAi_backend/:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --target app.celery_app --top 25
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def measure(target: str) -> List[Tuple[int, int, str]]:
+    """(cumulative_us, depth, module) for every module imported by `import target`"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            rows.append((int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of an entry point")
+    parser.add_argument("--target", action="append", help="module to import (repeatable)")
+    parser.add_argument("--top", type=int, default=15, help="direct dependencies to list")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for target in args.target or ["app.main", "app.celery_app"]:
+        runs = [measure(target) for _ in range(args.runs)]
+        totals = sorted(next(cum for cum, _, name in rows if name == target) for rows in runs)
+        print(f"{target}: median {totals[len(totals) // 2] / 1000:.1f} ms over {args.runs} runs")
+
+        direct = [(cum, name) for cum, depth, name in runs[-1] if depth == 1]
+        for cum, name in sorted(direct, reverse=True)[:args.top]:
+            print(f"    {cum / 1000:8.1f} ms  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
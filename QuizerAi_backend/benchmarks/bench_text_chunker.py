@@ -0,0 +1,136 @@
+# benchmarks/bench_text_chunker.py
+"""
+Micro-benchmark: legacy split_text_safely vs app.utils.text_chunker.chunk_text
+
+Run from QuizerAi_backend/:
+    python -m benchmarks.bench_text_chunker
+    python -m benchmarks.bench_text_chunker --sizes 10000 100000
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from app.utils.text_chunker import chunk_text, get_encoder
+
+WORDS = (
+    "cell energy mitochondria protein synthesis membrane nucleus photosynthesis "
+    "chlorophyll glucose oxygen carbon dioxide respiration enzyme substrate "
+    "diffusion osmosis transport gradient equilibrium reaction"
+).split()
+
+
+def make_document(n_chars: int, seed: int = 42) -> str:
+    """Deterministic textbook-like text: sentences grouped into paragraphs"""
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < n_chars:
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+            sentences.append(" ".join(words).capitalize())
+        paragraph = ". ".join(sentences) + "."
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:n_chars]
+
+
+# Legacy implementation (as it was in app/models/generate_quizes.py)
+def legacy_count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        return len(encoding.encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def legacy_truncate_to_tokens(text: str, max_tokens: int = 700) -> str:
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        tokens = encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+    except Exception:
+        return text[:max_tokens * 3]
+
+
+def legacy_split_text_safely(text: str, max_tokens: int = 700) -> List[str]:
+    if legacy_count_tokens(text) <= max_tokens:
+        return [text]
+
+    paragraphs = text.split('\n\n')
+    chunks = []
+    current_chunk = ""
+
+    for paragraph in paragraphs:
+        test_chunk = current_chunk + "\n\n" + paragraph if current_chunk else paragraph
+
+        if legacy_count_tokens(test_chunk) <= max_tokens:
+            current_chunk = test_chunk
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+
+            if legacy_count_tokens(paragraph) > max_tokens:
+                sentences = paragraph.split('. ')
+                sent_chunk = ""
+                for sentence in sentences:
+                    test_sent = sent_chunk + ". " + sentence if sent_chunk else sentence
+                    if legacy_count_tokens(test_sent) <= max_tokens:
+                        sent_chunk = test_sent
+                    else:
+                        if sent_chunk:
+                            chunks.append(sent_chunk.strip())
+                        sent_chunk = legacy_truncate_to_tokens(sentence, max_tokens)
+                if sent_chunk:
+                    chunks.append(sent_chunk.strip())
+            else:
+                current_chunk = paragraph
+
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+
+    return chunks
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token-aware chunking")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--max-tokens", type=int, default=650)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    tokenizer = "tiktoken" if get_encoder() is not None else "character estimate (tiktoken not installed)"
+    print(f"Tokenizer: {tokenizer}")
+    print(f"{'chars':>10} {'legacy s':>10} {'new s':>10} {'speedup':>8} {'legacy chunks':>14} {'new chunks':>11}")
+
+    for size in args.sizes:
+        text = make_document(size)
+        get_encoder()  # warm the shared encoder outside the timed region
+
+        legacy_chunks = legacy_split_text_safely(text, args.max_tokens)
+        new_chunks = chunk_text(text, args.max_tokens)
+
+        legacy_time = best_of(lambda: legacy_split_text_safely(text, args.max_tokens), args.repeats)
+        new_time = best_of(lambda: chunk_text(text, args.max_tokens), args.repeats)
+
+        speedup = legacy_time / new_time if new_time else float("inf")
+        print(f"{size:>10} {legacy_time:>10.4f} {new_time:>10.4f} {speedup:>7.1f}x "
+              f"{len(legacy_chunks):>14} {len(new_chunks):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_youtube_service.py
+"""
+Benchmark: wall-clock time of 10-video YouTube search requests (metadata +
+transcripts, the /api/you_tube_searcher loading path) before and after the
+shared YouTube service.
+
+before: video info loaded one URL at a time, a fresh ThreadPoolExecutor(3)
+        per request for the transcripts, a new Groq client per request
+after:  youtube_loader on the shared service (metadata loaded concurrently,
+        one bounded thread pool, one Groq client)
+
+Runs without network access: the yt-dlp loader and the transcript API are
+replaced by stand-ins that sleep for the given latencies, and every request
+uses new video IDs so the transcript store never answers.
+
+Run from QuizerAi_backend/:
+    python -m benchmarks.bench_youtube_service
+    python -m benchmarks.bench_youtube_service --requests 8 --concurrency 4 --metadata-ms 800
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+import uuid
+from types import SimpleNamespace
+
+
+def install_fakes(metadata_ms: float, transcript_ms: float):
+    """Offline stand-ins for the langchain_yt_dlp loader and the transcript API call"""
+    from app.models import generate_quizes
+
+    class FakeLoaderDL:
+        def __init__(self, url: str):
+            self.video_id = url.split("v=")[-1]
+
+        @classmethod
+        def from_youtube_url(cls, url: str, **kwargs):
+            return cls(url)
+
+        def load(self):
+            time.sleep(metadata_ms / 1000)
+            return [SimpleNamespace(page_content="", metadata={"source": self.video_id, "title": self.video_id})]
+
+    def fake_transcript(video_id: str):
+        time.sleep(transcript_ms / 1000)
+        return f"Transcript of {video_id}: photosynthesis converts light energy into chemical energy. " * 20
+
+    package = types.ModuleType("langchain_yt_dlp")
+    module = types.ModuleType("langchain_yt_dlp.youtube_loader")
+    module.YoutubeLoaderDL = FakeLoaderDL
+    package.youtube_loader = module
+    sys.modules["langchain_yt_dlp"] = package
+    sys.modules["langchain_yt_dlp.youtube_loader"] = module
+    generate_quizes.you_tube_transcript_from_video_id_sync = fake_transcript
+    return FakeLoaderDL, fake_transcript
+
+
+def search_results(videos: int) -> list:
+    return [f"https://www.youtube.com/watch?v={uuid.uuid4().hex[:11]}" for _ in range(videos)]
+
+
+async def before_request(urls: list, loader_cls, fetch_transcript):
+    """The loading path as it was: sequential video info, per-call executor and Groq client"""
+    from groq import Groq
+
+    Groq(api_key=os.environ["GROQ_API_KEY"])
+    loop = asyncio.get_running_loop()
+    content = []
+    for url in urls:
+        documents = await loop.run_in_executor(None, loader_cls.from_youtube_url(url, add_video_info=True).load)
+        if documents:
+            content.append(documents)
+    video_ids = [doc.metadata["source"] for group in content for doc in group]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        tasks = [loop.run_in_executor(executor, fetch_transcript, video_id) for video_id in video_ids]
+        transcripts = await asyncio.gather(*tasks)
+    for group, transcript in zip(content, transcripts):
+        group[0].page_content = transcript
+    return content
+
+
+async def after_request(urls: list):
+    from app.models.generate_quizes import youtube_loader
+    from app.services.enhanced_youtube_service import youtube_service
+
+    youtube_service.groq_client
+    return await youtube_loader(urls)
+
+
+async def run(name: str, request, requests: int, concurrency: int, videos: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            content = await request(search_results(videos))
+            assert len(content) == videos and all(group[0].page_content for group in content)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    total = time.perf_counter() - started
+    print(f"{name:<8} {statistics.median(latencies):>8.2f} {max(latencies):>8.2f} {total:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark 10-video YouTube search requests")
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--videos", type=int, default=10)
+    parser.add_argument("--metadata-ms", type=float, default=600)
+    parser.add_argument("--transcript-ms", type=float, default=400)
+    args = parser.parse_args()
+
+    # Keep the benchmark's transcripts out of the real disk tier
+    os.environ.setdefault("TRANSCRIPT_STORE_DIR", tempfile.mkdtemp(prefix="bench_transcripts_"))
+    # Clients are constructed but never called
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    loader_cls, fetch_transcript = install_fakes(args.metadata_ms, args.transcript_ms)
+    from app.services.enhanced_youtube_service import youtube_service
+
+    print(f"{args.requests} requests x {args.videos} videos, concurrency {args.concurrency}, "
+          f"video info {args.metadata_ms:.0f} ms, transcript {args.transcript_ms:.0f} ms")
+    print(f"{'path':<8} {'p50 s':>8} {'max s':>8} {'total s':>8}")
+
+    async def scenario():
+        try:
+            await run("before", lambda urls: before_request(urls, loader_cls, fetch_transcript),
+                      args.requests, args.concurrency, args.videos)
+            await run("after", after_request, args.requests, args.concurrency, args.videos)
+        finally:
+            await youtube_service.close()
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    main()
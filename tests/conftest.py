@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture
+def redis_offline(monkeypatch):
+    """Services with a Redis tier stay in-process: their circuit breaker reports Redis as down"""
+    try:
+        from app.config.redis_config import RedisCircuitBreaker  # type: ignore
+    except Exception:  # pragma: no cover
+        pytest.skip("Redis dependencies not available.")
+    monkeypatch.setattr(RedisCircuitBreaker, "_redis_available", lambda self: False)
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+
+try:
+    from app.services import disk_cache as disk_cache_module  # type: ignore
+    from app.services.disk_cache import DiskCache  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Disk cache dependencies not available.", allow_module_level=True)
+
+
+def test_directory_listed_on_a_write_counter_or_when_over_budget(tmp_path, monkeypatch) -> None:
+    listings = []
+    real_listdir = os.listdir
+    monkeypatch.setattr(disk_cache_module.os, "listdir", lambda path: listings.append(path) or real_listdir(path))
+
+    cache = DiskCache(str(tmp_path / "cache"), ttl=3600, max_bytes=10_000, prune_every=4)
+    for index in range(9):
+        assert cache.set(f"small:{index}", b"x" * 100)
+    # First write (size unknown), then every fourth write
+    assert len(listings) == 3
+
+    # Bytes written since the last listing exceed the budget: pruned straight away
+    cache.set("large", os.urandom(9_500))
+    assert len(listings) == 4
+    assert cache.total_bytes() <= 10_000
+    assert cache.get("large") is not None and cache.get("small:0") is None
@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+
+try:
+    from langchain_core.documents import Document  # type: ignore
+    from app.services.extraction_cache import ExtractionCache, sha256_file  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Extraction cache dependencies not available.", allow_module_level=True)
+
+pytestmark = pytest.mark.usefixtures("redis_offline")
+
+
+def make_cache(tmp_path, **kwargs) -> ExtractionCache:
+    return ExtractionCache(cache_dir=str(tmp_path / "cache"), **kwargs)
+
+
+def test_key_follows_content_and_extractor_version(tmp_path) -> None:
+    first = tmp_path / "chapter.pdf"
+    renamed = tmp_path / "chapter (1).pdf"
+    first.write_bytes(b"%PDF-1.4 photosynthesis")
+    renamed.write_bytes(b"%PDF-1.4 photosynthesis")
+    assert sha256_file(str(first)) == hashlib.sha256(b"%PDF-1.4 photosynthesis").hexdigest()
+
+    cache = make_cache(tmp_path)
+    digest = sha256_file(str(first))
+    assert cache.make_key(digest, "pdf") == cache.make_key(sha256_file(str(renamed)), "pdf")
+    assert cache.make_key(digest, "pdf") != cache.make_key(digest, "image")
+    assert cache.make_key(digest, "pdf") != cache.make_key(digest, "pdf", variant="pages=2")
+
+
+def test_round_trip_documents_and_text(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    documents = [Document(page_content="Chlorophyll absorbs light. " * 200, metadata={"page": 3}), "ocr text"]
+    key = cache.make_key("a" * 64, "pdf")
+
+    assert cache.get_sync(key) is None
+    cache.set_sync(key, documents)
+    restored = cache.get_sync(key)
+
+    assert restored[0].page_content == documents[0].page_content
+    assert restored[0].metadata == {"page": 3}
+    assert restored[1] == "ocr text"
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1 and stats["misses"] == 1
+    assert 0 < stats["compression_ratio"] < 0.1
+
+
+def test_get_or_extract_runs_extractor_once(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    calls = []
+
+    async def extract():
+        calls.append(1)
+        return ["extracted"]
+
+    async def scenario():
+        first = await cache.get_or_extract("b" * 64, "image", extract)
+        second = await cache.get_or_extract("b" * 64, "image", extract)
+        return first, second
+
+    assert asyncio.run(scenario()) == (["extracted"], ["extracted"])
+    assert len(calls) == 1
+
+
+def test_disk_tier_pruned_and_expired(tmp_path) -> None:
+    cache = make_cache(tmp_path, disk_max_bytes=3000)
+    for index in range(5):
+        # Incompressible payloads of ~1KB each
+        cache.set_sync(cache.make_key(str(index) * 64, "pdf"), [os.urandom(512).hex()])
+    assert cache.stats()["disk_bytes"] <= 3000
+    assert cache.get_sync(cache.make_key("4" * 64, "pdf")) is not None
+
+    expired = make_cache(tmp_path, ttl=1)
+    path = expired._disk.path(expired.make_key("4" * 64, "pdf"))
+    os.utime(path, (0, 0))
+    assert expired.get_sync(expired.make_key("4" * 64, "pdf")) is None
+    assert not os.path.exists(path)
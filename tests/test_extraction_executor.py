@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+try:
+    from fastapi import HTTPException  # type: ignore
+    from app.core.providers import lazy_import  # type: ignore
+    from app.services.extraction_executor import ExtractionExecutor  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Extraction executor not available.", allow_module_level=True)
+
+
+def test_blocking_io_runs_off_the_event_loop() -> None:
+    executor = ExtractionExecutor(thread_workers=2, thread_queue=4)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await executor.run_io(lambda: time.sleep(0.3) or "loaded")
+        task.cancel()
+        return result, ticks
+
+    try:
+        result, ticks = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert result == "loaded"
+    assert ticks >= 10
+    stats = executor.stats()["thread"]
+    assert stats["completed"] == 1 and stats["in_flight"] == 0
+    assert stats["run_ms"]["max"] >= 250
+
+
+def test_queue_limit_rejects_with_503() -> None:
+    executor = ExtractionExecutor(thread_workers=1, thread_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.create_task(executor.run_io(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as error:
+            await executor.run_io(time.sleep, 0)
+        release.set()
+        await first
+        return error.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert error.status_code == 503
+    assert executor.stats()["thread"]["rejected"] == 1
+
+
+def test_process_pool_runs_lazy_references() -> None:
+    executor = ExtractionExecutor(process_workers=1, process_queue=2)
+    try:
+        result = asyncio.run(executor.run_cpu(lazy_import("math", "factorial"), 10))
+    finally:
+        executor.shutdown(wait=True)
+    assert result == 3628800
+    assert executor.stats()["process"]["completed"] == 1
+
+
+def test_http_errors_in_workers_keep_the_process_pool(tmp_path) -> None:
+    # The worker imports the ingestion module (LangChain, Tesseract bindings, ...)
+    pytest.importorskip("app.services.data_ingestion_processing")
+    from app.services.upload_ingestion import SpooledUpload  # type: ignore
+
+    process_spooled_upload = lazy_import("app.services.data_ingestion_processing", "process_spooled_upload")
+    slides = tmp_path / "lecture.ppt"
+    slides.write_bytes(b"\xd0\xcf\x11\xe0legacy slides")
+    upload = SpooledUpload(path=str(slides), filename="lecture.ppt", content_type="application/vnd.ms-powerpoint",
+                           kind="ppt", size=slides.stat().st_size, sha256="0" * 64)
+    executor = ExtractionExecutor(process_workers=2, process_queue=4)
+
+    async def scenario():
+        other = asyncio.create_task(executor.run_cpu(lazy_import("time", "sleep"), 1.0))
+        await asyncio.sleep(0.2)
+        with pytest.raises(HTTPException) as error:
+            await executor.run_cpu(process_spooled_upload, upload)
+        await other
+        after = await executor.run_cpu(lazy_import("math", "factorial"), 5)
+        return error.value, after
+
+    try:
+        pool_before = executor._get_pool("process")
+        error, after = asyncio.run(scenario())
+        assert executor._process_pool is pool_before
+    finally:
+        executor.shutdown(wait=True)
+    assert error.status_code == 400 and "PPTX" in error.detail
+    assert after == 120
+    assert executor.stats()["process"]["completed"] == 2
@@ -0,0 +1,73 @@
+import pytest
+
+
+try:
+    from app.services.extractive_selector import ExtractiveSelector, split_units  # type: ignore
+    from app.utils.text_chunker import count_tokens  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Extractive selector not available.", allow_module_level=True)
+
+
+TOPICS = [
+    "Photosynthesis converts light energy into chemical energy stored in glucose molecules.",
+    "Mitochondria release energy from glucose through cellular respiration in the cell.",
+    "Enzymes lower the activation energy of reactions and speed up cell metabolism.",
+    "Diffusion moves molecules from regions of high concentration to low concentration.",
+    "Osmosis is the diffusion of water across a selectively permeable cell membrane.",
+]
+
+
+def chapter(repeats: int = 30) -> str:
+    paragraphs = []
+    for i in range(repeats):
+        paragraphs.append(f"Biology Class 10 Page {i}")
+        paragraphs.append(" ".join(TOPICS[(i + k) % len(TOPICS)] for k in range(3)) + f" Example {i} uses value {i * 7}.")
+    return "\n\n".join(paragraphs)
+
+
+def test_selection_respects_budget_and_reports_savings() -> None:
+    text = chapter()
+    result = ExtractiveSelector().select(text, 300)
+    assert result.method == "tfidf"
+    assert result.selected_tokens <= 300
+    assert count_tokens(result.text) <= 320
+    assert result.tokens_saved == result.original_tokens - result.selected_tokens > 0
+    assert "text" not in result.to_dict()
+
+
+def test_repeated_boilerplate_is_dropped_and_order_kept() -> None:
+    text = chapter()
+    result = ExtractiveSelector().select(text, 400)
+    kept = [unit for _, unit in split_units(result.text)]
+    assert len(kept) == len(set(kept))
+    assert not any(unit.startswith("Biology Class 10 Page") for unit in kept[1:])
+
+    positions = [text.index(unit) for unit in kept]
+    assert positions == sorted(positions)
+
+
+def test_textrank_and_disabled_budget() -> None:
+    selector = ExtractiveSelector()
+    result = selector.select(chapter(), 300, method="textrank")
+    assert result.method == "textrank"
+    assert 0 < result.selected_tokens <= 300
+
+    documents = ["short text"]
+    unchanged, selection = selector.select_documents(documents, 0)
+    assert unchanged is documents and selection is None
+
+    unchanged, selection = selector.select_documents(documents, 1000)
+    assert unchanged is documents and selection.method == "none"
+    assert selector.stats()["skipped"] == 1
+
+
+def test_only_single_quizzes_are_preselected_by_default(monkeypatch) -> None:
+    from app.services.extractive_selector import default_budget  # type: ignore
+
+    for name in ("EXTRACTIVE_SUMMARY_BUDGET", "EXTRACTIVE_QUIZ_MAP_REDUCE_BUDGET", "EXTRACTIVE_QUIZ_BUDGET"):
+        monkeypatch.delenv(name, raising=False)
+    assert default_budget("summary") == 0
+    assert default_budget("quiz", "map_reduce") == 0
+    assert default_budget("quiz", "single") == 1500
+    monkeypatch.setenv("EXTRACTIVE_SUMMARY_BUDGET", "8000")
+    assert default_budget("summary") == 8000
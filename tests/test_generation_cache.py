@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+
+try:
+    from app.services.generation_cache import GenerationCache  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Generation cache dependencies not available.", allow_module_level=True)
+
+pytestmark = pytest.mark.usefixtures("redis_offline")
+
+
+PARAMS = {"quiz_type": "mcq", "language": "English", "num_questions": "10", "difficulty_level": "medium"}
+
+
+def make_cache(**kwargs) -> GenerationCache:
+    return GenerationCache(**kwargs)
+
+
+def test_key_uses_full_text_not_prefix() -> None:
+    cache = make_cache()
+    opening = "Chapter 1. " * 100
+    key_a = cache.make_key("quiz", opening + "Photosynthesis", PARAMS, "model", "v1")
+    key_b = cache.make_key("quiz", opening + "Respiration", PARAMS, "model", "v1")
+    assert key_a != key_b
+
+
+def test_key_covers_every_parameter_model_and_prompt_version() -> None:
+    cache = make_cache()
+    base = cache.make_key("quiz", "text", PARAMS, "model", "v1")
+    assert base != cache.make_key("quiz", "text", {**PARAMS, "language": "Hindi"}, "model", "v1")
+    assert base != cache.make_key("quiz", "text", {**PARAMS, "difficulty_level": "hard"}, "model", "v1")
+    assert base != cache.make_key("quiz", "text", PARAMS, "other-model", "v1")
+    assert base != cache.make_key("quiz", "text", PARAMS, "model", "v2")
+    assert base != cache.make_key("summary", "text", PARAMS, "model", "v1")
+
+
+def test_key_ignores_whitespace_differences() -> None:
+    cache = make_cache()
+    assert cache.make_key("quiz", "a  b\n\nc ", PARAMS, "m", "v1") == cache.make_key("quiz", "a b c", PARAMS, "m", "v1")
+
+
+def test_hit_miss_metrics_and_eviction() -> None:
+    cache = make_cache(max_entries=2)
+
+    async def scenario() -> None:
+        assert await cache.get("k1") is None
+        await cache.set("k1", [{"question": "q1"}])
+        await cache.set("k2", [{"question": "q2"}])
+        assert await cache.get("k1") == [{"question": "q1"}]
+        await cache.set("k3", [{"question": "q3"}])  # evicts k2 (least recently used)
+        assert await cache.get("k2") is None
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import pytest
+
+
+try:
+    from app.services.ingestion_pipeline import (  # type: ignore
+        IngestionPipeline,
+        buffered,
+        iterate_in_thread,
+        map_ordered,
+    )
+except Exception:  # pragma: no cover
+    pytest.skip("Ingestion pipeline dependencies not available.", allow_module_level=True)
+
+
+async def slow_pages(count: int, delay: float, produced: list):
+    for number in range(count):
+        await asyncio.sleep(delay)
+        produced.append(number)
+        yield number
+
+
+def test_map_starts_before_extraction_ends_and_keeps_order() -> None:
+    produced, started = [], []
+
+    async def generate(index, page):
+        started.append((page, len(produced)))
+        await asyncio.sleep(0.05)
+        return page * 10
+
+    async def scenario():
+        start = time.perf_counter()
+        results = await map_ordered(buffered(slow_pages(8, 0.05, produced), maxsize=2), generate)
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == [page * 10 for page in range(8)]
+    # The first call ran while only one page had been extracted
+    assert started[0] == (0, 1)
+    # ~ extraction (0.4s) + one map call, not extraction + every call in sequence
+    assert elapsed < 0.7
+
+
+def test_backpressure_bounds_extraction_lead() -> None:
+    produced, completed = [], []
+    lead = []
+
+    async def generate(index, page):
+        await asyncio.sleep(0.02)
+        completed.append(page)
+        lead.append(len(produced) - len(completed))
+        return page
+
+    async def scenario():
+        return await map_ordered(buffered(slow_pages(30, 0, produced), maxsize=2), generate, max_in_flight=2)
+
+    assert asyncio.run(scenario()) == list(range(30))
+    # in flight (2) + queue (2) + the item being handed over
+    assert max(lead) <= 5
+
+
+def test_thread_source_propagates_items_and_errors() -> None:
+    def pages():
+        yield "first"
+        yield "second"
+        raise ValueError("corrupt member")
+
+    async def scenario():
+        received = []
+        with pytest.raises(ValueError):
+            async for page in iterate_in_thread(pages, maxsize=1):
+                received.append(page)
+        return received
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+
+
+def test_pdf_upload_streams_same_chunks_as_extraction(tmp_path) -> None:
+    fitz = pytest.importorskip("fitz")
+    from app.services.extraction_executor import ExtractionExecutor  # type: ignore
+    from app.services.pdf_engine import PDFEngine  # type: ignore
+
+    path = tmp_path / "book.pdf"
+    document = fitz.open()
+    for number in range(1, 13):
+        page = document.new_page()
+        text = "\n".join(f"Chapter {number} line {line}: enzymes lower activation energy." for line in range(30))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=8)
+    document.save(str(path))
+    document.close()
+
+    class Upload:
+        kind = "pdf"
+        filename = "book.pdf"
+
+    Upload.path = str(path)
+    executor = ExtractionExecutor(process_workers=1, process_queue=8)
+    engine = PDFEngine(pages_per_task=2, executor=executor)
+    pipeline = IngestionPipeline(queue_size=2, pdf_engine=engine)
+    stored = []
+
+    async def count_pages(chunks):
+        return sorted({chunk.metadata["page"] async for chunk in chunks})
+
+    async def store(documents):
+        stored.extend(documents)
+
+    try:
+        pages, timings = asyncio.run(pipeline.run(Upload, count_pages, on_documents=store))
+    finally:
+        executor.shutdown(wait=True)
+
+    assert pages == list(range(1, 13))
+    expected = engine.extract_documents_sync(str(path), "book.pdf")
+    assert [doc.page_content for doc in stored] == [doc.page_content for doc in expected]
+    assert timings["chunks"] == len(expected) and timings["first_chunk_ms"] <= timings["extract_ms"]
+    assert pipeline.stats()["runs"] == 1
+
+
+@pytest.mark.parametrize("action, quiz_mode, incremental", [
+    ("summary", "single", True),
+    ("quiz", "map_reduce", True),
+    ("quiz", "single", False),
+])
+def test_default_upload_takes_the_incremental_path(monkeypatch, action, quiz_mode, incremental) -> None:
+    pytest.importorskip("fastapi")
+    pytest.importorskip("multipart")
+    from fastapi import FastAPI  # type: ignore
+    from fastapi.testclient import TestClient  # type: ignore
+    from app.routers import api  # type: ignore
+
+    for name in ("EXTRACTIVE_SUMMARY_BUDGET", "EXTRACTIVE_QUIZ_MAP_REDUCE_BUDGET", "EXTRACTIVE_QUIZ_BUDGET"):
+        monkeypatch.delenv(name, raising=False)
+    paths = []
+
+    async def generate_incremental(file, session, action, *args):
+        paths.append("incremental")
+        return ([] if action == "quiz" else "summary"), {"chunks": 1}
+
+    async def extract_documents(file, url, session):
+        paths.append("buffered")
+        return ["Enzymes lower activation energy."]
+
+    async def preselect(documents, action, quiz_mode, extractive_budget):
+        paths.append("preselect")
+        return documents, None
+
+    async def generate(*args):
+        return [] if action == "quiz" else "summary"
+
+    monkeypatch.setattr(api, "_generate_incremental", generate_incremental)
+    monkeypatch.setattr(api, "_extract_documents", extract_documents)
+    monkeypatch.setattr(api, "_preselect", preselect)
+    monkeypatch.setattr(api, "generate_quiz", generate)
+    monkeypatch.setattr(api, "generate_summary", generate)
+    app = FastAPI()
+    app.include_router(api.router, prefix="/api")
+
+    response = TestClient(app).post("/api/upload", data={"action": action, "quiz_mode": quiz_mode},
+                                    files={"file": ("book.pdf", b"%PDF-1.4", "application/pdf")})
+    assert response.status_code == 200
+    assert paths == (["incremental"] if incremental else ["buffered", "preselect"])
+    assert (response.json()["metadata"]["pipeline"] is not None) == incremental
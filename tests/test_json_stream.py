@@ -0,0 +1,45 @@
+import pytest
+
+
+try:
+    from app.utils.json_stream import IncrementalJSONArrayParser  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("JSON stream parser not available.", allow_module_level=True)
+
+
+QUIZ = (
+    '```json\n[\n'
+    '  {"question": "What is {x}?", "options": ["a", "b"], "answer": "a", "explanation": "quote \\" and ] inside"},\n'
+    '  {"question": "Second", "answer": "b", "meta": {"nested": [1, 2]}}\n'
+    ']\n```'
+)
+
+
+def test_objects_are_emitted_as_soon_as_they_close() -> None:
+    parser = IncrementalJSONArrayParser()
+    emitted = []
+    first_emitted_at = None
+
+    for i, ch in enumerate(QUIZ):  # one character per "token"
+        objects = parser.feed(ch)
+        if objects and first_emitted_at is None:
+            first_emitted_at = i
+        emitted.extend(objects)
+
+    assert [q["question"] for q in emitted] == ["What is {x}?", "Second"]
+    assert emitted[0]["explanation"] == 'quote " and ] inside'
+    assert emitted[1]["meta"] == {"nested": [1, 2]}
+    assert first_emitted_at < QUIZ.index("Second")
+    assert parser.done
+
+
+def test_malformed_object_is_skipped() -> None:
+    parser = IncrementalJSONArrayParser()
+    objects = parser.feed('[{"question": "ok"}, {"question": bad}, {"question": "also ok"}]')
+    assert objects == [{"question": "ok"}, {"question": "also ok"}]
+
+
+def test_text_after_closing_bracket_is_ignored() -> None:
+    parser = IncrementalJSONArrayParser()
+    assert parser.feed('[{"a": 1}]') == [{"a": 1}]
+    assert parser.feed('{"b": 2}') == []
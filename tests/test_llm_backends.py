@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+import pytest
+
+
+try:
+    from langchain_core.messages import HumanMessage  # type: ignore
+    from app.models.llm_backends import FakeChatModel, FakeRateLimitError, RecordReplayChatModel  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("LLM backend dependencies not available.", allow_module_level=True)
+
+
+QUIZ_PROMPT = "Generate EXACTLY 5 high-quality mcq questions from the provided text. Mitochondria produce energy."
+
+
+def fast_fake(**kwargs) -> FakeChatModel:
+    return FakeChatModel(ttft_ms=1, tokens_per_second=1_000_000, **kwargs)
+
+
+def test_fake_quiz_response_is_valid_and_deterministic() -> None:
+    model = fast_fake()
+    first = asyncio.run(model.ainvoke([HumanMessage(content=QUIZ_PROMPT)])).content
+    second = asyncio.run(model.ainvoke([HumanMessage(content=QUIZ_PROMPT)])).content
+
+    questions = json.loads(first)
+    assert first == second
+    assert len(questions) == 5
+    assert all({"question", "options", "answer", "explanation"} <= set(q) for q in questions)
+
+
+def test_fake_streams_the_same_text() -> None:
+    model = fast_fake()
+
+    async def collect():
+        return "".join([chunk.content async for chunk in model.astream([HumanMessage(content=QUIZ_PROMPT)])])
+
+    assert asyncio.run(collect()) == model.render_response(QUIZ_PROMPT)
+
+
+def test_injected_rate_limit() -> None:
+    model = fast_fake(rate_limit_probability=1.0)
+    with pytest.raises(FakeRateLimitError):
+        asyncio.run(model.ainvoke([HumanMessage(content="Summarize this")]))
+
+
+def test_record_then_replay_offline(tmp_path) -> None:
+    prompt = [HumanMessage(content="Create a comprehensive 50-word summary in English: cells")]
+    recorder = RecordReplayChatModel(mode="record", record_dir=str(tmp_path), inner=fast_fake())
+    recorded = asyncio.run(recorder.ainvoke(prompt)).content
+
+    replayer = RecordReplayChatModel(mode="replay", record_dir=str(tmp_path))
+    assert asyncio.run(replayer.ainvoke(prompt)).content == recorded
+    with pytest.raises(LookupError):
+        asyncio.run(replayer.ainvoke([HumanMessage(content="never recorded")]))
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+
+import pytest
+
+
+try:
+    from app.services.llm_governor import LLMGovernor, classify_error, retry_after_seconds  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("LLM governor dependencies not available.", allow_module_level=True)
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def make_governor(**kwargs) -> LLMGovernor:
+    kwargs.setdefault("cooldown", 0)
+    return LLMGovernor(**kwargs)
+
+
+def test_error_classification_and_retry_after() -> None:
+    assert classify_error(RateLimitError("Too many requests")) == "rate_limited"
+    assert classify_error(asyncio.TimeoutError()) == "timeout"
+    assert classify_error(ValueError("bad json")) == "error"
+    assert retry_after_seconds(Exception("Rate limit reached. Please try again in 1.5s.")) == 1.5
+    assert retry_after_seconds(Exception("Please try again in 250ms")) == 0.25
+
+
+def test_concurrency_never_exceeds_limit(redis_offline) -> None:
+    governor = make_governor(initial_limit=2, max_limit=2)
+    active = 0
+    peak = 0
+
+    async def call():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*[governor.run(call) for _ in range(10)])
+
+    assert asyncio.run(scenario()) == ["ok"] * 10
+    assert peak == 2
+    assert governor.stats()["in_flight"] == 0
+
+
+def test_additive_increase_and_multiplicative_decrease(redis_offline) -> None:
+    governor = make_governor(initial_limit=4, min_limit=1, max_limit=8)
+
+    async def ok():
+        return "ok"
+
+    async def limited():
+        raise RateLimitError("429 Too Many Requests")
+
+    async def scenario():
+        for _ in range(8):
+            await governor.run(ok)
+        grown = governor.stats()["limit"]
+        with pytest.raises(RateLimitError):
+            await governor.run(limited)
+        return grown
+
+    grown = asyncio.run(scenario())
+    assert grown > 4
+    assert governor.stats()["limit"] == pytest.approx(grown / 2, abs=0.01)
+    assert governor.stats()["rate_limited"] == 1
+
+
+def test_shared_across_event_loops_in_threads(redis_offline) -> None:
+    governor = make_governor(initial_limit=1, max_limit=1)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    async def call():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        with lock:
+            active -= 1
+
+    async def calls():
+        await asyncio.wait_for(asyncio.gather(*[governor.run(call) for _ in range(3)]), timeout=5)
+
+    def worker():
+        asyncio.run(calls())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 1
+    assert governor.stats()["successes"] == 9
+
+
+def test_timeout_lowers_the_shared_limit(monkeypatch) -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from app.config.redis_config import redis_service  # type: ignore
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_service, "cache_client", None)
+    monkeypatch.setattr(redis_service, "get_sync_client", lambda decode_responses=False: client)
+    governor = LLMGovernor(initial_limit=4, min_limit=1, max_limit=8, cooldown=0)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await governor.run(slow, timeout=0.01)
+
+    asyncio.run(scenario())
+    assert float(client.get(governor._keys()["limit"])) == pytest.approx(2.0)
+    assert client.pttl(governor._keys()["cooldown"]) < 0
+    stats = governor.stats()
+    assert stats["timeouts"] == 1 and stats["redis_errors"] == 0 and stats["shared"]
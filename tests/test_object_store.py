@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+
+import pytest
+
+
+try:
+    from app.services.object_store import LocalObjectStore, ObjectNotFound  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Object store not available.", allow_module_level=True)
+
+
+PDF_BYTES = b"%PDF-1.4\n" + bytes(range(256)) * 200 + b"\n%%EOF\n"
+
+
+def write_part(store, key: str, upload_id: str, number: int, data: bytes) -> str:
+    writer = store.open_part_writer(key, upload_id, number)
+    for start in range(0, len(data), 1000):
+        writer.write(data[start:start + 1000])
+    return writer.commit()
+
+
+def test_multipart_parts_assembled_in_order(tmp_path) -> None:
+    store = LocalObjectStore(str(tmp_path / "store"))
+    key = "documents/paper.pdf"
+    upload_id = store.create_multipart_upload(key)
+    parts = [PDF_BYTES[:20_000], PDF_BYTES[20_000:40_000], PDF_BYTES[40_000:]]
+
+    etags = {}
+    for number in (3, 1, 2):
+        etags[number] = write_part(store, key, upload_id, number, parts[number - 1])
+    # A retried part replaces the earlier attempt
+    etags[2] = write_part(store, key, upload_id, 2, parts[1])
+    assert etags[1] == hashlib.md5(parts[0]).hexdigest()
+
+    listed = store.list_parts(key, upload_id)
+    assert [(part["part_number"], part["size"]) for part in listed] == [(n, len(parts[n - 1])) for n in (1, 2, 3)]
+
+    store.complete_multipart_upload(key, upload_id, sorted(etags.items()))
+    assert store.get_bytes(key) == PDF_BYTES
+    with pytest.raises(ObjectNotFound):
+        store.list_parts(key, upload_id)
+
+    copy = tmp_path / "copy.pdf"
+    store.download_to(key, str(copy))
+    assert copy.read_bytes() == PDF_BYTES
+
+
+def test_abort_discards_parts_and_keys_stay_inside_root(tmp_path) -> None:
+    store = LocalObjectStore(str(tmp_path / "store"))
+    upload_id = store.create_multipart_upload("documents/a.pdf")
+    write_part(store, "documents/a.pdf", upload_id, 1, PDF_BYTES)
+    store.abort_multipart_upload("documents/a.pdf", upload_id)
+    with pytest.raises(ObjectNotFound):
+        store.open_part_writer("documents/a.pdf", upload_id, 2)
+    assert store.size("documents/a.pdf") is None
+
+    with pytest.raises(ValueError):
+        store.put_bytes("../escape.txt", b"x")
+
+
+def test_chunked_upload_session_resumes_missing_parts(tmp_path) -> None:
+    try:
+        from fastapi import HTTPException  # type: ignore
+        from app.services.chunked_upload import ChunkedUploadService  # type: ignore
+        from app.services.upload_ingestion import open_object  # type: ignore
+    except Exception:  # pragma: no cover
+        pytest.skip("Chunked uploads not available.")
+
+    store = LocalObjectStore(str(tmp_path / "store"))
+    service = ChunkedUploadService(store=store, part_bytes=16_384)
+
+    async def body(data: bytes):
+        for start in range(0, len(data), 4096):
+            yield data[start:start + 4096]
+
+    def part(number: int) -> bytes:
+        return PDF_BYTES[(number - 1) * 16_384:number * 16_384]
+
+    async def scenario():
+        session = await service.initiate("paper.pdf", len(PDF_BYTES), "application/pdf", allowed_kinds=("pdf",))
+        assert session.total_parts == 4
+        for number in (4, 2):
+            await service.put_part(session.session_id, number, body(part(number)))
+
+        # Wrong size and wrong magic bytes are rejected without storing the part
+        with pytest.raises(HTTPException):
+            await service.put_part(session.session_id, 3, body(part(3)[:100]))
+        with pytest.raises(HTTPException):
+            await service.put_part(session.session_id, 1, body(b"GIF89a" + part(1)[6:]))
+
+        status = await service.status(session.session_id)
+        assert status["received_parts"] == [2, 4] and status["missing_parts"] == [1, 3]
+        with pytest.raises(HTTPException) as error:
+            await service.complete(session.session_id)
+        assert error.value.status_code == 409
+
+        for number in (1, 3):
+            await service.put_part(session.session_id, number, body(part(number)))
+        completed = await service.complete(session.session_id)
+        return completed
+
+    session = asyncio.run(scenario())
+    assert store.get_bytes(session.key) == PDF_BYTES
+
+    with open_object(session.key, session.filename, allowed_kinds=("pdf",), store=store) as upload:
+        assert upload.kind == "pdf"
+        assert upload.sha256 == hashlib.sha256(PDF_BYTES).hexdigest()
+
+
+def test_expired_and_ingested_upload_sessions_are_removed(tmp_path, monkeypatch) -> None:
+    try:
+        from fastapi import HTTPException  # type: ignore
+        from app.services import chunked_upload  # type: ignore
+    except Exception:  # pragma: no cover
+        pytest.skip("Chunked uploads not available.")
+
+    store = LocalObjectStore(str(tmp_path / "store"))
+    service = chunked_upload.ChunkedUploadService(store=store, part_bytes=16_384)
+
+    async def body(data: bytes):
+        yield data
+
+    async def start(parts: int):
+        session = await service.initiate("paper.pdf", len(PDF_BYTES), "application/pdf", allowed_kinds=("pdf",))
+        for number in range(1, parts + 1):
+            await service.put_part(session.session_id, number, body(PDF_BYTES[(number - 1) * 16_384:number * 16_384]))
+        return session
+
+    abandoned, stale, ingested = asyncio.run(start(2)), asyncio.run(start(3)), asyncio.run(start(4))
+    ingested = asyncio.run(service.complete(ingested.session_id))
+    asyncio.run(service.release(ingested))
+    assert store.size(ingested.key) is None
+    assert store.list_keys(".uploads/") == sorted([f".uploads/{abandoned.session_id}.json",
+                                                   f".uploads/{stale.session_id}.json"])
+
+    monkeypatch.setattr(chunked_upload, "CHUNKED_UPLOAD_SESSION_TTL", -1)
+    # Loading an expired session discards it; the sweeper takes the rest
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.status(stale.session_id))
+    assert error.value.status_code == 410
+    assert service.sweep_expired() == 1
+    assert store.list_keys(".uploads/") == [] and store.list_keys(".multipart/") == []
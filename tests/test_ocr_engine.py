@@ -0,0 +1,73 @@
+import shutil
+
+import pytest
+
+
+try:
+    import fitz  # type: ignore
+    from PIL import Image, ImageDraw  # type: ignore
+    from app.services import ocr_engine  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("OCR engine dependencies not available.", allow_module_level=True)
+
+
+def lined_page(width: int = 1600, height: int = 1200) -> "Image.Image":
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    for top in range(100, height - 100, 60):
+        draw.rectangle((100, top, width - 100, top + 12), fill=0)
+    return image
+
+
+def test_preprocess_downscales_to_target_dpi_and_deskews() -> None:
+    tilted = lined_page().rotate(3, resample=Image.BICUBIC, expand=False, fillcolor=255)
+    assert abs(ocr_engine.estimate_skew(tilted) + 3) <= 0.5
+    assert ocr_engine.estimate_skew(lined_page()) == 0
+
+    # 600 DPI scan -> half size at 300 DPI (plus the margin added by deskewing)
+    processed = ocr_engine.preprocess_image(lined_page().convert("RGB"), source_dpi=600)
+    assert processed.mode == "L"
+    assert 800 <= processed.width <= 900 and 600 <= processed.height <= 700
+
+
+def test_scanned_pages_detected_by_text_density(tmp_path) -> None:
+    picture = tmp_path / "scan.png"
+    lined_page(400, 300).save(picture)
+    document = fitz.open()
+    text_page = document.new_page()
+    text_page.insert_textbox(fitz.Rect(36, 36, 576, 806), "Mitochondria produce ATP. " * 80, fontsize=9)
+    text_page.insert_image(fitz.Rect(36, 600, 236, 750), filename=str(picture))
+    scanned = document.new_page()
+    scanned.insert_image(scanned.rect, filename=str(picture))
+    scanned.insert_text((40, 40), "12")
+    document.new_page()
+    saved = tmp_path / "mixed.pdf"
+    document.save(str(saved))
+    document.close()
+
+    # Reopen so every page is a fresh handle onto the saved content
+    document = fitz.open(str(saved))
+    try:
+        pages = [(page, page.get_text().strip()) for page in document]
+        assert [ocr_engine.is_scanned_page(page, text) for page, text in pages] == [False, True, False]
+    finally:
+        document.close()
+
+
+@pytest.mark.skipif(shutil.which("tesseract") is None, reason="Tesseract not installed.")
+def test_page_results_cached_by_image_hash(tmp_path, monkeypatch, redis_offline) -> None:
+    from app.services import extraction_cache as cache_module  # type: ignore
+
+    cache = cache_module.ExtractionCache(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(cache_module, "extraction_cache", cache)
+
+    image = Image.new("L", (1200, 300), 255)
+    ImageDraw.Draw(image).text((40, 120), "Photosynthesis makes glucose", fill=0)
+    first, second = tmp_path / "first.png", tmp_path / "copy.png"
+    image.save(first)
+    image.save(second)
+
+    text, hit = ocr_engine.ocr_image_file(str(first))
+    again, hit_again = ocr_engine.ocr_image_file(str(second))
+    assert hit is False and hit_again is True
+    assert again == text
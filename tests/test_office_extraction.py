@@ -0,0 +1,107 @@
+import io
+import zipfile
+
+import pytest
+
+
+pytest.importorskip("langchain")
+
+try:
+    from app.services.office_extraction import (  # type: ignore
+        extract_office,
+        iter_docx_documents,
+        iter_pptx_slides,
+        iter_xlsx_sheets,
+    )
+except Exception:  # pragma: no cover
+    pytest.skip("Office extraction dependencies not available.", allow_module_level=True)
+
+
+A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+S = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+def rels(*entries) -> str:
+    items = "".join(f'<Relationship Id="{rid}" Type="{R}/{kind}" Target="{target}"/>' for rid, kind, target in entries)
+    return f'<Relationships xmlns="{REL}">{items}</Relationships>'
+
+
+def slide_xml(*texts) -> str:
+    runs = "".join(f"<a:p><a:r><a:t>{text}</a:t></a:r></a:p>" for text in texts)
+    return f'<p:sld xmlns:p="{P}" xmlns:a="{A}"><p:cSld><p:spTree><p:sp><p:txBody>{runs}</p:txBody></p:sp></p:spTree></p:cSld></p:sld>'
+
+
+def make_pptx(slide_count: int = 11) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        # Presentation order: slide 2 first, then 1, then 3..n
+        order = [2, 1] + list(range(3, slide_count + 1))
+        ids = "".join(f'<p:sldId id="{255 + i}" r:id="rId{n}"/>' for i, n in enumerate(order, 1))
+        archive.writestr("ppt/presentation.xml", f'<p:presentation xmlns:p="{P}" xmlns:r="{R}"><p:sldIdLst>{ids}</p:sldIdLst></p:presentation>')
+        archive.writestr("ppt/_rels/presentation.xml.rels",
+                         rels(*[(f"rId{n}", "slide", f"slides/slide{n}.xml") for n in range(1, slide_count + 1)]))
+        for n in range(1, slide_count + 1):
+            archive.writestr(f"ppt/slides/slide{n}.xml", slide_xml(f"Slide file {n}", "Photosynthesis &amp; respiration"))
+        # Notes belong to slide 3 (file notesSlide1), which the old index-based pairing got wrong
+        archive.writestr("ppt/slides/_rels/slide3.xml.rels", rels(("rId1", "notesSlide", "../notesSlides/notesSlide1.xml")))
+        archive.writestr("ppt/notesSlides/notesSlide1.xml", slide_xml("Mention chlorophyll"))
+    return buffer.getvalue()
+
+
+def make_docx(paragraphs) -> bytes:
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def make_xlsx() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("xl/workbook.xml", f'<workbook xmlns="{S}" xmlns:r="{R}"><sheets>'
+                                            f'<sheet name="Marks" sheetId="1" r:id="rId1"/>'
+                                            f'<sheet name="Empty" sheetId="2" r:id="rId2"/></sheets></workbook>')
+        archive.writestr("xl/_rels/workbook.xml.rels",
+                         rels(("rId1", "worksheet", "worksheets/sheet1.xml"), ("rId2", "worksheet", "worksheets/sheet2.xml")))
+        archive.writestr("xl/sharedStrings.xml", f'<sst xmlns="{S}"><si><t>Name</t></si><si><t>Score</t></si><si><t>Asha</t></si></sst>')
+        archive.writestr("xl/worksheets/sheet1.xml", f'<worksheet xmlns="{S}"><sheetData>'
+                                                     f'<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="s"><v>1</v></c></row>'
+                                                     f'<row r="2"><c r="A2" t="s"><v>2</v></c><c r="C2"><v>91</v></c></row>'
+                                                     f'</sheetData></worksheet>')
+        archive.writestr("xl/worksheets/sheet2.xml", f'<worksheet xmlns="{S}"><sheetData/></worksheet>')
+    return buffer.getvalue()
+
+
+def test_pptx_slides_in_presentation_order_with_notes() -> None:
+    slides = list(iter_pptx_slides(io.BytesIO(make_pptx()), "deck.pptx"))
+    assert [doc.page_content.split(" Photosynthesis")[0] for doc in slides[:3]] == [
+        "Slide file 2", "Slide file 1", "Slide file 3"
+    ]
+    # slide10/slide11 come after slide9 (numeric, not lexicographic)
+    assert slides[-1].page_content.startswith("Slide file 11")
+    assert "Speaker Notes: Mention chlorophyll" in slides[2].page_content
+    assert slides[0].metadata == {"slide": 1, "source": "deck.pptx", "file_type": "pptx", "total_slides": 11}
+
+
+def test_docx_paragraphs_are_grouped_into_blocks() -> None:
+    paragraphs = [f"Paragraph {n} about cell division." for n in range(100)]
+    blocks = list(iter_docx_documents(io.BytesIO(make_docx(paragraphs)), block_chars=500))
+    assert len(blocks) > 1
+    assert "\n".join(doc.page_content for doc in blocks).split("\n") == paragraphs
+    assert [doc.metadata["block"] for doc in blocks] == list(range(1, len(blocks) + 1))
+
+
+def test_xlsx_sheets_keep_columns_and_skip_empty_sheets(tmp_path) -> None:
+    path = tmp_path / "marks.xlsx"
+    path.write_bytes(make_xlsx())
+    sheets = list(iter_xlsx_sheets(str(path)))
+    assert len(sheets) == 1
+    assert sheets[0].page_content == "Sheet: Marks\nName |  | Score\nAsha |  | 91"
+
+    with pytest.raises(ValueError):
+        extract_office(io.BytesIO(b"not a zip"), "docx")
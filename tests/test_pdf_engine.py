@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+
+try:
+    import fitz  # type: ignore  # noqa: F401
+    from app.services.extraction_executor import ExtractionExecutor  # type: ignore
+    from app.services.pdf_engine import PDFEngine, page_ranges  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("PyMuPDF not available.", allow_module_level=True)
+
+
+def make_pdf(path, pages: int, repeat_page: int = None) -> None:
+    document = fitz.open()
+    for number in range(1, pages + 1):
+        page = document.new_page()
+        label = repeat_page if repeat_page and number == repeat_page + 1 else number
+        lines = [f"Chapter {label} line {line}: cells convert glucose into energy." for line in range(30)]
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), "\n".join(lines), fontsize=8)
+    document.save(str(path))
+    document.close()
+
+
+def test_page_ranges_cover_every_page() -> None:
+    assert page_ranges(5, 2) == [(0, 2), (2, 4), (4, 5)]
+    assert page_ranges(0, 4) == []
+
+
+def test_parallel_matches_serial_in_page_order(tmp_path) -> None:
+    path = tmp_path / "book.pdf"
+    make_pdf(path, 40, repeat_page=10)
+    executor = ExtractionExecutor(process_workers=2, process_queue=8)
+    engine = PDFEngine(pages_per_task=3, executor=executor)
+
+    async def collect():
+        return [page async for page in engine.stream_pages(str(path))]
+
+    try:
+        streamed = asyncio.run(collect())
+        parallel = asyncio.run(engine.extract_documents(str(path), "book.pdf"))
+    finally:
+        executor.shutdown(wait=True)
+
+    assert [number for number, _ in streamed] == list(range(1, 41))
+    serial = engine.extract_documents_sync(str(path), "book.pdf")
+    assert [doc.page_content for doc in parallel] == [doc.page_content for doc in serial]
+    # Page 11 repeats page 10 and is dropped; metadata keeps real page numbers
+    pages = sorted({doc.metadata["page"] for doc in serial})
+    assert 11 not in pages and pages[-1] == 40
+
+
+def test_large_documents_are_not_capped(tmp_path) -> None:
+    path = tmp_path / "textbook.pdf"
+    make_pdf(path, 60)
+    documents = PDFEngine().extract_documents_sync(str(path), max_pages=None)
+    assert sum(len(doc.page_content) for doc in documents) > 50_000
+
+    limited = PDFEngine().extract_documents_sync(str(path), max_pages=2)
+    assert {doc.metadata["page"] for doc in limited} == {1, 2}
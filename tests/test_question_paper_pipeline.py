@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+
+
+try:
+    from app.services.question_paper_pipeline import (  # type: ignore
+        PageCheckpoints,
+        PaperPage,
+        QuestionPaperJob,
+    )
+except Exception:  # pragma: no cover
+    pytest.skip("Question paper pipeline not available.", allow_module_level=True)
+
+
+class MemoryCache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = value
+
+
+TOPICS = "osmosis enzymes mitosis photosynthesis respiration diffusion ribosomes chlorophyll glucose membranes".split()
+
+
+def make_pages(count: int, filename: str = "paper.pdf", start: int = 0):
+    return [PaperPage(start + i, f"/tmp/{filename}", filename, "pdf", i + 1) for i in range(count)]
+
+
+def make_job(pages, cache, calls, fail_page=None, delay=0.05):
+    async def extract_page(page, mode):
+        await asyncio.sleep(delay)
+        return f"Q{page.page_number}. Describe {TOPICS[page.index]} ({page.filename})"
+
+    async def extract_questions(content, generate_answers):
+        await asyncio.sleep(delay)
+        first_line = content.splitlines()[0]
+        calls.append(content)
+        if fail_page and first_line.startswith(f"Q{fail_page}."):
+            raise RuntimeError("LLM unavailable")
+        return [{"question": first_line, "answer": "because"}]
+
+    return QuestionPaperJob("job-1", pages, "ocr_only", True, PageCheckpoints("job-1", cache),
+                            extract_page, extract_questions, concurrency=4)
+
+
+def test_pages_run_concurrently_in_page_order_with_overlap() -> None:
+    pages = make_pages(8) + make_pages(2, "answers.pdf", start=8)
+    calls, updates = [], []
+    job = make_job(pages, MemoryCache(), calls)
+
+    async def on_page(page, questions):
+        updates.append(page.index)
+
+    start = time.perf_counter()
+    questions = asyncio.run(job.run(on_page))
+    elapsed = time.perf_counter() - start
+
+    assert [q["page_number"] for q in questions] == list(range(1, 9)) + [1, 2]
+    assert questions[-1]["source_file"] == "answers.pdf"
+    assert sorted(updates) == list(range(10))
+    # 10 pages x (extract + LLM) = 1s serially; 4 pages at a time
+    assert elapsed < 0.6
+    # The next page of the same file is appended, never a page of another file
+    page_one = next(call for call in calls if call.startswith("Q1. Describe osmosis"))
+    assert "[Start of the next page]\nQ2." in page_one
+    last = next(call for call in calls if call.startswith("Q8."))
+    assert "next page" not in last
+
+
+def test_retry_resumes_after_checkpointed_pages() -> None:
+    pages = make_pages(6)
+    cache, calls = MemoryCache(), []
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(make_job(pages, cache, calls, fail_page=4).run())
+    # Every page but the failing one was checkpointed
+    assert len(cache.values) == 5
+
+    calls.clear()
+    job = make_job(pages, cache, calls)
+    questions = asyncio.run(job.run())
+    assert job.resumed_pages == 5
+    assert [call.splitlines()[0][:3] for call in calls] == ["Q4."]
+    assert [q["page_number"] for q in questions] == list(range(1, 7))
+
+
+def test_only_transient_errors_are_retried() -> None:
+    pytest.importorskip("redis")
+    from app.services.question_paper_pipeline import is_transient_error  # type: ignore
+
+    class RateLimitError(Exception):
+        status_code = 429
+
+    assert is_transient_error(RateLimitError("Too many requests"))
+    assert is_transient_error(asyncio.TimeoutError())
+    assert is_transient_error(ConnectionResetError("connection reset by peer"))
+    assert not is_transient_error(ValueError("No pages found in the uploaded files"))
+    assert not is_transient_error(ValueError("No questions could be extracted from the processed content"))
+
+
+def test_failed_job_files_are_removed_now_or_after_the_retry_window(tmp_path, monkeypatch) -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.services import question_paper_pipeline as pipeline  # type: ignore
+    from app.services.object_store import LocalObjectStore  # type: ignore
+
+    monkeypatch.setattr(pipeline, "QUESTION_PAPER_UPLOAD_DIR", str(tmp_path / "local"))
+    store = LocalObjectStore(str(tmp_path / "store"))
+    client = fakeredis.FakeRedis(decode_responses=True)
+    files = {}
+    for job_id in ("bad", "flaky"):
+        files[job_id] = [{"key": f"question_papers/{job_id}/0.pdf", "filename": "paper.pdf", "kind": "pdf"}]
+        store.put_bytes(files[job_id][0]["key"], b"%PDF-1.4")
+
+    pipeline.release_failed_upload_files("bad", files["bad"], resumable=False, client=client, store=store)
+    pipeline.release_failed_upload_files("flaky", files["flaky"], resumable=True, delay=60, client=client, store=store)
+    assert store.size("question_papers/bad/0.pdf") is None
+    assert store.size("question_papers/flaky/0.pdf") == 8
+
+    assert pipeline.sweep_upload_files(client=client, store=store) == 0
+    assert pipeline.sweep_upload_files(now=time.time() + 61, client=client, store=store) == 1
+    assert store.size("question_papers/flaky/0.pdf") is None
+    assert client.zcard(pipeline.QUESTION_PAPER_CLEANUP_KEY) == 0
@@ -0,0 +1,65 @@
+import pytest
+
+
+try:
+    from app.utils.quiz_allocation import allocate_questions, balance_questions, dedupe_questions  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Quiz allocation helpers not available.", allow_module_level=True)
+
+
+def q(text: str) -> dict:
+    return {"question": text, "answer": "a"}
+
+
+def test_allocation_is_proportional_and_sums_to_total() -> None:
+    allocation = allocate_questions([1000, 500, 500], 10)
+    assert sum(allocation) == 10
+    assert allocation[0] > allocation[1]
+    assert allocate_questions([300, 300, 300], 10) in ([4, 3, 3], [3, 4, 3], [3, 3, 4])
+
+
+def test_more_chunks_than_questions_favours_heaviest_chunks() -> None:
+    allocation = allocate_questions([10, 900, 20, 800], 2)
+    assert allocation == [0, 1, 0, 1]
+    assert allocate_questions([], 5) == []
+    assert allocate_questions([0, 0], 3) in ([2, 1], [1, 2])
+
+
+def test_near_duplicate_questions_are_removed_across_chunks() -> None:
+    groups = [
+        [q("What is photosynthesis?"), q("Where does respiration happen?")],
+        [q("what is Photosynthesis"), q("Define osmosis.")],
+    ]
+    deduped = dedupe_questions(groups)
+    assert [x["question"] for x in deduped[0]] == ["What is photosynthesis?", "Where does respiration happen?"]
+    assert [x["question"] for x in deduped[1]] == ["Define osmosis."]
+
+
+def test_balance_fills_shortfall_from_other_chunks() -> None:
+    groups = [[q("a1"), q("a2"), q("a3")], [q("b1")], []]
+    selected = balance_questions(groups, [1, 2, 1], 4)
+    assert [x["question"] for x in selected] == ["a1", "a2", "a3", "b1"]
+    assert len(balance_questions(groups, [1, 1, 0], 2)) == 2
+
+
+def test_streaming_allocator_spreads_quotas_and_sums_to_total() -> None:
+    from app.utils.quiz_allocation import StreamingAllocator  # type: ignore
+
+    # 40 pages of ~150 tokens -> 4 chunks of 1500; all of them fit in 10 map slots
+    allocator = StreamingAllocator(total=8, max_chunks=10, chunk_tokens=1500, total_units=40)
+    quotas = []
+    for number in range(1, 5):
+        allocator.observe_unit(number * 10)
+        quotas.append(allocator.next_quota(1500, last=number == 4))
+    assert sum(quotas) == 8 and all(quotas)
+
+    # 300 pages -> 30 chunks, but only about 10 get a quota, evenly spaced
+    allocator = StreamingAllocator(total=10, max_chunks=10, chunk_tokens=1500, total_units=300)
+    quotas = []
+    for number in range(1, 31):
+        allocator.observe_unit(number * 10)
+        quotas.append(allocator.next_quota(1500, last=number == 30))
+    mapped = [i for i, quota in enumerate(quotas) if quota]
+    assert sum(quotas) == 10 == sum(allocator.allocation)
+    assert 8 <= len(mapped) <= 11
+    assert mapped[0] == 0 and mapped[-1] >= 25
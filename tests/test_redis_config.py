@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+
+try:
+    from app.config.redis_config import RedisCircuitBreaker, RedisService  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Redis dependencies not available.", allow_module_level=True)
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """Every client the service builds connects to one fake server; records how it was built"""
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis  # type: ignore
+    import redis.asyncio  # type: ignore
+
+    server = fakeredis.FakeServer()
+    server.connections = []
+
+    class Factory:
+        """Stands in for a Redis class: Redis(**kwargs) and Redis.from_url(url, **kwargs)"""
+
+        def __init__(self, fake_class):
+            self.fake_class = fake_class
+
+        def __call__(self, **kwargs):
+            return self.from_url(None, **kwargs)
+
+        def from_url(self, url, **kwargs):
+            server.connections.append({"url": url, **kwargs})
+            return self.fake_class(server=server, db=kwargs.get("db", 0),
+                                   decode_responses=kwargs.get("decode_responses", False))
+
+    async_factory = Factory(fakeredis.FakeAsyncRedis)
+    monkeypatch.setattr(redis.asyncio, "from_url", async_factory.from_url)
+    monkeypatch.setattr(redis.asyncio, "Redis", async_factory)
+    monkeypatch.setattr(redis, "Redis", Factory(fakeredis.FakeRedis))
+    return server
+
+
+@pytest.mark.parametrize("redis_url", ["redis://cache.internal:6379", None])
+def test_sync_and_async_clients_share_the_cache_database(fake_server, redis_url) -> None:
+    service = RedisService()
+    service.redis_url = redis_url
+    service.db_cache = 5
+
+    async def scenario():
+        await service.initialize()
+        service.get_sync_client().set("gen:quiz:abc", "cached")
+        try:
+            return await service.cache_client.get("gen:quiz:abc")
+        finally:
+            await service.close()
+
+    assert asyncio.run(scenario()) == "cached"
+    sync_connection = fake_server.connections[-1]
+    assert sync_connection["db"] == 5
+    if redis_url is None:
+        assert sync_connection["password"] == service.redis_password
+        assert sync_connection["username"] == service.redis_username
+
+
+def test_circuit_breaker_skips_redis_after_an_error(monkeypatch) -> None:
+    import time
+
+    class Tier(RedisCircuitBreaker):
+        redis_retry_after = 30
+
+    tier, other = Tier(), Tier()
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    tier._redis_failed(ConnectionError("refused"))
+    assert not tier._redis_available() and other._redis_available()
+    assert tier.redis_errors == 1 and other.redis_errors == 0
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert tier._redis_available()
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+
+try:
+    from app.services import segmented_transcription  # type: ignore
+    from app.services.segmented_transcription import (  # type: ignore
+        SegmentedTranscriber, SegmentsFailed, plan_segments, stitch_transcripts
+    )
+except Exception:  # pragma: no cover
+    pytest.skip("Segmented transcription dependencies not available.", allow_module_level=True)
+
+
+def test_cuts_fall_inside_silences_or_overlap_when_there_are_none() -> None:
+    silences = [(290.0, 291.0), (580.0, 582.0), (590.0, 590.5)]
+    segments = plan_segments(1500.0, silences, segment_seconds=600, search_seconds=60, overlap_seconds=3)
+    # First cut: the longest silence before 600s; second: no silence near 1181s, so a hard cut with overlap
+    assert [(s.start, s.end) for s in segments] == [(0.0, 581.0), (581.0, 1181.0), (1178.0, 1500.0)]
+    assert plan_segments(400.0, [], segment_seconds=600) == plan_segments(400.0, silences, segment_seconds=600)
+    assert len(plan_segments(400.0, [], segment_seconds=600)) == 1
+
+
+def test_stitching_drops_the_words_repeated_in_an_overlap() -> None:
+    first = "Mitochondria produce ATP through oxidative phosphorylation in the inner membrane."
+    second = "in the inner membrane, the electron transport chain pumps protons."
+    assert stitch_transcripts([first, second]) == (
+        "Mitochondria produce ATP through oxidative phosphorylation in the inner membrane. "
+        "the electron transport chain pumps protons."
+    )
+    # Whisper hears the overlap slightly differently
+    assert stitch_transcripts(["so the enzyme binds to its substrate at the active site",
+                               "the enzyme binds to the substrate at the active site and then"]).endswith(
+        "active site and then")
+    # Silence cuts do not repeat words, and short near-repeats are kept
+    assert stitch_transcripts(["We start here.", "", "Here we go."]) == "We start here. Here we go."
+    assert stitch_transcripts(["Part 0 of the lecture.", "Part 1 of the lecture."]) == (
+        "Part 0 of the lecture. Part 1 of the lecture.")
+
+
+def test_retry_only_transcribes_the_failed_segments(tmp_path, monkeypatch, redis_offline) -> None:
+    from app.services import extraction_cache as cache_module  # type: ignore
+
+    cache = cache_module.ExtractionCache(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(cache_module, "extraction_cache", cache)
+
+    async def probe(path):
+        return 1500.0
+
+    async def silences(path):
+        return [(580.0, 582.0), (1170.0, 1172.0)]
+
+    async def extract(path, segment, directory):
+        output = tmp_path / f"segment_{segment.index}.ogg"
+        output.write_text(str(segment.index))
+        return str(output)
+
+    monkeypatch.setattr(segmented_transcription, "probe_duration", probe)
+    monkeypatch.setattr(segmented_transcription, "detect_silences", silences)
+    monkeypatch.setattr(segmented_transcription, "extract_segment", extract)
+
+    audio = tmp_path / "audio.webm"
+    audio.write_bytes(b"lecture audio")
+    calls = []
+    flaky = {"1"}
+
+    def transcribe(path):
+        index = open(path).read()
+        calls.append(index)
+        if index in flaky:
+            raise RuntimeError("connection reset")
+        return f"Part {index} of the lecture."
+
+    transcriber = SegmentedTranscriber(concurrency=2, segment_seconds=600)
+    with pytest.raises(SegmentsFailed):
+        asyncio.run(transcriber.transcribe(str(audio), "whisper-large-v3-turbo", transcribe, asyncio.to_thread))
+    assert sorted(calls) == ["0", "1", "2"]
+
+    flaky.clear()
+    calls.clear()
+    text, info = asyncio.run(transcriber.transcribe(str(audio), "whisper-large-v3-turbo", transcribe,
+                                                    asyncio.to_thread))
+    assert calls == ["1"]
+    assert text == "Part 0 of the lecture. Part 1 of the lecture. Part 2 of the lecture."
+    assert info["segments"] == 3 and info["segments_cached"] == 2 and info["silence_cuts"] == 2
+    assert transcriber.stats()["segments_failed"] == 1
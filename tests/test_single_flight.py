@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+
+try:
+    from app.services.single_flight import SingleFlight  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Single-flight dependencies not available.", allow_module_level=True)
+
+
+def make_single_flight(**kwargs) -> SingleFlight:
+    return SingleFlight(**kwargs)
+
+
+def test_concurrent_duplicates_share_one_execution(redis_offline) -> None:
+    flight = make_single_flight()
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [{"question": "q1"}]
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do("gen:quiz:abc", generate) for _ in range(40)])
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result == [{"question": "q1"}] for result in results)
+    assert flight.stats()["local_coalesced"] == 39
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_do_not_coalesce_and_errors_propagate(redis_offline) -> None:
+    flight = make_single_flight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        return await asyncio.gather(
+            flight.do("a", fail), flight.do("a", fail), flight.do("b", fail),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["leaders"] == 2
+
+
+def test_waiter_takes_over_when_leader_is_cancelled(redis_offline) -> None:
+    flight = make_single_flight()
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "summary"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("k", generate))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do("k", generate))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "summary"
+    assert calls == 2
+
+
+def test_lock_outlives_its_ttl_while_the_leader_runs(monkeypatch) -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from app.config.redis_config import redis_service  # type: ignore
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_service, "cache_client", None)
+    monkeypatch.setattr(redis_service, "get_sync_client", lambda decode_responses=False: client)
+    # Two processes: separate instances share only Redis and the cache
+    leader, other = SingleFlight(lock_ttl=1, poll_interval=0.1), SingleFlight(lock_ttl=1, poll_interval=0.1)
+    cache, calls = {}, []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(2.5)
+        cache["quiz"] = "questions"
+        return "questions"
+
+    async def lookup():
+        return cache.get("quiz")
+
+    async def scenario():
+        first = asyncio.create_task(leader.do("quiz", generate, lookup))
+        await asyncio.sleep(1.5)
+        second = await other.do("quiz", generate, lookup)
+        return await first, second
+
+    assert asyncio.run(scenario()) == ("questions", "questions")
+    assert len(calls) == 1
+    assert other.stats()["remote_coalesced"] == 1
+    assert not client.exists("singleflight:quiz")
@@ -0,0 +1,65 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "QuizerAi_backend"
+
+# Must not be imported by API pods / workers that only serve auth, classroom or quiz-session traffic
+HEAVY_MODULES = [
+    "langchain", "langchain_core", "langchain_groq", "langchain_community", "langchain_yt_dlp",
+    "yt_dlp", "pytesseract", "bs4", "youtube_transcript_api", "fitz", "numpy", "selenium", "openpyxl",
+]
+
+# Cumulative import time allowed for app.main (microseconds); override on slow CI machines
+IMPORT_BUDGET_US = int(os.getenv("STARTUP_IMPORT_BUDGET_US", 3_000_000))
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def run_importtime(statement: str, tmp_path: Path, **env_overrides):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env.update(env_overrides)
+    code = f"import sys, json\n{statement}\nprint(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120
+    )
+    if proc.returncode != 0:
+        pytest.skip(f"Cannot import in this environment: {proc.stderr.strip().splitlines()[-1]}")
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    modules = set(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return cumulative, modules
+
+
+def test_api_startup_skips_heavy_dependencies(tmp_path: Path) -> None:
+    cumulative, modules = run_importtime("import app.main", tmp_path)
+    assert not [name for name in HEAVY_MODULES if name in modules]
+    assert cumulative["app.main"] < IMPORT_BUDGET_US
+
+
+def test_worker_startup_skips_heavy_dependencies(tmp_path: Path) -> None:
+    _, modules = run_importtime(
+        "import app.celery_app, app.tasks.quiz_tasks, app.tasks.quiz_generation_tasks", tmp_path
+    )
+    assert not [name for name in HEAVY_MODULES if name in modules]
+
+
+def test_generation_module_imports_without_api_key(tmp_path: Path) -> None:
+    _, modules = run_importtime(
+        "import app.models.generate_quizes as g\nassert not g.providers.is_initialized('llm')",
+        tmp_path, GROQ_API_KEY="", LLM_BACKEND="groq"
+    )
+    assert "yt_dlp" not in modules and "youtube_transcript_api" not in modules
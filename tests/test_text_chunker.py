@@ -0,0 +1,55 @@
+import pytest
+
+
+try:
+    from app.utils.text_chunker import chunk_text, count_tokens  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Text chunker not available.", allow_module_level=True)
+
+
+def test_small_text_is_a_single_chunk() -> None:
+    chunks = chunk_text("Photosynthesis converts light energy into chemical energy.", max_tokens=700)
+    assert len(chunks) == 1
+    assert chunks[0].token_count == count_tokens(chunks[0].text)
+
+
+def test_chunks_respect_token_budget_and_keep_all_paragraphs() -> None:
+    paragraphs = [f"Paragraph {i} " + "mitochondria produce energy " * 20 for i in range(40)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = chunk_text(text, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(chunk.token_count <= 200 for chunk in chunks)
+    joined = "\n\n".join(chunk.text for chunk in chunks)
+    for i in range(40):
+        assert f"Paragraph {i} " in joined
+
+
+def test_oversized_sentence_is_split_not_dropped() -> None:
+    sentence = "word " * 5000
+    chunks = chunk_text(sentence, max_tokens=100)
+
+    assert all(chunk.token_count <= 100 for chunk in chunks)
+    assert sum(len(chunk.text.split()) for chunk in chunks) >= 4900
+
+
+def test_empty_text_has_no_chunks() -> None:
+    assert chunk_text("   \n\n  ") == []
+
+
+def test_small_documents_are_packed_into_shared_chunks() -> None:
+    from app.utils.text_chunker import ChunkPacker, chunk_documents  # type: ignore
+
+    paragraphs = [f"Paragraph {i}" + " enzymes lower activation energy" * 8 for i in range(60)]
+    as_one = chunk_documents(["\n\n".join(paragraphs)], max_tokens=400)
+    as_many = chunk_documents(paragraphs, max_tokens=400)
+
+    # The chunk count follows the total token count, not the number of documents
+    assert len(as_many) == len(as_one) <= len(paragraphs) / 5
+    assert [chunk.text for chunk in as_many] == [chunk.text for chunk in as_one]
+    assert all(chunk.token_count <= 400 for chunk in as_many)
+
+    packer = ChunkPacker(400)
+    streamed = [leaf for text in paragraphs for chunk in chunk_text(text, 400) for leaf in packer.add(chunk)]
+    assert streamed + packer.flush() == as_many
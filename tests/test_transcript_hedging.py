@@ -0,0 +1,105 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+try:
+    from app.services.transcript_hedging import (  # type: ignore
+        HedgedAcquirer, MethodStats, TranscriptMethod, plan_methods
+    )
+except Exception:  # pragma: no cover
+    pytest.skip("Transcript hedging dependencies not available.", allow_module_level=True)
+
+pytestmark = pytest.mark.usefixtures("redis_offline")
+
+
+TRANSCRIPT = "Cells divide by mitosis into two identical daughter cells. " * 5
+
+
+def make_acquirer(hedge_delay: float) -> HedgedAcquirer:
+    return HedgedAcquirer(hedge_delay=hedge_delay, stats=MethodStats())
+
+
+def method(name: str, delay: float, text, events: list, paid: bool = False) -> TranscriptMethod:
+    async def fetch(video_id):
+        events.append(("start", name, time.monotonic()))
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            events.append(("cancelled", name, time.monotonic()))
+            raise
+        if text is None:
+            raise RuntimeError(f"{name} failed")
+        return SimpleNamespace(transcript=text, source=name)
+    return TranscriptMethod(name, fetch, paid=paid)
+
+
+def started(events) -> list:
+    return [name for kind, name, _ in events if kind == "start"]
+
+
+def test_fast_free_method_wins_and_slow_one_is_cancelled() -> None:
+    events = []
+    methods = [method("yt_dlp", 1.0, None, events), method("native", 0.05, TRANSCRIPT, events),
+               method("groq_turbo", 0.05, TRANSCRIPT, events, paid=True)]
+
+    async def scenario():
+        result, attempts = await make_acquirer(0.5).acquire("vid", methods)
+        await asyncio.sleep(0)
+        return result, attempts
+
+    begin = time.monotonic()
+    result, attempts = asyncio.run(scenario())
+    assert result.source == "native" and time.monotonic() - begin < 0.5
+    assert started(events) == ["yt_dlp", "native"]
+    assert ("cancelled", "yt_dlp") in [(kind, name) for kind, name, _ in events]
+    assert [attempt["method"] for attempt in attempts] == ["native"]
+
+
+def test_paid_hedges_start_after_free_failures_one_at_a_time() -> None:
+    events = []
+    methods = [method("yt_dlp", 0.02, None, events), method("native", 0.02, "too short", events),
+               method("groq_turbo", 0.1, None, events, paid=True),
+               method("groq_primary", 0.05, TRANSCRIPT, events, paid=True)]
+
+    acquirer = make_acquirer(10.0)
+    begin = time.monotonic()
+    result, attempts = asyncio.run(acquirer.acquire("vid", methods))
+    # Every free method failed: no waiting for the hedge delay, and the paid ones never overlap
+    assert result.source == "groq_primary" and time.monotonic() - begin < 1.0
+    assert started(events)[2:] == ["groq_turbo", "groq_primary"]
+    turbo_start, primary_start = [at for kind, name, at in events if kind == "start" and name.startswith("groq")]
+    assert primary_start - turbo_start >= 0.09
+    assert [a["success"] for a in attempts] == [False, False, False, True]
+    assert acquirer.stats()["methods"]["native"]["success_rate"] == 0.0
+
+
+def test_hedge_starts_after_delay_and_is_cancelled_when_free_method_wins() -> None:
+    events = []
+    methods = [method("native", 0.3, TRANSCRIPT, events), method("groq_turbo", 1.0, TRANSCRIPT, events, paid=True)]
+
+    async def scenario():
+        result, _ = await make_acquirer(0.1).acquire("vid", methods)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario()).source == "native"
+    assert started(events) == ["native", "groq_turbo"]
+    assert ("cancelled", "groq_turbo") in [(kind, name) for kind, name, _ in events]
+
+
+def test_stats_reorder_paid_methods_and_demote_failing_free_method() -> None:
+    noop = lambda video_id: None  # noqa: E731
+    methods = [TranscriptMethod("yt_dlp", noop), TranscriptMethod("native", noop),
+               TranscriptMethod("groq_turbo", noop, paid=True, expected_latency=30),
+               TranscriptMethod("groq_primary", noop, paid=True, expected_latency=45)]
+    stats = {
+        "yt_dlp": {"attempts": 40, "successes": 1, "latency": 400.0},
+        "groq_turbo": {"attempts": 30, "successes": 6, "latency": 900.0},
+        "groq_primary": {"attempts": 30, "successes": 29, "latency": 1200.0},
+    }
+    immediate, hedges = plan_methods(methods, stats)
+    assert [m.name for m in immediate] == ["native"]
+    assert [m.name for m in hedges] == ["yt_dlp", "groq_primary", "groq_turbo"]
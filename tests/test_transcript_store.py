@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+
+try:
+    from app.services.transcript_store import TranscriptRecord, TranscriptStore  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Transcript store dependencies not available.", allow_module_level=True)
+
+pytestmark = pytest.mark.usefixtures("redis_offline")
+
+
+def make_store(tmp_path, **kwargs) -> TranscriptStore:
+    return TranscriptStore(cache_dir=str(tmp_path / "transcripts"), **kwargs)
+
+
+def lecture(video_id: str = "abcdefghijk", source: str = "youtube_native") -> TranscriptRecord:
+    return TranscriptRecord(video_id=video_id, language="en", transcript="Enzymes lower activation energy. " * 50,
+                            source=source, metadata={"confidence_score": 0.9})
+
+
+def test_disk_tier_survives_a_new_process_and_keeps_the_source(tmp_path) -> None:
+    make_store(tmp_path).set_sync(lecture())
+
+    fresh = make_store(tmp_path)
+    record = fresh.get_sync("abcdefghijk")
+    assert record.transcript == lecture().transcript
+    assert record.source == "youtube_native" and record.metadata["confidence_score"] == 0.9
+    assert fresh.get_sync("abcdefghijk") is not None
+    stats = fresh.stats()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1
+    assert record.language == "en"
+
+
+def test_unavailable_results_expire_after_the_negative_ttl(tmp_path, monkeypatch) -> None:
+    store = make_store(tmp_path, negative_ttl=60)
+    store.set_unavailable_sync("zzzzzzzzzzz", reason="No subtitles")
+    record = store.get_sync("zzzzzzzzzzz")
+    assert record is not None and not record.available and record.error_message == "No subtitles"
+    # Negative records never reach the disk tier
+    assert store.stats()["disk_bytes"] == 0
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert store.get_sync("zzzzzzzzzzz") is None
+
+
+def test_concurrent_lookups_share_one_fetch(tmp_path) -> None:
+    store = make_store(tmp_path)
+    calls = []
+
+    async def fetch() -> TranscriptRecord:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return lecture(source="groq_whisper")
+
+    async def scenario():
+        return await asyncio.gather(*[store.get_or_fetch("abcdefghijk", fetch) for _ in range(5)])
+
+    records = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert {record.source for record in records} == {"groq_whisper"}
+    assert store.stats()["sources"] == {"groq_whisper": 1}
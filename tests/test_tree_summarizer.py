@@ -0,0 +1,58 @@
+import asyncio
+import os
+
+import pytest
+
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+
+try:
+    from langchain.schema import Document  # type: ignore
+    from app.models.generate_quizes import IntelligentSummarizer  # type: ignore
+    from app.models.llm_backends import FakeChatModel  # type: ignore
+    from app.utils.text_chunker import TextChunk  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Summarizer dependencies not available.", allow_module_level=True)
+
+
+def test_siblings_are_grouped_at_least_in_pairs() -> None:
+    nodes = [TextChunk(f"s{i}", 300) for i in range(7)]
+    groups = IntelligentSummarizer._group_siblings(nodes, 650)
+    assert [len(group) for group in groups] == [2, 2, 2, 1]
+
+
+def test_tree_reduce_covers_every_leaf_and_reports_levels() -> None:
+    summarizer = IntelligentSummarizer(FakeChatModel(ttft_ms=1, tokens_per_second=1_000_000))
+    paragraphs = [f"Section {i}. " + "Enzymes catalyse reactions in living cells. " * 40 for i in range(60)]
+    documents = [Document(page_content="\n\n".join(paragraphs))]
+    updates = []
+
+    summary = asyncio.run(summarizer.process_by_size(documents, "English", "200", progress_callback=updates.append))
+
+    assert summary
+    assert updates[0]["stage"] == "leaves"
+    assert updates[0]["nodes"] >= 30
+    assert updates[-1]["stage"] == "final"
+    assert any(update["stage"] == "merge" for update in updates)
+
+
+def test_streamed_tree_summary_matches_buffered_leaves() -> None:
+    summarizer = IntelligentSummarizer(FakeChatModel(ttft_ms=1, tokens_per_second=1_000_000))
+    paragraphs = [f"Section {i}. " + "Osmosis moves water across membranes. " * 40 for i in range(20)]
+    documents = [Document(page_content=paragraph) for paragraph in paragraphs]
+    buffered_updates, streamed_updates = [], []
+
+    async def chunks():
+        for doc in documents:
+            await asyncio.sleep(0)
+            yield doc
+
+    async def scenario():
+        buffered = await summarizer.process_by_size(documents, "English", "200", progress_callback=buffered_updates.append)
+        streamed = await summarizer.process_stream(chunks(), "English", "200", progress_callback=streamed_updates.append)
+        return buffered, streamed
+
+    buffered, streamed = asyncio.run(scenario())
+    assert buffered and streamed
+    assert streamed_updates[0]["nodes"] == buffered_updates[0]["nodes"]
+    assert streamed_updates[-1]["stage"] == "final"
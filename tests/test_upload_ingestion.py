@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+
+
+try:
+    from fastapi import HTTPException, UploadFile  # type: ignore
+    from starlette.datastructures import Headers  # type: ignore
+    from app.services.upload_ingestion import detect_kind, spool_upload  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("Upload ingestion not available.", allow_module_level=True)
+
+
+PDF_BYTES = b"%PDF-1.4\n" + b"x" * 10_000 + b"\n%%EOF\n"
+
+
+def make_upload(data: bytes, filename: str, content_type: str = "application/octet-stream") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename,
+                      headers=Headers({"content-type": content_type}))
+
+
+def test_spool_streams_and_hashes() -> None:
+    upload = asyncio.run(spool_upload(make_upload(PDF_BYTES, "notes.pdf"), chunk_size=1024))
+    with upload:
+        assert upload.kind == "pdf"
+        assert upload.size == len(PDF_BYTES)
+        assert upload.sha256 == hashlib.sha256(PDF_BYTES).hexdigest()
+        with upload.mmap() as mapped:
+            assert mapped[:5] == b"%PDF-"
+    assert not os.path.exists(upload.path)
+
+
+def test_size_limit_enforced_while_streaming(monkeypatch) -> None:
+    import tempfile
+    import app.services.upload_ingestion as module
+
+    created = []
+    original = tempfile.NamedTemporaryFile
+
+    def tracking(*args, **kwargs):
+        spool = original(*args, **kwargs)
+        created.append(spool.name)
+        return spool
+
+    monkeypatch.setattr(module.tempfile, "NamedTemporaryFile", tracking)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(spool_upload(make_upload(PDF_BYTES, "big.pdf"), max_bytes=4096, chunk_size=1024))
+    assert error.value.status_code == 400 and "exceeds" in error.value.detail
+    assert created and not os.path.exists(created[0])
+
+
+def test_magic_mismatch_and_unsupported_kind_rejected() -> None:
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(spool_upload(make_upload(b"MZ\x90\x00 not a pdf", "fake.pdf")))
+    assert "does not match" in error.value.detail
+
+    with pytest.raises(HTTPException):
+        asyncio.run(spool_upload(make_upload(b"hello", "notes.txt"), allowed_kinds=("pdf",)))
+
+    assert detect_kind("scan", "image/png") == "image"
+    assert detect_kind("deck.PPTX", None) == "pptx"
+
+
+def test_oversized_multipart_requests_rejected_before_parsing() -> None:
+    pytest.importorskip("multipart")
+    from fastapi import FastAPI, File  # type: ignore
+    from fastapi.testclient import TestClient  # type: ignore
+    from app.middleware.upload_limit import UploadSizeLimitMiddleware  # type: ignore
+
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=64 * 1024)
+    calls = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        calls.append(file.filename)
+        return {"size": file.size}
+
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("notes.pdf", PDF_BYTES)}).json() == {"size": len(PDF_BYTES)}
+
+    big = b"%PDF-1.4\n" + b"x" * 200_000
+    declared = client.post("/upload", files={"file": ("big.pdf", big)})
+    assert declared.status_code == 413
+
+    # No Content-Length (chunked transfer): cut off while the body streams
+    boundary = "limit-test"
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.pdf\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode() + big + f"\r\n--{boundary}--\r\n".encode()
+    streamed = client.post("/upload", content=iter([body[i:i + 8192] for i in range(0, len(body), 8192)]),
+                           headers={"content-type": f"multipart/form-data; boundary={boundary}"})
+    assert streamed.status_code == 413
+    assert calls == ["notes.pdf"]
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("bs4")
+
+try:
+    from app.services.url_fetcher import URLFetcher, extract_main_content, needs_javascript  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("URL fetcher dependencies not available.", allow_module_level=True)
+
+
+PARAGRAPH = "Photosynthesis converts light energy into chemical energy stored in glucose. " * 6
+
+ARTICLE = f"""<html><head><title>Photosynthesis</title><script>var tracking = 1;</script></head>
+<body>
+  <nav><a href="/">Home</a> <a href="/biology">Biology</a> <a href="/chemistry">Chemistry</a></nav>
+  <div class="sidebar"><a href="/a">Related one</a><a href="/b">Related two</a></div>
+  <article>
+    <h1>How plants make food</h1>
+    <p>{PARAGRAPH}</p>
+    <p>{PARAGRAPH}</p>
+    <ul><li>Chlorophyll absorbs light</li></ul>
+  </article>
+  <footer>Copyright 2024 Example Site</footer>
+</body></html>"""
+
+SPA = """<html><head><title>App</title></head><body>
+<div id="root"></div><noscript>You need to enable JavaScript to run this app.</noscript>
+<script src="/bundle.js"></script></body></html>"""
+
+RENDERED = f"<html><body><main><h1>Rendered</h1><p>{PARAGRAPH}</p></main></body></html>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        Handler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/article":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = ARTICLE.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", '"v1"')
+        elif self.path == "/spa":
+            body = SPA.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+        else:
+            body = b"missing"
+            self.send_response(404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBrowserPool:
+    size = 1
+    _created = 0
+
+    def __init__(self):
+        self.rendered = []
+
+    def render(self, url):
+        self.rendered.append(url)
+        return RENDERED
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture()
+def server():
+    Handler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_main_content_drops_boilerplate() -> None:
+    title, text = extract_main_content(ARTICLE)
+    assert title == "Photosynthesis"
+    assert text.startswith("How plants make food")
+    assert "Chlorophyll absorbs light" in text
+    assert "Home" not in text and "Copyright" not in text and "Related one" not in text
+    assert not needs_javascript(ARTICLE, text)
+    assert needs_javascript(SPA, extract_main_content(SPA)[1])
+
+
+def test_cache_and_conditional_get(server) -> None:
+    fetcher = URLFetcher(browser_pool=FakeBrowserPool(), fresh_seconds=0)
+
+    async def scenario():
+        first = await fetcher.load(f"{server}/article")
+        second = await fetcher.load(f"{server}/article")
+        await fetcher.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first[0].page_content == second[0].page_content
+    assert first[0].metadata["fetched_via"] == "http"
+    # The second request revalidated with the ETag and got a 304
+    assert Handler.requests == [("/article", None), ("/article", '"v1"')]
+    stats = fetcher.stats()
+    assert stats["fetched"] == 1 and stats["revalidated"] == 1
+    # Only the extracted text is cached, not the page's HTML
+    assert stats["cached_bytes"] == len(first[0].page_content) < len(ARTICLE)
+
+
+def test_page_cache_bounded_by_text_bytes(server) -> None:
+    fetcher = URLFetcher(browser_pool=FakeBrowserPool(), cache_max_bytes=500)
+
+    async def scenario():
+        await fetcher.load(f"{server}/article")
+        await fetcher.close()
+
+    asyncio.run(scenario())
+    # The article's text alone is over the budget: served, not cached
+    assert fetcher.stats()["cached_pages"] == 0 and fetcher.stats()["cached_bytes"] == 0
+
+
+def test_browser_only_for_javascript_pages(server) -> None:
+    browsers = FakeBrowserPool()
+    fetcher = URLFetcher(browser_pool=browsers)
+
+    async def scenario():
+        await fetcher.load(f"{server}/article")
+        documents = await fetcher.load(f"{server}/spa")
+        with pytest.raises(Exception) as error:
+            await fetcher.load(f"{server}/missing")
+        await fetcher.close()
+        return documents, error.value
+
+    documents, error = asyncio.run(scenario())
+    assert browsers.rendered == [f"{server}/spa"]
+    assert documents[0].metadata["fetched_via"] == "browser"
+    assert "Rendered" in documents[0].page_content
+    assert getattr(error, "status_code", None) == 400
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+
+try:
+    from app.services import youtube_content_cache as module  # type: ignore
+    from app.services.youtube_content_cache import YouTubeContentCache, video_ids_from  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("YouTube content cache dependencies not available.", allow_module_level=True)
+
+
+SEARCH_RESULT = "['https://www.youtube.com/watch?v=aaaaaaaaaaa&pp=ygU', 'https://www.youtube.com/watch?v=bbbbbbbbbbb']"
+
+
+@pytest.fixture
+def cache(redis_offline) -> YouTubeContentCache:
+    return YouTubeContentCache()
+
+
+def bundle(video_id: str, questions: int = 10) -> dict:
+    return {
+        "video_id": video_id, "language": "English", "title": f"Lecture {video_id[0]}",
+        "transcript": f"Transcript of {video_id}", "transcript_source": "youtube_native", "confidence_score": 0.9,
+        "summaries": {"400": f"Summary of {video_id}", "500": f"Longer summary of {video_id}"},
+        "quiz": [{"question": f"{video_id} question about topic {n} number {n * 7}?", "answer": "A"}
+                 for n in range(questions)],
+        "quiz_type": "mcq", "difficulty_level": "medium", "generated_at": 0.0,
+    }
+
+
+def test_searches_share_a_result_by_normalized_query_and_count(cache) -> None:
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return SEARCH_RESULT
+
+    async def scenario():
+        first = await cache.search("Photosynthesis  Class 10,5", fetch)
+        again = await cache.search("photosynthesis class 10?,5", fetch)
+        other_count = await cache.search("photosynthesis class 10,3", fetch)
+        return first, again, other_count
+
+    first, again, _ = asyncio.run(scenario())
+    assert first == again == SEARCH_RESULT and len(calls) == 2
+    assert video_ids_from(first) == ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+    assert cache.stats()["search_hits"] == 1
+
+
+def test_hot_videos_are_ranked_and_decay(cache) -> None:
+    for _ in range(4):
+        cache.record_hits_sync(["aaaaaaaaaaa", "bbbbbbbbbbb"])
+    cache.record_hits_sync(["aaaaaaaaaaa", "aaaaaaaaaaa"])
+    cache.record_hits_sync(["ccccccccccc"])
+    assert cache.hot_videos_sync(10, 3) == [("aaaaaaaaaaa", 6.0), ("bbbbbbbbbbb", 4.0)]
+
+    cache.decay_sync(0.5)
+    assert cache.hot_videos_sync(10, 0) == [("aaaaaaaaaaa", 3.0), ("bbbbbbbbbbb", 2.0)]
+
+
+def test_search_is_answered_from_bundles_only_when_they_cover_it(cache) -> None:
+    asyncio.run(cache.set_bundle(bundle("aaaaaaaaaaa")))
+    assert asyncio.run(cache.get_bundles(["aaaaaaaaaaa", "bbbbbbbbbbb"])) is None
+
+    asyncio.run(cache.set_bundle(bundle("bbbbbbbbbbb", questions=3)))
+    bundles = asyncio.run(cache.get_bundles(["aaaaaaaaaaa", "bbbbbbbbbbb"], "english"))
+    questions = cache.quiz_from_bundles(bundles, "mcq", "medium", "10")
+    assert len(questions) == 10
+    assert sum(q["question"].startswith("bbbbbbbbbbb") for q in questions) == 3
+    assert cache.quiz_from_bundles(bundles, "mcq", "medium", "14") is None
+    assert cache.quiz_from_bundles(bundles, "true_false", "medium", "5") is None
+
+    assert asyncio.run(cache.summary_from_bundles(bundles[:1], "400")) == "Summary of aaaaaaaaaaa"
+    assert asyncio.run(cache.summary_from_bundles(bundles, "250")) is None
+    assert cache.content_from_bundles(bundles)[1] == {"channel": "bbbbbbbbbbb", "content": "Transcript of bbbbbbbbbbb"}
+
+
+def test_multi_video_summary_keeps_the_requested_word_budget(cache, monkeypatch) -> None:
+    generate_quizes = pytest.importorskip("app.models.generate_quizes")
+    calls = []
+
+    async def generate_summary(documents, language="English", no_of_words="400", progress_callback=None):
+        calls.append((documents, language, no_of_words))
+        return " ".join(["word"] * int(no_of_words))
+
+    monkeypatch.setattr(generate_quizes, "generate_summary", generate_summary)
+    bundles = [{**bundle(video_id), "summaries": {"400": "key point " * 200}}
+               for video_id in ("aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc", "ddddddddddd", "eeeeeeeeeee")]
+
+    summary = asyncio.run(cache.summary_from_bundles(bundles, "400", "Hindi"))
+    assert len(summary.split()) == 400
+    # One reduce call over the five precomputed summaries, not five summaries joined
+    [(sections, language, no_of_words)] = calls
+    assert sections.count("key point") == 5 * 200 and (language, no_of_words) == ("Hindi", "400")
+
+
+def test_job_builds_missing_bundles_for_hot_videos(cache, monkeypatch) -> None:
+    monkeypatch.setattr(module, "YOUTUBE_HOT_MIN_HITS", 3)
+    for _ in range(3):
+        cache.record_hits_sync(["aaaaaaaaaaa", "bbbbbbbbbbb", "ddddddddddd"])
+    cache.record_hits_sync(["ccccccccccc"])
+    asyncio.run(cache.set_bundle({**bundle("aaaaaaaaaaa"), "generated_at": module.time.time()}))
+    built = []
+
+    async def build_bundle(video_id, language="English"):
+        built.append(video_id)
+        return None if video_id == "ddddddddddd" else bundle(video_id)
+
+    monkeypatch.setattr(cache, "build_bundle", build_bundle)
+    outcome = asyncio.run(cache.precompute_hot_bundles())
+    assert sorted(built) == ["bbbbbbbbbbb", "ddddddddddd"]
+    assert outcome == {"hot_videos": 3, "fresh": 1, "built": 1, "skipped": 1}
+    assert cache.hot_videos_sync(10, 0) == [("aaaaaaaaaaa", 1.5), ("bbbbbbbbbbb", 1.5), ("ddddddddddd", 1.5)]
@@ -0,0 +1,87 @@
+import asyncio
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+
+try:
+    from app.services.enhanced_youtube_service import EnhancedYouTubeService  # type: ignore
+except Exception:  # pragma: no cover
+    pytest.skip("YouTube service dependencies not available.", allow_module_level=True)
+
+
+def test_video_info_loads_run_concurrently_on_the_shared_pool(monkeypatch) -> None:
+    threads = set()
+
+    class FakeLoaderDL:
+        def __init__(self, url, with_info):
+            self.url, self.with_info = url, with_info
+
+        @classmethod
+        def from_youtube_url(cls, url, add_video_info=False):
+            return cls(url, add_video_info)
+
+        def load(self):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.2)
+            if "broken" in self.url and self.with_info:
+                raise RuntimeError("video info unavailable")
+            if "private" in self.url:
+                return []
+            return [types.SimpleNamespace(page_content="", metadata={"source": self.url[-11:]})]
+
+    module = types.ModuleType("langchain_yt_dlp.youtube_loader")
+    module.YoutubeLoaderDL = FakeLoaderDL
+    monkeypatch.setitem(sys.modules, "langchain_yt_dlp", types.ModuleType("langchain_yt_dlp"))
+    monkeypatch.setitem(sys.modules, "langchain_yt_dlp.youtube_loader", module)
+
+    service = EnhancedYouTubeService(thread_workers=16)
+    urls = [f"https://www.youtube.com/watch?v=video{index:06d}" for index in range(8)]
+    urls += ["https://www.youtube.com/watch?v=broken00001", "https://www.youtube.com/watch?v=private0001"]
+
+    async def scenario():
+        try:
+            return await service.load_video_metadata(urls)
+        finally:
+            await service.close()
+
+    started = time.monotonic()
+    loaded = asyncio.run(scenario())
+    # Ten 0.2s loads (plus one retry) instead of ~2.2s one after another
+    assert time.monotonic() - started < 1.0
+    assert [group[0].metadata["source"] for group in loaded[:9]] == [url[-11:] for url in urls[:9]]
+    assert loaded[9] is None
+    assert all(name.startswith("youtube") for name in threads)
+    stats = service.stats()
+    assert stats["metadata_loads"] == 10 and stats["metadata_failures"] == 1
+    assert stats["blocking_calls"] == 11 and stats["blocking_in_flight"] == 0
+
+
+def test_groq_client_is_created_once(monkeypatch) -> None:
+    from app.services import enhanced_youtube_service as module  # type: ignore
+
+    created = []
+    monkeypatch.setattr(module, "Groq", lambda api_key=None: created.append(api_key) or object())
+    service = EnhancedYouTubeService()
+    assert not created
+    assert service.groq_client is service.groq_client
+    assert len(created) == 1
+
+
+def test_task_session_is_closed_before_its_loop_ends() -> None:
+    service = EnhancedYouTubeService()
+
+    async def task():
+        async with service.task_session():
+            session = await service.get_session()
+            assert await service.get_session() is session
+        return session
+
+    # Like consecutive Celery tasks, each on its own event loop
+    sessions = [asyncio.run(task()) for _ in range(2)]
+    assert sessions[0] is not sessions[1]
+    assert all(session.closed for session in sessions)
+    assert service.stats()["sessions_closed"] == 2